@@ -0,0 +1,303 @@
+"""
+Hot path microbenchmarks
+
+Times the per-message and per-order functions on a fixed corpus (the
+formats in discord-bot/YOUR_FORMAT.md and TEST_SIGNALS.md):
+
+1. parse      - SignalParser.parse on each signal format, on chatter and on
+                signals that fail validation
+2. sign       - BloFinAuth.get_headers for a GET with query and an order POST
+3. sizing     - BloFinClient.round_size_to_lot and calculate_position_size
+                (instrument specs and balance preloaded, no network)
+4. codec      - TradeSignal.to_dict / to_wire / from_dict
+
+Each case reports ops/sec (best of --rounds) and the bytes allocated per
+call (tracemalloc peak). Speed is compared as a score: ops/sec divided by
+the ops/sec of a fixed reference workload timed alongside the case, so a
+slower or busier machine doesn't read as a regression. With a baseline file,
+a case fails when its score drops, or its allocations grow, by more than
+--threshold percent.
+
+Usage:
+    python benchmarks/bench_micro.py [--rounds 7] [--min-time 0.2]
+        [--baseline benchmarks/micro_baseline.json] [--save-baseline]
+        [--threshold 25] [--only parse]
+
+Record a baseline on the reference commit with --save-baseline, then run
+without it to compare. Exits with status 1 on a regression or if the corpus
+doesn't parse as expected.
+"""
+import argparse
+import gc
+import json
+import logging
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / 'discord-bot'))
+sys.path.append(str(ROOT / 'trading-server'))
+
+from parser import SignalParser
+from blofin_auth import BloFinAuth
+from blofin_client import BloFinClient
+from shared.models import TradeSignal
+
+DEFAULT_BASELINE = Path(__file__).parent / 'micro_baseline.json'
+
+TIA_ALERT = """**TRADING SIGNAL ALERT**
+
+**📝PAIR:** TIA/USDT __(LOW RISK)__🟢
+
+**TYPE:** __SWING 🚀__
+**SIZE: 1-4%**
+**SIDE:** __SHORT📉__
+
+**📍ENTRY:** `0.566409`
+**✖️SL:** `0.578367`
+
+**💰TAKE PROFIT TARGETS:**
+**TP1:** `0.560457`
+**TP2:** `0.55628`
+**TP3:** `0.531816`
+
+**⚖️LEVERAGE:** 16x"""
+
+BTC_ALERT = """**TRADING SIGNAL ALERT**
+**📝PAIR:** BTC/USDT
+**SIDE:** __LONG📈__
+**📍ENTRY:** `60000`
+**✖️SL:** `58000`
+**TP1:** `65000`"""
+
+# case -> (messages, expect a signal)
+PARSE_CORPUS = {
+    'alert': ([TIA_ALERT, BTC_ALERT], True),
+    'standard': (["🚨 LONG BTC-USDT Entry: 60000 SL: 58000 TP: 65000 Size: 0.01",
+                  "SHORT ETH-USDT Entry: 3500 SL: 3600 TP: 3200 Size: 0.05",
+                  "BUY BTC-USDT Entry: 50000 SL: 48000 TP: 55000",
+                  "SELL SOL-USDT Entry: 100 SL: 105 TP: 90"], True),
+    'compact': (["LONG BTCUSDT 60000/58000/65000",
+                 "SHORT ETHUSDT 3500/3600/3200"], True),
+    'emoji': (["📈 BTC-USDT 💰 60000 🛑 58000 🎯 65000",
+               "📉 ETH-USDT 💰 3500 🛑 3600 🎯 3200"], True),
+    'indicators': (["🚨 SIGNAL 🚨\nLONG BTC-USDT Entry: 60000 SL: 58000 TP: 65000",
+                    "💎 TRADE ALERT 💎\nSHORT ETH-USDT Entry: 3500 SL: 3600 TP: 3200 Size: 0.1"], True),
+    'chatter': (["anyone taking the BTC long? entry looks good, SL below the range",
+                 "gm everyone, markets are quiet today",
+                 "!test This is just a random message"], False),
+    'invalid': (["LONG Entry: 60000 SL: 58000",
+                 "BTC-USDT Entry: 60000 SL: 58000",
+                 "LONG BTC-USDT Entry: 60000 SL: 62000 TP: 65000",
+                 "SHORT ETH-USDT Entry: 3500 SL: 3600 TP: 3600"], False),
+}
+
+INSTRUMENTS = {
+    'BTC-USDT': {'minSize': 0.1, 'lotSize': 0.1, 'tickSize': 0.1, 'contractValue': 0.001, 'instId': 'BTC-USDT'},
+    'SEI-USDT': {'minSize': 1.0, 'lotSize': 1.0, 'tickSize': 0.0001, 'contractValue': 10.0, 'instId': 'SEI-USDT'},
+    '1000BONK-USDT': {'minSize': 1.0, 'lotSize': 1.0, 'tickSize': 0.000001, 'contractValue': 1000.0,
+                      'instId': '1000BONK-USDT'},
+}
+BALANCE = {'details': [{'equity': '10250.50', 'available': '8120.25'}]}
+ORDER = {"instId": "BTC-USDT", "marginMode": "cross", "positionSide": "net", "side": "buy",
+         "orderType": "market", "size": "1.5"}
+
+
+def offline_client():
+    """BloFinClient with instrument specs and balance preloaded."""
+    client = BloFinClient("bench-key", "bench-secret", "bench-passphrase", base_url="http://127.0.0.1:9")
+    client._instrument_cache.update(INSTRUMENTS)
+    client.get_account_balance = lambda: BALANCE
+    return client
+
+
+def build_cases():
+    """name -> (function, inputs); one op is one call on one input."""
+    cases = {}
+    parser = SignalParser()
+    for name, (messages, _) in PARSE_CORPUS.items():
+        cases[f'parse.{name}'] = (parser.parse, [(m,) for m in messages])
+
+    auth = BloFinAuth("bench-key", "bench-secret", "bench-passphrase")
+    cases['sign.get'] = (auth.get_headers, [("GET", "/api/v1/copytrading/trade/orders-tpsl-pending", None,
+                                             {"instId": "BTC-USDT"})])
+    cases['sign.post'] = (auth.get_headers, [("POST", "/api/v1/copytrading/trade/place-order", ORDER)])
+
+    client = offline_client()
+    cases['sizing.round_size_to_lot'] = (client.round_size_to_lot, [("BTC-USDT", 1.2345), ("SEI-USDT", 813.6),
+                                                                    ("1000BONK-USDT", 0.4), ("BTC-USDT", -0.5)])
+    cases['sizing.calculate_position_size'] = (client.calculate_position_size,
+                                               [("BTC-USDT", 60000, 58000, 1.0, 10),
+                                                ("SEI-USDT", 0.45, 0.43, 1.0, 10),
+                                                ("1000BONK-USDT", 0.02, 0.0185, 1.0, 10)])
+
+    signal = parser.parse(TIA_ALERT, message_id='1451667836417347728')
+    full, wire = signal.to_dict(), signal.to_wire()
+    cases['codec.to_dict'] = (TradeSignal.to_dict, [(signal,)])
+    cases['codec.to_wire'] = (TradeSignal.to_wire, [(signal,)])
+    cases['codec.from_dict'] = (TradeSignal.from_dict, [(full,)])
+    cases['codec.from_dict_wire'] = (TradeSignal.from_dict, [(wire,)])
+    return cases
+
+
+def check_corpus():
+    """Every message parses (or doesn't) as expected; returns the mismatches."""
+    parser = SignalParser()
+    return [(name, message) for name, (messages, expect_signal) in PARSE_CORPUS.items()
+            for message in messages if (parser.parse(message) is not None) != expect_signal]
+
+
+def calibrate(func, inputs, min_time):
+    """Passes over the inputs that take about min_time."""
+    passes = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(passes):
+            for args in inputs:
+                func(*args)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time / 4:
+            break
+        passes *= 2
+    return max(1, int(passes * min_time / max(elapsed, 1e-9)))
+
+
+def timed_rate(func, inputs, passes):
+    """Calls per second over one round."""
+    start = time.perf_counter()
+    for _ in range(passes):
+        for args in inputs:
+            func(*args)
+    return passes * len(inputs) / (time.perf_counter() - start)
+
+
+def measure(func, inputs, rounds, min_time):
+    """
+    (best ops/sec, score) with GC off, like timeit.
+
+    Each round times the reference workload and then the case back to back;
+    the score is the median of the per-round ratios, so load that comes and
+    goes between rounds cancels out.
+    """
+    passes = calibrate(func, inputs, min_time)
+    reference_passes = calibrate(reference_work, [()], min_time)
+    rates, ratios = [], []
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            reference = timed_rate(reference_work, [()], reference_passes)
+            rate = timed_rate(func, inputs, passes)
+            rates.append(rate)
+            ratios.append(rate / reference)
+    finally:
+        gc.enable()
+    return max(rates), statistics.median(ratios)
+
+
+def reference_work(text="LONG BTC-USDT Entry: 60000 SL: 58000 TP: 65000"):
+    """Fixed pure-Python workload used to normalize for machine speed."""
+    return {word: len(word) for word in text.split()}
+
+
+def bytes_per_call(func, inputs, repeat=20):
+    """Mean tracemalloc peak per call, in bytes (after a warm-up call)."""
+    for args in inputs:
+        func(*args)
+    total = 0
+    tracemalloc.start()
+    try:
+        for _ in range(repeat):
+            for args in inputs:
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                func(*args)
+                total += tracemalloc.get_traced_memory()[1] - before
+    finally:
+        tracemalloc.stop()
+    return total / (repeat * len(inputs))
+
+
+def compare(result, baseline, threshold):
+    """Regression messages for one case against its baseline entry."""
+    problems = []
+    if result['score'] < baseline['score'] * (1 - threshold / 100):
+        problems.append(f"score {baseline['score']:.4f} -> {result['score']:.4f}")
+    # Ignore growth within 64 bytes: tracemalloc peaks move a little between runs
+    if result['bytes_per_call'] > max(baseline['bytes_per_call'] * (1 + threshold / 100),
+                                      baseline['bytes_per_call'] + 64):
+        problems.append(f"bytes/call {baseline['bytes_per_call']:,.0f} -> {result['bytes_per_call']:,.0f}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--rounds', type=int, default=7, help='Best-of rounds per case')
+    parser.add_argument('--min-time', type=float, default=0.2, help='Seconds per round')
+    parser.add_argument('--baseline', default=str(DEFAULT_BASELINE), help='Baseline JSON file')
+    parser.add_argument('--save-baseline', action='store_true', help='Write this run as the baseline')
+    parser.add_argument('--threshold', type=float, default=25, help='Allowed regression in percent')
+    parser.add_argument('--only', help='Only run cases whose name starts with this prefix')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    mismatches = check_corpus()
+    for name, message in mismatches:
+        print(f"❌ parse.{name}: unexpected result for {message[:60]!r}")
+
+    baseline = {}
+    baseline_path = Path(args.baseline)
+    if not args.save_baseline and baseline_path.exists():
+        with open(baseline_path) as f:
+            baseline = json.load(f)['cases']
+
+    print(f"Microbenchmarks ({args.rounds} rounds, threshold {args.threshold:g}%"
+          f"{', baseline ' + baseline_path.name if baseline else ', no baseline'})")
+    print("-" * 78)
+    print(f"  {'case':<34} {'ops/sec':>12} {'B/call':>10}  {'vs baseline':<16}")
+
+    results = {}
+    regressions = []
+    for name, (func, inputs) in build_cases().items():
+        if args.only and not name.startswith(args.only):
+            continue
+        ops, score = measure(func, inputs, args.rounds, args.min_time)
+        result = {
+            'ops_per_sec': round(ops, 1),
+            'score': round(score, 6),
+            'bytes_per_call': round(bytes_per_call(func, inputs), 1)
+        }
+        results[name] = result
+
+        change = ""
+        if name in baseline:
+            change = f"{100 * (result['score'] / baseline[name]['score'] - 1):+.1f}%"
+            problems = compare(result, baseline[name], args.threshold)
+            if problems:
+                regressions.append((name, problems))
+                change += " ❌"
+        print(f"  {name:<34} {result['ops_per_sec']:>12,.0f} {result['bytes_per_call']:>10,.0f}  {change:<16}")
+
+    if args.save_baseline:
+        with open(baseline_path, 'w') as f:
+            json.dump({'python': platform.python_version(), 'machine': platform.machine(),
+                       'cases': results}, f, indent=2)
+        print(f"\nBaseline written to {baseline_path}")
+
+    for name, problems in regressions:
+        print(f"\n  {name} regressed: {'; '.join(problems)}")
+
+    if mismatches or regressions:
+        print("\n❌ FAILED")
+        return 1
+    print("\n✅ PASSED")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Model codec benchmark
+
+Compares the generated codec in shared/codec.py with what the models
+used before:
+
+1. encode  - dataclasses.asdict vs generated to_dict / to_wire
+2. decode  - unchecked cls(**data) vs type-checked from_dict
+3. size    - JSON bytes of the full form vs the lean wire form
+
+The signal is a real labelled alert, raw_message included, as parsed by
+the bot.
+
+Usage:
+    python benchmarks/bench_models.py [--iterations 100000] [--rounds 5]
+
+Exits with status 1 if the codec round trip doesn't reproduce the signal.
+"""
+import argparse
+import dataclasses
+import json
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent))
+sys.path.append(str(Path(__file__).parent.parent / 'discord-bot'))
+
+from parser import SignalParser
+from shared.models import TradeSignal
+from bench_tokenizer import SEI_SIGNAL
+
+
+def best_of(func, arg, iterations, rounds):
+    """Best mean time per call in µs."""
+    best = float('inf')
+    for _ in range(rounds):
+        start = time.perf_counter()
+        for _ in range(iterations):
+            func(arg)
+        best = min(best, (time.perf_counter() - start) / iterations)
+    return best * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--iterations', type=int, default=100000, help='Calls per round')
+    parser.add_argument('--rounds', type=int, default=5, help='Best-of rounds')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    signal = SignalParser().parse(SEI_SIGNAL, message_id='1451667836417347728')
+    full = dataclasses.asdict(signal)
+    wire = signal.to_wire()
+
+    round_trip_ok = (TradeSignal.from_dict(signal.to_dict()) == signal
+                     and TradeSignal.from_dict(wire) == dataclasses.replace(signal, raw_message=None))
+
+    def unchecked(data):
+        return TradeSignal(**data)
+
+    rows = [
+        ('encode', 'asdict', best_of(dataclasses.asdict, signal, args.iterations, args.rounds)),
+        ('encode', 'to_dict', best_of(TradeSignal.to_dict, signal, args.iterations, args.rounds)),
+        ('encode', 'to_wire', best_of(TradeSignal.to_wire, signal, args.iterations, args.rounds)),
+        ('decode', 'cls(**data)', best_of(unchecked, full, args.iterations, args.rounds)),
+        ('decode', 'from_dict', best_of(TradeSignal.from_dict, full, args.iterations, args.rounds)),
+        ('decode', 'from_dict (wire)', best_of(TradeSignal.from_dict, wire, args.iterations, args.rounds)),
+    ]
+
+    print(f"TradeSignal codec ({args.iterations:,} calls, best of {args.rounds})")
+    print("-" * 60)
+    for op, name, us in rows:
+        print(f"  {op:<7} {name:<18} {us:>7.2f} µs")
+
+    full_bytes = len(json.dumps(full).encode())
+    wire_bytes = len(json.dumps(wire).encode())
+    print(f"\n  JSON size: full {full_bytes} B, wire {wire_bytes} B "
+          f"({100 * (1 - wire_bytes / full_bytes):.0f}% smaller)")
+    print(f"  Round trip: {'identical' if round_trip_ok else 'DIFFERS'}")
+
+    if not round_trip_ok:
+        print("\n❌ FAILED")
+        return 1
+    print("\n✅ PASSED")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,149 @@
+"""
+Pattern registry benchmark
+
+Measures mean SignalParser.parse time on a message mix with three pattern
+setups:
+
+1. fixed      - every pattern in registration order, no pre-checks (the old
+                PATTERNS loop)
+2. prechecks  - pre-checks rule patterns out, order stays fixed
+3. adaptive   - pre-checks plus hit-frequency ordering (the default)
+
+All three must produce exactly the same result for every message.
+
+The default mix is synthetic: mostly labelled alerts, some one-line
+signals and chat that gets past the pre-filter. Pass a JSONL export
+(the backfill.py input format) to measure a real channel instead.
+
+Usage:
+    python benchmarks/bench_patterns.py [--input export.jsonl] [--rounds 5]
+
+Exits with status 1 if results differ or the default setup is slower
+than the fixed one (beyond --tolerance).
+"""
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / 'discord-bot'))
+
+from parser import SignalParser
+from pattern_registry import PatternRegistry
+from bench_tokenizer import SEI_SIGNAL, FIL_SIGNAL, BONK_SIGNAL
+
+# (message, weight)
+DEFAULT_MIX = [
+    (SEI_SIGNAL, 30),
+    (FIL_SIGNAL, 20),
+    (BONK_SIGNAL, 10),
+    ("🚨 LONG BTC-USDT Entry: 60000 SL: 58000 TP: 65000 Size: 0.01", 15),
+    ("SHORT ETH-USDT 3500/3600/3200", 5),
+    ("📈 BTC-USDT 💰 60000 🛑 58000 🎯 65000", 5),
+    ("ETH/USDT broke 3500, 3600 next? SL for me was 3400", 10),
+    ("Closed BTC-USDT at 61000 from 60000, TP hit 🟢", 5),
+]
+
+
+def build_mix(size, seed=42):
+    """Weighted random sample of DEFAULT_MIX."""
+    rng = random.Random(seed)
+    messages, weights = zip(*DEFAULT_MIX)
+    return rng.choices(messages, weights=weights, k=size)
+
+
+def load_mix(path):
+    """Message texts from a JSONL export."""
+    messages = []
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            messages.append(record.get('content') or record.get('message') or '')
+    return messages
+
+
+def make_parser(prechecks, adaptive):
+    """SignalParser whose registry has the given features."""
+    registry = PatternRegistry(reorder_interval=256 if adaptive else 0)
+    for entry in SignalParser.default_registry().patterns:
+        registry.register(entry.name, entry.extract, entry.precheck if prechecks else None)
+    return SignalParser(registry=registry)
+
+
+def run(parser, messages):
+    """Parse every message; returns (seconds, outcomes)."""
+    results = []
+    start = time.perf_counter()
+    for message in messages:
+        results.append(parser.parse_detailed(message))
+    elapsed = time.perf_counter() - start
+
+    outcomes = []
+    for signal, outcome in results:
+        fields = signal.to_dict() if signal else None
+        if fields:
+            fields.pop('timestamp')  # Parse time, differs between runs
+        outcomes.append((outcome, fields))
+    return elapsed, outcomes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--input', help='JSONL export to use as the message mix')
+    parser.add_argument('--messages', type=int, default=20000, help='Synthetic mix size')
+    parser.add_argument('--rounds', type=int, default=5, help='Best-of rounds per setup')
+    parser.add_argument('--tolerance', type=float, default=0.05,
+                        help='Allowed slowdown vs fixed before failing (timing noise)')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    messages = load_mix(args.input) if args.input else build_mix(args.messages)
+    print(f"Message mix: {len(messages):,} messages ({'from ' + args.input if args.input else 'synthetic'})")
+    print("-" * 60)
+
+    setups = [
+        ('fixed', False, False),
+        ('prechecks', True, False),
+        ('adaptive', True, True),
+    ]
+    # Rounds are interleaved so machine noise hits every setup alike
+    timings = {name: float('inf') for name, _, _ in setups}
+    orders = {}
+    reference = None
+    identical = True
+    for _ in range(args.rounds):
+        for name, prechecks, adaptive in setups:
+            p = make_parser(prechecks, adaptive)
+            seconds, outcomes = run(p, messages)
+            timings[name] = min(timings[name], seconds)
+            orders[name] = ', '.join(p.registry.get_stats()['order'])
+            if reference is None:
+                reference = outcomes
+            elif outcomes != reference:
+                identical = False
+
+    for name, _, _ in setups:
+        print(f"  {name:<10} {timings[name] / len(messages) * 1e6:>8.2f} µs/msg   order: {orders[name]}")
+
+    speedup = timings['fixed'] / timings['adaptive']
+    print(f"\n  adaptive vs fixed: {speedup:.2f}x, results {'identical' if identical else 'DIFFER'}")
+
+    if not identical or speedup < 1.0 - args.tolerance:
+        print("\n❌ FAILED")
+        return 1
+    print("\n✅ PASSED")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,332 @@
+"""
+Trade pipeline benchmark
+
+Fires bursts of signals at /api/v1/trade of an in-process trading server,
+backed by the exchange simulator (with a configurable round trip time) and
+a stub Discord webhook, and reports latency percentiles per stage:
+
+1. parse -> ack         raw message parsed by the bot parser until the
+                        server claims the signal
+2. ack -> order         until the exchange acknowledged the market order
+3. order -> protected   until the TP/SL pair is confirmed
+4. notification         TP/SL confirmed until the Discord webhook returned
+5. end to end           parse until the bot has the server's response
+
+Signals are sent with the bot's TradingServerClient (REST). Each burst
+size runs twice: every signal on the same symbol, and spread over all
+simulator symbols. The exchange is reset between scenarios.
+
+Usage:
+    python benchmarks/bench_pipeline.py [--bursts 1,10,100] [--rtt-ms 50]
+        [--jitter-ms 10] [--settle-delay 1.5] [--output pipeline.json]
+        [--compare previous.json]
+
+Results are written as JSON (with the git commit) so runs can be compared.
+Exits with status 1 if any signal isn't executed and protected.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime
+from pathlib import Path
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+sys.path.append(str(ROOT / 'discord-bot'))
+sys.path.append(str(ROOT / 'trading-server'))
+sys.path.append(str(ROOT / 'exchange-simulator'))
+
+STAGES = ['parse_to_ack', 'ack_to_order', 'order_to_protected', 'notification', 'end_to_end']
+SIM_KEY, SIM_SECRET, SIM_PASSPHRASE = "sim-key", "sim-secret", "sim-passphrase"
+SERVER_API_KEY = "bench-key"
+
+
+def percentile(values, pct):
+    """Linear-interpolated percentile of a non-empty list."""
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def summarize(values):
+    """Percentiles in ms."""
+    if not values:
+        return None
+    ms = [v * 1000 for v in values]
+    return {
+        'count': len(ms),
+        'p50': round(percentile(ms, 50), 2),
+        'p95': round(percentile(ms, 95), 2),
+        'p99': round(percentile(ms, 99), 2),
+        'mean': round(sum(ms) / len(ms), 2),
+        'max': round(max(ms), 2)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class StageProbe:
+    """
+    Records per-signal stage timestamps (time.perf_counter) by wrapping the
+    server's dedupe claim, per-account execution, BloFin calls and Discord
+    notification.
+    """
+
+    def __init__(self, server, client_class):
+        self.times = defaultdict(dict)
+        self._local = threading.local()
+        self._wrap_claim(server)
+        self._wrap_execution(server)
+        self._wrap_client(client_class)
+        self._wrap_notification(server)
+
+    def _mark(self, signal_id, stage):
+        if signal_id and stage not in self.times[signal_id]:
+            self.times[signal_id][stage] = time.perf_counter()
+
+    def _wrap_claim(self, server):
+        store = server.state_store
+        claim = store.claim_signal
+
+        def claim_signal(signal_id, payload):
+            self._mark(signal_id, 'ack')
+            return claim(signal_id, payload)
+        store.claim_signal = claim_signal
+
+    def _wrap_execution(self, server):
+        execute = server.execute_on_account
+
+        def execute_on_account(account, trade_signal):
+            self._local.signal_id = trade_signal.signal_id
+            try:
+                return execute(account, trade_signal)
+            finally:
+                self._local.signal_id = None
+        server.execute_on_account = execute_on_account
+
+    def _wrap_client(self, client_class):
+        # get_pending_tpsl confirms the TP/SL after a 200108 duplicate error
+        for method, stage in (('place_market_order', 'order'), ('set_tpsl_pair', 'protected'),
+                              ('get_pending_tpsl', 'protected')):
+            original = getattr(client_class, method)
+
+            def wrapped(client, *args, _original=original, _stage=stage, **kwargs):
+                result = _original(client, *args, **kwargs)
+                self._mark(getattr(self._local, 'signal_id', None), _stage)
+                return result
+            setattr(client_class, method, wrapped)
+
+    def _wrap_notification(self, server):
+        notify = server.send_discord_notification
+
+        def send_discord_notification(*args, **kwargs):
+            notify(*args, **kwargs)
+            if not kwargs.get('error_message'):
+                self._mark(getattr(self._local, 'signal_id', None), 'notified')
+        server.send_discord_notification = send_discord_notification
+
+
+def start_stack(args, workdir):
+    """Simulator, stub webhook and trading server, all in this process."""
+    from fastapi import FastAPI
+    from simulator import create_app, serve_in_thread, FaultRule
+
+    sim_app = create_app()
+    sim_url = serve_in_thread(sim_app)
+    if args.rtt_ms or args.jitter_ms:
+        sim_app.state.faults.add(FaultRule(latency_ms=args.rtt_ms, jitter_ms=args.jitter_ms))
+
+    webhook = FastAPI()
+    webhook.state.received = 0
+
+    @webhook.post("/webhook", status_code=204)
+    async def receive():
+        webhook.state.received += 1
+    webhook_url = serve_in_thread(webhook)
+
+    # The server reads its configuration at import
+    os.environ.update({
+        'API_KEY': SERVER_API_KEY,
+        'BLOFIN_BASE_URL': sim_url,
+        'BLOFIN_API_KEY': SIM_KEY,
+        'BLOFIN_SECRET_KEY': SIM_SECRET,
+        'BLOFIN_PASSPHRASE': SIM_PASSPHRASE,
+        'DISCORD_NOTIFICATION_WEBHOOK': f"{webhook_url}/webhook",
+        'STATE_DB_PATH': os.path.join(workdir, 'state.db'),
+        'LOG_FILE': os.path.join(workdir, 'trading_server.log'),
+        'LOG_LEVEL': 'WARNING',
+        'POSITION_SETTLE_DELAY': str(args.settle_delay),
+        'RISK_PER_TRADE_PERCENT': '0.1',
+        'MAX_ORDERS_PER_MINUTE': '1000000'
+    })
+    for name in ('BLOFIN_ACCOUNTS', 'BLOFIN_RECORD_CASSETTE', 'BLOFIN_REPLAY_CASSETTE'):
+        os.environ.pop(name, None)
+
+    import server
+    from blofin_client import BloFinClient
+    server_url = serve_in_thread(server.app)
+    logging.getLogger().setLevel(logging.WARNING)
+    probe = StageProbe(server, BloFinClient)
+    return sim_app, server_url, probe
+
+
+def signal_texts(scenario_id, burst, symbols, prices):
+    """Raw Discord messages: 10% stop, TP at +20%."""
+    texts = []
+    for i in range(burst):
+        symbol = symbols[i % len(symbols)]
+        entry = prices[symbol]
+        texts.append((f"{scenario_id}{i:04d}",
+                      f"🚨 LONG {symbol} Entry: {entry:g} SL: {entry * 0.9:g} TP: {entry * 1.2:g}"))
+    return texts
+
+
+async def run_burst(server_url, texts):
+    """Parse and send every message concurrently; returns {signal_id: (parse_start, response_at, response)}."""
+    from parser import SignalParser
+    from trading_client import TradingServerClient
+
+    parser = SignalParser()
+    client = TradingServerClient(server_url, SERVER_API_KEY, timeout=300, max_retries=1, deadline=600)
+
+    async def one(message_id, text):
+        start = time.perf_counter()
+        signal = parser.parse(text, message_id=message_id)
+        if not signal:
+            return message_id, (start, time.perf_counter(), None)
+        response = await client.send_signal(signal)
+        return signal.signal_id, (start, time.perf_counter(), response)
+
+    try:
+        return dict(await asyncio.gather(*(one(message_id, text) for message_id, text in texts)))
+    finally:
+        await client.close()
+
+
+def run_scenario(name, burst, mixed, server_url, sim_app, probe):
+    sim_app.state.exchange.reset()
+    prices = dict(sim_app.state.exchange.market.prices)
+    symbols = [s for s in sorted(prices) if s[0].isalpha()] if mixed else ['BTC-USDT']  # Parser needs a letter first
+    texts = signal_texts(f"{int(time.time() * 1000)}{int(mixed)}{burst}", burst, symbols, prices)
+
+    wall_start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):  # BloFinClient prints every POST
+        sent = asyncio.run(run_burst(server_url, texts))
+    wall = time.perf_counter() - wall_start
+
+    samples = defaultdict(list)
+    executed = 0
+    for signal_id, (start, done, response) in sent.items():
+        marks = probe.times.get(signal_id, {})
+        ok = response is not None and response.success and 'protected' in marks
+        executed += ok
+        samples['end_to_end'].append(done - start)
+        for stage, begin, end in (('parse_to_ack', start, marks.get('ack')),
+                                  ('ack_to_order', marks.get('ack'), marks.get('order')),
+                                  ('order_to_protected', marks.get('order'), marks.get('protected')),
+                                  ('notification', marks.get('protected'), marks.get('notified'))):
+            if begin is not None and end is not None:
+                samples[stage].append(end - begin)
+
+    return {
+        'name': name,
+        'burst': burst,
+        'symbols': 'mixed' if mixed else 'same',
+        'signals': len(sent),
+        'executed': executed,
+        'wall_seconds': round(wall, 3),
+        'signals_per_second': round(len(sent) / wall, 2),
+        'stages': {stage: summarize(samples[stage]) for stage in STAGES}
+    }
+
+
+def print_scenario(result, previous=None):
+    print(f"\n{result['name']}: {result['executed']}/{result['signals']} executed in "
+          f"{result['wall_seconds']:.2f}s ({result['signals_per_second']:.2f} signals/s)")
+    print(f"  {'stage':<20} {'p50':>10} {'p95':>10} {'p99':>10}   (ms)")
+    for stage in STAGES:
+        stats = result['stages'][stage]
+        if not stats:
+            print(f"  {stage:<20} {'-':>10}")
+            continue
+        line = f"  {stage:<20} {stats['p50']:>10.1f} {stats['p95']:>10.1f} {stats['p99']:>10.1f}"
+        before = ((previous or {}).get('stages') or {}).get(stage)
+        if before and before['p50']:
+            line += f"   p50 {100 * (stats['p50'] - before['p50']) / before['p50']:+.0f}% vs baseline"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--bursts', default='1,10,100', help='Comma-separated concurrent signal counts')
+    parser.add_argument('--rtt-ms', type=float, default=50, help='Simulated exchange round trip time')
+    parser.add_argument('--jitter-ms', type=float, default=10, help='Uniform extra RTT 0..jitter')
+    parser.add_argument('--settle-delay', type=float, default=1.5,
+                        help='POSITION_SETTLE_DELAY for the server (seconds)')
+    parser.add_argument('--output', default='pipeline_results.json', help='JSON results file')
+    parser.add_argument('--compare', help='Previous results file to compare p50s with')
+    args = parser.parse_args()
+
+    bursts = [int(b) for b in args.bursts.split(',') if b.strip()]
+    previous = {}
+    if args.compare:
+        with open(args.compare) as f:
+            previous = {s['name']: s for s in json.load(f)['scenarios']}
+
+    workdir = tempfile.mkdtemp(prefix='bench_pipeline_')
+    with contextlib.redirect_stdout(io.StringIO()):
+        sim_app, server_url, probe = start_stack(args, workdir)
+
+    print(f"Trade pipeline (RTT {args.rtt_ms:g}±{args.jitter_ms:g} ms, settle delay {args.settle_delay:g}s)")
+    print("-" * 70)
+
+    scenarios = []
+    for burst in bursts:
+        for mixed in (False, True):
+            name = f"burst{burst}_{'mixed' if mixed else 'same'}"
+            result = run_scenario(name, burst, mixed, server_url, sim_app, probe)
+            scenarios.append(result)
+            print_scenario(result, previous.get(name))
+
+    report = {
+        'benchmark': 'pipeline',
+        'commit': git_commit(),
+        'timestamp': datetime.utcnow().isoformat(),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'config': {'rtt_ms': args.rtt_ms, 'jitter_ms': args.jitter_ms, 'settle_delay': args.settle_delay,
+                   'bursts': bursts},
+        'scenarios': scenarios
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {args.output}")
+
+    if any(s['executed'] != s['signals'] for s in scenarios):
+        print("\n❌ FAILED")
+        return 1
+    print("\n✅ PASSED")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
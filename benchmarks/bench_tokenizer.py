@@ -0,0 +1,224 @@
+"""
+Signal tokenizer benchmark
+
+Compares the single-pass tokenizer (discord-bot/signal_tokenizer.py) with
+the regex it replaced:
+
+1. Accuracy - both parsers run on a corpus of real signal formats and the
+   tokenizer must get at least as many right.
+2. Worst case - adversarial near-miss messages (every label present except
+   the one that completes the match) of growing size. The tokenizer's time
+   per KB must stay flat; the old regex backtracks and grows super-linearly.
+
+Usage:
+    python benchmarks/bench_tokenizer.py [--max-kb 64]
+
+Exits with status 1 if accuracy regresses or the tokenizer isn't linear.
+"""
+import argparse
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.append(str(Path(__file__).parent.parent / 'discord-bot'))
+
+from signal_tokenizer import scan_signal
+
+# The pattern signal_tokenizer replaced (parser.py 'trading_signal_alert')
+LEGACY_PATTERN = re.compile(
+    r'PAIR[:\s*]+(?P<symbol>[A-Z]+/USDT)(?:\s*#\d+)?.*?'
+    r'SIDE[:\s*]+[_*]*(?P<side>LONG|SHORT)[📈📉_*]*.*?'
+    r'ENTRY[:\s*]+`?(?P<entry>[\d.]+)`?.*?'
+    r'SL[:\s*]+`?(?P<sl>[\d.]+)`?.*?'
+    r'TP1[:\s*]+`?(?P<tp1>[\d.]+)`?(?:.*?TP2[:\s*]+`?(?P<tp2>[\d.]+)`?)?(?:.*?TP3[:\s*]+`?(?P<tp3>[\d.]+)`?)?'
+    r'(?:.*?LEVERAGE[:\s*]+(?P<leverage>\d+)x)?',
+    re.IGNORECASE | re.DOTALL
+)
+
+SEI_SIGNAL = """**TRADING SIGNAL ALERT**
+
+**📝PAIR:** SEI/USDT #1131
+__(MEDIUM RISK)__🟡
+
+**TYPE:** __POSITION__
+**SIZE: 1-4%**
+**SIDE:** __SHORT📉__
+
+**📍ENTRY:** `0.125294`
+**✖️SL:** `0.127698`          (-72.52%)
+
+**💰TAKE PROFIT TARGETS:**
+
+**TP1:** `0.123615`      (46.9%)
+**TP2:** `0.121812`      (97.27%)
+**TP3:** `0.12017`      (148.16%)
+
+**⚖️LEVERAGE:** 35x
+
+**TP1:** 0.65 R:R
+**TP2:** 1.34 R:R
+**TP3:** 2.04 R:R
+
+**⚠️PROTECT YOUR CAPITAL, MANAGE RISK, LETS PRINT!**"""
+
+FIL_SIGNAL = """TRADING SIGNAL ALERT
+
+📝PAIR: FIL/USDT (MEDIUM RISK)🟡
+
+TYPE: SWING 🚀
+SIZE: 1-4%
+SIDE: LONG📈
+
+📍ENTRY: 1.295222
+✖️SL: 1.220152          (-82.72%)
+
+💰TAKE PROFIT TARGETS:
+
+TP1: 1.337893          (46.12%)
+TP2: 1.374898          (86.12%)
+TP3: 1.528733          (254.39%)
+
+⚖️LEVERAGE: 14x"""
+
+BONK_SIGNAL = """**📝PAIR:** 1000BONK/USDT
+**SIDE:** __LONG📈__
+**📍ENTRY:** `0.01234`
+**✖️SL:** `0.01180`
+**TP1:** `0.01300`
+**TP2:** `0.01350`
+**⚖️LEVERAGE:** 20x"""
+
+REORDERED_SIGNAL = """SIDE: SHORT
+PAIR: ETH/USDT
+LEVERAGE: 10x
+ENTRY: 3500
+TP1: 3400
+SL: 3600"""
+
+# (message, expected fields) - expected None means "not a signal"
+CORPUS = [
+    (SEI_SIGNAL, {'symbol': 'SEI-USDT', 'side': 'short', 'entry': 0.125294, 'sl': 0.127698,
+                  'tp1': 0.123615, 'tp2': 0.121812, 'tp3': 0.12017, 'leverage': 35}),
+    (FIL_SIGNAL, {'symbol': 'FIL-USDT', 'side': 'long', 'entry': 1.295222, 'sl': 1.220152,
+                  'tp1': 1.337893, 'tp2': 1.374898, 'tp3': 1.528733, 'leverage': 14}),
+    (SEI_SIGNAL.replace('**', ''), {'symbol': 'SEI-USDT', 'side': 'short', 'entry': 0.125294,
+                                    'sl': 0.127698, 'tp1': 0.123615, 'leverage': 35}),
+    (SEI_SIGNAL.lower(), {'symbol': 'SEI-USDT', 'side': 'short', 'entry': 0.125294,
+                          'sl': 0.127698, 'tp1': 0.123615, 'leverage': 35}),
+    (BONK_SIGNAL, {'symbol': '1000BONK-USDT', 'side': 'long', 'entry': 0.01234, 'sl': 0.0118,
+                   'tp1': 0.013, 'tp2': 0.0135, 'leverage': 20}),
+    (REORDERED_SIGNAL, {'symbol': 'ETH-USDT', 'side': 'short', 'entry': 3500.0, 'sl': 3600.0,
+                        'tp1': 3400.0, 'leverage': 10}),
+    ("PAIR: BTC/USDT SIDE: LONG ENTRY: 60000 SL: 58000 (no targets yet)", None),
+    ("anyone taking the BTC long? entry looks good, SL below the range", None),
+]
+
+
+def legacy_scan(message):
+    """Run the old regex and return its fields (or None)."""
+    match = LEGACY_PATTERN.search(message)
+    if not match:
+        return None
+    data = match.groupdict()
+    return {
+        'symbol': data['symbol'].upper().replace('/', '-'),
+        'side': data['side'].lower(),
+        'entry': float(data['entry']),
+        'sl': float(data['sl']),
+        'tp1': float(data['tp1']),
+        'tp2': float(data['tp2']) if data['tp2'] else None,
+        'tp3': float(data['tp3']) if data['tp3'] else None,
+        'leverage': int(data['leverage']) if data['leverage'] else None,
+    }
+
+
+def is_correct(result, expected):
+    """True if result matches every expected field (or both are None)."""
+    if expected is None or result is None:
+        return expected is None and result is None
+    return all(result.get(key) == value for key, value in expected.items())
+
+
+def adversarial_message(size_kb):
+    """Near-miss message: labels repeat but TP1 never appears."""
+    block = "PAIR: ABC/USDT SIDE: LONG ENTRY: 1.5 SL: 1.2 size 3% notes "
+    return (block * (size_kb * 1024 // len(block) + 1))[:size_kb * 1024]
+
+
+def time_call(func, message, min_time=0.2):
+    """Best-of-3 average seconds per call."""
+    best = float('inf')
+    for _ in range(3):
+        runs = 0
+        start = time.perf_counter()
+        while True:
+            func(message)
+            runs += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time or elapsed > 2.0:
+                break
+        best = min(best, elapsed / runs)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--max-kb', type=int, default=64, help='Largest adversarial message in KB')
+    parser.add_argument('--legacy-budget', type=float, default=2.0,
+                        help='Stop timing the old regex once one call exceeds this many seconds')
+    args = parser.parse_args()
+
+    # Accuracy
+    print("Accuracy")
+    print("-" * 60)
+    tokenizer_ok = legacy_ok = 0
+    for i, (message, expected) in enumerate(CORPUS):
+        t_ok = is_correct(scan_signal(message), expected)
+        l_ok = is_correct(legacy_scan(message), expected)
+        tokenizer_ok += t_ok
+        legacy_ok += l_ok
+        print(f"  case {i + 1}: tokenizer {'✅' if t_ok else '❌'}  legacy {'✅' if l_ok else '❌'}")
+    print(f"  tokenizer {tokenizer_ok}/{len(CORPUS)}, legacy regex {legacy_ok}/{len(CORPUS)}")
+
+    # Worst case
+    print("\nAdversarial near-miss messages (µs per KB)")
+    print("-" * 60)
+    print(f"  {'size':>8} {'tokenizer':>12} {'legacy regex':>14}")
+    sizes = []
+    size = 1
+    while size <= args.max_kb:
+        sizes.append(size)
+        size *= 2
+
+    tokenizer_per_kb = []
+    legacy_done = False
+    for size in sizes:
+        message = adversarial_message(size)
+        t = time_call(scan_signal, message)
+        tokenizer_per_kb.append(t / size)
+
+        if legacy_done:
+            legacy_text = "skipped"
+        else:
+            l = time_call(LEGACY_PATTERN.search, message, min_time=0)
+            legacy_text = f"{l / size * 1e6:,.0f}"
+            if l > args.legacy_budget:
+                legacy_done = True
+        print(f"  {size:>6}KB {t / size * 1e6:>12,.1f} {legacy_text:>14}")
+
+    # Linear: cost per KB at the largest size within 3x of the smallest
+    growth = tokenizer_per_kb[-1] / tokenizer_per_kb[0]
+    linear = growth < 3.0
+    print(f"\n  tokenizer per-KB cost growth {sizes[0]}KB -> {sizes[-1]}KB: {growth:.2f}x "
+          f"({'linear' if linear else 'NOT linear'})")
+
+    if tokenizer_ok < legacy_ok or not linear:
+        print("\n❌ FAILED")
+        return 1
+    print("\n✅ PASSED")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
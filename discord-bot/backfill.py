@@ -0,0 +1,265 @@
+"""
+Backfill Module
+
+Bulk-parses historical Discord messages, e.g. to check a parser change
+against a channel's history or to compute provider statistics.
+
+Messages are streamed from a JSONL export (one message object per line)
+and parsed in chunks across a process pool. Only the local patterns are
+used - the Claude fallback is never called. Results are written as JSONL
+in input order, and per-pattern hit/miss counts and throughput are
+reported at the end.
+
+Usage:
+    python backfill.py export.jsonl -o results.jsonl [--workers 4] [--chunk-size 500]
+
+Each input line needs the message text in "content" (or "message");
+"id" / "message_id", "timestamp" / "created_at" and "author" are copied
+to the output when present.
+"""
+import argparse
+import json
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from itertools import islice
+from typing import Iterable, Iterator, Optional, Dict, Any, List, Tuple
+
+from parser import SignalParser
+
+logger = logging.getLogger(__name__)
+
+# One parser per worker process, created by _init_worker
+_worker_parser: Optional[SignalParser] = None
+
+
+def read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream message records from a JSONL file, skipping malformed lines.
+
+    Args:
+        path: Path to the export ('-' for stdin)
+
+    Yields:
+        Message dicts
+    """
+    f = sys.stdin if path == '-' else open(path, 'r', encoding='utf-8')
+    try:
+        for line_no, line in enumerate(f, 1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError:
+                logger.warning(f"Skipping malformed line {line_no}")
+    finally:
+        if f is not sys.stdin:
+            f.close()
+
+
+def parse_record(parser: SignalParser, record: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Parse one exported message.
+
+    Args:
+        parser: SignalParser (without an LLM fallback)
+        record: Exported message
+
+    Returns:
+        Result dict with id, timestamp, author, outcome and signal (or None)
+    """
+    message_id = record.get('id', record.get('message_id'))
+    message_id = str(message_id) if message_id is not None else None
+    timestamp = record.get('timestamp') or record.get('created_at')
+    author = record.get('author')
+    if isinstance(author, dict):
+        author = author.get('name') or author.get('id')
+
+    result = {
+        'id': message_id,
+        'timestamp': timestamp,
+        'author': author,
+        'outcome': None,
+        'signal': None
+    }
+
+    try:
+        signal, outcome = parser.parse_detailed(record.get('content') or record.get('message') or '', message_id)
+    except Exception as e:
+        result['outcome'] = 'error'
+        result['error'] = str(e)
+        return result
+
+    result['outcome'] = outcome
+    if signal:
+        # Historical signals keep the time they were posted
+        if timestamp:
+            signal.timestamp = timestamp
+        result['signal'] = signal.to_dict()
+    return result
+
+
+def _init_worker(log_level: int):
+    """Create this worker's parser."""
+    global _worker_parser
+    logging.basicConfig(level=log_level)
+    logging.getLogger('parser').setLevel(max(log_level, logging.ERROR))
+    _worker_parser = SignalParser()
+
+
+def _parse_chunk(records: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], Dict[str, Any]]:
+    """Parse a chunk in a worker; returns its results and the parser stats for it."""
+    _worker_parser.reset_stats()
+    results = [parse_record(_worker_parser, record) for record in records]
+    return results, _worker_parser.get_stats()
+
+
+def _chunks(records: Iterable[Dict[str, Any]], size: int) -> Iterator[List[Dict[str, Any]]]:
+    """Split a record stream into lists of `size` records."""
+    iterator = iter(records)
+    while True:
+        chunk = list(islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class BatchParser:
+    """
+    Parses large message streams across a process pool.
+    """
+
+    def __init__(self, workers: Optional[int] = None, chunk_size: int = 500,
+                 log_level: int = logging.WARNING):
+        """
+        Initialize batch parser.
+
+        Args:
+            workers: Worker processes (default: CPU count; 1 parses in-process)
+            chunk_size: Messages sent to a worker at a time
+            log_level: Log level inside workers (parser logs are capped at ERROR)
+        """
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        self.log_level = log_level
+        self.reset_stats()
+
+    def reset_stats(self):
+        """Reset batch statistics."""
+        self.stats = {
+            'messages': 0,
+            'parsed': 0,
+            'prefilter_rejected': 0,
+            'unparsed': 0,
+            'errors': 0,
+            'by_pattern': {},
+            'pattern_misses': {},
+            'elapsed_seconds': 0.0
+        }
+
+    def _merge(self, results: List[Dict[str, Any]], parser_stats: Dict[str, Any]):
+        """Add one chunk's results to the totals."""
+        self.stats['messages'] += len(results)
+        for result in results:
+            if result['signal']:
+                self.stats['parsed'] += 1
+            elif result['outcome'] == 'error':
+                self.stats['errors'] += 1
+            elif result['outcome'] in self.stats:
+                self.stats[result['outcome']] += 1
+        for key in ('by_pattern', 'pattern_misses'):
+            for pattern_name, count in parser_stats[key].items():
+                self.stats[key][pattern_name] = self.stats[key].get(pattern_name, 0) + count
+
+    def parse(self, records: Iterable[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+        """
+        Parse a stream of exported messages.
+
+        Args:
+            records: Message dicts (consumed lazily)
+
+        Yields:
+            Result dicts in input order (see parse_record)
+        """
+        start = time.perf_counter()
+        try:
+            if self.workers == 1:
+                _init_worker(self.log_level)
+                for chunk in _chunks(records, self.chunk_size):
+                    results, parser_stats = _parse_chunk(chunk)
+                    self._merge(results, parser_stats)
+                    yield from results
+                return
+
+            with multiprocessing.Pool(self.workers, initializer=_init_worker,
+                                      initargs=(self.log_level,)) as pool:
+                for results, parser_stats in pool.imap(_parse_chunk, _chunks(records, self.chunk_size)):
+                    self._merge(results, parser_stats)
+                    yield from results
+        finally:
+            self.stats['elapsed_seconds'] += time.perf_counter() - start
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get batch statistics, including throughput and per-pattern hit rates."""
+        stats = self.stats.copy()
+        elapsed = stats['elapsed_seconds']
+        stats['messages_per_sec'] = round(stats['messages'] / elapsed, 1) if elapsed else 0.0
+
+        patterns = {}
+        for pattern_name in sorted(set(stats['by_pattern']) | set(stats['pattern_misses'])):
+            hits = stats['by_pattern'].get(pattern_name, 0)
+            misses = stats['pattern_misses'].get(pattern_name, 0)
+            patterns[pattern_name] = {
+                'hits': hits,
+                'misses': misses,
+                'hit_rate': round(hits / (hits + misses), 4) if hits + misses else 0.0
+            }
+        stats['patterns'] = patterns
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk-parse a JSONL export of Discord messages')
+    parser.add_argument('input', help="JSONL export ('-' for stdin)")
+    parser.add_argument('-o', '--output', help='Write results as JSONL here')
+    parser.add_argument('--signals-only', action='store_true', help='Only write messages that parsed')
+    parser.add_argument('--workers', type=int, default=None, help='Worker processes (default: CPU count)')
+    parser.add_argument('--chunk-size', type=int, default=500, help='Messages per worker task')
+    parser.add_argument('--stats', help='Also write the summary statistics to this JSON file')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s - %(message)s')
+
+    batch = BatchParser(workers=args.workers, chunk_size=args.chunk_size)
+    out = open(args.output, 'w', encoding='utf-8') if args.output else None
+    try:
+        for result in batch.parse(read_jsonl(args.input)):
+            if out and (result['signal'] or not args.signals_only):
+                out.write(json.dumps(result, separators=(',', ':')) + '\n')
+    finally:
+        if out:
+            out.close()
+
+    stats = batch.get_stats()
+    print(f"\nParsed {stats['messages']:,} messages in {stats['elapsed_seconds']:.2f}s "
+          f"({stats['messages_per_sec']:,.0f} msgs/sec, {batch.workers} workers)")
+    print(f"  signals:            {stats['parsed']:,}")
+    print(f"  prefilter rejected: {stats['prefilter_rejected']:,}")
+    print(f"  unparsed:           {stats['unparsed']:,}")
+    print(f"  errors:             {stats['errors']:,}")
+    print(f"\n  {'pattern':<24} {'hits':>8} {'misses':>8} {'hit rate':>9}")
+    for pattern_name, counts in stats['patterns'].items():
+        print(f"  {pattern_name:<24} {counts['hits']:>8,} {counts['misses']:>8,} {counts['hit_rate']:>9.1%}")
+
+    if args.stats:
+        with open(args.stats, 'w', encoding='utf-8') as f:
+            json.dump(stats, f, indent=2)
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -11,33 +11,81 @@ import os
 from dotenv import load_dotenv
 import sys
 from pathlib import Path
-import requests
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Optional, Dict
 
 # Add parent directory to path for shared imports
 sys.path.append(str(Path(__file__).parent.parent))
 
 from parser import SignalParser
+from llm_fallback import LLMFallback, LLM_AVAILABLE, DEFAULT_MODEL
 from trading_client import TradingServerClient
+from webhook_sender import WebhookSender
+from signal_channel import SignalChannel
+from channel_state import ChannelState
+from channel_config import ChannelConfig, load_channel_configs
 from shared.models import TradeSignal
+from shared.metrics import REGISTRY, CONTENT_TYPE
+from shared import tracing, profiler
 import aiohttp
+import io
+from aiohttp import web
 
 # Load environment variables (looks in current directory for .env)
 load_dotenv()
 
 # Configuration
 DISCORD_BOT_TOKEN = os.getenv('DISCORD_BOT_TOKEN')
-DISCORD_CHANNEL_ID = int(os.getenv('DISCORD_CHANNEL_ID', 0))
+# Monitored channels: DISCORD_CHANNEL_ID, or DISCORD_CHANNELS + CHANNEL_<NAME>_* (see channel_config.py)
 DISCORD_NOTIFICATION_WEBHOOK = os.getenv('DISCORD_NOTIFICATION_WEBHOOK')
 TRADING_SERVER_URL = os.getenv('TRADING_SERVER_URL', 'http://localhost:8000')
 TRADING_SERVER_API_KEY = os.getenv('TRADING_SERVER_API_KEY')
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 LOG_FILE = os.getenv('LOG_FILE', 'discord_bot.log')
 
+# Persistent signal channel (WebSocket) - REST is used while it is down
+SIGNAL_CHANNEL_ENABLED = os.getenv('SIGNAL_CHANNEL_ENABLED', 'false').lower() == 'true'
+SIGNAL_CHANNEL_URL = os.getenv(
+    'SIGNAL_CHANNEL_URL',
+    TRADING_SERVER_URL.replace('https://', 'wss://').replace('http://', 'ws://').rstrip('/') + '/ws/v1/signals'
+)
+
+# Claude fallback for messages no pattern can parse (optional)
+CLAUDE_API_KEY = os.getenv('CLAUDE_API_KEY')
+CLAUDE_MODEL = os.getenv('CLAUDE_MODEL', DEFAULT_MODEL)
+CLAUDE_BASE_URL = os.getenv('CLAUDE_BASE_URL')  # e.g. a local fake endpoint for testing
+CLAUDE_BUDGET = float(os.getenv('CLAUDE_BUDGET', 10))  # seconds per message, queueing included
+CLAUDE_MAX_CONCURRENCY = int(os.getenv('CLAUDE_MAX_CONCURRENCY', 2))
+CLAUDE_CACHE_SIZE = int(os.getenv('CLAUDE_CACHE_SIZE', 1024))
+CLAUDE_NEGATIVE_TTL = float(os.getenv('CLAUDE_NEGATIVE_TTL', 3600))  # seconds
+CLAUDE_CACHE_FILE = os.getenv('CLAUDE_CACHE_FILE')  # persist cached results across restarts
+
+# Missed-message recovery after disconnects
+CHANNEL_STATE_FILE = os.getenv('CHANNEL_STATE_FILE', 'channel_state.json')
+CHANNEL_STATE_FLUSH_INTERVAL = 2  # Cursor moves are written to CHANNEL_STATE_FILE every 2 seconds
+RECOVERY_ENABLED = os.getenv('RECOVERY_ENABLED', 'true').lower() == 'true'
+RECOVERY_MAX_MESSAGES = int(os.getenv('RECOVERY_MAX_MESSAGES', 200))
+RECOVERY_MAX_AGE = float(os.getenv('RECOVERY_MAX_AGE', 300))  # seconds - older missed signals are skipped
+RECOVERY_MAX_DRIFT_PCT = float(os.getenv('RECOVERY_MAX_DRIFT_PCT', 1.0))  # % from entry, 0 disables
+
+# Prometheus metrics endpoint (GET /metrics); 0 disables it
+METRICS_PORT = int(os.getenv('METRICS_PORT', 0))
+METRICS_HOST = os.getenv('METRICS_HOST', '127.0.0.1')
+
+# Account status snapshot shared by !update and the status update task
+ACCOUNT_STATUS_TTL = float(os.getenv('ACCOUNT_STATUS_TTL', 30))  # seconds
+
 # Optional filters
 ALLOWED_USER_IDS = os.getenv('ALLOWED_USER_IDS', '').split(',')
 ALLOWED_USER_IDS = [int(uid) for uid in ALLOWED_USER_IDS if uid.strip()]
 REQUIRED_ROLE_NAME = os.getenv('REQUIRED_ROLE_NAME')
 
+# Users allowed to run !profile; unset means nobody
+PROFILE_ALLOWED_USER_IDS = os.getenv('PROFILE_ALLOWED_USER_IDS', '').split(',')
+PROFILE_ALLOWED_USER_IDS = [int(uid) for uid in PROFILE_ALLOWED_USER_IDS if uid.strip()]
+
 # Setup logging
 logging.basicConfig(
     level=getattr(logging, LOG_LEVEL),
@@ -49,14 +97,64 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+BOT_STAGE_SECONDS = REGISTRY.histogram('bot_stage_seconds', 'Duration of each bot pipeline stage '
+                                       '(parse, send to the trading server)', ['stage'])
+MESSAGES_IN_FLIGHT = REGISTRY.gauge('bot_messages_in_flight', 'Messages being parsed or sent')
+TPSL_FILLS = REGISTRY.counter('bot_tpsl_fills_total', 'TP/SL fills pushed by the Trading Server', ['order_type'])
+
+
+SIGNAL_FIELDS = [
+    ('entry_price', 'Entry'),
+    ('stop_loss', 'SL'),
+    ('take_profit', 'TP1'),
+    ('take_profit_2', 'TP2'),
+    ('take_profit_3', 'TP3'),
+    ('leverage', 'Leverage'),
+]
+
+
+def describe_signal_changes(old: TradeSignal, new: TradeSignal) -> list:
+    """
+    Describe how an edited signal differs from the original.
+    
+    Returns:
+        List like ["SL 58000 -> 59000", "TP3 added (70000)"], empty if the
+        trade-relevant fields are unchanged
+    """
+    changes = []
+    if (old.symbol, old.side) != (new.symbol, new.side):
+        changes.append(f"{old.side.upper()} {old.symbol} -> {new.side.upper()} {new.symbol}")
+    for field, label in SIGNAL_FIELDS:
+        before, after = getattr(old, field), getattr(new, field)
+        if before == after:
+            continue
+        if before is None:
+            changes.append(f"{label} added ({after})")
+        elif after is None:
+            changes.append(f"{label} removed")
+        else:
+            changes.append(f"{label} {before} -> {after}")
+    return changes
+
+
+def apply_channel_config(signal: TradeSignal, config: ChannelConfig):
+    """Tag a signal with its channel's risk multiplier and target account."""
+    signal.risk_multiplier = config.risk_multiplier
+    signal.account = config.account
+
 
 class TradingBot(commands.Bot):
     """
     Discord bot that monitors channels for trade signals.
     """
     
-    def __init__(self):
-        """Initialize bot with intents and components."""
+    def __init__(self, channels: Dict[int, ChannelConfig]):
+        """
+        Initialize bot with intents and components.
+        
+        Args:
+            channels: Monitored channels by channel ID
+        """
         intents = discord.Intents.default()
         intents.message_content = True
         intents.guilds = True
@@ -65,70 +163,192 @@ class TradingBot(commands.Bot):
         super().__init__(command_prefix='!', intents=intents)
         
         # Initialize components
-        self.parser = SignalParser()
-        self.trading_client = TradingServerClient(
-            base_url=TRADING_SERVER_URL,
-            api_key=TRADING_SERVER_API_KEY
-        )
+        llm_fallback = None
+        if CLAUDE_API_KEY and LLM_AVAILABLE:
+            llm_fallback = LLMFallback(
+                api_key=CLAUDE_API_KEY,
+                model=CLAUDE_MODEL,
+                base_url=CLAUDE_BASE_URL,
+                budget=CLAUDE_BUDGET,
+                max_concurrency=CLAUDE_MAX_CONCURRENCY,
+                cache_size=CLAUDE_CACHE_SIZE,
+                negative_ttl=CLAUDE_NEGATIVE_TTL,
+                cache_file=CLAUDE_CACHE_FILE
+            )
+        self.llm_fallback = llm_fallback
+        
+        # One parser per channel (its profile's formats, ordering and stats);
+        # the LLM fallback and trading server connection are shared
+        self.channels = channels
+        self.parsers = {
+            channel_id: SignalParser.for_profile(config.profile, llm_fallback)
+            for channel_id, config in channels.items()
+        }
+        
+        # Created in setup_hook, once the event loop is running
+        self.http_session: aiohttp.ClientSession = None
+        self.trading_client: TradingServerClient = None
+        self.webhook_sender: WebhookSender = None
+        self.signal_channel: SignalChannel = None
+        self.metrics_runner: web.AppRunner = None
+        
+        # Cached account status snapshot
+        self._account_status = None
+        self._account_status_at = 0.0
+        self._account_status_lock = asyncio.Lock()
+        
+        # Last processed message per channel, for recovery after disconnects
+        self.channel_state = ChannelState(CHANNEL_STATE_FILE)
+        self._processed_ids: "OrderedDict[int, None]" = OrderedDict()
+        self._recovery_done = asyncio.Event()
+        self._recovery_done.set()
+        
+        # Signals by signal_id (the message ID), for diffing edits, and
+        # messages still being parsed/sent, so a delete can cancel them
+        self._signals: "OrderedDict[str, TradeSignal]" = OrderedDict()
+        self._pending_ids: set = set()
+        MESSAGES_IN_FLIGHT.set_function(lambda: len(self._pending_ids))
         
         self.stats = {
             'messages_seen': 0,
             'signals_detected': 0,
             'signals_sent': 0,
-            'signals_failed': 0
+            'signals_failed': 0,
+            'messages_recovered': 0,
+            'recovered_signals_skipped': 0,
+            'signals_amended': 0,
+            'signals_cancelled': 0
+        }
+        self.channel_stats = {
+            channel_id: {key: 0 for key in self.stats}
+            for channel_id in channels
+        }
+    
+    def _count(self, key: str, channel_id: int, amount: int = 1):
+        """Increment a stat in the totals and in the channel's stats."""
+        self.stats[key] += amount
+        if channel_id in self.channel_stats:
+            self.channel_stats[channel_id][key] += amount
+    
+    def get_channel_stats(self) -> Dict[str, dict]:
+        """Per-channel counters and parser stats, keyed by channel name."""
+        return {
+            config.name: {
+                **config.to_dict(),
+                **self.channel_stats[channel_id],
+                'parser': self.parsers[channel_id].get_stats()
+            }
+            for channel_id, config in self.channels.items()
         }
     
-    async def send_webhook_notification(self, title: str, description: str, color: int, fields: list = None):
-        """Send notification to Discord webhook."""
-        if not DISCORD_NOTIFICATION_WEBHOOK:
+    def _monitored_channel(self, channel_id: int, guild_id: Optional[int]) -> Optional[ChannelConfig]:
+        """Config for a monitored channel, or None if the channel (or its guild) isn't monitored."""
+        config = self.channels.get(channel_id)
+        if config and config.matches(guild_id):
+            return config
+        return None
+    
+    async def send_webhook_notification(self, title: str, description: str, color: int,
+                                        fields: list = None, key: str = None):
+        """
+        Queue a notification for the Discord webhook.
+        
+        Args:
+            title: Embed title
+            description: Embed description
+            color: Embed color
+            fields: Embed fields
+            key: Coalescing key - a queued notification with the same key is replaced
+        """
+        if not DISCORD_NOTIFICATION_WEBHOOK or not self.webhook_sender:
             logger.warning("No webhook URL configured")
             return
         
-        try:
-            embed = {
-                "title": title,
-                "description": description,
-                "color": color,
-                "timestamp": discord.utils.utcnow().isoformat()
-            }
-            
-            if fields:
-                embed["fields"] = fields
-            
-            logger.debug(f"Sending webhook to {DISCORD_NOTIFICATION_WEBHOOK[:50]}...")
+        embed = {
+            "title": title,
+            "description": description,
+            "color": color,
+            "timestamp": discord.utils.utcnow().isoformat()
+        }
+        
+        if fields:
+            embed["fields"] = fields
+        
+        self.webhook_sender.send(embed, key=key)
+    
+    async def handle_server_event(self, kind: str, data: dict):
+        """
+        Handle an event pushed by the Trading Server over the signal channel.
+        
+        Args:
+            kind: Event type ('tpsl_set', 'tpsl_failed', 'order_filled')
+            data: Event data
+        """
+        logger.info(f"Server event {kind}: {data}")
+        
+        # Positions/orders changed - next status read should refetch
+        self._account_status = None
+        
+        account = f" [{data['account']}]" if data.get('account') else ""
+        if kind == 'tpsl_set':
+            await self.send_webhook_notification(
+                title=f"🛡️ TP/SL Set: {data.get('symbol')}{account}",
+                description="Position is protected",
+                color=0x3498db,  # Blue
+                fields=[
+                    {"name": "Take Profit", "value": f"${data['tp_price']}" if data.get('tp_price') else "N/A", "inline": True},
+                    {"name": "Stop Loss", "value": f"${data['sl_price']}" if data.get('sl_price') else "N/A", "inline": True}
+                ]
+            )
+        elif kind == 'tpsl_failed':
+            await self.send_webhook_notification(
+                title=f"🚨 TP/SL Failed: {data.get('symbol')}{account}",
+                description="Position is UNPROTECTED - manual intervention required!",
+                color=0xff0000,  # Red
+                fields=[
+                    {"name": "Error", "value": str(data.get('error', 'unknown'))[:1024], "inline": False}
+                ]
+            )
+        elif kind == 'order_filled':
+            # The server's order monitor already posts the fill to its webhook -
+            # record it here instead of posting it twice
+            order_type = str(data.get('order_type') or 'unknown')
+            pnl = float(data.get('pnl') or 0)
+            TPSL_FILLS.labels(order_type).inc()
+            logger.info(f"{'✅' if pnl >= 0 else '❌'} {order_type} filled: {data.get('symbol')}{account} "
+                        f"@ {data.get('trigger_price')} ({'+' if pnl >= 0 else '-'}${abs(pnl):.2f})")
+        else:
+            logger.debug(f"Ignoring unknown server event {kind}")
+    
+    async def get_account_status(self, max_age: float = ACCOUNT_STATUS_TTL) -> dict:
+        """
+        Get the account status snapshot, fetching it if older than max_age.
+        
+        Concurrent callers share one in-flight request.
+        
+        Args:
+            max_age: Maximum snapshot age in seconds
             
-            async with aiohttp.ClientSession() as session:
-                response = await session.post(
-                    DISCORD_NOTIFICATION_WEBHOOK,
-                    json={"embeds": [embed]}
-                )
-                
-                if response.status == 204:
-                    logger.debug("Webhook sent successfully")
-                else:
-                    response_text = await response.text()
-                    logger.error(f"Webhook returned status {response.status}: {response_text}")
-                    
-        except Exception as e:
-            logger.error(f"Failed to send webhook notification: {e}", exc_info=True)
+        Returns:
+            Account status dict from the Trading Server
+        """
+        async with self._account_status_lock:
+            if self._account_status is None or time.monotonic() - self._account_status_at > max_age:
+                self._account_status = await self.trading_client.get_account_status()
+                self._account_status_at = time.monotonic()
+            return self._account_status
     
     @tasks.loop(minutes=15)
     async def status_update_task(self):
         """Post account status to webhook every 15 minutes."""
         try:
             # Get account data from trading server
-            response = requests.get(
-                f"{TRADING_SERVER_URL}/api/v1/account/status",
-                headers={"X-API-Key": TRADING_SERVER_API_KEY},
-                timeout=10
-            )
-            
-            if response.status_code != 200:
-                logger.warning(f"Failed to get account status: {response.status_code}")
+            try:
+                data = await self.get_account_status()
+            except Exception as e:
+                logger.warning(str(e))
                 return
             
-            data = response.json()
-            
             # Format positions
             positions_text = ""
             if data.get('positions'):
@@ -167,7 +387,8 @@ class TradingBot(commands.Bot):
                 color=0x3498db,  # Blue
                 fields=[
                     {"name": "Open Positions", "value": positions_text[:1024], "inline": False}
-                ]
+                ],
+                key="status_update"
             )
             
             logger.info("Posted status update to webhook")
@@ -181,29 +402,108 @@ class TradingBot(commands.Bot):
         await self.wait_until_ready()
         logger.info("Starting 15-minute status update task")
     
+    @tasks.loop(seconds=CHANNEL_STATE_FLUSH_INTERVAL)
+    async def channel_state_flush_task(self):
+        """Persist channel cursors that moved (written off the event loop)."""
+        await asyncio.to_thread(self.channel_state.flush)
+    
     async def close(self):
         """Cleanup when bot shuts down."""
         self.status_update_task.cancel()
+        self.channel_state_flush_task.cancel()
+        self.channel_state.flush()
+        if self.signal_channel:
+            await self.signal_channel.close()
+        if self.webhook_sender:
+            await self.webhook_sender.close()
+        if self.llm_fallback:
+            await self.llm_fallback.close()
+        if self.metrics_runner:
+            await self.metrics_runner.cleanup()
+        if self.http_session:
+            await self.http_session.close()
         await super().close()
     
     async def setup_hook(self):
         """Called when bot is starting up."""
         logger.info("Bot is starting up...")
+        
+        # One long-lived HTTP session for the Trading Server and webhooks
+        self.http_session = aiohttp.ClientSession()
+        if SIGNAL_CHANNEL_ENABLED:
+            self.signal_channel = SignalChannel(
+                url=SIGNAL_CHANNEL_URL,
+                api_key=TRADING_SERVER_API_KEY,
+                session=self.http_session,
+                on_event=self.handle_server_event
+            )
+            self.signal_channel.start()
+        self.trading_client = TradingServerClient(
+            base_url=TRADING_SERVER_URL,
+            api_key=TRADING_SERVER_API_KEY,
+            session=self.http_session,
+            channel=self.signal_channel
+        )
+        if DISCORD_NOTIFICATION_WEBHOOK:
+            self.webhook_sender = WebhookSender(DISCORD_NOTIFICATION_WEBHOOK, self.http_session)
+            self.webhook_sender.start()
+        
+        if METRICS_PORT:
+            await self.start_metrics_server()
+        
         # Start periodic status updates
         self.status_update_task.start()
+        self.channel_state_flush_task.start()
+    
+    async def start_metrics_server(self):
+        """Serve GET /metrics (Prometheus text format) on METRICS_HOST:METRICS_PORT."""
+        async def metrics(request):
+            return web.Response(body=REGISTRY.render().encode('utf-8'), headers={'Content-Type': CONTENT_TYPE})
+        
+        app = web.Application()
+        app.router.add_get('/metrics', metrics)
+        self.metrics_runner = web.AppRunner(app, access_log=None)
+        await self.metrics_runner.setup()
+        await web.TCPSite(self.metrics_runner, METRICS_HOST, METRICS_PORT).start()
+        logger.info(f"📈 Metrics at http://{METRICS_HOST}:{METRICS_PORT}/metrics")
     
     async def on_ready(self):
         """Called when bot is ready."""
         logger.info(f'Bot logged in as {self.user.name} (ID: {self.user.id})')
-        logger.info(f'Monitoring channel ID: {DISCORD_CHANNEL_ID}')
+        for config in self.channels.values():
+            logger.info(f"Monitoring channel {config.name} (ID: {config.channel_id}, profile: {config.profile}, "
+                        f"risk x{config.risk_multiplier}, account: {config.account or 'all'})")
         logger.info(f'Trading Server: {TRADING_SERVER_URL}')
         
-        # Check if bot can access the monitoring channel
+        # Check if bot can access the monitored channels
+        for config in self.channels.values():
+            await self._check_channel_access(config)
+        
+        # Test connection to trading server
+        health = await self.trading_client.health_check()
+        if health.get('status') == 'healthy':
+            logger.info(f"✅ Trading Server is reachable")
+        else:
+            logger.warning(f"⚠️ Trading Server health check failed: {health}")
+        
+        # Set bot status
+        await self.change_presence(
+            activity=discord.Activity(
+                type=discord.ActivityType.watching,
+                name="for trade signals"
+            )
+        )
+        
+        # Pick up signals posted while the bot was offline
+        await self.recover_missed_messages()
+    
+    async def _check_channel_access(self, config: ChannelConfig):
+        """Log whether the bot can find and read a monitored channel."""
         try:
-            channel = self.get_channel(DISCORD_CHANNEL_ID)
+            channel = self.get_channel(config.channel_id)
             if channel is None:
                 # Try fetching it
-                channel = await self.fetch_channel(DISCORD_CHANNEL_ID)
+                channel = await self.fetch_channel(config.channel_id)
             
             if channel:
                 # Test if we can read messages
@@ -211,39 +511,24 @@ class TradingBot(commands.Bot):
                     # Try to fetch recent messages to verify read permission
                     async for msg in channel.history(limit=1):
                         break
-                    logger.info(f"✅ Successfully verified access to channel: {channel.name}")
+                    logger.info(f"✅ Successfully verified access to channel: {channel.name} ({config.name})")
                 except discord.Forbidden:
-                    logger.error(f"❌ CRITICAL: Bot cannot read messages from channel {DISCORD_CHANNEL_ID}")
+                    logger.error(f"❌ CRITICAL: Bot cannot read messages from channel {config.channel_id}")
                     logger.error(f"   Channel name: {channel.name}")
                     logger.error(f"   Missing permission: Read Message History")
                     logger.error(f"   ACTION REQUIRED: Add bot to channel or grant permissions")
                 except Exception as e:
-                    logger.error(f"❌ Error accessing channel {DISCORD_CHANNEL_ID}: {e}")
+                    logger.error(f"❌ Error accessing channel {config.channel_id}: {e}")
             else:
-                logger.error(f"❌ CRITICAL: Cannot find channel {DISCORD_CHANNEL_ID}")
+                logger.error(f"❌ CRITICAL: Cannot find channel {config.channel_id}")
                 logger.error(f"   Bot may not be in the server or channel doesn't exist")
                 logger.error(f"   ACTION REQUIRED: Invite bot to server or verify channel ID")
                 
         except discord.NotFound:
-            logger.error(f"❌ CRITICAL: Channel {DISCORD_CHANNEL_ID} not found")
+            logger.error(f"❌ CRITICAL: Channel {config.channel_id} not found")
             logger.error(f"   Bot is not in the server or channel doesn't exist")
         except Exception as e:
             logger.error(f"❌ Error checking channel access: {e}")
-        
-        # Test connection to trading server
-        health = self.trading_client.health_check()
-        if health.get('status') == 'healthy':
-            logger.info(f"✅ Trading Server is reachable")
-        else:
-            logger.warning(f"⚠️ Trading Server health check failed: {health}")
-        
-        # Set bot status
-        await self.change_presence(
-            activity=discord.Activity(
-                type=discord.ActivityType.watching,
-                name="for trade signals"
-            )
-        )
     
     async def on_message(self, message: discord.Message):
         """
@@ -263,36 +548,102 @@ class TradingBot(commands.Bot):
         # Process commands from any channel first
         await self.process_commands(message)
         
-        # Only parse trade signals from the monitored channel
-        if message.channel.id != DISCORD_CHANNEL_ID:
+        # Only parse trade signals from monitored channels
+        config = self._monitored_channel(message.channel.id, message.guild.id if message.guild else None)
+        if not config:
             return
         
-        self.stats['messages_seen'] += 1
+        # Missed messages are replayed first so signals execute in order
+        await self._recovery_done.wait()
+        await self.process_channel_message(message, config)
+        
+        # Process commands (if any)
+        await self.process_commands(message)
+    
+    async def process_channel_message(self, message: discord.Message, config: ChannelConfig,
+                                      recovered: bool = False):
+        """
+        Parse a message from a monitored channel and execute its signal.
+        
+        Args:
+            message: Discord message object
+            config: The channel's config (parser profile, risk multiplier, account)
+            recovered: True if the message was posted while the bot was
+                       disconnected (staleness and price drift are checked)
+        """
+        # The same message can arrive live and in a recovery page
+        if message.id in self._processed_ids:
+            return
+        self._processed_ids[message.id] = None
+        if len(self._processed_ids) > 1000:
+            self._processed_ids.popitem(last=False)
+        
+        self._count('messages_seen', config.channel_id)
         
         # Optional: Check user permissions
         if not self._is_authorized_user(message.author):
             logger.debug(f"Message from unauthorized user {message.author.name}")
+            self.channel_state.advance(message.channel.id, message.id)
             return
         
+        # Trace the message from Discord to the exchange (server continues it)
+        trace = tracing.Trace(tracing.new_trace_id(), 'bot')
+        posted_at = message.created_at.timestamp()
+        trace.add_span('discord', posted_at, max(trace.started_at - posted_at, 0.0))
+        
         # Try to parse signal
+        self._pending_ids.add(message.id)
+        self.channel_state.start(message.channel.id, message.id)
         try:
-            signal = self.parser.parse(
-                message.content,
-                message_id=str(message.id)
-            )
+            with BOT_STAGE_SECONDS.labels('parse').time(), trace.stage('parse'):
+                signal = await self.parsers[config.channel_id].parse_async(
+                    message.content,
+                    message_id=str(message.id)
+                )
             
             if not signal:
                 # Not a signal message, ignore
                 return
             
-            self.stats['signals_detected'] += 1
-            logger.info(f"Signal detected from {message.author.name}: {signal.symbol} {signal.side}")
+            # Signal time is when it was posted, not when we read it
+            signal.timestamp = message.created_at.isoformat()
+            apply_channel_config(signal, config)
+            
+            self._count('signals_detected', config.channel_id)
+            self._remember_signal(signal)
+            logger.info(f"Signal detected in {config.name} from {message.author.name}: {signal.symbol} {signal.side}"
+                        f"{' (recovered)' if recovered else ''}")
+            
+            if recovered:
+                reason = await self._check_recovered_signal(signal, message)
+                if reason:
+                    self._count('recovered_signals_skipped', config.channel_id)
+                    logger.warning(f"Skipping missed signal {signal.symbol} {signal.side}: {reason}")
+                    await self.send_webhook_notification(
+                        title="⏭️ Missed Signal Skipped",
+                        description=f"{signal.side.upper()} {signal.symbol} was posted while the bot was offline",
+                        color=0xffa500,  # Orange
+                        fields=[
+                            {"name": "Symbol", "value": signal.symbol, "inline": True},
+                            {"name": "Side", "value": signal.side.upper(), "inline": True},
+                            {"name": "Reason", "value": reason[:1024], "inline": False}
+                        ]
+                    )
+                    return
             
             # Send to trading server
-            response = self.trading_client.send_signal(signal)
+            trace.mark('sent')
+            signal.trace_id = trace.trace_id
+            signal.trace = trace.spans()
+            with BOT_STAGE_SECONDS.labels('send').time():
+                response = await self.trading_client.send_signal(signal)
+            if response.timeline:
+                total_ms = max(span['offset_ms'] + span['duration_ms'] for span in response.timeline)
+                logger.info(f"Trace {trace.trace_id}: {total_ms:.0f}ms from Discord post to done "
+                            f"(GET /api/v1/trades/{trace.trace_id}/timeline for the breakdown)")
             
             if response.success:
-                self.stats['signals_sent'] += 1
+                self._count('signals_sent', config.channel_id)
                 logger.info(f"Signal executed successfully: {response.order_id}")
                 
                 # Send success notification
@@ -310,8 +661,11 @@ class TradingBot(commands.Bot):
                     ]
                 )
                 
+            elif response.error_code == "SIGNAL_CANCELLED":
+                logger.info(f"Signal {signal.signal_id} was deleted before execution")
+                
             else:
-                self.stats['signals_failed'] += 1
+                self._count('signals_failed', config.channel_id)
                 logger.error(f"Signal execution failed: {response.message}")
                 
                 # Send failure notification
@@ -329,8 +683,200 @@ class TradingBot(commands.Bot):
         except Exception as e:
             logger.error(f"Error processing message: {e}", exc_info=True)
         
-        # Process commands (if any)
-        await self.process_commands(message)
+        finally:
+            self._pending_ids.discard(message.id)
+            self.channel_state.advance(message.channel.id, message.id)
+    
+    def _remember_signal(self, signal: TradeSignal):
+        """Keep the latest version of a signal for diffing later edits."""
+        self._signals[signal.signal_id] = signal
+        self._signals.move_to_end(signal.signal_id)
+        if len(self._signals) > 500:
+            self._signals.popitem(last=False)
+    
+    async def on_raw_message_edit(self, payload: discord.RawMessageUpdateEvent):
+        """
+        Re-parse an edited signal and send what changed to the Trading Server.
+        
+        Raw events are used so edits to messages no longer in discord.py's
+        cache (e.g. after a restart) are still seen.
+        """
+        config = self._monitored_channel(payload.channel_id, payload.guild_id)
+        if not config:
+            return
+        message = payload.message
+        if message.author == self.user or not self._is_authorized_user(message.author):
+            return
+        if payload.cached_message and payload.cached_message.content == message.content:
+            return  # Embed/unfurl update, text unchanged
+        
+        signal_id = str(message.id)
+        old_signal = self._signals.get(signal_id)
+        try:
+            signal = await self.parsers[config.channel_id].parse_async(message.content, message_id=signal_id)
+            if not signal:
+                if old_signal:
+                    logger.warning(f"Signal {signal_id} edited into something unparseable - trade left as is")
+                return
+            
+            apply_channel_config(signal, config)
+            if old_signal:
+                signal.timestamp = old_signal.timestamp
+                changes = describe_signal_changes(old_signal, signal)
+                if not changes:
+                    logger.debug(f"Edit to {signal_id} doesn't change the signal")
+                    return
+            else:
+                # Not seen by this process - the server knows whether it executed
+                changes = ["edited after restart"]
+            
+            logger.info(f"✏️ Signal {signal_id} edited: {', '.join(changes)}")
+            response = await self.trading_client.amend_signal(signal)
+            if response.error_code == "SIGNAL_NOT_FOUND" and not old_signal:
+                return  # Edited message was never a signal
+            if response.success:
+                self._remember_signal(signal)
+                self._count('signals_amended', config.channel_id)
+            
+            await self.send_webhook_notification(
+                title=f"✏️ Signal Edited: {signal.symbol}" if response.success else f"⚠️ Signal Edit Not Applied: {signal.symbol}",
+                description=response.message,
+                color=0x3498db if response.success else 0xffa500,  # Blue / Orange
+                fields=[
+                    {"name": "Changes", "value": ", ".join(changes)[:1024], "inline": False},
+                    {"name": "Stop Loss", "value": f"${signal.stop_loss}" if signal.stop_loss else "N/A", "inline": True},
+                    {"name": "Take Profit", "value": " / ".join(
+                        f"${tp}" for tp in (signal.take_profit, signal.take_profit_2, signal.take_profit_3) if tp
+                    ) or "N/A", "inline": True}
+                ]
+            )
+        
+        except Exception as e:
+            logger.error(f"Error processing edit of {signal_id}: {e}", exc_info=True)
+    
+    async def on_raw_message_delete(self, payload: discord.RawMessageDeleteEvent):
+        """
+        Cancel a signal whose message was deleted.
+        
+        Only entries that haven't been placed are cancelled - an open
+        position is left alone.
+        """
+        config = self._monitored_channel(payload.channel_id, payload.guild_id)
+        if not config:
+            return
+        
+        signal_id = str(payload.message_id)
+        signal = self._signals.get(signal_id)
+        if not signal and payload.message_id not in self._pending_ids:
+            return  # Not a signal (or too old to matter)
+        
+        try:
+            response = await self.trading_client.cancel_signal(signal_id)
+            what = f"{signal.side.upper()} {signal.symbol}" if signal else f"message {signal_id}"
+            if response.success:
+                self._count('signals_cancelled', config.channel_id)
+                logger.info(f"🚫 Signal {signal_id} deleted, cancelled: {response.message}")
+                title = f"🚫 Signal Cancelled: {what}"
+                color = 0x95a5a6  # Grey
+            else:
+                logger.warning(f"Signal {signal_id} deleted but not cancelled: {response.message}")
+                title = f"⚠️ Deleted Signal Not Cancelled: {what}"
+                color = 0xffa500  # Orange
+            await self.send_webhook_notification(
+                title=title,
+                description=response.message,
+                color=color
+            )
+        
+        except Exception as e:
+            logger.error(f"Error processing delete of {signal_id}: {e}", exc_info=True)
+    
+    async def _check_recovered_signal(self, signal: TradeSignal, message: discord.Message) -> Optional[str]:
+        """
+        Decide whether a signal posted while the bot was offline should still execute.
+        
+        Args:
+            signal: Parsed signal
+            message: Message it came from
+            
+        Returns:
+            Reason to skip it, or None to execute
+        """
+        age = (discord.utils.utcnow() - message.created_at).total_seconds()
+        if RECOVERY_MAX_AGE and age > RECOVERY_MAX_AGE:
+            return f"Posted {age / 60:.1f} min ago (limit {RECOVERY_MAX_AGE / 60:.1f} min)"
+        
+        if RECOVERY_MAX_DRIFT_PCT and signal.entry_price:
+            try:
+                ticker = await self.trading_client.get_ticker(signal.symbol)
+            except Exception as e:
+                return f"Could not check price drift: {e}"
+            drift = abs(ticker['last'] - signal.entry_price) / signal.entry_price * 100
+            if drift > RECOVERY_MAX_DRIFT_PCT:
+                return (f"Price {ticker['last']} is {drift:.2f}% from entry {signal.entry_price} "
+                        f"(limit {RECOVERY_MAX_DRIFT_PCT}%)")
+        
+        return None
+    
+    async def recover_missed_messages(self):
+        """
+        Replay messages posted in the monitored channels since the last ones processed.
+        
+        Called after on_ready and on_resumed. Live messages wait until every
+        channel has been replayed.
+        """
+        if not RECOVERY_ENABLED or not self._recovery_done.is_set():
+            return
+        
+        self._recovery_done.clear()
+        try:
+            for config in self.channels.values():
+                await self._recover_channel(config)
+        finally:
+            self._recovery_done.set()
+    
+    async def _recover_channel(self, config: ChannelConfig):
+        """
+        Replay one channel's missed messages. On the very first run there is
+        no cursor yet, so history is not replayed.
+        """
+        channel = self.get_channel(config.channel_id)
+        if channel is None:
+            return
+        
+        recovered = 0
+        try:
+            last_id = self.channel_state.last_message_id(channel.id)
+            if last_id is None:
+                async for msg in channel.history(limit=1):
+                    self.channel_state.advance(channel.id, msg.id)
+                logger.info(f"No channel state yet for {config.name} - recovery starts from the newest message")
+                return
+            
+            async for msg in channel.history(limit=RECOVERY_MAX_MESSAGES, after=discord.Object(id=last_id),
+                                             oldest_first=True):
+                if msg.author == self.user:
+                    continue
+                recovered += 1
+                await self.process_channel_message(msg, config, recovered=True)
+            
+            if recovered:
+                logger.info(f"🔁 Recovered {recovered} message(s) posted in {config.name} while disconnected")
+            if recovered >= RECOVERY_MAX_MESSAGES:
+                logger.warning(f"⚠️ Recovery of {config.name} stopped at RECOVERY_MAX_MESSAGES={RECOVERY_MAX_MESSAGES}, "
+                               f"older missed messages may remain")
+        
+        except discord.Forbidden:
+            logger.error(f"❌ Cannot read message history of {config.name} - missed messages not recovered")
+        except Exception as e:
+            logger.error(f"Error recovering missed messages in {config.name}: {e}", exc_info=True)
+        finally:
+            self._count('messages_recovered', config.channel_id, recovered)
+    
+    async def on_resumed(self):
+        """Called when the gateway session resumes after a disconnect."""
+        logger.info("Gateway session resumed, checking for missed messages")
+        await self.recover_missed_messages()
     
     def _is_authorized_user(self, user: discord.User | discord.Member) -> bool:
         """
@@ -365,27 +911,21 @@ class TradingBot(commands.Bot):
 @commands.command(name='update')
 async def cmd_update(ctx):
     """Get current account status and active trades."""
-    logger.info(f"!update command called from channel {ctx.channel.id}, monitored channel is {DISCORD_CHANNEL_ID}")
+    logger.info(f"!update command called from channel {ctx.channel.id}")
     
-    # Don't respond in the trade signals channel
-    if ctx.channel.id == DISCORD_CHANNEL_ID:
+    # Don't respond in the trade signals channels
+    if ctx.channel.id in ctx.bot.channels:
         logger.info("Ignoring !update in trade signals channel")
         return
     
     try:
-        # Get account data from trading server
-        response = requests.get(
-            f"{TRADING_SERVER_URL}/api/v1/account/status",
-            headers={"X-API-Key": TRADING_SERVER_API_KEY},
-            timeout=10
-        )
-        
-        if response.status_code != 200:
-            await ctx.send(f"❌ Failed to get account status: {response.status_code}")
+        # Get account data from trading server (cached snapshot, max 30s old by default)
+        try:
+            data = await ctx.bot.get_account_status()
+        except Exception as e:
+            await ctx.send(f"❌ {e}")
             return
         
-        data = response.json()
-        
         # Format header
         available = data.get('available_balance', 0)
         equity = data.get('total_equity', 0)
@@ -443,18 +983,88 @@ async def cmd_update(ctx):
 @commands.command(name='health')
 async def cmd_health(ctx):
     """Check Trading Server health."""
-    # Don't respond in the trade signals channel
-    if ctx.channel.id == DISCORD_CHANNEL_ID:
+    # Don't respond in the trade signals channels
+    if ctx.channel.id in ctx.bot.channels:
+        return
+    
+    health = await ctx.bot.trading_client.health_check()
+    if health.get('status') == 'unreachable':
+        await ctx.send(f"❌ Cannot reach Trading Server: {health.get('error')}")
+    elif 'error' in health:
+        await ctx.send(f"⚠️ Trading Server returned status code: {health['error']}")
+    else:
+        await ctx.send("✅ Trading Server is healthy")
+
+
+@commands.command(name='channels')
+async def cmd_channels(ctx):
+    """Show per-channel signal stats."""
+    # Don't respond in the trade signals channels
+    if ctx.channel.id in ctx.bot.channels:
+        return
+    
+    msg = "📡 **Monitored Channels**\n\n"
+    for name, stats in ctx.bot.get_channel_stats().items():
+        parser_stats = stats['parser']
+        msg += f"**{name}** (profile: {stats['profile']}, risk x{stats['risk_multiplier']}, account: {stats['account'] or 'all'})\n"
+        msg += (f"  Messages: {stats['messages_seen']} | Signals: {stats['signals_detected']} | "
+                f"Sent: {stats['signals_sent']} | Failed: {stats['signals_failed']}\n")
+        msg += (f"  Amended: {stats['signals_amended']} | Cancelled: {stats['signals_cancelled']} | "
+                f"Recovered: {stats['messages_recovered']}\n")
+        msg += f"  Parsed: {parser_stats['successful']}/{parser_stats['total_parsed']}\n\n"
+    
+    await ctx.send(msg[:2000])
+
+
+@commands.command(name='profile')
+async def cmd_profile(ctx, *args):
+    """
+    Sample the bot (or the Trading Server) and upload collapsed stacks.
+    
+    Usage: !profile [server] [seconds] [cpu]
+    'cpu' leaves out threads parked in idle waits.
+    """
+    # Don't respond in the trade signals channels
+    if ctx.channel.id in ctx.bot.channels:
+        return
+    # Profiles expose internals and cost CPU - admins only, never open by default
+    if ctx.author.id not in PROFILE_ALLOWED_USER_IDS:
+        await ctx.send("❌ Not authorized (PROFILE_ALLOWED_USER_IDS)")
+        return
+    
+    target = 'server' if 'server' in args else 'bot'
+    idle = 'cpu' not in args
+    numbers = [a for a in args if a not in ('server', 'cpu')]
+    try:
+        seconds = float(numbers[0]) if numbers else 10.0
+    except ValueError:
+        await ctx.send("❌ Usage: `!profile [server] [seconds] [cpu]`")
+        return
+    if not 0 < seconds <= profiler.MAX_SECONDS:
+        await ctx.send(f"❌ seconds must be between 0 and {profiler.MAX_SECONDS}")
         return
     
+    await ctx.send(f"🔬 Profiling {target} for {seconds:g}s...")
     try:
-        response = requests.get(f"{TRADING_SERVER_URL}/health", timeout=5)
-        if response.status_code == 200:
-            await ctx.send("✅ Trading Server is healthy")
+        if target == 'server':
+            data = await ctx.bot.trading_client.get_profile(seconds, idle=idle)
+            summary = f"{len(data.splitlines())} stacks"
         else:
-            await ctx.send(f"⚠️ Trading Server returned status code: {response.status_code}")
+            profile = await asyncio.to_thread(profiler.sample, seconds, idle=idle)
+            data = profile.collapsed().encode()
+            info = profile.summary()
+            summary = f"{info['samples']} samples, {info['stacks']} stacks, CPU {info['cpu_seconds']}s"
+    except profiler.ProfilerBusy as e:
+        await ctx.send(f"⚠️ {e}")
+        return
     except Exception as e:
-        await ctx.send(f"❌ Cannot reach Trading Server: {str(e)}")
+        logger.error(f"Error in profile command: {e}")
+        await ctx.send(f"❌ Profile failed: {e}")
+        return
+    
+    filename = f"{target}-{time.strftime('%Y%m%d-%H%M%S')}.collapsed"
+    await ctx.send(f"✅ {target} profile: {summary} (open in speedscope or flamegraph.pl)",
+                   file=discord.File(io.BytesIO(data), filename=filename))
 
 
 def main():
@@ -464,8 +1074,15 @@ def main():
         logger.error("❌ DISCORD_BOT_TOKEN not set in .env file")
         return
     
-    if not DISCORD_CHANNEL_ID:
-        logger.error("❌ DISCORD_CHANNEL_ID not set in .env file")
+    try:
+        channels = load_channel_configs()
+        for config in channels.values():
+            SignalParser.for_profile(config.profile)  # Fail fast on unknown profiles
+    except ValueError as e:
+        logger.error(f"❌ Invalid channel configuration: {e}")
+        return
+    if not channels:
+        logger.error("❌ DISCORD_CHANNEL_ID (or DISCORD_CHANNELS) not set in .env file")
         return
     
     if not TRADING_SERVER_API_KEY:
@@ -473,11 +1090,13 @@ def main():
         return
     
     # Create bot instance
-    bot = TradingBot()
+    bot = TradingBot(channels)
     
     # Add standalone commands to the bot
     bot.add_command(cmd_update)
     bot.add_command(cmd_health)
+    bot.add_command(cmd_channels)
+    bot.add_command(cmd_profile)
     
     try:
         logger.info("🚀 Starting Discord Bot...")
@@ -0,0 +1,113 @@
+"""
+Channel Config Module
+
+Loads the Discord channels the bot monitors from the environment. Each
+channel has its own parser profile, risk multiplier and target trading
+account, so one bot (one gateway connection) can follow several signal
+providers.
+"""
+import os
+import logging
+from typing import Dict, Optional, Any
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHANNEL_NAME = "main"
+
+
+class ChannelConfig:
+    """A monitored channel and how its signals are handled."""
+
+    def __init__(self, name: str, channel_id: int, guild_id: Optional[int] = None,
+                 profile: str = 'default', risk_multiplier: float = 1.0,
+                 account: Optional[str] = None):
+        """
+        Initialize channel config.
+
+        Args:
+            name: Channel name used in logs and stats (e.g., "main", "alpha")
+            channel_id: Discord channel ID
+            guild_id: Guild the channel must belong to (None = any)
+            profile: SignalParser profile name
+            risk_multiplier: Scales the server's per-trade risk for this channel's signals
+            account: Trading account to execute on (None = every account)
+        """
+        self.name = name
+        self.channel_id = channel_id
+        self.guild_id = guild_id
+        self.profile = profile
+        self.risk_multiplier = risk_multiplier
+        self.account = account
+
+    def matches(self, message_guild_id: Optional[int]) -> bool:
+        """True if a message from this channel ID also comes from the configured guild."""
+        return self.guild_id is None or self.guild_id == message_guild_id
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Config as a dict (for logs and stats)."""
+        return {
+            'name': self.name,
+            'channel_id': self.channel_id,
+            'guild_id': self.guild_id,
+            'profile': self.profile,
+            'risk_multiplier': self.risk_multiplier,
+            'account': self.account
+        }
+
+
+def _optional_int(value: Optional[str]) -> Optional[int]:
+    return int(value) if value and value.strip() else None
+
+
+def load_channel_configs() -> Dict[int, ChannelConfig]:
+    """
+    Read monitored channels from the environment.
+
+    Multiple channels are configured with a comma-separated list of names:
+
+        DISCORD_CHANNELS=main,alpha
+        CHANNEL_MAIN_ID=...              CHANNEL_ALPHA_ID=...
+        CHANNEL_ALPHA_GUILD_ID=...       (optional)
+        CHANNEL_ALPHA_PROFILE=oneline    (optional, default "default")
+        CHANNEL_ALPHA_RISK_MULTIPLIER=0.5 (optional, default 1.0)
+        CHANNEL_ALPHA_ACCOUNT=alpha      (optional, default all accounts)
+
+    Without DISCORD_CHANNELS the single DISCORD_CHANNEL_ID is used as
+    channel "main" with the default profile.
+
+    Returns:
+        Dict of channel ID -> ChannelConfig
+
+    Raises:
+        ValueError: If a listed channel has no ID or an invalid value
+    """
+    names = [n.strip() for n in os.getenv('DISCORD_CHANNELS', '').split(',') if n.strip()]
+
+    if not names:
+        channel_id = _optional_int(os.getenv('DISCORD_CHANNEL_ID'))
+        if not channel_id:
+            return {}
+        return {channel_id: ChannelConfig(DEFAULT_CHANNEL_NAME, channel_id)}
+
+    channels = {}
+    for name in names:
+        prefix = f"CHANNEL_{name.upper()}_"
+        channel_id = _optional_int(os.getenv(f"{prefix}ID"))
+        if not channel_id:
+            raise ValueError(f"{prefix}ID not set for channel '{name}'")
+        if channel_id in channels:
+            raise ValueError(f"Channel ID {channel_id} is listed twice ({channels[channel_id].name}, {name})")
+
+        risk_multiplier = float(os.getenv(f"{prefix}RISK_MULTIPLIER", 1.0))
+        if risk_multiplier <= 0:
+            raise ValueError(f"{prefix}RISK_MULTIPLIER must be positive")
+
+        channels[channel_id] = ChannelConfig(
+            name=name,
+            channel_id=channel_id,
+            guild_id=_optional_int(os.getenv(f"{prefix}GUILD_ID")),
+            profile=os.getenv(f"{prefix}PROFILE", 'default'),
+            risk_multiplier=risk_multiplier,
+            account=os.getenv(f"{prefix}ACCOUNT") or None
+        )
+    return channels
@@ -0,0 +1,115 @@
+"""
+Channel State Module
+
+Remembers the last message processed in each monitored channel, so that
+after a disconnect the bot can fetch what it missed with
+channel.history(after=...).
+
+State is a small JSON file ({channel_id: last_message_id}). Messages are
+processed concurrently and can finish out of order, so a cursor only moves
+past a message once every message below it has finished: IDs are marked
+in flight with start() and the cursor stops just below the oldest one
+still running. Discord message IDs are snowflakes and increase with time,
+so a cursor only ever advances.
+
+advance() only updates memory; flush() writes the file (atomically) when
+a cursor has moved, and is called periodically and on shutdown.
+"""
+import json
+import logging
+import os
+from typing import Optional, Dict, Set
+
+logger = logging.getLogger(__name__)
+
+
+class ChannelState:
+    """
+    Persistent per-channel "last processed message" cursors.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize channel state.
+
+        Args:
+            path: JSON file to load from and save to
+        """
+        self.path = path
+        self._cursors: Dict[str, int] = {}
+        self._in_flight: Dict[str, Set[int]] = {}
+        self._finished: Dict[str, Set[int]] = {}  # Done, but above an in-flight ID
+        self._dirty = False
+        self._load()
+
+    def _load(self):
+        """Load cursors from disk (a missing or corrupt file starts empty)."""
+        if not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                self._cursors = {str(k): int(v) for k, v in json.load(f).items()}
+            logger.info(f"Loaded channel state for {len(self._cursors)} channel(s)")
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable channel state {self.path}: {e}")
+
+    def flush(self) -> bool:
+        """
+        Write cursors to disk atomically if any moved since the last flush.
+
+        Returns:
+            True if the file was written
+        """
+        if not self._dirty:
+            return False
+        self._dirty = False
+        cursors = dict(self._cursors)
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(cursors, f)
+            os.replace(tmp_path, self.path)
+            return True
+        except OSError as e:
+            self._dirty = True
+            logger.error(f"Failed to save channel state: {e}")
+            return False
+
+    def last_message_id(self, channel_id: int) -> Optional[int]:
+        """Last processed message ID in a channel, or None if never seen."""
+        return self._cursors.get(str(channel_id))
+
+    def start(self, channel_id: int, message_id: int):
+        """Mark a message as being processed - the cursor won't pass it until advance()."""
+        self._in_flight.setdefault(str(channel_id), set()).add(message_id)
+
+    def advance(self, channel_id: int, message_id: int) -> bool:
+        """
+        Mark a message as processed and move the cursor as far as allowed.
+
+        Args:
+            channel_id: Discord channel ID
+            message_id: ID of a message that has been processed
+
+        Returns:
+            True if the cursor moved
+        """
+        key = str(channel_id)
+        in_flight = self._in_flight.get(key, set())
+        in_flight.discard(message_id)
+        finished = self._finished.setdefault(key, set())
+        finished.add(message_id)
+
+        oldest_running = min(in_flight) if in_flight else None
+        done = [i for i in finished if oldest_running is None or i < oldest_running]
+        finished.difference_update(done)
+        if not in_flight:
+            self._in_flight.pop(key, None)
+        if not finished:
+            self._finished.pop(key, None)
+
+        if not done or self._cursors.get(key, 0) >= max(done):
+            return False
+        self._cursors[key] = max(done)
+        self._dirty = True
+        return True
@@ -0,0 +1,278 @@
+"""
+LLM Fallback Module
+
+Parses signals the pattern parsers can't handle by asking Claude.
+
+- One long-lived AsyncAnthropic client, so calls never block the event loop
+  and connections are reused.
+- Results are memoised by a hash of the normalised message in an LRU cache
+  (optionally persisted to disk), so reposted or edited messages don't pay
+  the LLM latency again. "Not a signal" answers are cached too, for a
+  limited time.
+- Every call has a hard latency budget (queueing included) and the number
+  of concurrent requests is capped.
+
+Set base_url to point the client at a local fake endpoint for testing.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import re
+import time
+from collections import OrderedDict
+from typing import Optional, Dict, Any, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Optional: Try to import Claude API client
+try:
+    import anthropic
+    LLM_AVAILABLE = True
+except ImportError:
+    LLM_AVAILABLE = False
+    logger.warning("Anthropic package not installed - Claude fallback unavailable")
+
+DEFAULT_MODEL = "claude-sonnet-4-5-20250929"  # Best model for coding and complex parsing
+
+PROMPT = """Parse this trading signal and extract the key information.
+Return ONLY a JSON object with these exact fields (no markdown, no explanation):
+{{
+    "symbol": "SYMBOL-USDT" (e.g., "BTC-USDT"),
+    "side": "long" or "short",
+    "entry": decimal number or null,
+    "stop_loss": decimal number or null,
+    "take_profit": decimal number or null,
+    "take_profit_2": decimal number or null,
+    "take_profit_3": decimal number or null,
+    "leverage": integer or null
+}}
+If the message is not a trade signal, return {{"symbol": null, "side": null}}.
+
+Trading Signal:
+{message}
+
+Remember: Return ONLY the JSON object, nothing else."""
+
+SIDES = ('long', 'short', 'buy', 'sell')
+
+# Markdown and whitespace don't change what a message means
+_MARKDOWN_RE = re.compile(r'[*_`~|>]+')
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def cache_key(message: str) -> str:
+    """
+    Hash a message after normalising formatting, case and whitespace.
+
+    Args:
+        message: Message text
+
+    Returns:
+        Hex digest identifying the message content
+    """
+    text = _MARKDOWN_RE.sub(' ', message)
+    text = _WHITESPACE_RE.sub(' ', text).strip().casefold()
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def parse_response(text: str) -> Optional[Dict[str, Any]]:
+    """
+    Convert Claude's JSON answer into parser fields.
+
+    Args:
+        text: Response text (may be wrapped in a markdown code block)
+
+    Returns:
+        Dict with symbol, side, entry, sl, tp1, tp2, tp3 and leverage,
+        or None if Claude says it isn't a signal
+
+    Raises:
+        ValueError: If the response contains no JSON object
+    """
+    start, end = text.find('{'), text.rfind('}')
+    if start < 0 or end < start:
+        raise ValueError(f"No JSON object in response: {text[:100]}")
+    data = json.loads(text[start:end + 1])
+
+    symbol = data.get('symbol')
+    side = str(data.get('side') or '').lower()
+    if not symbol or side not in SIDES:
+        return None
+
+    return {
+        'symbol': str(symbol).upper().replace('/', '-'),
+        'side': side,
+        'entry': data.get('entry'),
+        'sl': data.get('stop_loss'),
+        'tp1': data.get('take_profit'),
+        'tp2': data.get('take_profit_2'),
+        'tp3': data.get('take_profit_3'),
+        'leverage': data.get('leverage')
+    }
+
+
+class LLMFallback:
+    """
+    Cached, budgeted Claude parser used when no pattern matches.
+    """
+
+    def __init__(self, api_key: str, model: str = DEFAULT_MODEL, base_url: Optional[str] = None,
+                 budget: float = 10.0, max_concurrency: int = 2, cache_size: int = 1024,
+                 negative_ttl: float = 3600.0, cache_file: Optional[str] = None):
+        """
+        Initialize fallback parser.
+
+        Args:
+            api_key: Anthropic API key
+            model: Model name
+            base_url: Override the API URL (e.g., a local fake endpoint)
+            budget: Hard limit in seconds for one call, including time queued
+                    behind other calls
+            max_concurrency: Maximum requests in flight at once
+            cache_size: Maximum cached results (least recently used are dropped)
+            negative_ttl: Seconds to remember "not a signal" answers
+            cache_file: Optional JSON file the cache is loaded from and saved to
+        """
+        if not LLM_AVAILABLE:
+            raise RuntimeError("anthropic package not installed")
+
+        self.model = model
+        self.budget = budget
+        self.cache_size = cache_size
+        self.negative_ttl = negative_ttl
+        self.cache_file = cache_file
+
+        # The budget is enforced here, so the SDK must not retry on its own
+        self._client = anthropic.AsyncAnthropic(
+            api_key=api_key,
+            base_url=base_url,
+            timeout=budget,
+            max_retries=0
+        )
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        # key -> (fields or None, expires_at or None)
+        self._cache: "OrderedDict[str, Tuple[Optional[Dict[str, Any]], Optional[float]]]" = OrderedDict()
+
+        self.stats = {
+            'requests': 0,
+            'cache_hits': 0,
+            'negative_hits': 0,
+            'api_calls': 0,
+            'timeouts': 0,
+            'errors': 0
+        }
+
+        if cache_file:
+            self.load_cache()
+
+    def _cache_get(self, key: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """Look up a cached result; returns (hit, fields)."""
+        entry = self._cache.get(key)
+        if entry is None:
+            return False, None
+        fields, expires_at = entry
+        if expires_at is not None and expires_at < time.time():
+            del self._cache[key]
+            return False, None
+        self._cache.move_to_end(key)
+        return True, fields
+
+    def _cache_put(self, key: str, fields: Optional[Dict[str, Any]]):
+        """Store a result, evicting the least recently used entries."""
+        expires_at = None if fields is not None else time.time() + self.negative_ttl
+        self._cache[key] = (fields, expires_at)
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    async def extract(self, message: str) -> Optional[Dict[str, Any]]:
+        """
+        Extract signal fields from a message.
+
+        Args:
+            message: Message text
+
+        Returns:
+            Dict with symbol, side, entry, sl, tp1, tp2, tp3 and leverage,
+            or None if it isn't a signal or the call failed / ran out of time
+        """
+        self.stats['requests'] += 1
+        key = cache_key(message)
+
+        hit, fields = self._cache_get(key)
+        if hit:
+            if fields is None:
+                self.stats['negative_hits'] += 1
+            else:
+                self.stats['cache_hits'] += 1
+            return fields
+
+        try:
+            fields = await asyncio.wait_for(self._call(message), self.budget)
+        except asyncio.TimeoutError:
+            self.stats['timeouts'] += 1
+            logger.warning(f"Claude fallback exceeded {self.budget}s budget")
+            return None
+        except Exception as e:
+            # Transient failures are not cached
+            self.stats['errors'] += 1
+            logger.error(f"Claude fallback failed: {e}")
+            return None
+
+        self._cache_put(key, fields)
+        return fields
+
+    async def _call(self, message: str) -> Optional[Dict[str, Any]]:
+        """Ask Claude to parse one message (waits for a concurrency slot)."""
+        async with self._semaphore:
+            self.stats['api_calls'] += 1
+            response = await self._client.messages.create(
+                model=self.model,
+                max_tokens=300,
+                messages=[{"role": "user", "content": PROMPT.format(message=message)}]
+            )
+        return parse_response(response.content[0].text.strip())
+
+    def load_cache(self):
+        """Load cached results from cache_file (missing or corrupt files are ignored)."""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r', encoding='utf-8') as f:
+                entries = json.load(f).get('entries', [])
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable Claude cache {self.cache_file}: {e}")
+            return
+
+        now = time.time()
+        for key, fields, expires_at in entries[-self.cache_size:]:
+            if expires_at is None or expires_at > now:
+                self._cache[key] = (fields, expires_at)
+        logger.info(f"Loaded {len(self._cache)} cached Claude results")
+
+    def save_cache(self):
+        """Write the cache to cache_file (oldest entries first)."""
+        if not self.cache_file:
+            return
+        entries = [[key, fields, expires_at] for key, (fields, expires_at) in self._cache.items()]
+        tmp_path = f"{self.cache_file}.tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump({'entries': entries}, f)
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            logger.error(f"Failed to save Claude cache: {e}")
+
+    async def close(self):
+        """Save the cache and close the HTTP client."""
+        self.save_cache()
+        await self._client.close()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get fallback statistics."""
+        stats = self.stats.copy()
+        stats['cache_entries'] = len(self._cache)
+        return stats
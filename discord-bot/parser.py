@@ -5,10 +5,8 @@ Extracts trade signal information from Discord messages.
 Self-contained - add new patterns without affecting other modules.
 """
 import re
-import json
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List, Tuple
 import logging
-import os
 
 # Add parent directory to path for shared imports
 import sys
@@ -16,16 +14,21 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
 from shared.models import TradeSignal
+from shared.metrics import REGISTRY
+from signal_tokenizer import scan_signal
+from pattern_registry import PatternRegistry
 
 logger = logging.getLogger(__name__)
 
-# Optional: Try to import Claude API client
-try:
-    import anthropic
-    CLAUDE_AVAILABLE = True
-except ImportError:
-    CLAUDE_AVAILABLE = False
-    logger.warning("Anthropic package not installed - Claude fallback unavailable")
+# parse_detailed outcomes when no pattern produced a signal
+PREFILTER_REJECTED = 'prefilter_rejected'
+UNPARSED = 'unparsed'
+
+# Hit rate = pattern outcomes / all outcomes
+PARSE_OUTCOMES = REGISTRY.counter('signal_parse_total', 'Parsed messages by outcome (pattern name, '
+                                  'claude_fallback, prefilter_rejected or unparsed)', ['outcome'])
+PATTERN_MISSES = REGISTRY.counter('signal_pattern_misses_total', 'Patterns tried without producing a signal',
+                                  ['pattern'])
 
 
 class SignalParser:
@@ -35,20 +38,13 @@ class SignalParser:
     Supports multiple signal formats and can be extended with new patterns.
     """
     
+    # Labelled formats are handled by the single-pass tokenizer (signal_tokenizer.py):
+    # Trading Signal Alert format (YOUR FORMAT)
+    # Example: "📝PAIR: SEI/USDT #1131 ... SIDE: __SHORT📉__ ... 📍ENTRY: `0.125294` ✖️SL: `0.127698` TP1: `0.123615` ... ⚖️LEVERAGE: 35x"
+    TOKENIZER_PATTERN = 'trading_signal_alert'
+    
     # Pattern library - easily add new formats
     PATTERNS = {
-        # Pattern 1: Trading Signal Alert format (YOUR FORMAT)
-        # Example: "📝PAIR: SEI/USDT #1131 ... SIDE: __SHORT📉__ ... 📍ENTRY: `0.125294` ✖️SL: `0.127698` TP1: `0.123615` ... ⚖️LEVERAGE: 35x"
-        'trading_signal_alert': re.compile(
-            r'PAIR[:\s*]+(?P<symbol>[A-Z]+/USDT)(?:\s*#\d+)?.*?'
-            r'SIDE[:\s*]+[_*]*(?P<side>LONG|SHORT)[📈📉_*]*.*?'
-            r'ENTRY[:\s*]+`?(?P<entry>[\d.]+)`?.*?'
-            r'SL[:\s*]+`?(?P<sl>[\d.]+)`?.*?'
-            r'TP1[:\s*]+`?(?P<tp1>[\d.]+)`?(?:.*?TP2[:\s*]+`?(?P<tp2>[\d.]+)`?)?(?:.*?TP3[:\s*]+`?(?P<tp3>[\d.]+)`?)?'
-            r'(?:.*?LEVERAGE[:\s*]+(?P<leverage>\d+)x)?',
-            re.IGNORECASE | re.DOTALL
-        ),
-        
         # Pattern 2: Standard format
         # Example: "🚨 LONG BTC-USDT Entry: 60000 SL: 58000 TP: 65000 Size: 0.01"
         'standard': re.compile(
@@ -82,6 +78,24 @@ class SignalParser:
         )
     }
     
+    # Cheap pre-checks - a pattern only runs if its check passes. Each check
+    # is a necessary condition for its pattern, so it never changes results.
+    PRECHECKS = {
+        TOKENIZER_PATTERN: re.compile(r'PAIR|SYMBOL', re.IGNORECASE).search,  # Symbol needs a label
+        'standard': lambda message: '-' in message,  # Hyphenated symbol
+        'compact': lambda message: message.count('/') >= 2,  # entry/sl/tp
+        'emoji': re.compile(r'📈|📉|🟢|🔴').search
+    }
+    
+    # Parser profiles for monitored channels: which formats to try and whether
+    # unparsed messages may go to the LLM fallback (patterns None = all)
+    PROFILES = {
+        'default': {'patterns': None, 'llm': True},
+        'strict': {'patterns': None, 'llm': False},
+        'alert': {'patterns': [TOKENIZER_PATTERN], 'llm': False},
+        'oneline': {'patterns': ['standard', 'compact', 'emoji'], 'llm': False},
+    }
+    
     # Emoji to side mapping
     EMOJI_SIDES = {
         '📈': 'long',
@@ -90,46 +104,107 @@ class SignalParser:
         '🔴': 'short'
     }
     
-    # Signal indicators - messages containing these are likely signals
-    SIGNAL_INDICATORS = [
-        '🚨',
-        'signal',
-        'trade',
-        'entry',
-        'long',
-        'short',
-        '📈',
-        '📉',
-        'trading signal alert',
-        'pair:',
-        'side:'
-    ]
+    # Pre-filter - one scan looking for structural evidence of a signal:
+    # a symbol (BTC-USDT, SEI/USDT, BTCUSDT, or a PAIR:/SYMBOL: label) and prices
+    PREFILTER = re.compile(
+        r'(?P<symbol>\b[A-Z0-9]{2,20}[/-]?(?:USDT|USDC|USD)\b|\bPAIR\b|\bSYMBOL\b)'
+        r'|(?P<price>(?<![\w.])\d*\.?\d+(?![\w.%]))',
+        re.IGNORECASE
+    )
+    PREFILTER_MIN_PRICES = 2  # Every format has at least an entry and a stop/target
     
-    def __init__(self):
-        """Initialize parser."""
+    def __init__(self, llm_fallback=None, registry: Optional[PatternRegistry] = None):
+        """
+        Initialize parser.
+        
+        Args:
+            llm_fallback: Optional LLMFallback used by parse_async when no pattern matches
+            registry: Pattern registry to use (default: default_registry())
+        """
+        self.llm_fallback = llm_fallback
+        self.registry = registry or self.default_registry()
         self.stats = {
             'total_parsed': 0,
             'successful': 0,
             'failed': 0,
-            'by_pattern': {}
+            'prefilter_rejected': 0,
+            'by_pattern': {},
+            'pattern_misses': {}
         }
     
+    @classmethod
+    def default_registry(cls, patterns: Optional[List[str]] = None) -> PatternRegistry:
+        """
+        Build a registry with the tokenizer and every pattern in PATTERNS.
+        
+        Extra channel formats can be added to the returned registry with
+        register() / register_regex() without touching these.
+        
+        Args:
+            patterns: Only register these pattern names (default: all)
+        
+        Returns:
+            PatternRegistry with pre-checks and adaptive ordering
+        """
+        registry = PatternRegistry()
+        if patterns is None or cls.TOKENIZER_PATTERN in patterns:
+            registry.register(cls.TOKENIZER_PATTERN, scan_signal, cls.PRECHECKS.get(cls.TOKENIZER_PATTERN))
+        for pattern_name, pattern in cls.PATTERNS.items():
+            if patterns is None or pattern_name in patterns:
+                registry.register_regex(pattern_name, pattern, cls.PRECHECKS.get(pattern_name))
+        return registry
+    
+    @classmethod
+    def for_profile(cls, profile: str, llm_fallback=None) -> 'SignalParser':
+        """
+        Create a parser for a channel's parser profile.
+        
+        Args:
+            profile: Name from PROFILES
+            llm_fallback: LLMFallback to use if the profile allows it
+        
+        Returns:
+            SignalParser with its own registry (and ordering/stats)
+            
+        Raises:
+            ValueError: If the profile is unknown
+        """
+        if profile not in cls.PROFILES:
+            raise ValueError(f"Unknown parser profile '{profile}' (known: {', '.join(cls.PROFILES)})")
+        settings = cls.PROFILES[profile]
+        return cls(
+            llm_fallback=llm_fallback if settings['llm'] else None,
+            registry=cls.default_registry(settings['patterns'])
+        )
+    
     def is_signal_message(self, message: str) -> bool:
         """
         Quick check if message might contain a trade signal.
         
+        Scans the message once and stops as soon as it has seen a symbol
+        token and at least two price tokens. Chat that merely mentions
+        "long" or "entry" is rejected without running the parsers.
+        
         Args:
             message: Discord message content
             
         Returns:
             True if message likely contains a signal
         """
-        message_lower = message.lower()
-        return any(indicator in message_lower for indicator in self.SIGNAL_INDICATORS)
+        has_symbol = False
+        prices = 0
+        for match in self.PREFILTER.finditer(message):
+            if match.lastgroup == 'symbol':
+                has_symbol = True
+            else:
+                prices += 1
+            if has_symbol and prices >= self.PREFILTER_MIN_PRICES:
+                return True
+        return False
     
     def parse(self, message: str, message_id: Optional[str] = None) -> Optional[TradeSignal]:
         """
-        Parse a Discord message for trade signal.
+        Parse a Discord message for trade signal using the local patterns only.
         
         Args:
             message: Discord message content
@@ -138,64 +213,127 @@ class SignalParser:
         Returns:
             TradeSignal object if parsing successful, None otherwise
         """
+        return self.parse_detailed(message, message_id)[0]
+    
+    def parse_detailed(self, message: str, message_id: Optional[str] = None) -> Tuple[Optional[TradeSignal], str]:
+        """
+        Parse a message with the local patterns and report what happened.
+        
+        Args:
+            message: Discord message content
+            message_id: Optional Discord message ID for tracking
+            
+        Returns:
+            (signal, outcome) - outcome is the name of the pattern that
+            matched, PREFILTER_REJECTED or UNPARSED
+        """
         self.stats['total_parsed'] += 1
         
-        # Quick filter
-        if not self.is_signal_message(message):
-            logger.debug(f"Message doesn't contain signal indicators: {message[:50]}...")
+        if not self._passes_prefilter(message):
+            return None, PREFILTER_REJECTED
+        
+        signal, pattern_name = self._parse_patterns(message, message_id)
+        if not signal:
+            self.stats['failed'] += 1
+            PARSE_OUTCOMES.labels(UNPARSED).inc()
+            logger.warning(f"Could not parse message: {message[:100]}...")
+            return None, UNPARSED
+        return signal, pattern_name
+    
+    async def parse_async(self, message: str, message_id: Optional[str] = None) -> Optional[TradeSignal]:
+        """
+        Parse a Discord message, falling back to the LLM if no pattern matches.
+        
+        Args:
+            message: Discord message content
+            message_id: Optional Discord message ID for tracking
+            
+        Returns:
+            TradeSignal object if parsing successful, None otherwise
+        """
+        self.stats['total_parsed'] += 1
+        
+        if not self._passes_prefilter(message):
             return None
         
-        # Try each pattern
-        for pattern_name, pattern in self.PATTERNS.items():
-            try:
-                signal = self._try_pattern(pattern, pattern_name, message, message_id)
-                if signal:
-                    self.stats['successful'] += 1
-                    self.stats['by_pattern'][pattern_name] = self.stats['by_pattern'].get(pattern_name, 0) + 1
-                    logger.info(f"Successfully parsed signal using pattern '{pattern_name}': {signal.symbol} {signal.side}")
-                    return signal
-            except Exception as e:
-                logger.error(f"Error with pattern '{pattern_name}': {e}")
-                continue
+        signal, _ = self._parse_patterns(message, message_id)
+        if signal:
+            return signal
+        
+        if self.llm_fallback:
+            logger.info("No pattern matched, attempting Claude fallback...")
+            data = await self.llm_fallback.extract(message)
+            signal = self._build_signal(data, message, message_id) if data else None
+            if signal:
+                self._record_success('claude_fallback', signal)
+                return signal
         
         self.stats['failed'] += 1
+        PARSE_OUTCOMES.labels(UNPARSED).inc()
         logger.warning(f"Could not parse message: {message[:100]}...")
-        
-        # Try Claude fallback if available
-        if CLAUDE_AVAILABLE and os.getenv('CLAUDE_API_KEY'):
-            logger.info("Attempting Claude API fallback...")
-            try:
-                signal = self._parse_with_claude(message, message_id)
-                if signal:
-                    self.stats['successful'] += 1
-                    self.stats['by_pattern']['claude_fallback'] = self.stats['by_pattern'].get('claude_fallback', 0) + 1
-                    logger.info(f"✅ Claude fallback successful: {signal.symbol} {signal.side}")
-                    return signal
-            except Exception as e:
-                logger.error(f"Claude fallback failed: {e}")
-        
         return None
     
-    def _try_pattern(self, pattern: re.Pattern, pattern_name: str, 
-                     message: str, message_id: Optional[str]) -> Optional[TradeSignal]:
+    def _passes_prefilter(self, message: str) -> bool:
+        """Run the pre-filter and count rejections."""
+        if self.is_signal_message(message):
+            return True
+        self.stats['prefilter_rejected'] += 1
+        PARSE_OUTCOMES.labels(PREFILTER_REJECTED).inc()
+        logger.debug(f"Message doesn't contain signal indicators: {message[:50]}...")
+        return False
+    
+    def _record_success(self, pattern_name: str, signal: TradeSignal):
+        """Count a parsed signal against the pattern that produced it."""
+        self.stats['successful'] += 1
+        self.stats['by_pattern'][pattern_name] = self.stats['by_pattern'].get(pattern_name, 0) + 1
+        PARSE_OUTCOMES.labels(pattern_name).inc()
+        logger.info(f"Successfully parsed signal using pattern '{pattern_name}': {signal.symbol} {signal.side}")
+    
+    def _record_miss(self, pattern_name: str):
+        """Count a pattern that ran without producing a signal."""
+        self.stats['pattern_misses'][pattern_name] = self.stats['pattern_misses'].get(pattern_name, 0) + 1
+        PATTERN_MISSES.labels(pattern_name).inc()
+    
+    def _parse_patterns(self, message: str, message_id: Optional[str]) -> Tuple[Optional[TradeSignal], Optional[str]]:
         """
-        Try to match a specific pattern.
+        Try the registered patterns whose pre-checks pass, most frequent first.
         
         Args:
-            pattern: Compiled regex pattern
-            pattern_name: Name of pattern for logging
             message: Message to parse
             message_id: Message ID for tracking
             
         Returns:
-            TradeSignal if match found, None otherwise
+            (signal, pattern_name) from the first pattern that matches, (None, None) otherwise
         """
-        match = pattern.search(message)
-        if not match:
-            return None
+        for entry in self.registry.candidates(message):
+            try:
+                data = entry.extract(message)
+                signal = self._build_signal(data, message, message_id) if data else None
+            except Exception as e:
+                logger.error(f"Error with pattern '{entry.name}': {e}")
+                signal = None
+            
+            self.registry.record(entry, signal is not None)
+            if signal:
+                self._record_success(entry.name, signal)
+                return signal, entry.name
+            self._record_miss(entry.name)
         
-        data = match.groupdict()
+        return None, None
+    
+    def _build_signal(self, data: Dict[str, Any], message: str,
+                      message_id: Optional[str]) -> Optional[TradeSignal]:
+        """
+        Build and validate a TradeSignal from extracted fields.
         
+        Args:
+            data: Extracted fields (symbol, side/emoji, entry, sl, tp/tp1..tp3, size, leverage)
+            message: Original message
+            message_id: Message ID for tracking
+            
+        Returns:
+            TradeSignal if the fields form a valid signal, None otherwise
+        """
         # Handle emoji-based side detection
         side = data.get('side')
         if not side and 'emoji' in data:
@@ -293,7 +431,13 @@ class SignalParser:
     
     def get_stats(self) -> Dict[str, Any]:
         """Get parser statistics."""
-        return self.stats.copy()
+        stats = self.stats.copy()
+        total = stats['total_parsed']
+        stats['prefilter_rejection_rate'] = round(stats['prefilter_rejected'] / total, 4) if total else 0.0
+        stats['registry'] = self.registry.get_stats()
+        if self.llm_fallback:
+            stats['llm_fallback'] = self.llm_fallback.get_stats()
+        return stats
     
     def reset_stats(self):
         """Reset parser statistics."""
@@ -301,96 +445,10 @@ class SignalParser:
             'total_parsed': 0,
             'successful': 0,
             'failed': 0,
-            'by_pattern': {}
+            'prefilter_rejected': 0,
+            'by_pattern': {},
+            'pattern_misses': {}
         }
-    
-    def _parse_with_claude(self, message: str, message_id: Optional[str] = None) -> Optional[TradeSignal]:
-        """
-        Parse signal using Claude API as fallback.
-        
-        Args:
-            message: Discord message content
-            message_id: Optional message ID for tracking
-            
-        Returns:
-            TradeSignal if successfully parsed, None otherwise
-        """
-        if not CLAUDE_AVAILABLE:
-            logger.warning("Claude API not available (anthropic package not installed)")
-            return None
-        
-        api_key = os.getenv('CLAUDE_API_KEY')
-        if not api_key:
-            logger.warning("CLAUDE_API_KEY not set in environment")
-            return None
-        
-        try:
-            client = anthropic.Anthropic(api_key=api_key)
-            
-            prompt = f"""Parse this trading signal and extract the key information.
-Return ONLY a JSON object with these exact fields (no markdown, no explanation):
-{{
-    "symbol": "SYMBOL-USDT" (e.g., "BTC-USDT"),
-    "side": "long" or "short",
-    "entry": decimal number or null,
-    "stop_loss": decimal number or null,
-    "take_profit": decimal number or null,
-    "take_profit_2": decimal number or null,
-    "take_profit_3": decimal number or null,
-    "leverage": integer or null
-}}
-
-Trading Signal:
-{message}
-
-Remember: Return ONLY the JSON object, nothing else."""
-            
-            response = client.messages.create(
-                model="claude-sonnet-4-5-20250929",  # Best model for coding and complex parsing
-                max_tokens=300,
-                messages=[{"role": "user", "content": prompt}]
-            )
-            
-            response_text = response.content[0].text.strip()
-            
-            # Remove markdown code blocks if present
-            if response_text.startswith('```'):
-                lines = response_text.split('\n')
-                response_text = '\n'.join(lines[1:-1]) if len(lines) > 2 else response_text
-                response_text = response_text.replace('```json', '').replace('```', '').strip()
-            
-            # Parse JSON response
-            import json
-            data = json.loads(response_text)
-            
-            # Validate required fields
-            if not data.get('symbol') or not data.get('side'):
-                logger.warning("Claude response missing required fields")
-                return None
-            
-            # Create TradeSignal
-            signal = TradeSignal(
-                symbol=data['symbol'],
-                side=data['side'],
-                entry_price=data.get('entry'),
-                stop_loss=data.get('stop_loss'),
-                take_profit=data.get('take_profit'),
-                take_profit_2=data.get('take_profit_2'),
-                take_profit_3=data.get('take_profit_3'),
-                leverage=data.get('leverage'),
-                signal_id=message_id,
-                raw_message=message
-            )
-            
-            return signal
-            
-        except json.JSONDecodeError as e:
-            logger.error(f"Claude returned invalid JSON: {e}")
-            logger.debug(f"Response was: {response_text[:200]}")
-            return None
-        except Exception as e:
-            logger.error(f"Claude API error: {e}")
-            return None
 
 
 # Convenience function for simple parsing
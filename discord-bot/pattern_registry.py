@@ -0,0 +1,146 @@
+"""
+Pattern Registry Module
+
+Holds the signal formats SignalParser tries, each with an optional cheap
+pre-check (e.g. "contains PAIR") that rules the format out before its
+extractor runs.
+
+Evaluation order adapts to what the channel actually posts: every
+`reorder_interval` messages the patterns are re-sorted by recent hit
+count, so the most common format is tried first. Hit counts decay at
+each re-sort, so the order follows changes in the message mix.
+
+Formats are expected not to overlap (the pre-checks normally make them
+disjoint): the first pattern that produces a signal wins, and that order
+changes over time.
+"""
+import re
+from typing import Optional, Dict, Any, Callable, Iterator, List
+
+Extractor = Callable[[str], Optional[Dict[str, Any]]]
+Precheck = Callable[[str], bool]
+
+
+class PatternEntry:
+    """One registered format and its counters."""
+
+    __slots__ = ('name', 'extract', 'precheck', 'index', 'hits', 'misses', 'skipped', 'score')
+
+    def __init__(self, name: str, extract: Extractor, precheck: Optional[Precheck], index: int):
+        self.name = name
+        self.extract = extract
+        self.precheck = precheck
+        self.index = index  # Registration order, breaks ties
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0  # Ruled out by the pre-check
+        self.score = 0.0  # Decayed hit count used for ordering
+
+
+class PatternRegistry:
+    """
+    Ordered set of signal formats with pre-checks and adaptive ordering.
+    """
+
+    def __init__(self, reorder_interval: int = 256, decay: float = 0.5):
+        """
+        Initialize registry.
+
+        Args:
+            reorder_interval: Messages between re-sorts (0 keeps registration order)
+            decay: Factor applied to hit scores after each re-sort
+        """
+        self.reorder_interval = reorder_interval
+        self.decay = decay
+        self.patterns: List[PatternEntry] = []
+        self._by_name: Dict[str, PatternEntry] = {}
+        self._since_reorder = 0
+        self.reorders = 0
+
+    def register(self, name: str, extract: Extractor, precheck: Optional[Precheck] = None):
+        """
+        Add a format.
+
+        Args:
+            name: Unique pattern name (used in stats)
+            extract: Returns the extracted fields (symbol, side/emoji, entry,
+                     sl, tp/tp1..tp3, size, leverage) or None
+            precheck: Cheap test that must pass for extract to run; it must
+                      never reject a message the extractor would match
+
+        Raises:
+            ValueError: If the name is already registered
+        """
+        if name in self._by_name:
+            raise ValueError(f"Pattern '{name}' already registered")
+        entry = PatternEntry(name, extract, precheck, len(self._by_name))
+        self.patterns = self.patterns + [entry]
+        self._by_name[name] = entry
+
+    def register_regex(self, name: str, pattern: re.Pattern, precheck: Optional[Precheck] = None):
+        """
+        Add a regex format; the match's named groups are the extracted fields.
+
+        Args:
+            name: Unique pattern name
+            pattern: Compiled regex with named groups
+            precheck: Optional cheap pre-check
+        """
+        def extract(message: str) -> Optional[Dict[str, Any]]:
+            match = pattern.search(message)
+            return match.groupdict() if match else None
+
+        self.register(name, extract, precheck)
+
+    def unregister(self, name: str):
+        """Remove a format (no-op if it isn't registered)."""
+        entry = self._by_name.pop(name, None)
+        if entry:
+            self.patterns = [e for e in self.patterns if e is not entry]
+
+    def candidates(self, message: str) -> Iterator[PatternEntry]:
+        """
+        Yield the formats worth trying for a message, most likely first.
+
+        Args:
+            message: Message text
+
+        Yields:
+            PatternEntry objects whose pre-check passes
+        """
+        self._since_reorder += 1
+        if self.reorder_interval and self._since_reorder >= self.reorder_interval:
+            self.reorder()
+
+        for entry in self.patterns:
+            if entry.precheck is None or entry.precheck(message):
+                yield entry
+            else:
+                entry.skipped += 1
+
+    def record(self, entry: PatternEntry, hit: bool):
+        """Record whether a pattern produced a signal."""
+        if hit:
+            entry.hits += 1
+            entry.score += 1
+        else:
+            entry.misses += 1
+
+    def reorder(self):
+        """Sort formats by recent hits and decay the scores."""
+        self.patterns = sorted(self.patterns, key=lambda e: (-e.score, e.index))
+        for entry in self.patterns:
+            entry.score *= self.decay
+        self._since_reorder = 0
+        self.reorders += 1
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get current order and per-pattern counters."""
+        return {
+            'order': [entry.name for entry in self.patterns],
+            'reorders': self.reorders,
+            'patterns': {
+                entry.name: {'hits': entry.hits, 'misses': entry.misses, 'skipped': entry.skipped}
+                for entry in self.patterns
+            }
+        }
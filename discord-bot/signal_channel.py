@@ -0,0 +1,226 @@
+"""
+Signal Channel Module
+
+Persistent WebSocket connection to the Trading Server.
+
+Signals are sent as compact JSON frames tagged with a correlation ID and
+the server answers with a result frame carrying the same ID, so several
+signals can be in flight on one connection. The server also pushes events
+(TP/SL placed or failed, TP/SL orders filled) on the same connection.
+
+The channel reconnects in the background; while it is down
+TradingServerClient falls back to REST.
+"""
+import asyncio
+import aiohttp
+import functools
+import inspect
+import itertools
+import json
+import logging
+from typing import Optional, Dict, Any, Callable, Set
+
+# Add parent directory to path for shared imports
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.models import TradeSignal, TradeResponse
+
+logger = logging.getLogger(__name__)
+
+
+class SignalChannelError(Exception):
+    """
+    Raised when a signal's result cannot be obtained over the channel.
+
+    `delivered` is True if the frame was sent before the failure, in which
+    case the server may still execute it and the caller must not resend.
+    """
+
+    def __init__(self, message: str, delivered: bool = False):
+        super().__init__(message)
+        self.delivered = delivered
+
+
+class SignalChannel:
+    """
+    WebSocket client for the Trading Server's /ws/v1/signals endpoint.
+    """
+
+    def __init__(self, url: str, api_key: str, session: aiohttp.ClientSession,
+                 on_event: Optional[Callable[[str, Dict[str, Any]], Any]] = None,
+                 max_reconnect_delay: float = 30.0):
+        """
+        Initialize signal channel.
+
+        Args:
+            url: WebSocket URL (e.g., ws://localhost:8000/ws/v1/signals)
+            api_key: API key for authentication
+            session: Shared aiohttp session
+            on_event: Called as on_event(kind, data) for server-pushed events
+                      (may be a coroutine function)
+            max_reconnect_delay: Upper bound for reconnect backoff in seconds
+        """
+        self.url = url
+        self.api_key = api_key
+        self.session = session
+        self.on_event = on_event
+        self.max_reconnect_delay = max_reconnect_delay
+
+        self._ws: Optional[aiohttp.ClientWebSocketResponse] = None
+        self._task: Optional[asyncio.Task] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._event_tasks: Set[asyncio.Task] = set()  # Running async event handlers, kept referenced
+        self._ids = itertools.count(1)
+
+        self.stats = {
+            'signals_sent': 0,
+            'results_received': 0,
+            'events_received': 0,
+            'connects': 0,
+            'disconnects': 0
+        }
+
+    @property
+    def connected(self) -> bool:
+        """True if the WebSocket is open."""
+        return self._ws is not None and not self._ws.closed
+
+    def start(self):
+        """Start the background connect/receive task."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        """Close the connection and stop reconnecting."""
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._ws and not self._ws.closed:
+            await self._ws.close()
+
+    async def _run(self):
+        """Keep the connection open, reconnecting with exponential backoff."""
+        delay = 1.0
+        while True:
+            try:
+                async with self.session.ws_connect(
+                    self.url,
+                    headers={'X-API-Key': self.api_key},
+                    heartbeat=20
+                ) as ws:
+                    self._ws = ws
+                    self.stats['connects'] += 1
+                    delay = 1.0
+                    logger.info(f"🔌 Signal channel connected: {self.url}")
+
+                    async for msg in ws:
+                        if msg.type == aiohttp.WSMsgType.TEXT:
+                            await self._handle_frame(msg.data)
+                        elif msg.type in (aiohttp.WSMsgType.CLOSED, aiohttp.WSMsgType.ERROR):
+                            break
+
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.debug(f"Signal channel connect failed: {e}")
+            finally:
+                if self._ws is not None:
+                    self.stats['disconnects'] += 1
+                    logger.warning("🔌 Signal channel disconnected, using REST until it reconnects")
+                self._ws = None
+                self._fail_pending("Signal channel closed")
+
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, self.max_reconnect_delay)
+
+    def _fail_pending(self, reason: str):
+        """Fail every in-flight request (their frames were already sent)."""
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(SignalChannelError(reason, delivered=True))
+        self._pending.clear()
+
+    async def _handle_frame(self, raw: str):
+        """Dispatch one frame from the server."""
+        try:
+            frame = json.loads(raw)
+        except ValueError:
+            logger.warning(f"Ignoring malformed frame: {raw[:100]}")
+            return
+
+        kind = frame.get('t')
+        if kind == 'res':
+            future = self._pending.pop(str(frame.get('id')), None)
+            if future and not future.done():
+                self.stats['results_received'] += 1
+                future.set_result(frame.get('d') or {})
+
+        elif kind == 'evt':
+            self.stats['events_received'] += 1
+            if self.on_event:
+                try:
+                    result = self.on_event(frame.get('k'), frame.get('d') or {})
+                    if inspect.isawaitable(result):
+                        task = asyncio.create_task(result)
+                        self._event_tasks.add(task)
+                        task.add_done_callback(functools.partial(self._event_done, frame.get('k')))
+                except Exception as e:
+                    logger.error(f"Error handling {frame.get('k')} event: {e}")
+
+    def _event_done(self, kind: str, task: asyncio.Task):
+        """Drop a finished event handler task and log its exception, if any."""
+        self._event_tasks.discard(task)
+        if not task.cancelled() and task.exception():
+            logger.error(f"Error handling {kind} event: {task.exception()}", exc_info=task.exception())
+
+    async def send_signal(self, signal: TradeSignal, timeout: float = 30.0) -> TradeResponse:
+        """
+        Send a signal and wait for its result.
+
+        Args:
+            signal: TradeSignal to execute
+            timeout: Seconds to wait for the result
+
+        Returns:
+            TradeResponse from server
+
+        Raises:
+            SignalChannelError: If the channel is down or the result doesn't arrive in time
+        """
+        if not self.connected:
+            raise SignalChannelError("Signal channel not connected")
+
+        correlation_id = str(next(self._ids))
+        future = asyncio.get_running_loop().create_future()
+        self._pending[correlation_id] = future
+
+        try:
+            try:
+                await self._ws.send_str(json.dumps(
+                    {'t': 'sig', 'id': correlation_id, 'd': signal.to_wire()},
+                    separators=(',', ':')
+                ))
+            except Exception as e:
+                raise SignalChannelError(f"Send failed: {e}")
+            self.stats['signals_sent'] += 1
+
+            try:
+                data = await asyncio.wait_for(future, timeout)
+            except asyncio.TimeoutError:
+                raise SignalChannelError(f"No result within {timeout}s", delivered=True)
+        finally:
+            self._pending.pop(correlation_id, None)
+
+        return TradeResponse.from_dict(data)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get channel statistics."""
+        stats = self.stats.copy()
+        stats['connected'] = self.connected
+        stats['in_flight'] = len(self._pending)
+        return stats
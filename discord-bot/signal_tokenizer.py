@@ -0,0 +1,178 @@
+"""
+Signal Tokenizer Module
+
+Single-pass parser for labelled signal messages (the "TRADING SIGNAL ALERT"
+format: PAIR / SIDE / ENTRY / SL / TP1..TPn / LEVERAGE).
+
+The message is split into word tokens with one linear regex scan, and a
+small state machine assigns values to labels as it goes. Nothing is ever
+re-scanned, so parse time is linear in message length, even for long
+messages that almost match.
+
+Compared to the old regex pattern it also accepts fields in any order,
+symbols with digits (1000BONK/USDT), any number of TP levels and the
+"STOP LOSS" label.
+"""
+import re
+from typing import Optional, Dict, Any, Iterator, Tuple
+
+# Words are runs of letters/digits/dots; '/' and '-' are kept so pairs
+# like TIA/USDT and BTC-USDT can be joined. Everything else (emoji,
+# markdown, punctuation, whitespace) separates tokens.
+TOKEN_RE = re.compile(r'[A-Za-z0-9.]+|[/-]')
+
+LEVERAGE_RE = re.compile(r'^(\d+)x$', re.IGNORECASE)
+TP_LABEL_RE = re.compile(r'^TP(\d*)$')
+
+SIDES = {'LONG': 'long', 'SHORT': 'short', 'BUY': 'buy', 'SELL': 'sell'}
+QUOTES = ('USDT', 'USDC', 'USD')
+
+# Label token -> field it introduces
+LABELS = {
+    'PAIR': 'symbol',
+    'SYMBOL': 'symbol',
+    'SIDE': 'side',
+    'DIRECTION': 'side',
+    'ENTRY': 'entry',
+    'SL': 'sl',
+    'STOPLOSS': 'sl',
+    'LEVERAGE': 'leverage',
+    'LEV': 'leverage',
+}
+
+
+def tokenize(message: str) -> Iterator[Tuple[str, int, int]]:
+    """
+    Split a message into tokens.
+
+    Args:
+        message: Message text
+
+    Yields:
+        (token, start, end) tuples
+    """
+    for match in TOKEN_RE.finditer(message):
+        yield match.group(), match.start(), match.end()
+
+
+def _to_number(token: str) -> Optional[float]:
+    """Convert a token to a positive float, or None if it isn't a price."""
+    if not token[0].isdigit() and token[0] != '.':
+        return None
+    try:
+        value = float(token)
+    except ValueError:
+        return None
+    return value if value > 0 else None
+
+
+def _normalize_symbol(base: str, quote: Optional[str]) -> str:
+    """Build a BloFin symbol (BASE-QUOTE) from scanned parts."""
+    base = base.upper()
+    if quote:
+        return f"{base}-{quote.upper()}"
+    for q in QUOTES:
+        if base.endswith(q) and len(base) > len(q):
+            return f"{base[:-len(q)]}-{q}"
+    return f"{base}-USDT"
+
+
+def scan_signal(message: str) -> Optional[Dict[str, Any]]:
+    """
+    Extract a labelled signal from a message in one pass.
+
+    The first value seen for each label wins, so trailing sections such
+    as "TP1: 0.46 R:R" don't overwrite the real targets.
+
+    Args:
+        message: Message text
+
+    Returns:
+        Dict with symbol, side, entry, sl, tp1, tp2, tp3, take_profits
+        (all levels in order) and leverage - or None if symbol, side,
+        entry, sl or tp1 is missing
+    """
+    fields: Dict[str, Any] = {}
+    take_profits: Dict[int, float] = {}
+
+    expecting: Optional[str] = None  # Field the next word token should fill
+    tp_level = 0
+    symbol_base: Optional[str] = None  # Pair being assembled: BASE [/-] QUOTE
+    symbol_state = 0  # 1 = have base, 2 = have base + adjacent separator
+    last_end = -1
+    previous = ''
+
+    for token, start, end in tokenize(message):
+        adjacent = start == last_end
+        last_end = end
+
+        # Finish a pair that was split by '/' or '-'
+        if symbol_state:
+            if symbol_state == 1 and adjacent and token in ('/', '-'):
+                symbol_state = 2
+                continue
+            if symbol_state == 2 and adjacent and token.isalnum():
+                fields.setdefault('symbol', _normalize_symbol(symbol_base, token))
+                symbol_state = 0
+                continue
+            fields.setdefault('symbol', _normalize_symbol(symbol_base, None))
+            symbol_state = 0
+
+        if token in ('/', '-'):
+            continue
+
+        upper = token.upper()
+
+        # A label starts a new expectation (STOP LOSS is two tokens)
+        field = LABELS.get(upper)
+        if field is None and upper == 'LOSS' and previous == 'STOP':
+            field = 'sl'
+        if field is None:
+            tp_match = TP_LABEL_RE.match(upper)
+            if tp_match:
+                field = 'tp'
+                tp_level = int(tp_match.group(1)) if tp_match.group(1) else len(take_profits) + 1
+        previous = upper
+        if field is not None:
+            expecting = field
+            continue
+
+        if expecting is None:
+            continue
+
+        # Value for the current label - only the very next word is considered
+        if expecting == 'symbol':
+            if 'symbol' not in fields and token.isalnum() and not token.isdigit():
+                symbol_base = token
+                symbol_state = 1
+        elif expecting == 'side':
+            if upper in SIDES:
+                fields.setdefault('side', SIDES[upper])
+        elif expecting == 'leverage':
+            match = LEVERAGE_RE.match(token)
+            if match:
+                fields.setdefault('leverage', int(match.group(1)))
+            elif token.isdigit():
+                fields.setdefault('leverage', int(token))
+        elif expecting == 'tp':
+            value = _to_number(token)
+            if value is not None and tp_level not in take_profits:
+                take_profits[tp_level] = value
+        else:
+            value = _to_number(token)
+            if value is not None:
+                fields.setdefault(expecting, value)
+        expecting = None
+
+    if symbol_state:
+        fields.setdefault('symbol', _normalize_symbol(symbol_base, None))
+
+    levels = [take_profits[level] for level in sorted(take_profits)]
+    fields['take_profits'] = levels
+    fields['tp1'] = take_profits.get(1)
+    fields['tp2'] = take_profits.get(2)
+    fields['tp3'] = take_profits.get(3)
+
+    if not all(fields.get(key) for key in ('symbol', 'side', 'entry', 'sl', 'tp1')):
+        return None
+    return fields
@@ -3,10 +3,14 @@ Trading Server Client Module
 
 Handles communication with the Trading Server.
 Self-contained - can switch from REST to message queue without affecting other modules.
+
+All calls are async (aiohttp) so a slow Trading Server never blocks
+discord.py's event loop or its gateway heartbeats.
 """
-import requests
+import asyncio
+import aiohttp
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
 import time
 
 # Add parent directory to path for shared imports
@@ -14,123 +18,198 @@ import sys
 from pathlib import Path
 sys.path.append(str(Path(__file__).parent.parent))
 
+from shared.codec import CodecError
 from shared.models import TradeSignal, TradeResponse
+from signal_channel import SignalChannel, SignalChannelError
 
 logger = logging.getLogger(__name__)
 
 
 class TradingServerClient:
     """
-    Client for communicating with the Trading Server.
+    Async client for communicating with the Trading Server.
     
-    Handles retries, error handling, and response parsing.
+    Handles retries, error handling, and response parsing. Uses one shared
+    aiohttp session so several signals can be in flight at once.
     """
     
-    def __init__(self, base_url: str, api_key: str, timeout: int = 10, max_retries: int = 3):
+    def __init__(self, base_url: str, api_key: str, timeout: int = 10, max_retries: int = 3,
+                 deadline: float = 30.0, session: Optional[aiohttp.ClientSession] = None,
+                 channel: Optional[SignalChannel] = None):
         """
         Initialize Trading Server client.
         
         Args:
             base_url: Base URL of Trading Server (e.g., http://localhost:8000)
             api_key: API key for authentication
-            timeout: Request timeout in seconds
+            timeout: Timeout for a single HTTP attempt in seconds
             max_retries: Maximum retry attempts
+            deadline: Total time budget for one signal, including retries and backoff
+            session: Shared aiohttp session (created on first use if None)
+            channel: Persistent signal channel, preferred over REST while connected
         """
         self.base_url = base_url.rstrip('/')
         self.api_key = api_key
         self.timeout = timeout
         self.max_retries = max_retries
+        self.deadline = deadline
         
-        self.session = requests.Session()
-        self.session.headers.update({
+        self.headers = {
             'Content-Type': 'application/json',
             'X-API-Key': self.api_key
-        })
+        }
+        self.session = session
+        self._owns_session = session is None
+        self.channel = channel
         
         self.stats = {
             'requests_sent': 0,
             'requests_succeeded': 0,
             'requests_failed': 0,
-            'retries': 0
+            'retries': 0,
+            'deadline_exceeded': 0,
+            'channel_sent': 0,
+            'rest_fallbacks': 0
         }
     
-    def send_signal(self, signal: TradeSignal) -> TradeResponse:
+    def _get_session(self) -> aiohttp.ClientSession:
+        """Get the shared session, creating it on first use."""
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession()
+            self._owns_session = True
+        return self.session
+    
+    async def close(self):
+        """Close the HTTP session if this client created it."""
+        if self._owns_session and self.session and not self.session.closed:
+            await self.session.close()
+    
+    async def send_signal(self, signal: TradeSignal, deadline: Optional[float] = None) -> TradeResponse:
         """
         Send trade signal to Trading Server.
         
+        Uses the signal channel when it is connected and falls back to REST
+        otherwise (or if the signal could not be handed to the channel).
+        
         Args:
             signal: TradeSignal object to send
-            
+            deadline: Total time budget in seconds (defaults to self.deadline)
+        
         Returns:
             TradeResponse from server
         """
         self.stats['requests_sent'] += 1
         
+        if self.channel and self.channel.connected:
+            try:
+                response = await self.channel.send_signal(signal, timeout=deadline or self.deadline)
+                self.stats['channel_sent'] += 1
+                self.stats['requests_succeeded'] += 1
+                return response
+            except CodecError as e:
+                # The server has the signal - resending would come back as DUPLICATE_SIGNAL
+                self.stats['requests_failed'] += 1
+                return self._unreadable_response(signal.signal_id, e)
+            except SignalChannelError as e:
+                if e.delivered:
+                    # The server has the signal - resending could double-execute
+                    self.stats['requests_failed'] += 1
+                    logger.error(f"Signal channel lost result for {signal.signal_id}: {e}")
+                    return TradeResponse(
+                        success=False,
+                        signal_id=signal.signal_id,
+                        message=f"Signal sent but result unknown: {e}",
+                        error_code="NETWORK_ERROR",
+                        error_details=str(e)
+                    )
+                self.stats['rest_fallbacks'] += 1
+                logger.warning(f"Signal channel unavailable, falling back to REST: {e}")
+        elif self.channel:
+            self.stats['rest_fallbacks'] += 1
+        
         endpoint = f"{self.base_url}/api/v1/trade"
-        payload = signal.to_dict()
+        payload = signal.to_wire()
+        session = self._get_session()
+        give_up_at = time.monotonic() + (deadline or self.deadline)
         
         last_error = None
         for attempt in range(self.max_retries):
+            if attempt > 0:
+                self.stats['retries'] += 1
+                wait_time = 2 ** attempt  # Exponential backoff
+                if time.monotonic() + wait_time >= give_up_at:
+                    last_error = f"Deadline exceeded ({last_error})"
+                    self.stats['deadline_exceeded'] += 1
+                    break
+                logger.info(f"Retry attempt {attempt + 1}/{self.max_retries} after {wait_time}s...")
+                await asyncio.sleep(wait_time)
+            
+            remaining = give_up_at - time.monotonic()
+            if remaining <= 0:
+                last_error = f"Deadline exceeded ({last_error})"
+                self.stats['deadline_exceeded'] += 1
+                break
+            
             try:
-                if attempt > 0:
-                    self.stats['retries'] += 1
-                    wait_time = 2 ** attempt  # Exponential backoff
-                    logger.info(f"Retry attempt {attempt + 1}/{self.max_retries} after {wait_time}s...")
-                    time.sleep(wait_time)
-                
                 logger.info(f"Sending signal to {endpoint}: {signal.symbol} {signal.side}")
                 
-                response = self.session.post(
+                async with session.post(
                     endpoint,
                     json=payload,
-                    timeout=self.timeout
-                )
-                
-                # Check HTTP status
-                if response.status_code == 200:
-                    self.stats['requests_succeeded'] += 1
-                    data = response.json()
-                    logger.info(f"Server response: {data.get('message', 'Success')}")
-                    return TradeResponse.from_dict(data)
-                
-                elif response.status_code == 401:
-                    # Authentication error - don't retry
-                    logger.error("Authentication failed - check API key")
-                    self.stats['requests_failed'] += 1
-                    return TradeResponse(
-                        success=False,
-                        signal_id=signal.signal_id,
-                        message="Authentication failed",
-                        error_code="AUTH_ERROR"
-                    )
-                
-                elif response.status_code == 400:
-                    # Bad request - don't retry
-                    logger.error(f"Bad request: {response.text}")
-                    self.stats['requests_failed'] += 1
-                    return TradeResponse(
-                        success=False,
-                        signal_id=signal.signal_id,
-                        message=f"Invalid signal: {response.text}",
-                        error_code="VALIDATION_ERROR"
-                    )
-                
-                else:
-                    # Server error - retry
-                    last_error = f"HTTP {response.status_code}: {response.text}"
-                    logger.warning(f"Server error (attempt {attempt + 1}): {last_error}")
-                    continue
+                    headers=self.headers,
+                    timeout=aiohttp.ClientTimeout(total=min(self.timeout, remaining))
+                ) as response:
+                    
+                    # Check HTTP status
+                    if response.status == 200:
+                        self.stats['requests_succeeded'] += 1
+                        data = await response.json()
+                        logger.info(f"Server response: {data.get('message', 'Success')}")
+                        try:
+                            return TradeResponse.from_dict(data)
+                        except CodecError as e:
+                            # Executed - don't retry into DUPLICATE_SIGNAL
+                            return self._unreadable_response(signal.signal_id, e)
                     
-            except requests.exceptions.Timeout:
+                    elif response.status == 401:
+                        # Authentication error - don't retry
+                        logger.error("Authentication failed - check API key")
+                        self.stats['requests_failed'] += 1
+                        return TradeResponse(
+                            success=False,
+                            signal_id=signal.signal_id,
+                            message="Authentication failed",
+                            error_code="AUTH_ERROR"
+                        )
+                    
+                    elif response.status == 400:
+                        # Bad request - don't retry
+                        text = await response.text()
+                        logger.error(f"Bad request: {text}")
+                        self.stats['requests_failed'] += 1
+                        return TradeResponse(
+                            success=False,
+                            signal_id=signal.signal_id,
+                            message=f"Invalid signal: {text}",
+                            error_code="VALIDATION_ERROR"
+                        )
+                    
+                    else:
+                        # Server error - retry
+                        last_error = f"HTTP {response.status}: {await response.text()}"
+                        logger.warning(f"Server error (attempt {attempt + 1}): {last_error}")
+                        continue
+            
+            except asyncio.TimeoutError:
                 last_error = "Request timeout"
                 logger.warning(f"Request timeout (attempt {attempt + 1})")
                 continue
-                
-            except requests.exceptions.ConnectionError:
+            
+            except aiohttp.ClientConnectionError:
                 last_error = "Connection failed"
                 logger.warning(f"Connection failed (attempt {attempt + 1})")
                 continue
-                
+            
             except Exception as e:
                 last_error = str(e)
                 logger.error(f"Unexpected error (attempt {attempt + 1}): {e}")
@@ -147,7 +226,90 @@ class TradingServerClient:
             error_details=last_error
         )
     
-    def health_check(self) -> Dict[str, Any]:
+    async def send_signals(self, signals: List[TradeSignal]) -> List[TradeResponse]:
+        """
+        Send several signals concurrently.
+        
+        Args:
+            signals: TradeSignal objects to send
+        
+        Returns:
+            TradeResponses in the same order as `signals`
+        """
+        return list(await asyncio.gather(*(self.send_signal(signal) for signal in signals)))
+    
+    async def amend_signal(self, signal: TradeSignal) -> TradeResponse:
+        """
+        Send an edited signal for a trade that was already sent.
+        
+        The server only touches the position if the TP/SL it placed changed.
+        
+        Args:
+            signal: Edited TradeSignal (same signal_id as the original)
+        
+        Returns:
+            TradeResponse from server
+        """
+        return await self._post_signal_action(signal.signal_id, 'amend', signal.to_wire())
+    
+    async def cancel_signal(self, signal_id: str) -> TradeResponse:
+        """
+        Cancel a signal whose message was deleted.
+        
+        Args:
+            signal_id: Signal ID
+        
+        Returns:
+            TradeResponse from server (error_code ALREADY_FILLED if the entry
+            has been placed - the position is left open)
+        """
+        return await self._post_signal_action(signal_id, 'cancel')
+    
+    async def _post_signal_action(self, signal_id: str, action: str,
+                                  payload: Optional[dict] = None) -> TradeResponse:
+        """POST to /api/v1/trade/{signal_id}/{action}, mapping failures to a TradeResponse."""
+        endpoint = f"{self.base_url}/api/v1/trade/{signal_id}/{action}"
+        try:
+            async with self._get_session().post(
+                endpoint,
+                json=payload,
+                headers=self.headers,
+                timeout=aiohttp.ClientTimeout(total=self.timeout)
+            ) as response:
+                if response.status == 200:
+                    data = await response.json()
+                    logger.info(f"Server response to {action} {signal_id}: {data.get('message', 'Success')}")
+                    try:
+                        return TradeResponse.from_dict(data)
+                    except CodecError as e:
+                        return self._unreadable_response(signal_id, e)
+                error = f"HTTP {response.status}: {await response.text()}"
+        except asyncio.TimeoutError:
+            error = "Request timeout"
+        except aiohttp.ClientError as e:
+            error = str(e) or type(e).__name__
+        
+        logger.error(f"Failed to {action} signal {signal_id}: {error}")
+        return TradeResponse(
+            success=False,
+            signal_id=signal_id,
+            message=f"Failed to {action} signal: {error}",
+            error_code="NETWORK_ERROR",
+            error_details=error
+        )
+    
+    def _unreadable_response(self, signal_id: Optional[str], error: CodecError) -> TradeResponse:
+        """Failure for a request the server processed but whose response didn't decode."""
+        logger.error(f"Unreadable server response for {signal_id}: {error}")
+        return TradeResponse(
+            success=False,
+            signal_id=signal_id,
+            message=f"Signal sent but the server response couldn't be read: {error}",
+            error_code="INVALID_RESPONSE",
+            error_details=str(error)
+        )
+    
+    async def health_check(self) -> Dict[str, Any]:
         """
         Check if Trading Server is reachable.
         
@@ -155,23 +317,84 @@ class TradingServerClient:
             Health check response or error dict
         """
         try:
-            response = self.session.get(
+            async with self._get_session().get(
                 f"{self.base_url}/health",
-                timeout=5
-            )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return {
-                    'status': 'unhealthy',
-                    'error': f"HTTP {response.status_code}"
-                }
+                timeout=aiohttp.ClientTimeout(total=5)
+            ) as response:
+                if response.status == 200:
+                    return await response.json()
+                else:
+                    return {
+                        'status': 'unhealthy',
+                        'error': f"HTTP {response.status}"
+                    }
         except Exception as e:
             return {
                 'status': 'unreachable',
-                'error': str(e)
+                'error': str(e) or type(e).__name__
             }
     
+    async def get_account_status(self) -> Dict[str, Any]:
+        """
+        Get balance, equity and open positions from the Trading Server.
+        
+        Returns:
+            Account status dict
+            
+        Raises:
+            Exception: If the server is unreachable or returns an error
+        """
+        async with self._get_session().get(
+            f"{self.base_url}/api/v1/account/status",
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        ) as response:
+            if response.status != 200:
+                raise Exception(f"Failed to get account status: {response.status}")
+            return await response.json()
+    
+    async def get_profile(self, seconds: float, idle: bool = True) -> bytes:
+        """
+        Sample the Trading Server for `seconds` (GET /debug/profile).
+        
+        Returns:
+            Collapsed stacks (flamegraph input) of the worker that answered
+            
+        Raises:
+            Exception: If the server is unreachable or returns an error
+        """
+        async with self._get_session().get(
+            f"{self.base_url}/debug/profile",
+            params={'seconds': seconds, 'idle': str(idle).lower()},
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=seconds + self.timeout)
+        ) as response:
+            if response.status != 200:
+                raise Exception(f"Profile failed: HTTP {response.status}: {await response.text()}")
+            return await response.read()
+    
+    async def get_ticker(self, symbol: str) -> Dict[str, Any]:
+        """
+        Get the latest price for a symbol from the Trading Server.
+        
+        Args:
+            symbol: Trading pair (e.g., BTC-USDT)
+            
+        Returns:
+            Dict with symbol, last, bid, ask and ts (exchange time in ms)
+            
+        Raises:
+            Exception: If the server is unreachable or has no price for the symbol
+        """
+        async with self._get_session().get(
+            f"{self.base_url}/api/v1/ticker/{symbol}",
+            headers=self.headers,
+            timeout=aiohttp.ClientTimeout(total=self.timeout)
+        ) as response:
+            if response.status != 200:
+                raise Exception(f"Failed to get ticker for {symbol}: {response.status}")
+            return await response.json()
+    
     def get_stats(self) -> Dict[str, Any]:
         """Get client statistics."""
         return self.stats.copy()
@@ -182,7 +405,10 @@ class TradingServerClient:
             'requests_sent': 0,
             'requests_succeeded': 0,
             'requests_failed': 0,
-            'retries': 0
+            'retries': 0,
+            'deadline_exceeded': 0,
+            'channel_sent': 0,
+            'rest_fallbacks': 0
         }
 
 
@@ -190,27 +416,31 @@ if __name__ == "__main__":
     # Test the client
     logging.basicConfig(level=logging.INFO)
     
-    client = TradingServerClient(
-        base_url="http://localhost:8000",
-        api_key="test_key"
-    )
-    
-    # Test health check
-    print("Testing health check...")
-    health = client.health_check()
-    print(f"Health: {health}")
-    
-    # Test sending signal
-    print("\nTesting signal send...")
-    test_signal = TradeSignal(
-        symbol="BTC-USDT",
-        side="long",
-        entry_price=60000.0,
-        stop_loss=58000.0,
-        take_profit=65000.0,
-        size=0.01
-    )
-    
-    response = client.send_signal(test_signal)
-    print(f"Response: {response.to_dict()}")
-    print(f"\nStats: {client.get_stats()}")
+    async def _demo():
+        client = TradingServerClient(
+            base_url="http://localhost:8000",
+            api_key="test_key"
+        )
+        
+        # Test health check
+        print("Testing health check...")
+        health = await client.health_check()
+        print(f"Health: {health}")
+        
+        # Test sending signal
+        print("\nTesting signal send...")
+        test_signal = TradeSignal(
+            symbol="BTC-USDT",
+            side="long",
+            entry_price=60000.0,
+            stop_loss=58000.0,
+            take_profit=65000.0,
+            size=0.01
+        )
+        
+        response = await client.send_signal(test_signal)
+        print(f"Response: {response.to_dict()}")
+        print(f"\nStats: {client.get_stats()}")
+        await client.close()
+    
+    asyncio.run(_demo())
@@ -0,0 +1,207 @@
+"""
+Webhook Sender Module
+
+Queued Discord webhook sender for bot notifications.
+
+Notifications are queued and sent by a single background task over the
+bot's shared aiohttp session:
+- Embeds queued close together are coalesced into one request (Discord
+  accepts up to 10 embeds per message)
+- Embeds queued with the same key replace each other while waiting, so a
+  burst of status updates only sends the latest one
+- 429 responses and the X-RateLimit-* headers are honoured before the
+  next request is sent
+"""
+import asyncio
+import aiohttp
+import logging
+import time
+from typing import Optional, Dict, Any, List
+
+# Add parent directory to path for shared imports
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+MAX_EMBEDS_PER_MESSAGE = 10
+
+NOTIFICATION_LAG = REGISTRY.histogram('webhook_notification_lag_seconds',
+                                      'Time from queueing a notification to Discord accepting it', ['result'])
+QUEUE_DEPTH = REGISTRY.gauge('webhook_queue_depth', 'Notifications waiting to be sent')
+
+
+class WebhookSender:
+    """
+    Background sender for one Discord webhook URL.
+
+    `send()` never blocks the caller; call `start()` once the event loop is
+    running and `close()` on shutdown to flush what is still queued.
+    """
+
+    def __init__(self, url: str, session: aiohttp.ClientSession,
+                 coalesce_window: float = 0.5, max_retries: int = 3):
+        """
+        Initialize webhook sender.
+
+        Args:
+            url: Discord webhook URL
+            session: Shared aiohttp session
+            coalesce_window: Seconds to wait for more embeds before sending
+            max_retries: Attempts per batch for non rate-limit failures
+        """
+        self.url = url
+        self.session = session
+        self.coalesce_window = coalesce_window
+        self.max_retries = max_retries
+
+        self._pending: List[Dict[str, Any]] = []  # [{'key': ..., 'embed': ..., 'queued_at': ...}]
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._blocked_until = 0.0  # monotonic time the rate limit resets
+
+        self.stats = {
+            'queued': 0,
+            'coalesced': 0,
+            'requests': 0,
+            'sent': 0,
+            'rate_limited': 0,
+            'failed': 0
+        }
+        QUEUE_DEPTH.set_function(lambda: len(self._pending))
+
+    def start(self):
+        """Start the background send task."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def send(self, embed: Dict[str, Any], key: Optional[str] = None):
+        """
+        Queue an embed for sending.
+
+        Args:
+            embed: Discord embed dict
+            key: Optional coalescing key - a queued embed with the same key
+                 is replaced instead of sending both
+        """
+        self.stats['queued'] += 1
+        if key is not None:
+            for item in self._pending:
+                if item['key'] == key:
+                    item['embed'] = embed
+                    self.stats['coalesced'] += 1
+                    return
+        self._pending.append({'key': key, 'embed': embed, 'queued_at': time.monotonic()})
+        self._wakeup.set()
+
+    async def close(self):
+        """Stop the background task after flushing queued embeds."""
+        if self._task and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        while self._pending:
+            await self._send_batch(self._take_batch())
+
+    def _take_batch(self) -> List[Dict[str, Any]]:
+        """Remove up to one message worth of queued items from the queue."""
+        batch = self._pending[:MAX_EMBEDS_PER_MESSAGE]
+        del self._pending[:MAX_EMBEDS_PER_MESSAGE]
+        if len(batch) > 1:
+            self.stats['coalesced'] += len(batch) - 1
+        return batch
+
+    async def _run(self):
+        """Send queued embeds until cancelled."""
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+
+            # Give notifications from the same event a moment to arrive together
+            await asyncio.sleep(self.coalesce_window)
+
+            while self._pending:
+                await self._send_batch(self._take_batch())
+
+    async def _wait_for_rate_limit(self):
+        """Sleep until the webhook's rate limit bucket has reset."""
+        delay = self._blocked_until - time.monotonic()
+        if delay > 0:
+            logger.debug(f"Webhook rate limited, waiting {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def _update_rate_limit(self, headers):
+        """Track X-RateLimit-Remaining/Reset-After so the next send waits if needed."""
+        remaining = headers.get('X-RateLimit-Remaining')
+        reset_after = headers.get('X-RateLimit-Reset-After')
+        if remaining is not None and reset_after is not None:
+            try:
+                if int(remaining) == 0:
+                    self._blocked_until = time.monotonic() + float(reset_after)
+            except ValueError:
+                pass
+
+    def _record_lag(self, batch: List[Dict[str, Any]], result: str):
+        now = time.monotonic()
+        for item in batch:
+            NOTIFICATION_LAG.labels(result).observe(now - item['queued_at'])
+
+    async def _send_batch(self, batch: List[Dict[str, Any]]):
+        """Post one message, retrying on rate limits and transient errors."""
+        embeds = [item['embed'] for item in batch]
+        attempts = 0
+        while attempts < self.max_retries:
+            await self._wait_for_rate_limit()
+            self.stats['requests'] += 1
+            try:
+                async with self.session.post(
+                    self.url,
+                    json={"embeds": embeds},
+                    timeout=aiohttp.ClientTimeout(total=10)
+                ) as response:
+                    self._update_rate_limit(response.headers)
+
+                    if response.status in (200, 204):
+                        self.stats['sent'] += len(embeds)
+                        self._record_lag(batch, 'sent')
+                        logger.debug(f"Webhook sent successfully ({len(embeds)} embeds)")
+                        return
+
+                    if response.status == 429:
+                        # Rate limited - wait as instructed and retry without using an attempt
+                        self.stats['rate_limited'] += 1
+                        retry_after = response.headers.get('Retry-After')
+                        try:
+                            data = await response.json()
+                            retry_after = data.get('retry_after', retry_after)
+                        except Exception:
+                            pass
+                        self._blocked_until = time.monotonic() + float(retry_after or 1)
+                        logger.warning(f"Webhook rate limited (429), retrying in {float(retry_after or 1):.2f}s")
+                        continue
+
+                    response_text = await response.text()
+                    logger.error(f"Webhook returned status {response.status}: {response_text}")
+                    if response.status < 500:
+                        break  # Client error - retrying won't help
+
+            except Exception as e:
+                logger.error(f"Failed to send webhook notification: {e}")
+
+            attempts += 1
+            await asyncio.sleep(2 ** attempts)
+
+        self.stats['failed'] += len(embeds)
+        self._record_lag(batch, 'failed')
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get sender statistics."""
+        stats = self.stats.copy()
+        stats['pending'] = len(self._pending)
+        return stats
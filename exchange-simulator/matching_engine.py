@@ -0,0 +1,579 @@
+"""
+Matching Engine Module
+
+In-memory copy-trading exchange for the simulator: instruments and mark
+prices shared by every account, and per account one-way (net) positions,
+market and limit orders, reduce-only orders and position TP/SL.
+
+Everything is driven by mark price updates - set_price() fills crossed
+limit orders and fires TP/SL triggers on every account, so a scripted
+price path plays out the way it would on the exchange. All numbers in the
+API rows are strings, like BloFin returns them.
+"""
+import itertools
+import threading
+import time
+from dataclasses import dataclass
+from typing import Optional, Dict, Any, List
+
+# Error codes. 200108 is the one BloFin returns (and server.py handles) for a
+# second full-position TP/SL; the others are the simulator's own.
+INVALID_PARAMETER = "102002"
+UNKNOWN_INSTRUMENT = "102014"
+INSUFFICIENT_MARGIN = "102015"
+REDUCE_ONLY_REJECTED = "102022"
+NO_POSITION = "102024"
+INVALID_TRIGGER_PRICE = "102026"
+ORDER_NOT_FOUND = "102035"
+TPSL_EXISTS = "200108"
+
+DEFAULT_INSTRUMENTS = [
+    {'instId': 'BTC-USDT', 'contractValue': 0.001, 'lotSize': 0.1, 'minSize': 0.1, 'tickSize': 0.1,
+     'maxLeverage': 150, 'price': 60000.0},
+    {'instId': 'ETH-USDT', 'contractValue': 0.01, 'lotSize': 0.1, 'minSize': 0.1, 'tickSize': 0.01,
+     'maxLeverage': 150, 'price': 3000.0},
+    {'instId': 'SOL-USDT', 'contractValue': 1, 'lotSize': 1, 'minSize': 1, 'tickSize': 0.001,
+     'maxLeverage': 100, 'price': 150.0},
+    {'instId': 'SEI-USDT', 'contractValue': 10, 'lotSize': 1, 'minSize': 1, 'tickSize': 0.0001,
+     'maxLeverage': 50, 'price': 0.45},
+    {'instId': '1000BONK-USDT', 'contractValue': 1000, 'lotSize': 1, 'minSize': 1, 'tickSize': 0.0000001,
+     'maxLeverage': 50, 'price': 0.02},
+]
+
+
+class ExchangeError(Exception):
+    """Business error, returned to the client as {"code": code, "msg": msg}."""
+
+    def __init__(self, code: str, msg: str):
+        super().__init__(f"{code}: {msg}")
+        self.code = code
+        self.msg = msg
+
+
+def fmt(value: Optional[float]) -> str:
+    """Number as an API string without float noise ("" for None)."""
+    if value is None:
+        return ""
+    text = f"{value:.10f}".rstrip('0').rstrip('.')
+    return "0" if text in ("", "-0") else text
+
+
+def now_ms() -> int:
+    return int(time.time() * 1000)
+
+
+def _number(body: Dict[str, Any], key: str, required: bool = True) -> Optional[float]:
+    value = body.get(key)
+    if value in (None, "", "-1") and not required:
+        return None
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        raise ExchangeError(INVALID_PARAMETER, f"Invalid {key}: {value!r}")
+    if number <= 0:
+        raise ExchangeError(INVALID_PARAMETER, f"{key} must be positive")
+    return number
+
+
+@dataclass
+class Order:
+    """A market or limit order."""
+    order_id: str
+    inst_id: str
+    side: str  # buy/sell
+    order_type: str  # market/limit
+    size: float
+    price: Optional[float]
+    reduce_only: bool
+    margin_mode: str
+    created: int
+    state: str = "live"  # live/filled/canceled
+    filled_size: float = 0.0
+    average_price: Optional[float] = None
+
+    def to_row(self) -> Dict[str, Any]:
+        return {
+            'orderId': self.order_id,
+            'clientOrderId': '',
+            'instId': self.inst_id,
+            'marginMode': self.margin_mode,
+            'positionSide': 'net',
+            'side': self.side,
+            'orderType': self.order_type,
+            'price': fmt(self.price),
+            'size': fmt(self.size),
+            'reduceOnly': 'true' if self.reduce_only else 'false',
+            'filledSize': fmt(self.filled_size),
+            'averagePrice': fmt(self.average_price),
+            'state': self.state,
+            'createTime': str(self.created),
+            'updateTime': str(self.created)
+        }
+
+
+@dataclass
+class TpslOrder:
+    """Position take-profit/stop-loss (closes at market when triggered)."""
+    algo_id: str
+    inst_id: str
+    size: Optional[float]  # None = the whole position
+    tp_trigger: Optional[float]
+    sl_trigger: Optional[float]
+    margin_mode: str
+    created: int
+    state: str = "live"  # live/effective/canceled
+
+    def to_row(self, side: str) -> Dict[str, Any]:
+        return {
+            'algoId': self.algo_id,
+            'clientOrderId': '',
+            'instId': self.inst_id,
+            'marginMode': self.margin_mode,
+            'positionSide': 'net',
+            'side': side,
+            'size': fmt(self.size) if self.size is not None else '-1',
+            'tpTriggerPrice': fmt(self.tp_trigger),
+            'tpOrderPrice': '-1' if self.tp_trigger else '',
+            'slTriggerPrice': fmt(self.sl_trigger),
+            'slOrderPrice': '-1' if self.sl_trigger else '',
+            'state': self.state,
+            'createTime': str(self.created)
+        }
+
+
+@dataclass
+class Position:
+    """Net position in one instrument (size < 0 = short)."""
+    inst_id: str
+    size: float
+    average_price: float
+    margin_mode: str
+    created: int
+    updated: int
+
+
+class Market:
+    """Instrument specs and mark prices, shared by all accounts."""
+
+    def __init__(self, instruments: Optional[List[Dict[str, Any]]] = None):
+        self.instruments: Dict[str, Dict[str, Any]] = {}
+        self.prices: Dict[str, float] = {}
+        for spec in instruments or DEFAULT_INSTRUMENTS:
+            spec = dict(spec)
+            self.prices[spec['instId']] = float(spec.pop('price'))
+            self.instruments[spec['instId']] = spec
+
+    def spec(self, inst_id: Optional[str]) -> Dict[str, Any]:
+        spec = self.instruments.get(inst_id)
+        if spec is None:
+            raise ExchangeError(UNKNOWN_INSTRUMENT, f"Instrument {inst_id} does not exist")
+        return spec
+
+    def instrument_rows(self) -> List[Dict[str, Any]]:
+        return [{
+            'instId': inst_id,
+            'baseCurrency': inst_id.split('-')[0],
+            'quoteCurrency': inst_id.split('-')[1],
+            'contractValue': fmt(spec['contractValue']),
+            'listTime': '1700000000000',
+            'expireTime': '',
+            'maxLeverage': str(spec['maxLeverage']),
+            'minSize': fmt(spec['minSize']),
+            'lotSize': fmt(spec['lotSize']),
+            'tickSize': fmt(spec['tickSize']),
+            'instType': 'SWAP',
+            'contractType': 'linear',
+            'maxLimitSize': '1000000',
+            'maxMarketSize': '100000',
+            'state': 'live'
+        } for inst_id, spec in self.instruments.items()]
+
+
+class Account:
+    """One API key's copy-trading account."""
+
+    def __init__(self, name: str, market: Market, equity: float, fee_rate: float,
+                 default_leverage: int, ids: itertools.count, events: List[Dict[str, Any]]):
+        self.name = name
+        self.market = market
+        self.cash = equity  # Deposits + realized PnL - fees
+        self.fee_rate = fee_rate
+        self.default_leverage = default_leverage
+        self.leverage: Dict[str, int] = {}
+        self.positions: Dict[str, Position] = {}
+        self.orders: Dict[str, Order] = {}  # Every order, for the order lookup
+        self.tpsl: Dict[str, TpslOrder] = {}  # Live TP/SL only
+        self._ids = ids
+        self._events = events
+
+    # ---- helpers ----
+
+    def _next_id(self) -> str:
+        return str(next(self._ids))
+
+    def _event(self, event_type: str, **details):
+        self._events.append({'ts': now_ms(), 'account': self.name, 'type': event_type, **details})
+
+    def _size(self, body: Dict[str, Any], spec: Dict[str, Any]) -> float:
+        size = _number(body, 'size')
+        lots = size / spec['lotSize']
+        if abs(lots - round(lots)) > 1e-9:
+            raise ExchangeError(INVALID_PARAMETER, f"size {fmt(size)} is not a multiple of lotSize {fmt(spec['lotSize'])}")
+        if size < spec['minSize'] - 1e-12:
+            raise ExchangeError(INVALID_PARAMETER, f"size {fmt(size)} is below minSize {fmt(spec['minSize'])}")
+        return size
+
+    def _unrealized(self, position: Position) -> float:
+        spec = self.market.instruments[position.inst_id]
+        mark = self.market.prices[position.inst_id]
+        return position.size * spec['contractValue'] * (mark - position.average_price)
+
+    def _margin(self, position: Position) -> float:
+        spec = self.market.instruments[position.inst_id]
+        notional = abs(position.size) * spec['contractValue'] * position.average_price
+        return notional / self.leverage.get(position.inst_id, self.default_leverage)
+
+    def equity(self) -> float:
+        return self.cash + sum(self._unrealized(p) for p in self.positions.values())
+
+    def available(self) -> float:
+        return self.equity() - sum(self._margin(p) for p in self.positions.values())
+
+    # ---- trading ----
+
+    def set_leverage(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        spec = self.market.spec(body.get('instId'))
+        try:
+            leverage = int(body.get('leverage'))
+        except (TypeError, ValueError):
+            raise ExchangeError(INVALID_PARAMETER, f"Invalid leverage: {body.get('leverage')!r}")
+        if not 1 <= leverage <= spec['maxLeverage']:
+            raise ExchangeError(INVALID_PARAMETER, f"Leverage must be between 1 and {spec['maxLeverage']}")
+        self.leverage[body['instId']] = leverage
+        return {'instId': body['instId'], 'leverage': str(leverage),
+                'marginMode': body.get('marginMode', 'cross'), 'positionSide': 'net'}
+
+    def place_order(self, body: Dict[str, Any]) -> Order:
+        inst_id = body.get('instId')
+        spec = self.market.spec(inst_id)
+        side = body.get('side')
+        order_type = body.get('orderType')
+        if side not in ('buy', 'sell'):
+            raise ExchangeError(INVALID_PARAMETER, f"Invalid side: {side!r}")
+        if order_type not in ('market', 'limit'):
+            raise ExchangeError(INVALID_PARAMETER, f"Unsupported orderType: {order_type!r}")
+        if body.get('positionSide', 'net') != 'net':
+            raise ExchangeError(INVALID_PARAMETER, "Only one-way mode (positionSide=net) is simulated")
+        size = self._size(body, spec)
+        price = _number(body, 'price') if order_type == 'limit' else None
+        reduce_only = str(body.get('reduceOnly', 'false')).lower() == 'true'
+
+        mark = self.market.prices[inst_id]
+        position = self.positions.get(inst_id)
+        direction = 1 if side == 'buy' else -1
+        if reduce_only:
+            if not position or position.size * direction >= 0:
+                raise ExchangeError(REDUCE_ONLY_REJECTED, "Reduce-only order would not reduce the position")
+        else:
+            opening = size if not position or position.size * direction > 0 else max(size - abs(position.size), 0)
+            margin = opening * spec['contractValue'] * (price or mark) / self.leverage.get(inst_id, self.default_leverage)
+            if margin > self.available():
+                raise ExchangeError(INSUFFICIENT_MARGIN, f"Insufficient margin: need {fmt(margin)}, "
+                                                         f"available {fmt(self.available())}")
+
+        order = Order(self._next_id(), inst_id, side, order_type, size, price, reduce_only,
+                      body.get('marginMode', 'cross'), now_ms())
+        self.orders[order.order_id] = order
+        self._event('order', orderId=order.order_id, instId=inst_id, side=side, orderType=order_type,
+                    size=fmt(size), price=fmt(price))
+
+        if order_type == 'market' or direction * (mark - price) <= 0:
+            self._fill(order, mark)
+        return order
+
+    def _fill(self, order: Order, price: float):
+        """Fill an order completely at price and update the position."""
+        direction = 1 if order.side == 'buy' else -1
+        size = order.size
+        position = self.positions.get(order.inst_id)
+        if order.reduce_only:
+            if not position or position.size * direction >= 0:
+                order.state = 'canceled'
+                self._event('canceled', orderId=order.order_id, reason='nothing to reduce')
+                return
+            size = min(size, abs(position.size))
+
+        spec = self.market.instruments[order.inst_id]
+        contract_value = spec['contractValue']
+        self.cash -= size * contract_value * price * self.fee_rate
+        ts = now_ms()
+
+        if position is None:
+            self.positions[order.inst_id] = Position(order.inst_id, direction * size, price,
+                                                     order.margin_mode, ts, ts)
+        elif position.size * direction > 0:
+            total = abs(position.size) + size
+            position.average_price = (abs(position.size) * position.average_price + size * price) / total
+            position.size += direction * size
+            position.updated = ts
+        else:
+            closed = min(size, abs(position.size))
+            self.cash += closed * contract_value * (price - position.average_price) * (1 if position.size > 0 else -1)
+            position.size += direction * size
+            position.updated = ts
+            if abs(position.size) < 1e-12:
+                del self.positions[order.inst_id]
+                self._close_position(order.inst_id)
+            elif position.size * direction > 0:
+                position.average_price = price  # Flipped: the remainder opened at this price
+
+        order.filled_size = size
+        order.average_price = price
+        order.state = 'filled'
+        self._event('fill', orderId=order.order_id, instId=order.inst_id, side=order.side,
+                    size=fmt(size), price=fmt(price))
+
+    def _close_position(self, inst_id: str):
+        """Position is flat: its TP/SL orders go with it."""
+        for algo_id, tpsl in list(self.tpsl.items()):
+            if tpsl.inst_id == inst_id:
+                tpsl.state = 'canceled'
+                del self.tpsl[algo_id]
+                self._event('tpsl_canceled', algoId=algo_id, instId=inst_id, reason='position closed')
+
+    def place_tpsl(self, body: Dict[str, Any]) -> TpslOrder:
+        inst_id = body.get('instId')
+        self.market.spec(inst_id)
+        position = self.positions.get(inst_id)
+        if not position:
+            raise ExchangeError(NO_POSITION, f"No open position for {inst_id}")
+
+        tp = _number(body, 'tpTriggerPrice', required=False)
+        sl = _number(body, 'slTriggerPrice', required=False)
+        if tp is None and sl is None:
+            raise ExchangeError(INVALID_PARAMETER, "tpTriggerPrice or slTriggerPrice is required")
+        mark = self.market.prices[inst_id]
+        long = position.size > 0
+        if tp is not None and (tp <= mark if long else tp >= mark):
+            raise ExchangeError(INVALID_TRIGGER_PRICE, f"TP trigger price must be {'above' if long else 'below'} "
+                                                       f"the mark price {fmt(mark)}")
+        if sl is not None and (sl >= mark if long else sl <= mark):
+            raise ExchangeError(INVALID_TRIGGER_PRICE, f"SL trigger price must be {'below' if long else 'above'} "
+                                                       f"the mark price {fmt(mark)}")
+
+        size = None if str(body.get('size', '-1')) == '-1' else _number(body, 'size')
+        if size is None and any(t.inst_id == inst_id and t.size is None for t in self.tpsl.values()):
+            raise ExchangeError(TPSL_EXISTS, "There is already a take-profit/stop-loss order for the full position")
+
+        tpsl = TpslOrder(self._next_id(), inst_id, size, tp, sl, body.get('marginMode', 'cross'), now_ms())
+        self.tpsl[tpsl.algo_id] = tpsl
+        self._event('tpsl', algoId=tpsl.algo_id, instId=inst_id, size=fmt(size) if size else '-1',
+                    tp=fmt(tp), sl=fmt(sl))
+        return tpsl
+
+    def cancel_tpsl(self, body: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Cancel by algoId, or every TP/SL of an instrument."""
+        if body.get('algoId'):
+            if body['algoId'] not in self.tpsl:
+                raise ExchangeError(ORDER_NOT_FOUND, f"TP/SL order {body['algoId']} does not exist")
+            targets = [self.tpsl[body['algoId']]]
+        else:
+            self.market.spec(body.get('instId'))
+            targets = [t for t in self.tpsl.values() if t.inst_id == body['instId']]
+
+        rows = []
+        for tpsl in targets:
+            tpsl.state = 'canceled'
+            del self.tpsl[tpsl.algo_id]
+            self._event('tpsl_canceled', algoId=tpsl.algo_id, instId=tpsl.inst_id, reason='canceled')
+            rows.append({'algoId': tpsl.algo_id, 'clientOrderId': '', 'code': '0', 'msg': ''})
+        return rows
+
+    def on_price(self, inst_id: str, price: float):
+        """Fill crossed limit orders, then fire TP/SL triggers."""
+        for order in [o for o in self.orders.values() if o.state == 'live' and o.inst_id == inst_id]:
+            if (order.side == 'buy' and price <= order.price) or (order.side == 'sell' and price >= order.price):
+                self._fill(order, order.price)
+
+        for tpsl in sorted((t for t in self.tpsl.values() if t.inst_id == inst_id), key=lambda t: t.created):
+            position = self.positions.get(inst_id)
+            if not position or tpsl.algo_id not in self.tpsl:
+                continue
+            long = position.size > 0
+            hit_tp = tpsl.tp_trigger is not None and (price >= tpsl.tp_trigger if long else price <= tpsl.tp_trigger)
+            hit_sl = tpsl.sl_trigger is not None and (price <= tpsl.sl_trigger if long else price >= tpsl.sl_trigger)
+            if not (hit_tp or hit_sl):
+                continue
+
+            tpsl.state = 'effective'
+            del self.tpsl[tpsl.algo_id]
+            size = abs(position.size) if tpsl.size is None else min(tpsl.size, abs(position.size))
+            self._event('tpsl_triggered', algoId=tpsl.algo_id, instId=inst_id, kind='tp' if hit_tp else 'sl',
+                        price=fmt(price), size=fmt(size))
+            order = Order(self._next_id(), inst_id, 'sell' if long else 'buy', 'market', size, None, True,
+                          tpsl.margin_mode, now_ms())
+            self.orders[order.order_id] = order
+            self._fill(order, price)
+
+    # ---- queries ----
+
+    def position_rows(self, inst_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        rows = []
+        for position in self.positions.values():
+            if inst_id and position.inst_id != inst_id:
+                continue
+            unrealized = self._unrealized(position)
+            margin = self._margin(position)
+            rows.append({
+                'positionId': f"{self.name}-{position.inst_id}",
+                'instId': position.inst_id,
+                'instType': 'SWAP',
+                'marginMode': position.margin_mode,
+                'positionSide': 'net',
+                'positions': fmt(position.size),
+                'availablePositions': fmt(abs(position.size)),
+                'averagePrice': fmt(position.average_price),
+                'markPrice': fmt(self.market.prices[position.inst_id]),
+                'unrealizedPnl': fmt(unrealized),
+                'unrealizedPnlRatio': fmt(unrealized / margin if margin else 0),
+                'leverage': str(self.leverage.get(position.inst_id, self.default_leverage)),
+                'initialMargin': fmt(margin),
+                'liquidationPrice': '',
+                'createTime': str(position.created),
+                'updateTime': str(position.updated)
+            })
+        return rows
+
+    def balance(self) -> Dict[str, Any]:
+        equity = self.equity()
+        unrealized = sum(self._unrealized(p) for p in self.positions.values())
+        return {
+            'ts': str(now_ms()),
+            'totalEquity': fmt(equity),
+            'isolatedEquity': '0',
+            'details': [{
+                'currency': 'USDT',
+                'equity': fmt(equity),
+                'balance': fmt(self.cash),
+                'available': fmt(self.available()),
+                'frozen': '0',
+                'isolatedEquity': '0',
+                'unrealizedPnl': fmt(unrealized),
+                'ts': str(now_ms())
+            }]
+        }
+
+    def pending_order_rows(self, inst_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        return [o.to_row() for o in self.orders.values()
+                if o.state == 'live' and (not inst_id or o.inst_id == inst_id)]
+
+    def pending_tpsl_rows(self, inst_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        rows = []
+        for tpsl in self.tpsl.values():
+            if inst_id and tpsl.inst_id != inst_id:
+                continue
+            position = self.positions.get(tpsl.inst_id)
+            side = 'sell' if position and position.size > 0 else 'buy'
+            rows.append(tpsl.to_row(side))
+        return rows
+
+    def order_row(self, inst_id: Optional[str], order_id: Optional[str]) -> Dict[str, Any]:
+        order = self.orders.get(order_id)
+        if not order or (inst_id and order.inst_id != inst_id):
+            raise ExchangeError(ORDER_NOT_FOUND, f"Order {order_id} does not exist")
+        return order.to_row()
+
+
+class SimulatedExchange:
+    """
+    Market plus one account per API key. Thread-safe: every public method
+    takes the exchange lock.
+    """
+
+    def __init__(self, account_names: List[str], equity: float = 10000.0, fee_rate: float = 0.0006,
+                 default_leverage: int = 3, instruments: Optional[List[Dict[str, Any]]] = None):
+        """
+        Initialize exchange.
+
+        Args:
+            account_names: One account is created per name (the API key)
+            equity: Starting USDT equity of each account
+            fee_rate: Taker fee charged on every fill
+            default_leverage: Leverage until set-leverage is called
+            instruments: Instrument specs with a starting 'price' (default DEFAULT_INSTRUMENTS)
+        """
+        self.lock = threading.RLock()
+        self._settings = (account_names, equity, fee_rate, default_leverage, instruments)
+        self.reset()
+
+    def reset(self):
+        """Back to the starting prices, balances and no positions, orders or events."""
+        account_names, equity, fee_rate, default_leverage, instruments = self._settings
+        with self.lock:
+            self.market = Market(instruments)
+            self.events: List[Dict[str, Any]] = []
+            self._ids = itertools.count(1_000_000_001)
+            self.accounts = {
+                name: Account(name, self.market, equity, fee_rate, default_leverage, self._ids, self.events)
+                for name in account_names
+            }
+
+    def account(self, name: str) -> Account:
+        return self.accounts[name]
+
+    def set_price(self, inst_id: str, price: float) -> List[Dict[str, Any]]:
+        """
+        Move the mark price and run matching on every account.
+
+        Returns:
+            Events (fills, TP/SL triggers) caused by this move
+        """
+        with self.lock:
+            self.market.spec(inst_id)
+            if price <= 0:
+                raise ExchangeError(INVALID_PARAMETER, "price must be positive")
+            start = len(self.events)
+            self.market.prices[inst_id] = float(price)
+            for account in self.accounts.values():
+                account.on_price(inst_id, float(price))
+            return self.events[start:]
+
+    def play(self, inst_id: str, prices: List[float]) -> List[Dict[str, Any]]:
+        """Apply a price path instantly, one step after another."""
+        events = []
+        for price in prices:
+            events += self.set_price(inst_id, price)
+        return events
+
+    def tickers(self, inst_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self.lock:
+            ts = str(now_ms())
+            return [{
+                'instId': symbol,
+                'last': fmt(price),
+                'askPrice': fmt(price + self.market.instruments[symbol]['tickSize']),
+                'bidPrice': fmt(price - self.market.instruments[symbol]['tickSize']),
+                'ts': ts
+            } for symbol, price in self.market.prices.items() if not inst_id or symbol == inst_id]
+
+    def mark_prices(self, inst_id: Optional[str] = None) -> List[Dict[str, Any]]:
+        with self.lock:
+            ts = str(now_ms())
+            return [{'instId': symbol, 'indexPrice': fmt(price), 'markPrice': fmt(price), 'ts': ts}
+                    for symbol, price in self.market.prices.items() if not inst_id or symbol == inst_id]
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Prices, positions, orders and balances of every account."""
+        with self.lock:
+            return {
+                'prices': {symbol: fmt(price) for symbol, price in self.market.prices.items()},
+                'accounts': {
+                    name: {
+                        'balance': account.balance()['details'][0],
+                        'positions': account.position_rows(),
+                        'pending_orders': account.pending_order_rows(),
+                        'pending_tpsl': account.pending_tpsl_rows()
+                    } for name, account in self.accounts.items()
+                },
+                'events': len(self.events)
+            }
@@ -0,0 +1,500 @@
+"""
+BloFin Exchange Simulator
+
+Local stand-in for the BloFin copy-trading REST API, for end-to-end and
+load tests without the network. Point the trading server (or any script
+using BloFinClient) at it with BLOFIN_BASE_URL=http://127.0.0.1:8100 and
+the simulator's credentials.
+
+- Private endpoints verify BloFinAuth signatures (key, passphrase,
+  timestamp window, nonce reuse, HMAC over the raw path/query/body)
+- Orders, positions and TP/SL run on the in-memory matching engine
+- Prices only move when told to: /_sim/price and /_sim/price-path
+- Latency and errors can be injected per path prefix: /_sim/faults
+- The exchange clock can run ahead of or behind the host (`Date` header
+  and timestamp check): /_sim/clock
+
+Usage:
+    python exchange-simulator/simulator.py [--port 8100] [--equity 10000]
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import hmac
+import json
+import logging
+import os
+import random
+import socket
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass, asdict
+from email.utils import formatdate
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+from matching_engine import SimulatedExchange, ExchangeError, INVALID_PARAMETER
+
+logger = logging.getLogger(__name__)
+
+# Auth error codes (the simulator's own)
+KEY_NOT_FOUND = "152401"
+PASSPHRASE_MISMATCH = "152402"
+TIMESTAMP_EXPIRED = "152403"
+SIGNATURE_INVALID = "152405"
+NONCE_REUSED = "152406"
+NOT_FOUND = "152404"
+
+DEFAULT_CREDENTIALS = "sim-key:sim-secret:sim-passphrase"
+
+
+def parse_credentials(value: str) -> Dict[str, Tuple[str, str]]:
+    """
+    Parse "key:secret:passphrase[,key:secret:passphrase...]".
+
+    Returns:
+        Dict of API key -> (secret, passphrase)
+    """
+    credentials = {}
+    for entry in value.split(','):
+        if not entry.strip():
+            continue
+        parts = entry.strip().split(':')
+        if len(parts) != 3 or not all(parts):
+            raise ValueError(f"Invalid credentials entry '{entry}' (expected key:secret:passphrase)")
+        credentials[parts[0]] = (parts[1], parts[2])
+    return credentials
+
+
+def sign(secret: str, prehash: str) -> str:
+    """BloFin signature: base64 of the hex HMAC-SHA256 digest."""
+    digest = hmac.new(secret.encode('utf-8'), prehash.encode('utf-8'), hashlib.sha256).hexdigest()
+    return base64.b64encode(digest.encode('utf-8')).decode('utf-8')
+
+
+class SimClock:
+    """Exchange clock, `offset` seconds ahead of the host clock (negative = behind)."""
+
+    def __init__(self, offset: float = 0.0):
+        self.offset = offset
+
+    def time(self) -> float:
+        return time.time() + self.offset
+
+
+class SignatureVerifier:
+    """Checks the ACCESS-* headers of a private request."""
+
+    def __init__(self, credentials: Dict[str, Tuple[str, str]], recv_window: float = 30.0,
+                 clock: Optional[SimClock] = None):
+        """
+        Initialize verifier.
+
+        Args:
+            credentials: API key -> (secret, passphrase)
+            recv_window: Max |server time - ACCESS-TIMESTAMP| in seconds (0 = no check)
+            clock: Exchange clock (default: the host clock)
+        """
+        self.credentials = credentials
+        self.recv_window = recv_window
+        self.clock = clock or SimClock()
+        self._nonces = set()
+        self._nonce_order = deque()
+
+        self.stats = {
+            'verified': 0,
+            'rejected': 0
+        }
+
+    def verify(self, method: str, path: str, query: str, body: str, headers) -> str:
+        """
+        Verify a request.
+
+        Returns:
+            The API key (account name)
+
+        Raises:
+            ExchangeError: If the request isn't correctly signed
+        """
+        try:
+            api_key = headers.get('ACCESS-KEY')
+            if api_key not in self.credentials:
+                raise ExchangeError(KEY_NOT_FOUND, "API key does not exist")
+            secret, passphrase = self.credentials[api_key]
+            if headers.get('ACCESS-PASSPHRASE') != passphrase:
+                raise ExchangeError(PASSPHRASE_MISMATCH, "Passphrase is incorrect")
+
+            timestamp = headers.get('ACCESS-TIMESTAMP', '')
+            nonce = headers.get('ACCESS-NONCE', '')
+            if not timestamp.isdigit() or not nonce:
+                raise ExchangeError(SIGNATURE_INVALID, "ACCESS-TIMESTAMP and ACCESS-NONCE are required")
+            skew = abs(self.clock.time() - int(timestamp) / 1000)
+            if self.recv_window and skew > self.recv_window:
+                raise ExchangeError(TIMESTAMP_EXPIRED, f"Timestamp is {skew:.1f}s off server time "
+                                                       f"(window {self.recv_window:.0f}s)")
+            if nonce in self._nonces:
+                raise ExchangeError(NONCE_REUSED, "Nonce has already been used")
+
+            # GET signs the path with its query string, POST the path and raw body
+            signed_path = f"{path}?{query}" if query else path
+            prehash = f"{signed_path}{method}{timestamp}{nonce}{body}"
+            if not hmac.compare_digest(sign(secret, prehash), headers.get('ACCESS-SIGN', '')):
+                raise ExchangeError(SIGNATURE_INVALID, "Signature verification failed")
+        except ExchangeError:
+            self.stats['rejected'] += 1
+            raise
+
+        self._nonces.add(nonce)
+        self._nonce_order.append(nonce)
+        if len(self._nonce_order) > 100000:
+            self._nonces.discard(self._nonce_order.popleft())
+        self.stats['verified'] += 1
+        return api_key
+
+
+@dataclass
+class FaultRule:
+    """Latency/error injected into API calls whose path starts with `path`."""
+    path: str = ""  # API path prefix ("" = every call)
+    latency_ms: float = 0.0
+    jitter_ms: float = 0.0  # Uniform extra 0..jitter_ms
+    error_rate: float = 0.0  # Probability of failing a call
+    error_count: int = 0  # Fail the next N calls regardless of error_rate
+    error_code: str = "500"
+    error_msg: str = "Injected error"
+    http_status: int = 200
+
+
+class FaultInjector:
+    """Applies FaultRules to incoming API calls."""
+
+    def __init__(self, seed: Optional[int] = None):
+        self.rules: List[FaultRule] = []
+        self.random = random.Random(seed)
+
+        self.stats = {
+            'delayed': 0,
+            'errors_injected': 0
+        }
+
+    def add(self, rule: FaultRule):
+        self.rules.append(rule)
+
+    def clear(self):
+        self.rules = []
+
+    def apply(self, path: str) -> Tuple[float, Optional[FaultRule]]:
+        """
+        Match a call against the rules.
+
+        Returns:
+            (delay in seconds, rule whose error to return or None)
+        """
+        delay = 0.0
+        failing = None
+        for rule in self.rules:
+            if not path.startswith(rule.path):
+                continue
+            delay += (rule.latency_ms + self.random.uniform(0, rule.jitter_ms)) / 1000
+            if failing is None:
+                if rule.error_count > 0:
+                    rule.error_count -= 1
+                    failing = rule
+                elif rule.error_rate and self.random.random() < rule.error_rate:
+                    failing = rule
+        if delay:
+            self.stats['delayed'] += 1
+        if failing:
+            self.stats['errors_injected'] += 1
+        return delay, failing
+
+
+def _query(params: Dict[str, str], key: str) -> Optional[str]:
+    return params.get(key) or None
+
+
+def _private_routes(exchange: SimulatedExchange) -> Dict[Tuple[str, str], Callable]:
+    """(method, path) -> handler(account, params, body) returning the response data."""
+    prefix = "/api/v1/copytrading"
+
+    def place_order(account, params, body):
+        order = account.place_order(body)
+        return [{'orderId': order.order_id, 'clientOrderId': '', 'code': '0', 'msg': ''}]
+
+    def place_tpsl(account, params, body):
+        tpsl = account.place_tpsl(body)
+        return {'algoId': tpsl.algo_id, 'clientOrderId': '', 'code': '0', 'msg': ''}
+
+    def cancel_tpsl(account, params, body):
+        if isinstance(body, list):
+            return [row for item in body for row in account.cancel_tpsl(item)]
+        return account.cancel_tpsl(body)
+
+    return {
+        ('POST', f"{prefix}/trade/place-order"): place_order,
+        ('POST', f"{prefix}/trade/place-tpsl-by-contract"): place_tpsl,
+        ('POST', f"{prefix}/trade/cancel-tpsl-by-contract"): cancel_tpsl,
+        ('POST', f"{prefix}/account/set-leverage"): lambda account, params, body: account.set_leverage(body),
+        ('GET', f"{prefix}/trade/pending-tpsl-by-contract"):
+            lambda account, params, body: account.pending_tpsl_rows(_query(params, 'instId')),
+        ('GET', f"{prefix}/trade/pending-tpsl-by-order"):
+            lambda account, params, body: account.pending_tpsl_rows(_query(params, 'instId')),
+        ('GET', f"{prefix}/trade/orders-pending-by-contract"):
+            lambda account, params, body: account.pending_order_rows(_query(params, 'instId')),
+        ('GET', f"{prefix}/trade/order"):
+            lambda account, params, body: account.order_row(_query(params, 'instId'), _query(params, 'ordId')),
+        ('GET', f"{prefix}/account/positions-by-contract"):
+            lambda account, params, body: account.position_rows(_query(params, 'instId')),
+        ('GET', f"{prefix}/account/balance"): lambda account, params, body: account.balance(),
+    }
+
+
+def _public_routes(exchange: SimulatedExchange) -> Dict[Tuple[str, str], Callable]:
+    """(method, path) -> handler(params) returning the response data."""
+    return {
+        ('GET', "/api/v1/market/instruments"): lambda params: exchange.market.instrument_rows(),
+        ('GET', "/api/v1/market/tickers"): lambda params: exchange.tickers(_query(params, 'instId')),
+        ('GET', "/api/v1/market/mark-price"): lambda params: exchange.mark_prices(_query(params, 'instId')),
+    }
+
+
+def _error(code: str, msg: str, status: int = 200) -> JSONResponse:
+    return JSONResponse({'code': code, 'msg': msg, 'data': None}, status_code=status)
+
+
+def create_app(exchange: Optional[SimulatedExchange] = None,
+               credentials: Optional[Dict[str, Tuple[str, str]]] = None,
+               recv_window: float = 30.0, seed: Optional[int] = None,
+               clock_offset: float = 0.0) -> FastAPI:
+    """
+    Build the simulator app.
+
+    Args:
+        exchange: Exchange to serve (default: one account per credential, 10000 USDT each)
+        credentials: API key -> (secret, passphrase) (default DEFAULT_CREDENTIALS)
+        recv_window: Allowed clock difference for ACCESS-TIMESTAMP in seconds (0 = off)
+        seed: Random seed for fault injection
+        clock_offset: Seconds the exchange clock runs ahead of the host (negative = behind)
+
+    The exchange, clock, verifier and fault injector are on app.state. Serve it
+    with uvicorn's own Date header off (date_header=False); the app stamps
+    Date from the exchange clock.
+    """
+    credentials = credentials or parse_credentials(DEFAULT_CREDENTIALS)
+    exchange = exchange or SimulatedExchange(list(credentials))
+    clock = SimClock(clock_offset)
+    verifier = SignatureVerifier(credentials, recv_window, clock)
+    faults = FaultInjector(seed)
+    private_routes = _private_routes(exchange)
+    public_routes = _public_routes(exchange)
+    price_paths: Dict[str, asyncio.Task] = {}
+
+    app = FastAPI(
+        title="BloFin Exchange Simulator",
+        description="In-memory BloFin copy-trading API for offline tests",
+        version="1.0.0"
+    )
+    app.state.exchange = exchange
+    app.state.clock = clock
+    app.state.verifier = verifier
+    app.state.faults = faults
+
+    @app.middleware("http")
+    async def date_header(request: Request, call_next):
+        """Date header from the exchange clock (what clients sync against)."""
+        response = await call_next(request)
+        response.headers['Date'] = formatdate(clock.time(), usegmt=True)
+        return response
+
+    @app.api_route("/api/v1/{route:path}", methods=["GET", "POST"])
+    async def api(request: Request):
+        """Exchange API gateway: faults, then auth, then the engine."""
+        method = request.method
+        path = request.url.path.rstrip('/')
+        raw_body = (await request.body()).decode('utf-8')
+        params = dict(request.query_params)
+
+        delay, failing = faults.apply(path)
+        if delay:
+            await asyncio.sleep(delay)
+        if failing:
+            return _error(failing.error_code, failing.error_msg, failing.http_status)
+
+        key = (method, path)
+        if key not in private_routes and key not in public_routes:
+            return _error(NOT_FOUND, f"Endpoint {method} {path} is not simulated", 404)
+
+        try:
+            if key in public_routes:
+                with exchange.lock:
+                    data = public_routes[key](params)
+            else:
+                api_key = verifier.verify(method, path, request.url.query, raw_body, request.headers)
+                body = json.loads(raw_body) if raw_body else {}
+                with exchange.lock:
+                    data = private_routes[key](exchange.account(api_key), params, body)
+        except ExchangeError as e:
+            status = 401 if e.code.startswith("1524") else 200
+            return _error(e.code, e.msg, status)
+        except json.JSONDecodeError:
+            return _error(INVALID_PARAMETER, "Body is not valid JSON")
+
+        return JSONResponse({'code': '0', 'msg': 'success', 'data': data})
+
+    # ---- control endpoints (no auth) ----
+
+    @app.get("/_sim/state")
+    async def state():
+        return {
+            **exchange.snapshot(),
+            'auth': verifier.stats,
+            'clock_offset': clock.offset,
+            'faults': {**faults.stats, 'rules': [asdict(rule) for rule in faults.rules]},
+            'price_paths': sorted(symbol for symbol, task in price_paths.items() if not task.done())
+        }
+
+    @app.get("/_sim/events")
+    async def events(since: int = 0):
+        """Fills, TP/SL triggers and cancels from index `since`."""
+        with exchange.lock:
+            return {'events': exchange.events[since:], 'next': len(exchange.events)}
+
+    @app.post("/_sim/price")
+    async def set_price(request: Request):
+        """Body: {"instId": "BTC-USDT", "price": 61000}"""
+        payload = await request.json()
+        try:
+            return {'events': exchange.set_price(payload.get('instId'), float(payload.get('price')))}
+        except (TypeError, ValueError):
+            return _error(INVALID_PARAMETER, "price must be a number", 400)
+        except ExchangeError as e:
+            return _error(e.code, e.msg, 400)
+
+    @app.post("/_sim/price-path")
+    async def price_path(request: Request):
+        """
+        Body: {"instId": "BTC-USDT", "prices": [60500, 61000, ...], "interval": 0.5}
+
+        interval 0 plays the path immediately and returns its events; otherwise
+        it runs in the background (replacing any path running for the symbol).
+        """
+        payload = await request.json()
+        symbol = payload.get('instId')
+        try:
+            prices = [float(p) for p in payload.get('prices') or []]
+            interval = float(payload.get('interval', 0))
+            exchange.market.spec(symbol)
+        except (TypeError, ValueError):
+            return _error(INVALID_PARAMETER, "prices must be numbers", 400)
+        except ExchangeError as e:
+            return _error(e.code, e.msg, 400)
+
+        if interval <= 0:
+            return {'events': exchange.play(symbol, prices)}
+
+        async def run():
+            for price in prices:
+                exchange.set_price(symbol, price)
+                await asyncio.sleep(interval)
+
+        if symbol in price_paths:
+            price_paths[symbol].cancel()
+        price_paths[symbol] = asyncio.create_task(run())
+        return {'started': True, 'steps': len(prices), 'seconds': len(prices) * interval}
+
+    @app.post("/_sim/reset")
+    async def reset():
+        """Starting prices and balances, no positions, orders, events or faults."""
+        for task in price_paths.values():
+            task.cancel()
+        price_paths.clear()
+        faults.clear()
+        exchange.reset()
+        return {'reset': True}
+
+    @app.post("/_sim/faults")
+    async def add_fault(request: Request):
+        """Body: FaultRule fields, e.g. {"path": "/api/v1/copytrading/trade", "error_count": 1}"""
+        payload = await request.json()
+        try:
+            rule = FaultRule(**payload)
+        except TypeError as e:
+            return _error(INVALID_PARAMETER, str(e), 400)
+        faults.add(rule)
+        return {'rules': [asdict(r) for r in faults.rules]}
+
+    @app.delete("/_sim/faults")
+    async def clear_faults():
+        faults.clear()
+        return {'rules': []}
+
+    @app.post("/_sim/clock")
+    async def set_clock(request: Request):
+        """Body: {"offset": 45} - exchange clock 45s ahead of the host (negative = behind)"""
+        payload = await request.json()
+        try:
+            clock.offset = float(payload.get('offset'))
+        except (TypeError, ValueError):
+            return _error(INVALID_PARAMETER, "offset must be a number", 400)
+        return {'offset': clock.offset}
+
+    return app
+
+
+def serve_in_thread(app: FastAPI, host: str = '127.0.0.1') -> str:
+    """Serve an app with uvicorn in a daemon thread on a free port; returns its base URL."""
+    import uvicorn
+    with socket.socket() as sock:
+        sock.bind((host, 0))
+        port = sock.getsockname()[1]
+    server = uvicorn.Server(uvicorn.Config(app, host=host, port=port, log_level='error', date_header=False))
+    threading.Thread(target=server.run, daemon=True, name="exchange-simulator").start()
+    for _ in range(200):
+        if server.started:
+            break
+        time.sleep(0.05)
+    return f"http://{host}:{port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="BloFin exchange simulator")
+    parser.add_argument('--host', default=os.getenv('SIM_HOST', '127.0.0.1'))
+    parser.add_argument('--port', type=int, default=int(os.getenv('SIM_PORT', 8100)))
+    parser.add_argument('--credentials', default=os.getenv('SIM_CREDENTIALS', DEFAULT_CREDENTIALS),
+                        help='key:secret:passphrase[,...] - one account per key')
+    parser.add_argument('--equity', type=float, default=float(os.getenv('SIM_EQUITY', 10000)),
+                        help='Starting USDT equity per account')
+    parser.add_argument('--fee-rate', type=float, default=float(os.getenv('SIM_FEE_RATE', 0.0006)))
+    parser.add_argument('--recv-window', type=float, default=float(os.getenv('SIM_RECV_WINDOW', 30)),
+                        help='Allowed timestamp skew in seconds (0 = off)')
+    parser.add_argument('--latency-ms', type=float, default=float(os.getenv('SIM_LATENCY_MS', 0)),
+                        help='Latency added to every API call')
+    parser.add_argument('--jitter-ms', type=float, default=float(os.getenv('SIM_JITTER_MS', 0)))
+    parser.add_argument('--error-rate', type=float, default=float(os.getenv('SIM_ERROR_RATE', 0)),
+                        help='Probability of failing any API call')
+    parser.add_argument('--seed', type=int, default=None, help='Random seed for injected faults')
+    parser.add_argument('--clock-offset', type=float, default=float(os.getenv('SIM_CLOCK_OFFSET', 0)),
+                        help='Seconds the exchange clock runs ahead of the host (negative = behind)')
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+
+    credentials = parse_credentials(args.credentials)
+    exchange = SimulatedExchange(list(credentials), equity=args.equity, fee_rate=args.fee_rate)
+    app = create_app(exchange, credentials, recv_window=args.recv_window, seed=args.seed,
+                     clock_offset=args.clock_offset)
+    if args.latency_ms or args.jitter_ms or args.error_rate:
+        app.state.faults.add(FaultRule(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms,
+                                       error_rate=args.error_rate))
+
+    import uvicorn
+    logger.info(f"🧪 BloFin simulator on http://{args.host}:{args.port} ({len(credentials)} account(s))")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", date_header=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -8,6 +8,7 @@ from .models import (
     TradeStatus,
     HealthCheck
 )
+from .codec import CodecError
 
 __all__ = [
     "TradeSignal",
@@ -15,7 +16,8 @@ __all__ = [
     "TradeSide",
     "OrderType",
     "TradeStatus",
-    "HealthCheck"
+    "HealthCheck",
+    "CodecError"
 ]
 
 __version__ = "1.0.0"
@@ -0,0 +1,158 @@
+"""
+Wire codec for the shared models.
+
+For each model class a specialised encoder and decoder are generated once
+from its dataclass fields and type hints (the msgspec approach, without
+the dependency):
+
+- encode: builds the dict straight from the attributes - no recursive
+  deep copy like dataclasses.asdict
+- encode lean: the wire form - schema version under "v", None fields and
+  fields marked `metadata={'wire': False}` (e.g. raw_message) left out
+- decode: checks every field's type, rejects missing fields and (for
+  strict models) unknown fields, then constructs the object
+
+Supported field types: str, int, float (ints accepted), bool, list, dict,
+Literal[...] and Optional[...] of these.
+"""
+import dataclasses
+import typing
+from typing import Any, Callable, Dict, Tuple
+
+VERSION_KEY = 'v'
+
+
+class CodecError(ValueError):
+    """A payload doesn't match the model's schema."""
+
+
+class Codec:
+    """Generated encoder/decoder pair for one dataclass."""
+
+    def __init__(self, cls: type, version: int = 1, strict: bool = True):
+        """
+        Build the codec for a model class.
+
+        Args:
+            cls: Dataclass to encode/decode
+            version: Schema version written in the lean form; wire payloads
+                     with a newer "v" are decoded leniently (unknown fields ignored)
+            strict: Reject unknown fields in payloads of this version or older.
+                    Off for models a newer peer sends back in the full form,
+                    which carries no version to be lenient about.
+        """
+        self.cls = cls
+        self.version = version
+        self.strict = strict
+        self.fields = dataclasses.fields(cls)
+        self.field_names = frozenset(f.name for f in self.fields)
+        self.encode, self.encode_lean, self._decode = _generate(cls, self.fields, version)
+
+    def decode(self, data: Dict[str, Any]) -> Any:
+        """
+        Validate a payload and construct the model.
+
+        Raises:
+            CodecError: If the payload doesn't match the schema
+        """
+        if type(data) is not dict:
+            raise CodecError(f"{self.cls.__name__} payload must be an object, got {type(data).__name__}")
+        version = data.get(VERSION_KEY, self.version)
+        if type(version) is not int:
+            raise CodecError(f"{self.cls.__name__}: schema version must be an int")
+        unknown = data.keys() - self.field_names
+        unknown.discard(VERSION_KEY)
+        if unknown and self.strict and version <= self.version:
+            raise CodecError(f"{self.cls.__name__}: unknown field(s) {', '.join(sorted(unknown))}")
+        try:
+            return self._decode(data)
+        except CodecError:
+            raise
+        except (TypeError, ValueError) as e:
+            # e.g. __post_init__ normalisation
+            raise CodecError(f"{self.cls.__name__}: {e}") from e
+
+
+def _type_check(name: str, hint: Any, consts: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Python condition that is True when `value` does NOT match hint, and a
+    description of the expected type.
+    """
+    origin = typing.get_origin(hint)
+    args = typing.get_args(hint)
+
+    if origin is typing.Union and type(None) in args:
+        inner = [a for a in args if a is not type(None)]
+        inner_hint = inner[0] if len(inner) == 1 else typing.Union[tuple(inner)]
+        condition, expected = _type_check(name, inner_hint, consts)
+        return f"(value is not None and {condition})", f"{expected} or null"
+
+    if origin is typing.Literal:
+        consts[f"{name}_choices"] = frozenset(args)
+        return f"value not in {name}_choices", f"one of {', '.join(map(repr, args))}"
+
+    if hint is float:
+        return "(type(value) is not float and type(value) is not int)", "number"
+
+    simple = {str: 'string', int: 'integer', bool: 'boolean', list: 'array', dict: 'object'}
+    if hint in simple:
+        return f"type(value) is not {hint.__name__}", simple[hint]
+    if origin in (list, dict):
+        return f"type(value) is not {origin.__name__}", simple[origin]
+    if hint is Any:
+        return "False", "any"
+
+    raise TypeError(f"Codec doesn't support field type {hint!r} ({name})")
+
+
+def _generate(cls: type, fields, version: int) -> Tuple[Callable, Callable, Callable]:
+    """Generate (encode, encode_lean, decode) source for a dataclass and compile it."""
+    hints = typing.get_type_hints(cls)
+    consts: Dict[str, Any] = {'cls': cls, 'CodecError': CodecError, 'MISSING': dataclasses.MISSING}
+
+    encode = ["def encode(obj):", "    return {"]
+    encode += [f"        {f.name!r}: obj.{f.name}," for f in fields]
+    encode.append("    }")
+
+    lean = ["def encode_lean(obj):", f"    data = {{{VERSION_KEY!r}: {version}}}"]
+    for f in fields:
+        if not f.metadata.get('wire', True):
+            continue
+        lean += [f"    value = obj.{f.name}",
+                 f"    if value is not None:",
+                 f"        data[{f.name!r}] = value"]
+    lean.append("    return data")
+
+    decode = ["def decode(data):", "    get = data.get", "    kwargs = {}"]
+    for f in fields:
+        required = f.default is dataclasses.MISSING and f.default_factory is dataclasses.MISSING
+        condition, expected = _type_check(f.name, hints[f.name], consts)
+        missing = f"{cls.__name__}: missing field '{f.name}'"
+        wrong_type = f"{cls.__name__}: {f.name} must be {expected}, got "
+        decode.append(f"    value = get({f.name!r}, MISSING)")
+        if required:
+            decode += [f"    if value is MISSING:",
+                       f"        raise CodecError({missing!r})"]
+        decode += [f"    if value is not MISSING:",
+                   f"        if {condition}:",
+                   f"            raise CodecError({wrong_type!r} + type(value).__name__)",
+                   f"        kwargs[{f.name!r}] = value"]
+    decode.append("    return cls(**kwargs)")
+
+    namespace = dict(consts)
+    source = "\n".join(encode + [""] + lean + [""] + decode)
+    exec(compile(source, f"<codec {cls.__name__}>", "exec"), namespace)
+    return namespace['encode'], namespace['encode_lean'], namespace['decode']
+
+
+def versioned_model(version: int, strict: bool = True) -> Callable[[type], type]:
+    """
+    Class decorator: attach a generated Codec with the given schema version.
+
+    Applied after @dataclass.
+    """
+    def decorate(cls: type) -> type:
+        cls.__codec__ = Codec(cls, version, strict)
+        cls.SCHEMA_VERSION = version
+        return cls
+    return decorate
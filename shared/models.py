@@ -2,12 +2,23 @@
 Shared data models for Discord Bot and Trading Server.
 
 These models define the contract between services. Changes here affect both services.
+
+Models are slotted dataclasses with a generated codec (shared/codec.py):
+to_dict/from_dict are the full form with type-checked decoding, to_wire is
+the lean versioned form sent between services. Bump a model's schema
+version when a field changes meaning or is removed.
+
+The server answers with the full form (no version), so response models
+decode with strict=False: a bot running older code ignores fields a newer
+server adds instead of failing on them.
 """
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, field
 from typing import Optional, Literal
 from datetime import datetime
 from enum import Enum
 
+from .codec import versioned_model
+
 
 class TradeSide(Enum):
     """Trade direction."""
@@ -35,9 +46,11 @@ class TradeStatus(Enum):
     EXECUTED = "executed"
     FAILED = "failed"
     REJECTED = "rejected"
+    CANCELLED = "cancelled"
 
 
-@dataclass
+@versioned_model(2)
+@dataclass(slots=True)
 class TradeSignal:
     """
     Parsed trade signal data.
@@ -61,7 +74,15 @@ class TradeSignal:
     source: str = "discord"  # Source identifier
     signal_id: Optional[str] = None  # Unique ID for tracking
     timestamp: Optional[str] = None  # ISO format timestamp
-    raw_message: Optional[str] = None  # Original Discord message
+    raw_message: Optional[str] = field(default=None, metadata={'wire': False})  # Original Discord message (not sent)
+    
+    # Routing (set per source channel)
+    risk_multiplier: Optional[float] = None  # Scales per-trade risk (None = 1.0)
+    account: Optional[str] = None  # Execute on this account only (None = all accounts)
+    
+    # Tracing (v2) - see shared/tracing.py
+    trace_id: Optional[str] = None  # Follows the signal from the Discord message to the exchange
+    trace: Optional[list] = None  # Spans recorded by the bot (delivery, parsing)
     
     def __post_init__(self):
         """Normalize and validate data after initialization."""
@@ -79,12 +100,21 @@ class TradeSignal:
     
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
-        return asdict(self)
+        return self.__codec__.encode(self)
+    
+    def to_wire(self) -> dict:
+        """Lean versioned form sent between services (no raw_message or empty fields)."""
+        return self.__codec__.encode_lean(self)
     
     @classmethod
     def from_dict(cls, data: dict) -> 'TradeSignal':
-        """Create TradeSignal from dictionary."""
-        return cls(**data)
+        """
+        Create TradeSignal from a full or wire dictionary.
+        
+        Raises:
+            CodecError: If a field is unknown, missing or has the wrong type
+        """
+        return cls.__codec__.decode(data)
     
     def validate(self) -> tuple[bool, Optional[str]]:
         """
@@ -119,6 +149,9 @@ class TradeSignal:
         if self.size is not None and self.size <= 0:
             return False, "Size must be positive"
         
+        if self.risk_multiplier is not None and self.risk_multiplier <= 0:
+            return False, "Risk multiplier must be positive"
+        
         # Validate price logic for long positions
         if self.side in ["long", "buy"]:
             if self.stop_loss and self.entry_price and self.stop_loss >= self.entry_price:
@@ -136,7 +169,8 @@ class TradeSignal:
         return True, None
 
 
-@dataclass
+@versioned_model(2, strict=False)
+@dataclass(slots=True)
 class TradeResponse:
     """
     Response from Trading Server after processing a trade signal.
@@ -158,17 +192,37 @@ class TradeResponse:
     error_code: Optional[str] = None
     error_details: Optional[str] = None
     
+    # Multi-account fan-out
+    account: Optional[str] = None  # Account that produced this response
+    account_results: Optional[list] = None  # Per-account responses (consolidated response only)
+    
+    # Tracing (v2)
+    trace_id: Optional[str] = None
+    timeline: Optional[list] = None  # Stage spans, oldest first (consolidated response only)
+    
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
-        return asdict(self)
+        return self.__codec__.encode(self)
+    
+    def to_wire(self) -> dict:
+        """Lean versioned form sent between services (no empty fields)."""
+        return self.__codec__.encode_lean(self)
     
     @classmethod
     def from_dict(cls, data: dict) -> 'TradeResponse':
-        """Create TradeResponse from dictionary."""
-        return cls(**data)
+        """
+        Create TradeResponse from a full or wire dictionary.
+        
+        Unknown fields (from a newer server) are ignored.
+        
+        Raises:
+            CodecError: If a field is missing or has the wrong type
+        """
+        return cls.__codec__.decode(data)
 
 
-@dataclass
+@versioned_model(1, strict=False)
+@dataclass(slots=True)
 class HealthCheck:
     """Health check response for service monitoring."""
     service: str
@@ -179,4 +233,4 @@ class HealthCheck:
     
     def to_dict(self) -> dict:
         """Convert to dictionary for JSON serialization."""
-        return asdict(self)
+        return self.__codec__.encode(self)
@@ -0,0 +1,216 @@
+"""
+Tracing Module
+
+Per-trade latency breakdown. A trace follows one signal from the Discord
+message to the last BloFin call:
+
+- The bot starts it (trace_id), times its own stages (Discord delivery,
+  parsing) and sends them along in TradeSignal.trace
+- The server continues it: while a trace is current, every pipeline stage
+  and BloFin API call is recorded as a span. The current trace lives in a
+  contextvar, so asyncio.to_thread workers (one per account) inherit it
+- The finished timeline is returned in TradeResponse.timeline and written
+  to the journal, and /api/v1/trades/{id}/timeline renders the waterfall
+
+Spans are plain dicts so they pass through the model codec:
+{'stage', 'service', 'start' (unix seconds), 'duration_ms'} plus optional
+'account' and 'detail'. timeline() adds 'offset_ms' from the first span.
+
+Recording when no trace is current is a no-op, so instrumented code (e.g.
+BloFinClient used from a script) doesn't need to know about tracing.
+"""
+import contextvars
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+
+_current: contextvars.ContextVar[Optional['Trace']] = contextvars.ContextVar('trace', default=None)
+_attrs: contextvars.ContextVar[Dict[str, str]] = contextvars.ContextVar('trace_attrs', default={})
+
+SPAN_KEYS = ('stage', 'service', 'start', 'duration_ms')
+
+
+def new_trace_id() -> str:
+    """Short random trace ID (16 hex chars)."""
+    return uuid.uuid4().hex[:16]
+
+
+class Trace:
+    """
+    Spans recorded for one signal.
+
+    Span times come from perf_counter (monotonic, high resolution) and are
+    converted to wall-clock with one anchor taken when the trace starts, so
+    spans from different threads line up exactly. Spans from another
+    service (the bot) carry that host's clock - offsets between the two are
+    only as good as the clock sync between the hosts.
+    """
+
+    def __init__(self, trace_id: str, service: str):
+        """
+        Start a trace.
+
+        Args:
+            trace_id: ID shared by every service handling the signal
+            service: Name recorded on this process's spans ('bot', 'server')
+        """
+        self.trace_id = trace_id
+        self.service = service
+        self.started_at = time.time()
+        self._origin = time.perf_counter()
+        self._spans: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def _wall(self, perf: float) -> float:
+        return self.started_at + (perf - self._origin)
+
+    def add_span(self, stage: str, start: float, duration: float, service: Optional[str] = None, **attrs):
+        """
+        Add a span from wall-clock times.
+
+        Args:
+            stage: Stage name
+            start: Start time (unix seconds)
+            duration: Duration in seconds
+            service: Service that ran the stage (defaults to this trace's)
+            **attrs: Extra fields (account, detail); None values are dropped
+        """
+        span = {'stage': stage, 'service': service or self.service,
+                'start': round(start, 6), 'duration_ms': round(duration * 1000, 3)}
+        span.update((k, v) for k, v in attrs.items() if v is not None)
+        with self._lock:
+            self._spans.append(span)
+
+    def record(self, stage: str, started: float, **attrs):
+        """Add a span that started at perf_counter() `started` and ends now."""
+        ended = time.perf_counter()
+        self.add_span(stage, self._wall(started), ended - started, **{**_attrs.get(), **attrs})
+
+    def mark(self, stage: str, **attrs):
+        """Add a zero-length span (a point in time, e.g. 'sent')."""
+        self.record(stage, time.perf_counter(), **attrs)
+
+    @contextmanager
+    def stage(self, name: str, **attrs) -> Iterator[None]:
+        """`with trace.stage('parse'):` records the block as a span."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started, **attrs)
+
+    def adopt(self, spans: Any):
+        """
+        Add spans recorded upstream (TradeSignal.trace), then a span for the
+        hop from the upstream's last span to the start of this trace.
+
+        Malformed entries are skipped - tracing never fails a trade.
+        """
+        if not isinstance(spans, list):
+            return
+        upstream_end = None
+        for span in spans:
+            if not isinstance(span, dict) or not all(key in span for key in SPAN_KEYS):
+                continue
+            try:
+                start, duration = float(span['start']), float(span['duration_ms']) / 1000
+            except (TypeError, ValueError):
+                continue
+            extra = {k: v for k, v in span.items() if k in ('account', 'detail')}
+            self.add_span(str(span['stage']), start, duration, service=str(span['service']), **extra)
+            end = start + duration
+            upstream_end = end if upstream_end is None else max(upstream_end, end)
+        if upstream_end is not None:
+            # Clamped at 0: a negative hop means the hosts' clocks disagree
+            hop = max(self.started_at - upstream_end, 0.0)
+            self.add_span('handoff', self.started_at - hop, hop, service='network')
+
+    def spans(self) -> List[Dict[str, Any]]:
+        """
+        Raw spans (wire form for TradeSignal.trace), oldest first. Spans
+        starting together are ordered marks first, then longest (enclosing) first.
+        """
+        with self._lock:
+            spans = [dict(span) for span in self._spans]
+        return sorted(spans, key=lambda s: (s['start'], s['duration_ms'] > 0, -s['duration_ms']))
+
+    def timeline(self) -> List[Dict[str, Any]]:
+        """Spans oldest first, each with 'offset_ms' from the first span."""
+        spans = self.spans()
+        if spans:
+            first = spans[0]['start']
+            for span in spans:
+                span['offset_ms'] = round((span['start'] - first) * 1000, 3)
+        return spans
+
+
+def current() -> Optional[Trace]:
+    """The trace being recorded in this context, if any."""
+    return _current.get()
+
+
+@contextmanager
+def activate(trace: Trace) -> Iterator[Trace]:
+    """Make `trace` current for the block (and threads started from it)."""
+    token = _current.set(trace)
+    try:
+        yield trace
+    finally:
+        _current.reset(token)
+
+
+@contextmanager
+def scope(**attrs) -> Iterator[None]:
+    """Add fields (e.g. account=...) to every span recorded in the block."""
+    token = _attrs.set({**_attrs.get(), **attrs})
+    try:
+        yield
+    finally:
+        _attrs.reset(token)
+
+
+def record(stage: str, started: float, **attrs):
+    """Record a span on the current trace (no-op without one)."""
+    trace = _current.get()
+    if trace is not None:
+        trace.record(stage, started, **attrs)
+
+
+@contextmanager
+def stage(name: str, **attrs) -> Iterator[None]:
+    """`with tracing.stage(...)`: record the block on the current trace."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, started, **attrs)
+
+
+def render_waterfall(timeline: List[Dict[str, Any]], width: int = 50) -> str:
+    """
+    Plain-text waterfall of a timeline: one line per span with its offset,
+    duration and a bar positioned on a shared time axis.
+    """
+    if not timeline:
+        return "(no spans)\n"
+    total = max(span['offset_ms'] + span['duration_ms'] for span in timeline) or 1.0
+    label_width = max(len(_label(span)) for span in timeline)
+    lines = [f"{'stage':<{label_width}}  {'offset':>10}  {'duration':>10}  0{'':{width - 1}}{total:.0f}ms"]
+    for span in timeline:
+        left = int(span['offset_ms'] / total * width)
+        length = max(1, round(span['duration_ms'] / total * width))
+        bar = ' ' * left + ('█' * length if span['duration_ms'] else '|')
+        lines.append(f"{_label(span):<{label_width}}  {span['offset_ms']:>8.1f}ms  "
+                     f"{span['duration_ms']:>8.1f}ms  {bar[:width + 1]}")
+    return "\n".join(lines) + "\n"
+
+
+def _label(span: Dict[str, Any]) -> str:
+    label = f"{span['service']}:{span['stage']}"
+    if span.get('account'):
+        label += f"[{span['account']}]"
+    if span.get('detail'):
+        label += f" {span['detail']}"
+    return label
@@ -0,0 +1,131 @@
+"""
+Circuit Breaker Test (no exchange needed)
+
+Checks trading-server/circuit_breaker.py, then BloFinClient against the
+exchange simulator:
+1. Business errors don't open the breaker; transport/5xx failures do
+2. Slow calls count as failures
+3. An open breaker rejects fast; protective calls still go through
+4. Half-open lets one probe through; successes close, a failure reopens
+5. Protective calls while half-open don't count as probes
+6. Endpoint groups are independent
+7. Client: an account endpoint outage opens only that group, balance calls
+   fail fast, and TP/SL placement still reaches the exchange
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'trading-server'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'exchange-simulator'))
+
+from blofin_client import BloFinClient
+from circuit_breaker import (CircuitBreaker, CircuitBreakerSet, BreakerConfig, CircuitOpenError,
+                             CLOSED, OPEN)
+from simulator import create_app, serve_in_thread, FaultRule
+
+KEY, SECRET, PASSPHRASE = "sim-key", "sim-secret", "sim-passphrase"
+CONFIG = BreakerConfig(window_seconds=10, min_calls=4, failure_rate=0.5, slow_call_seconds=0.5,
+                       open_seconds=0.3, probe_successes=2)
+
+
+def rejects(breaker: CircuitBreaker, protective: bool = False) -> bool:
+    try:
+        breaker.allow(protective)
+        return False
+    except CircuitOpenError:
+        return True
+
+
+def main():
+    print("=" * 70)
+    print("CIRCUIT BREAKER TEST")
+    print("=" * 70)
+
+    results = {}
+
+    breaker = CircuitBreaker('trade', CONFIG, name='test')
+    for _ in range(10):
+        breaker.allow()
+        breaker.record(False, 0.01)  # e.g. 200108 - the exchange answered
+    healthy = breaker.state == CLOSED
+    for _ in range(10):
+        breaker.allow()
+        breaker.record(True, 0.01)
+    results['Opens on failures, not business errors'] = healthy and breaker.state == OPEN
+
+    slow = CircuitBreaker('market', CONFIG, name='test')
+    for _ in range(4):
+        slow.allow()
+        slow.record(False, 1.0)
+    results['Slow calls count as failures'] = slow.state == OPEN
+
+    started = time.perf_counter()
+    rejected = rejects(breaker)
+    fast = time.perf_counter() - started < 0.001
+    results['Open rejects fast, protective bypasses'] = rejected and fast and not rejects(breaker, protective=True)
+    breaker.record(True, 0.01, protective=True)  # Outcome while open doesn't reset the timer
+
+    time.sleep(CONFIG.open_seconds)
+    probe_allowed = not rejects(breaker)
+    second_rejected = rejects(breaker)
+    rejects(breaker, protective=True)
+    breaker.record(False, 0.01, protective=True)  # TP/SL placed while the probe is out
+    protective_not_probe = rejects(breaker) and breaker._probe_streak == 0
+    breaker.record(False, 0.01)
+    breaker.allow()
+    breaker.record(False, 0.01)
+    closed_after_probes = breaker.state == CLOSED
+    for _ in range(4):
+        breaker.allow()
+        breaker.record(True, 0.01)
+    time.sleep(CONFIG.open_seconds)
+    breaker.allow()
+    breaker.record(True, 0.01)
+    results['Half-open probes close or reopen'] = (probe_allowed and second_rejected and closed_after_probes
+                                                  and breaker.state == OPEN)
+    results['Protective calls are not probes'] = protective_not_probe
+
+    breakers = CircuitBreakerSet(CONFIG, name='test')
+    for _ in range(4):
+        breakers.for_path('/api/v1/market/tickers').allow()
+        breakers.for_path('/api/v1/market/tickers').record(True, 0.01)
+    results['Groups independent'] = (breakers.for_path('/api/v1/market/mark-price').state == OPEN
+                                     and breakers.for_path('/api/v1/copytrading/trade/place-order').state == CLOSED
+                                     and breakers.first_open(('account', 'market', 'trade')).group == 'market'
+                                     and breakers.degraded() == {'market': OPEN})
+
+    app = create_app(seed=1)
+    base_url = serve_in_thread(app)
+    client = BloFinClient(KEY, SECRET, PASSPHRASE, base_url=base_url,
+                          breakers=CircuitBreakerSet(CONFIG, name='sim'))
+    client.place_market_order('BTC-USDT', 'buy', 1.0)
+    app.state.faults.add(FaultRule(path="/api/v1/copytrading/account", error_rate=1.0, http_status=503))
+    for _ in range(CONFIG.min_calls):
+        try:
+            client.get_account_balance()
+        except Exception:
+            pass
+    calls_before = client.get_stats()['api_calls']
+    started = time.perf_counter()
+    try:
+        client.get_account_balance()
+        fast_fail = False
+    except CircuitOpenError:
+        fast_fail = time.perf_counter() - started < 0.01 and client.get_stats()['api_calls'] == calls_before
+    tpsl = client.set_tpsl_pair('BTC-USDT', tp_price=66000, sl_price=58000, size=1.0)
+    results['Client fails fast, protection still placed'] = (fast_fail and tpsl['order_id'] is not None
+                                                             and client.breakers.degraded() == {'account': OPEN})
+
+    for test_name, passed in results.items():
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    passed_count = sum(1 for p in results.values() if p)
+    print(f"\nTotal: {passed_count}/{len(results)} tests passed")
+    return 0 if passed_count == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
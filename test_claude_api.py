@@ -7,6 +7,7 @@ Tests:
 3. Fallback mechanism when regex parser fails
 4. Edge cases and error handling
 """
+import asyncio
 import os
 import sys
 from dotenv import load_dotenv
@@ -17,6 +18,7 @@ sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'discord-bot'))
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'shared'))
 
 from parser import SignalParser
+from llm_fallback import LLMFallback
 
 # Test signals
 TEST_SIGNALS = {
@@ -263,19 +265,20 @@ def test_fallback_mechanism():
         print("❌ SKIPPED: No Claude API key configured")
         return False
     
-    # Check if parser has Claude fallback implemented
-    parser = SignalParser()
-    
-    if not hasattr(parser, 'parse_with_claude') and not hasattr(parser, '_parse_with_claude'):
-        print("⚠️  WARNING: Claude fallback not yet implemented in SignalParser")
-        print("   This needs to be added to discord-bot/parser.py")
-        return False
+    fallback = LLMFallback(api_key=api_key)
+    parser = SignalParser(llm_fallback=fallback)
     
     print("Testing fallback on unusual format...")
     signal = TEST_SIGNALS["unusual_format"]
     
     # Try to parse - should fall back to Claude
-    result = parser.parse(signal)
+    async def parse_with_fallback():
+        try:
+            return await parser.parse_async(signal)
+        finally:
+            await fallback.close()
+    
+    result = asyncio.run(parse_with_fallback())
     
     if result:
         print(f"✅ Fallback successful!")
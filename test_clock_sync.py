@@ -0,0 +1,108 @@
+"""
+Clock Sync Test (no exchange needed)
+
+Checks trading-server/clock_sync.py, then request signing against the
+exchange simulator with its clock 45s ahead of the host:
+1. Estimate is a running mean, then an EWMA; a step restarts it
+2. One-second Date truncation averages out over jittered samples
+3. Unsynced requests are rejected as expired; synced requests are accepted
+4. Slow samples are discarded
+5. Drift alert fires once past the threshold and again when back in sync
+6. Offset is exported as a metric
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'trading-server'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'exchange-simulator'))
+
+import requests
+
+from blofin_client import BloFinClient
+from clock_sync import ClockSync, WARMUP_SAMPLES
+from shared.metrics import REGISTRY
+from simulator import create_app, serve_in_thread, FaultRule
+
+KEY, SECRET, PASSPHRASE = "sim-key", "sim-secret", "sim-passphrase"
+SKEW = 45.0
+
+
+def signed_ok(client: BloFinClient) -> bool:
+    try:
+        client.get_account_balance()
+        return True
+    except Exception as e:
+        print(f"   rejected: {e}")
+        return False
+
+
+def main():
+    print("=" * 70)
+    print("CLOCK SYNC TEST")
+    print("=" * 70)
+
+    results = {}
+
+    clock = ClockSync("http://unused", alpha=0.25, alert_threshold=0)
+    for sample in (1.0, 2.0, 3.0):
+        clock.add_sample(sample)
+    mean = clock.offset
+    clock.add_sample(2.0)
+    clock.add_sample(2.0)
+    ewma = clock.offset  # 5th sample weighs 0.25 (1/5 < alpha)
+    clock.add_sample(30.0)
+    results['Running mean, EWMA, step'] = (abs(mean - 2.0) < 1e-9 and abs(ewma - 2.0) < 1e-9
+                                          and clock.offset == 30.0 and clock.stats['steps'] == 1)
+
+    rng = random.Random(7)
+    clock = ClockSync("http://unused", alert_threshold=0)
+    true_offset = 3.3
+    for _ in range(200):
+        sent = 1_700_000_000 + rng.uniform(0, 86400)
+        received = sent + rng.uniform(0.01, 0.08)
+        stamped = int((sent + received) / 2 + true_offset)  # Date header truncates to the second
+        clock.add_sample(stamped + 0.5 - (sent + received) / 2)
+    results['Date truncation averages out'] = abs(clock.offset - true_offset) < 0.2
+
+    app = create_app(seed=1, clock_offset=SKEW)
+    base_url = serve_in_thread(app)
+    alerts = []
+    clock = ClockSync(base_url, alert_threshold=1.0, on_alert=lambda offset, drifting: alerts.append(drifting))
+    unsynced = BloFinClient(KEY, SECRET, PASSPHRASE, base_url=base_url)
+    synced = BloFinClient(KEY, SECRET, PASSPHRASE, base_url=base_url, clock=clock.now)
+    rejected = not signed_ok(unsynced)
+    for _ in range(WARMUP_SAMPLES):
+        clock.sample()
+    print(f"   measured offset {clock.offset:+.3f}s (true {SKEW:+.1f}s)")
+    results['Synced requests accepted'] = rejected and abs(clock.offset - SKEW) < 1.0 and signed_ok(synced)
+
+    app.state.faults.add(FaultRule(path="/api/v1/market", latency_ms=300))
+    clock.max_rtt = 0.2
+    slow = clock.sample()
+    results['Slow samples discarded'] = slow is None and clock.stats['slow_samples'] == 1
+    app.state.faults.clear()
+
+    drifting = clock.drifting
+    requests.post(f"{base_url}/_sim/clock", json={'offset': 0})
+    for _ in range(WARMUP_SAMPLES):
+        clock.sample()
+    results['Drift alert raised and cleared'] = (drifting and alerts == [True, False] and not clock.drifting
+                                                and clock.stats['steps'] == 1 and signed_ok(unsynced))
+
+    rendered = REGISTRY.render()
+    results['Offset exported'] = ('blofin_clock_offset_seconds ' in rendered
+                                  and 'blofin_clock_samples_total{result="slow"} 1' in rendered)
+
+    for test_name, passed in results.items():
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    passed_count = sum(1 for p in results.values() if p)
+    print(f"\nTotal: {passed_count}/{len(results)} tests passed")
+    return 0 if passed_count == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,76 @@
+"""
+Model Codec Test (no services needed)
+
+Checks shared/codec.py with the shared models:
+1. Signals reject unknown fields unless the payload's "v" is newer
+2. A response decoder built before a field existed reads a newer server's
+   full-form response (no "v") instead of failing on the new field
+3. Responses still reject missing and mistyped fields
+"""
+import os
+import sys
+from dataclasses import dataclass
+from typing import Optional
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from shared.codec import CodecError, versioned_model
+from shared.models import TradeSignal, TradeResponse
+
+
+@versioned_model(1, strict=False)
+@dataclass(slots=True)
+class OldTradeResponse:
+    """TradeResponse as a v1 bot knows it - before tracing and fan-out."""
+    success: bool
+    signal_id: Optional[str] = None
+    order_id: Optional[str] = None
+    message: str = ""
+    status: str = "received"
+    error_code: Optional[str] = None
+
+
+def decode_error(decode, data) -> Optional[str]:
+    try:
+        decode(data)
+        return None
+    except CodecError as e:
+        return str(e)
+
+
+def main():
+    print("=" * 70)
+    print("MODEL CODEC TEST")
+    print("=" * 70)
+
+    results = {}
+
+    wire = TradeSignal(symbol="BTC-USDT", side="long", signal_id="42").to_wire()
+    typo = decode_error(TradeSignal.from_dict, {**wire, 'stop_los': 58000})
+    newer = TradeSignal.from_dict({**wire, 'v': TradeSignal.SCHEMA_VERSION + 1, 'new_field': 1})
+    results['Signals strict unless newer'] = (typo is not None and 'stop_los' in typo and newer.signal_id == "42")
+
+    # What the server sends: the full form, no "v"
+    full = TradeResponse(success=True, signal_id="42", order_id="1001", status="executed",
+                         account="main", account_results=[], trace_id="t1", timeline=[]).to_dict()
+    full['new_field'] = "added by a newer server"
+    old = OldTradeResponse.__codec__.decode(full)
+    current = TradeResponse.from_dict(full)
+    results['Old decoder reads newer response'] = (old.success and old.order_id == "1001" and old.status == "executed"
+                                                   and current.trace_id == "t1")
+
+    missing = decode_error(TradeResponse.from_dict, {'signal_id': "42"})
+    mistyped = decode_error(TradeResponse.from_dict, {'success': "yes"})
+    results['Responses still type-checked'] = missing is not None and mistyped is not None
+
+    for test_name, passed in results.items():
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    passed_count = sum(1 for p in results.values() if p)
+    print(f"\nTotal: {passed_count}/{len(results)} tests passed")
+    return 0 if passed_count == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
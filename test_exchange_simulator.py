@@ -0,0 +1,113 @@
+"""
+Exchange Simulator Test (no exchange needed)
+
+Runs the BloFin simulator in-process and drives it with the real
+BloFinClient:
+1. Instruments, balance and set-leverage round trip
+2. Market order opens a position with the right average price
+3. TP/SL pair is placed and listed as pending
+4. A second full-position TP/SL is rejected with 200108
+5. A scripted price path triggers the stop loss and closes the position
+6. Reduce-only limit order fills when the price crosses it
+7. A wrong secret is rejected by signature verification
+8. Injected errors and latency reach the client
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'trading-server'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'exchange-simulator'))
+
+import requests
+
+from blofin_client import BloFinClient
+from simulator import create_app, serve_in_thread, FaultRule
+
+KEY, SECRET, PASSPHRASE = "sim-key", "sim-secret", "sim-passphrase"
+
+
+def main():
+    print("=" * 70)
+    print("EXCHANGE SIMULATOR TEST")
+    print("=" * 70)
+
+    app = create_app(seed=1)
+    base_url = serve_in_thread(app)
+    client = BloFinClient(KEY, SECRET, PASSPHRASE, base_url=base_url)
+    results = {}
+
+    spec = client.get_instrument_info('BTC-USDT')
+    balance = client.get_account_balance()['details'][0]
+    leverage = client.set_leverage('BTC-USDT', 10)
+    results['Instruments, balance, leverage'] = (spec['contractValue'] == 0.001 and float(balance['equity']) == 10000
+                                                 and leverage.get('leverage') == '10')
+
+    order = client.place_market_order('BTC-USDT', 'buy', 1.0)
+    positions = client.get_positions()
+    results['Market order opens position'] = (order['order_id'] is not None and len(positions) == 1
+                                              and positions[0]['positions'] == '1'
+                                              and positions[0]['averagePrice'] == '60000')
+
+    tpsl = client.set_tpsl_pair('BTC-USDT', tp_price=66000, sl_price=58000, size=1.0)
+    full = client._request("POST", "/api/v1/copytrading/trade/place-tpsl-by-contract", {
+        "instId": "BTC-USDT", "marginMode": "cross", "positionSide": "net",
+        "tpTriggerPrice": "66000", "slTriggerPrice": "58000", "size": "-1"
+    })
+    pending = client.get_pending_tpsl('BTC-USDT')
+    results['TP/SL placed and pending'] = (tpsl['order_id'] and full.get('algoId') and len(pending) == 2
+                                           and pending[0]['slTriggerPrice'] == '58000')
+
+    try:
+        client._request("POST", "/api/v1/copytrading/trade/place-tpsl-by-contract", {
+            "instId": "BTC-USDT", "marginMode": "cross", "positionSide": "net",
+            "tpTriggerPrice": "67000", "slTriggerPrice": "57000", "size": "-1"
+        })
+        results['Duplicate full TP/SL -> 200108'] = False
+    except Exception as e:
+        results['Duplicate full TP/SL -> 200108'] = "200108" in str(e)
+
+    requests.post(f"{base_url}/_sim/price-path",
+                  json={'instId': 'BTC-USDT', 'prices': [59500, 58800, 57900, 57500]}).raise_for_status()
+    triggered = [e for e in app.state.exchange.events if e['type'] == 'tpsl_triggered']
+    results['Price path triggers stop loss'] = (not client.get_positions() and not client.get_pending_tpsl('BTC-USDT')
+                                                and triggered and triggered[0]['kind'] == 'sl')
+
+    client.place_market_order('ETH-USDT', 'sell', 2.0)
+    client.place_reduce_only_limit_order('ETH-USDT', 'buy', 1.0, 2900)
+    resting = len(client.get_pending_orders('ETH-USDT'))
+    requests.post(f"{base_url}/_sim/price", json={'instId': 'ETH-USDT', 'price': 2890}).raise_for_status()
+    eth = client.get_positions()
+    results['Reduce-only limit fills on cross'] = (resting == 1 and not client.get_pending_orders('ETH-USDT')
+                                                   and eth and eth[0]['positions'] == '-1')
+
+    bad_client = BloFinClient(KEY, "wrong-secret", PASSPHRASE, base_url=base_url)
+    try:
+        bad_client.get_account_balance()
+        results['Bad signature rejected'] = False
+    except Exception as e:
+        results['Bad signature rejected'] = "152405" in str(e)
+
+    app.state.faults.add(FaultRule(path="/api/v1/copytrading/account/balance", latency_ms=200,
+                                   error_count=1, error_code="429", error_msg="Too Many Requests"))
+    start = time.perf_counter()
+    try:
+        client.get_account_balance()
+        injected = False
+    except Exception as e:
+        injected = "429" in str(e)
+    client.get_account_balance()
+    elapsed = time.perf_counter() - start
+    results['Injected error and latency'] = injected and elapsed >= 0.4
+
+    for test_name, passed in results.items():
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    passed_count = sum(1 for p in results.values() if p)
+    print(f"\nTotal: {passed_count}/{len(results)} tests passed")
+    return 0 if passed_count == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,161 @@
+"""
+Claude Fallback Test (no API key needed)
+
+Runs the parser's LLM fallback against a local fake Messages API:
+1. Unparseable signal goes to the fallback and is parsed
+2. Reposted / reformatted message is served from the cache
+3. Non-signals are negatively cached
+4. Slow responses are cut off at the latency budget
+5. Concurrent calls never exceed the concurrency limit
+6. Cache survives a restart when a cache file is configured
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import time
+from aiohttp import web
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'discord-bot'))
+
+from parser import SignalParser
+from llm_fallback import LLMFallback
+
+UNUSUAL_SIGNAL = """Hey team! New signal 🚀
+Token: ETH/USDT
+Direction: LONG
+Entry at: 3500.50
+Stop loss: 3400
+Target 1: 3650
+Use 15x leverage"""
+
+NOT_A_SIGNAL = "Closed my ETH/USDT bag at 3500 and 3650, what a week"
+
+SLOW_SIGNAL = "slow one: SOL/USDT long from 150 down to 140 up to 170"
+
+
+class FakeClaude:
+    """Minimal /v1/messages endpoint with a call counter and latency injection."""
+
+    def __init__(self):
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    async def messages(self, request):
+        body = await request.json()
+        prompt = body['messages'][0]['content']
+        self.calls += 1
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        try:
+            if 'slow one' in prompt:
+                await asyncio.sleep(2.0)
+            else:
+                await asyncio.sleep(0.05)
+
+            if 'Token: ETH/USDT' in prompt or 'concurrent' in prompt:
+                answer = {"symbol": "ETH-USDT", "side": "long", "entry": 3500.5, "stop_loss": 3400,
+                          "take_profit": 3650, "take_profit_2": None, "take_profit_3": None,
+                          "leverage": 15}
+            else:
+                answer = {"symbol": None, "side": None}
+
+            return web.json_response({
+                "id": f"msg_{self.calls}",
+                "type": "message",
+                "role": "assistant",
+                "model": body['model'],
+                "content": [{"type": "text", "text": "```json\n" + json.dumps(answer) + "\n```"}],
+                "stop_reason": "end_turn",
+                "stop_sequence": None,
+                "usage": {"input_tokens": 100, "output_tokens": 50}
+            })
+        finally:
+            self.in_flight -= 1
+
+
+async def run_tests():
+    fake = FakeClaude()
+    app = web.Application()
+    app.router.add_post('/v1/messages', fake.messages)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    base_url = f"http://127.0.0.1:{port}"
+
+    cache_file = os.path.join(tempfile.mkdtemp(), 'claude_cache.json')
+    results = {}
+
+    fallback = LLMFallback(api_key='test', base_url=base_url, budget=0.5,
+                           max_concurrency=2, cache_file=cache_file)
+    parser = SignalParser(llm_fallback=fallback)
+
+    # 1. Fallback parses what the patterns can't
+    assert parser.parse(UNUSUAL_SIGNAL) is None, "patterns shouldn't parse this format"
+    signal = await parser.parse_async(UNUSUAL_SIGNAL, message_id='1')
+    results['Fallback parses'] = bool(
+        signal and signal.symbol == 'ETH-USDT' and signal.side == 'long'
+        and signal.stop_loss == 3400 and signal.leverage == 15 and signal.signal_id == '1'
+    )
+
+    # 2. Repost with different markdown/whitespace hits the cache
+    calls = fake.calls
+    repost = '**' + UNUSUAL_SIGNAL.replace('\n', '  \n').upper() + '**'
+    signal = await parser.parse_async(repost, message_id='2')
+    results['Cache hit on repost'] = bool(signal and signal.signal_id == '2' and fake.calls == calls)
+
+    # 3. Non-signal is negatively cached
+    first = await parser.parse_async(NOT_A_SIGNAL)
+    calls = fake.calls
+    second = await parser.parse_async(NOT_A_SIGNAL)
+    results['Negative cache'] = first is None and second is None and fake.calls == calls
+
+    # 4. Budget cuts off a slow response and nothing is cached
+    start = time.perf_counter()
+    signal = await parser.parse_async(SLOW_SIGNAL)
+    elapsed = time.perf_counter() - start
+    results['Budget enforced'] = signal is None and elapsed < 0.8 and fallback.stats['timeouts'] == 1
+
+    # 5. Concurrency limit (let the abandoned slow request finish server-side first)
+    while fake.in_flight:
+        await asyncio.sleep(0.05)
+    fake.max_in_flight = 0
+    messages = [f"concurrent {i}: ETH/USDT long 3500 3400 3650" for i in range(6)]
+    await asyncio.gather(*(fallback.extract(m) for m in messages))
+    results['Concurrency limited'] = fake.max_in_flight <= 2
+
+    # 6. Persistence across restarts
+    await fallback.close()
+    restarted = LLMFallback(api_key='test', base_url=base_url, budget=0.5, cache_file=cache_file)
+    calls = fake.calls
+    fields = await restarted.extract(UNUSUAL_SIGNAL)
+    results['Cache persisted'] = bool(fields and fields['symbol'] == 'ETH-USDT' and fake.calls == calls)
+    await restarted.close()
+
+    print(f"\nParser stats: {parser.get_stats()}")
+    await runner.cleanup()
+    return results
+
+
+def main():
+    print("=" * 70)
+    print("CLAUDE FALLBACK TEST (fake endpoint)")
+    print("=" * 70)
+
+    results = asyncio.run(run_tests())
+
+    for test_name, passed in results.items():
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    passed_count = sum(1 for p in results.values() if p)
+    print(f"\nTotal: {passed_count}/{len(results)} tests passed")
+    return 0 if passed_count == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
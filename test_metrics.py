@@ -0,0 +1,109 @@
+"""
+Metrics Registry Test (no services needed)
+
+Checks shared/metrics.py:
+1. Counters from many threads don't lose increments
+2. Histogram buckets are cumulative with +Inf, sum and count
+3. Labelled children are cached and rendered sorted, values escaped
+4. Gauge functions are read at render time; a failing one is skipped
+5. Re-declaring a metric returns it; a conflicting type is refused
+6. Counters refuse to go down
+7. Recording a value takes well under 10 µs
+"""
+import os
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from shared.metrics import MetricsRegistry
+
+
+def main():
+    print("=" * 70)
+    print("METRICS REGISTRY TEST")
+    print("=" * 70)
+
+    results = {}
+    registry = MetricsRegistry()
+
+    calls = registry.counter('api_calls_total', 'API calls', ['endpoint'])
+
+    def hammer():
+        child = calls.labels('/balance')
+        for _ in range(20000):
+            child.inc()
+    threads = [threading.Thread(target=hammer) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    results['Thread-safe counter'] = calls.labels('/balance').get() == 160000
+
+    latency = registry.histogram('latency_seconds', 'Latency', buckets=(0.1, 0.5, 1))
+    for value in (0.05, 0.1, 0.3, 0.7, 2.0):
+        latency.observe(value)
+    text = registry.render()
+    results['Cumulative histogram'] = all(line in text for line in (
+        '# TYPE latency_seconds histogram',
+        'latency_seconds_bucket{le="0.1"} 2',
+        'latency_seconds_bucket{le="0.5"} 3',
+        'latency_seconds_bucket{le="1"} 4',
+        'latency_seconds_bucket{le="+Inf"} 5',
+        'latency_seconds_sum 3.15',
+        'latency_seconds_count 5'))
+
+    outcomes = registry.counter('parse_total', 'Parse outcomes', ['outcome'])
+    outcomes.labels('unparsed').inc()
+    outcomes.labels(outcome='alert').inc(2)
+    outcomes.labels('say "hi"\n').inc()
+    text = registry.render()
+    alert_at, unparsed_at = text.index('parse_total{outcome="alert"} 2'), text.index('parse_total{outcome="unparsed"} 1')
+    results['Labels cached, sorted, escaped'] = (outcomes.labels('alert') is outcomes.labels(outcome='alert')
+                                                 and alert_at < unparsed_at
+                                                 and 'parse_total{outcome="say \\"hi\\"\\n"} 1' in text)
+
+    queue = []
+    depth = registry.gauge('queue_depth', 'Queued jobs')
+    depth.set_function(lambda: len(queue))
+    broken = registry.gauge('broken', 'Always fails')
+    broken.set_function(lambda: 1 / 0)
+    queue.extend([1, 2, 3])
+    text = registry.render()
+    results['Gauge function at render'] = 'queue_depth 3' in text and '# TYPE broken gauge' in text \
+        and '\nbroken ' not in text
+
+    try:
+        registry.gauge('api_calls_total', 'Wrong type', ['endpoint'])
+        conflict_refused = False
+    except ValueError:
+        conflict_refused = True
+    results['Re-declare returns, conflict refused'] = (
+        registry.counter('api_calls_total', 'API calls', ['endpoint']) is calls and conflict_refused)
+
+    try:
+        calls.labels('/balance').inc(-1)
+        results['Counter refuses negative'] = False
+    except ValueError:
+        results['Counter refuses negative'] = True
+
+    child = latency.labels()
+    start = time.perf_counter()
+    for _ in range(100000):
+        child.observe(0.2)
+    per_call_us = (time.perf_counter() - start) / 100000 * 1e6
+    print(f"Histogram observe: {per_call_us:.2f} µs")
+    results['Cheap to record'] = per_call_us < 10
+
+    for test_name, passed in results.items():
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    passed_count = sum(1 for p in results.values() if p)
+    print(f"\nTotal: {passed_count}/{len(results)} tests passed")
+    return 0 if passed_count == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+"""
+Price Guard Test (no exchange needed)
+
+Checks PriceGuard decisions against a hand-filled mark price cache:
+1. Fresh signal at entry is allowed unchanged
+2. Old signal is rejected as stale
+3. Price through the stop loss is rejected
+4. Price past TP1 is rejected
+5. Remaining reward:risk below the minimum is rejected
+6. Price moved away from the stop shrinks the size to keep dollar risk
+7. Missing mark price fails open (or closed with require_price)
+8. A check takes well under a millisecond
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'trading-server'))
+
+from price_guard import PriceGuard, GuardLimits, MarkPriceCache
+
+LONG = dict(symbol='BTC-USDT', side='long', entry_price=60000, stop_loss=58000,
+            targets=[63000, 66000, None], tp_price=66000)
+
+
+def make_guard(price, **limits):
+    cache = MarkPriceCache(fetch=lambda: {})
+    if price is not None:
+        cache.update({'BTC-USDT': price})
+    return PriceGuard(cache, GuardLimits(**limits))
+
+
+def posted(seconds_ago):
+    return (datetime.now(timezone.utc) - timedelta(seconds=seconds_ago)).isoformat()
+
+
+def main():
+    print("=" * 70)
+    print("PRICE GUARD TEST")
+    print("=" * 70)
+
+    results = {}
+
+    decision = make_guard(60000).check(**LONG, timestamp=posted(5))
+    results['Fresh signal allowed'] = decision.allowed and decision.size_factor == 1.0
+
+    decision = make_guard(60000).check(**LONG, timestamp=posted(600))
+    results['Stale signal rejected'] = decision.error_code == 'STALE_SIGNAL'
+
+    decision = make_guard(57900).check(**LONG)
+    results['SL breached rejected'] = decision.error_code == 'SL_BREACHED'
+
+    decision = make_guard(63100).check(**LONG)
+    results['TP reached rejected'] = decision.error_code == 'TP_REACHED'
+
+    # At 62000: reward 4000, risk 4000 -> 1.0 < 1.5
+    decision = make_guard(62000, min_reward_risk=1.5).check(**LONG)
+    results['Low reward:risk rejected'] = decision.error_code == 'LOW_REWARD_RISK'
+
+    # At 61000 the stop is 3000 away instead of 2000 -> 2/3 size
+    decision = make_guard(61000).check(**LONG)
+    results['Resized to planned risk'] = decision.allowed and abs(decision.size_factor - 2 / 3) < 1e-9
+
+    short = dict(LONG, side='short', stop_loss=62000, targets=[57000], tp_price=57000)
+    decision = make_guard(62100).check(**short)
+    results['Short SL breached rejected'] = decision.error_code == 'SL_BREACHED'
+
+    allowed = make_guard(None).check(**LONG)
+    rejected = make_guard(None, require_price=True).check(**LONG)
+    results['Missing price handling'] = allowed.allowed and rejected.error_code == 'NO_MARK_PRICE'
+
+    guard = make_guard(60500)
+    timestamp = posted(5)
+    runs = 10000
+    start = time.perf_counter()
+    for _ in range(runs):
+        guard.check(**LONG, timestamp=timestamp)
+    per_check_us = (time.perf_counter() - start) / runs * 1e6
+    print(f"Check latency: {per_check_us:.1f} µs")
+    results['Sub-millisecond check'] = per_check_us < 1000
+
+    for test_name, passed in results.items():
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    passed_count = sum(1 for p in results.values() if p)
+    print(f"\nTotal: {passed_count}/{len(results)} tests passed")
+    return 0 if passed_count == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+"""
+Sampling Profiler Test (no services needed)
+
+Checks shared/profiler.py:
+1. A busy worker thread shows up in the stacks, rooted at its thread name
+2. Output is valid collapsed-stack format (frames;...;frames count)
+3. idle=False drops a thread parked in a condition wait
+4. Only one profile runs at a time
+"""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from shared import profiler
+
+
+def spin(stop: threading.Event):
+    while not stop.is_set():
+        sum(i * i for i in range(1000))
+
+
+def main():
+    print("=" * 70)
+    print("SAMPLING PROFILER TEST")
+    print("=" * 70)
+
+    results = {}
+    stop = threading.Event()
+    workers = [threading.Thread(target=spin, args=(stop,), name="busy-worker"),
+               threading.Thread(target=stop.wait, name="parked-worker")]
+    for worker in workers:
+        worker.start()
+
+    try:
+        profile = profiler.sample(0.5, interval=0.005)
+        print(profile.summary())
+        lines = profile.collapsed().splitlines()
+        busy = sum(int(line.rsplit(' ', 1)[1]) for line in lines if line.startswith("busy-worker;"))
+        results['Busy thread sampled'] = busy >= profile.samples * 0.8 and any('spin (test_profiler.py' in l for l in lines)
+
+        results['Collapsed format'] = all(
+            ';' in line and line.rsplit(' ', 1)[1].isdigit() for line in lines)
+
+        cpu = profiler.sample(0.2, idle=False).collapsed()
+        results['Idle wait filtered'] = "parked-worker;" in profile.collapsed() and "parked-worker;" not in cpu \
+            and "busy-worker;" in cpu
+
+        outcome = {}
+
+        def background():
+            outcome['profile'] = profiler.sample(0.5)
+        thread = threading.Thread(target=background)
+        thread.start()
+        while not profiler._busy.locked():
+            pass
+        try:
+            profiler.sample(0.1)
+            outcome['busy'] = False
+        except profiler.ProfilerBusy:
+            outcome['busy'] = True
+        thread.join()
+        results['One profile at a time'] = outcome['busy'] and outcome['profile'].samples > 0
+    finally:
+        stop.set()
+        for worker in workers:
+            worker.join()
+
+    for test_name, passed in results.items():
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    passed_count = sum(1 for p in results.values() if p)
+    print(f"\nTotal: {passed_count}/{len(results)} tests passed")
+    return 0 if passed_count == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Record/Replay Transport Test (no exchange needed)
+
+Records a BloFinClient session against the in-process exchange simulator,
+then replays the cassette with no network:
+1. Cassette has a header and one line per request
+2. API key, signature and passphrase are redacted
+3. Replay returns the same results as the live session
+4. A recorded 200108 duplicate-TP/SL error replays as the same error
+5. A recorded timeout replays as a timeout
+6. Extra GETs repeat the last response; an unrecorded POST fails
+7. speed=1 keeps the recorded latency, speed=10 compresses it
+"""
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'trading-server'))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'exchange-simulator'))
+
+from blofin_client import BloFinClient
+from blofin_transport import Cassette, RecordingTransport, ReplayTransport, RequestsTransport, load_cassette
+from simulator import create_app, serve_in_thread, FaultRule
+
+KEY, SECRET, PASSPHRASE = "sim-key", "sim-secret", "sim-passphrase"
+FULL_TPSL = {"instId": "BTC-USDT", "marginMode": "cross", "positionSide": "net",
+             "tpTriggerPrice": "66000", "slTriggerPrice": "58000", "size": "-1"}
+
+
+def session(client):
+    """The calls under test; errors are returned as strings."""
+    outcomes = []
+    for call in (lambda: client.get_account_balance()['details'][0]['equity'],
+                 lambda: client.place_market_order('BTC-USDT', 'buy', 1.0)['order_id'],
+                 lambda: client._request("POST", "/api/v1/copytrading/trade/place-tpsl-by-contract", FULL_TPSL),
+                 lambda: client._request("POST", "/api/v1/copytrading/trade/place-tpsl-by-contract", FULL_TPSL),
+                 lambda: client.get_positions()[0]['positions'],
+                 lambda: client.get_ticker('BTC-USDT')['last']):
+        try:
+            outcomes.append(call())
+        except Exception as e:
+            outcomes.append(f"error: {e}")
+    return outcomes
+
+
+def replay_client(interactions, **options):
+    # Unroutable base URL: any real request would fail
+    return BloFinClient(KEY, SECRET, PASSPHRASE, base_url="http://127.0.0.1:9",
+                        transport=ReplayTransport(interactions, **options))
+
+
+def main():
+    print("=" * 70)
+    print("RECORD/REPLAY TRANSPORT TEST")
+    print("=" * 70)
+
+    app = create_app()
+    base_url = serve_in_thread(app)
+    app.state.faults.add(FaultRule(path="/api/v1/market/tickers", latency_ms=300))
+    app.state.faults.add(FaultRule(path="/api/v1/copytrading/account/positions", latency_ms=1500))
+
+    path = os.path.join(tempfile.mkdtemp(), 'session.jsonl')
+    cassette = Cassette(path)
+    live = BloFinClient(KEY, SECRET, PASSPHRASE, base_url=base_url,
+                        transport=RecordingTransport(RequestsTransport(), cassette))
+    recorded = session(live)
+    live.timeout = 1
+    try:
+        live.get_positions()
+        timed_out_live = False
+    except Exception as e:
+        timed_out_live = "timeout" in str(e)
+    cassette.close()
+
+    results = {}
+    with open(path) as f:
+        lines = [json.loads(line) for line in f]
+    interactions = load_cassette(path)
+    results['Cassette written'] = lines[0].get('cassette') == 1 and len(interactions) == 8  # Includes the instruments lookup
+
+    text = open(path).read()
+    results['Credentials redacted'] = (SECRET not in text and PASSPHRASE not in text and f'"{KEY}"' not in text
+                                       and all(i['headers'].get('ACCESS-SIGN', 'REDACTED') == 'REDACTED'
+                                               for i in interactions))
+
+    replay = replay_client(interactions)
+    replayed = session(replay)
+    results['Replay matches live session'] = replayed == recorded
+    results['200108 replays as error'] = "200108" in str(replayed[3]) and replayed[3] == recorded[3]
+
+    try:
+        replay.get_positions()
+        timed_out_replay = False
+    except Exception as e:
+        timed_out_replay = "timeout" in str(e)
+    results['Timeout replays as timeout'] = timed_out_live and timed_out_replay
+
+    try:
+        replay.get_ticker('BTC-USDT')
+        replay.place_market_order('BTC-USDT', 'buy', 1.0)
+        unrecorded_post_fails = False
+    except Exception as e:
+        unrecorded_post_fails = "No recorded response" in str(e)
+    results['GET repeats, unrecorded POST fails'] = (unrecorded_post_fails
+                                                     and replay.transport.stats['repeated'] == 1)
+
+    ticker = next(i for i in interactions if '/market/tickers' in i['path'])
+    timings = {}
+    for speed in (1, 10):
+        client = replay_client([ticker], speed=speed)
+        start = time.perf_counter()
+        client.get_ticker('BTC-USDT')
+        timings[speed] = time.perf_counter() - start
+    print(f"Recorded ticker latency {ticker['elapsed'] * 1000:.0f} ms, "
+          f"replayed {timings[1] * 1000:.0f} ms (speed 1), {timings[10] * 1000:.0f} ms (speed 10)")
+    results['Original and compressed timing'] = (timings[1] >= ticker['elapsed'] * 0.9
+                                                 and timings[10] < ticker['elapsed'] / 5)
+
+    for test_name, passed in results.items():
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    passed_count = sum(1 for p in results.values() if p)
+    print(f"\nTotal: {passed_count}/{len(results)} tests passed")
+    return 0 if passed_count == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,88 @@
+"""
+Risk Engine Test (no services needed)
+
+Checks trading-server/risk_engine.py:
+1. Limits reject trades that grow exposure past them, never reducing trades
+2. Concurrent checks on one account reserve exposure - a burst can't
+   exceed MAX_OPEN_POSITIONS or the notional caps together
+3. Releasing a reservation gives the exposure back
+4. Committed fills stay; a book reload keeps trades that are still reserved
+"""
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'trading-server'))
+
+from risk_engine import RiskEngine, RiskLimits
+
+
+def burst(engine: RiskEngine, signals: list) -> list:
+    """Check every (symbol, side, notional) at the same moment; returns the decisions."""
+    start = threading.Barrier(len(signals))
+    decisions = [None] * len(signals)
+
+    def run(i, symbol, side, notional):
+        start.wait()
+        decisions[i] = engine.check(symbol, side, notional, 10)
+    threads = [threading.Thread(target=run, args=(i, *signal)) for i, signal in enumerate(signals)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return decisions
+
+
+def main():
+    print("=" * 70)
+    print("RISK ENGINE TEST")
+    print("=" * 70)
+
+    results = {}
+
+    engine = RiskEngine(RiskLimits(max_symbol_notional_usd=1000))
+    engine.apply_fill("BTC-USDT", "long", 900, 10)
+    grow = engine.check("BTC-USDT", "long", 200, 10)
+    reduce = engine.check("BTC-USDT", "short", 500, 10)
+    results['Limits only block growing exposure'] = (not grow.allowed and grow.error_code == "RISK_MAX_SYMBOL_EXPOSURE"
+                                                     and reduce.allowed)
+
+    engine = RiskEngine(RiskLimits(max_open_positions=3, max_gross_notional_usd=5000))
+    decisions = burst(engine, [(f"COIN{i}-USDT", "long", 500) for i in range(20)])
+    positions_ok = sum(d.allowed for d in decisions) == 3
+    decisions = burst(RiskEngine(RiskLimits(max_gross_notional_usd=2000)),
+                      [("BTC-USDT", "long", 500)] * 20)
+    results['Concurrent burst stays within limits'] = positions_ok and sum(d.allowed for d in decisions) == 4
+
+    engine = RiskEngine(RiskLimits(max_open_positions=1))
+    first = engine.check("BTC-USDT", "long", 500, 10)
+    blocked = engine.check("ETH-USDT", "long", 500, 10)
+    engine.release(first.reservation)
+    exposure = engine.get_exposure()
+    after_release = engine.check("ETH-USDT", "long", 500, 10)
+    results['Release gives exposure back'] = (not blocked.allowed and exposure['gross_notional'] == 0
+                                              and exposure['margin_in_use'] == 0 and after_release.allowed)
+
+    engine = RiskEngine(RiskLimits(max_open_positions=2))
+    filled = engine.check("BTC-USDT", "long", 500, 10)
+    pending = engine.check("ETH-USDT", "short", 300, 10)
+    engine.commit(filled.reservation)
+    engine.release(filled.reservation)  # Already committed - no effect
+    engine.load_positions([{'symbol': "BTC-USDT", 'side': "long", 'notional': 500, 'leverage': 10}], 1)
+    exposure = engine.get_exposure()
+    results['Commit keeps, reload keeps reserved'] = (exposure['symbols'] == {"BTC-USDT": 500, "ETH-USDT": -300}
+                                                      and exposure['reserved'] == 1
+                                                      and not engine.check("SOL-USDT", "long", 100, 10).allowed
+                                                      and pending.allowed)
+
+    for test_name, passed in results.items():
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    passed_count = sum(1 for p in results.values() if p)
+    print(f"\nTotal: {passed_count}/{len(results)} tests passed")
+    return 0 if passed_count == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Shared State Test (no services needed)
+
+Checks the signal lifecycle in trading-server/shared_state.py:
+1. Cancel and entry are exclusive - whichever comes first wins
+2. An edit queued while a signal executes comes back with its result;
+   the latest edit wins
+3. Nothing is queued once the result is recorded or the signal cancelled
+"""
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'trading-server'))
+
+from shared_state import SharedStateStore
+
+
+def main():
+    print("=" * 70)
+    print("SHARED STATE TEST")
+    print("=" * 70)
+
+    results = {}
+    store = SharedStateStore(os.path.join(tempfile.mkdtemp(), 'state.db'))
+
+    store.claim_signal("early", {'symbol': "BTC-USDT"})
+    store.cancel_signal("early")
+    entry_blocked = not store.start_entry("early")
+    store.claim_signal("late", {'symbol': "BTC-USDT"})
+    entered = store.start_entry("late") and store.start_entry("late")  # Second account
+    previous = store.cancel_signal("late")
+    results['Cancel and entry exclusive'] = (entry_blocked and entered and previous['entry_at'] is not None
+                                            and store.get_signal("late")['cancelled_at'] is None)
+
+    store.claim_signal("edited", {'symbol': "BTC-USDT", 'stop_loss': 58000})
+    queued = store.queue_amend("edited", {'stop_loss': 57000}) and store.queue_amend("edited", {'stop_loss': 57500})
+    handed_back = store.record_signal_result("edited", {'success': True})
+    results['Queued edit returned with result'] = (queued and handed_back == {'stop_loss': 57500}
+                                                   and store.record_signal_result("edited", {'success': True}) is None)
+
+    store.claim_signal("cancelled", {'symbol': "BTC-USDT"})
+    store.queue_amend("cancelled", {'stop_loss': 57000})
+    store.cancel_signal("cancelled")
+    results['No queue after result or cancel'] = (not store.queue_amend("edited", {'stop_loss': 57000})
+                                                 and not store.queue_amend("cancelled", {'stop_loss': 57000})
+                                                 and store.record_signal_result("cancelled", {}) is None)
+
+    for test_name, passed in results.items():
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    passed_count = sum(1 for p in results.values() if p)
+    print(f"\nTotal: {passed_count}/{len(results)} tests passed")
+    return 0 if passed_count == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""
+Trade Tracing Test (no services needed)
+
+Checks shared/tracing.py and the trade journal:
+1. Recording without a current trace is a no-op
+2. Spans from asyncio.to_thread workers land on the trace, tagged by scope
+3. Bot spans are adopted with a handoff span; malformed entries are skipped
+4. Timeline is ordered (enclosing spans first) with offsets; waterfall renders
+5. TradeSignal/TradeResponse carry trace_id, trace and timeline over the wire
+6. Journal keeps the first timeline per trace and finds it by signal ID
+"""
+import asyncio
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'trading-server'))
+
+from shared import tracing
+from shared.models import TradeSignal, TradeResponse
+from shared_state import SharedStateStore
+
+
+def work(account: str):
+    with tracing.scope(account=account), tracing.stage('account'):
+        with tracing.stage('order'):
+            time.sleep(0.01)
+
+
+async def fan_out(trace: tracing.Trace):
+    with tracing.activate(trace):
+        await asyncio.gather(asyncio.to_thread(work, 'main'), asyncio.to_thread(work, 'second'))
+    return tracing.current()
+
+
+def main():
+    print("=" * 70)
+    print("TRADE TRACING TEST")
+    print("=" * 70)
+
+    results = {}
+
+    tracing.record('orphan', time.perf_counter())
+    results['No-op without a trace'] = tracing.current() is None
+
+    bot = tracing.Trace(tracing.new_trace_id(), 'bot')
+    bot.add_span('discord', bot.started_at - 0.2, 0.2)
+    with bot.stage('parse'):
+        time.sleep(0.005)
+    bot.mark('sent')
+    upstream = bot.spans() + [{'stage': 'broken'}, 'junk']
+    time.sleep(0.02)
+
+    server = tracing.Trace(bot.trace_id, 'server')
+    server.adopt(upstream)
+    after = asyncio.run(fan_out(server))
+    timeline = server.timeline()
+    accounts = sorted(s['account'] for s in timeline if s['stage'] == 'order')
+    results['Thread spans tagged by account'] = accounts == ['main', 'second'] and after is None
+
+    stages = [(s['service'], s['stage']) for s in timeline]
+    handoff = next(s for s in timeline if s['stage'] == 'handoff')
+    results['Bot spans adopted with handoff'] = (stages[:3] == [('bot', 'discord'), ('bot', 'parse'), ('bot', 'sent')]
+                                                 and ('network', 'handoff') in stages
+                                                 and 'broken' not in [s for _, s in stages]
+                                                 and 15 <= handoff['duration_ms'] < 1000)
+
+    first_account = next(i for i, s in enumerate(timeline) if s['stage'] == 'account')
+    waterfall = tracing.render_waterfall(timeline)
+    print(waterfall)
+    results['Ordered timeline and waterfall'] = (timeline[0]['offset_ms'] == 0
+                                                 and timeline[first_account + 1]['stage'] == 'order'
+                                                 and all(a['start'] <= b['start'] for a, b in zip(timeline, timeline[1:]))
+                                                 and 'server:order[second]' in waterfall)
+
+    signal = TradeSignal(symbol="BTC-USDT", side="long", signal_id="42",
+                         trace_id=bot.trace_id, trace=bot.spans())
+    decoded = TradeSignal.from_dict(signal.to_wire())
+    response = TradeResponse(success=True, signal_id="42", trace_id=server.trace_id, timeline=timeline)
+    results['Carried over the wire'] = (decoded.trace_id == bot.trace_id and decoded.trace == bot.spans()
+                                        and TradeResponse.from_dict(response.to_wire()).timeline == timeline)
+
+    store = SharedStateStore(os.path.join(tempfile.mkdtemp(), 'state.db'))
+    store.record_trace(server.trace_id, "42", timeline)
+    store.record_trace(server.trace_id, "42", [])  # Resent signal keeps the original
+    by_trace, by_signal = store.get_trace(server.trace_id), store.get_trace("42")
+    results['Journal first timeline'] = (by_trace == by_signal and by_trace['timeline'] == timeline
+                                         and store.get_trace("missing") is None)
+
+    for test_name, passed in results.items():
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        print(f"{status}: {test_name}")
+
+    passed_count = sum(1 for p in results.values() if p)
+    print(f"\nTotal: {passed_count}/{len(results)} tests passed")
+    return 0 if passed_count == len(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,170 @@
+"""
+Account Manager Module
+
+Loads one or more BloFin copy-trading accounts from the environment.
+Each account gets its own BloFinClient, rate limiter, circuit breakers,
+order monitor and risk engine so signals can be fanned out to every
+account concurrently.
+"""
+import os
+import logging
+from typing import Dict, List, Optional, Callable, Any
+
+from blofin_client import BloFinClient
+from rate_limiter import RateLimiter
+from circuit_breaker import CircuitBreakerSet, BreakerConfig
+from order_monitor import OrderMonitor
+from risk_engine import RiskEngine, RiskLimits
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ACCOUNT_NAME = "main"
+
+
+class TradingAccount:
+    """A single BloFin account and the components bound to it."""
+
+    def __init__(self, name: str, client: BloFinClient,
+                 order_monitor: Optional[OrderMonitor] = None,
+                 risk_engine: Optional[RiskEngine] = None):
+        """
+        Initialize trading account.
+
+        Args:
+            name: Account name (e.g., "main", "alpha")
+            client: BloFinClient authenticated for this account
+            order_monitor: OrderMonitor watching this account's TP/SL orders
+            risk_engine: RiskEngine tracking this account's exposure
+        """
+        self.name = name
+        self.client = client
+        self.order_monitor = order_monitor
+        self.risk_engine = risk_engine
+
+    def get_stats(self) -> Dict:
+        """Get client, rate limiter, circuit breaker and risk statistics for this account."""
+        stats = self.client.get_stats()
+        if self.client.rate_limiter:
+            stats['rate_limiter'] = self.client.rate_limiter.get_stats()
+        if self.client.breakers:
+            stats['circuit_breakers'] = self.client.breakers.get_stats()
+        if self.risk_engine:
+            stats['risk'] = self.risk_engine.get_stats()
+        return stats
+
+
+def load_account_credentials() -> List[Dict[str, str]]:
+    """
+    Read account credentials from the environment.
+
+    Multiple accounts are configured with a comma-separated list of names:
+
+        BLOFIN_ACCOUNTS=main,alpha
+        BLOFIN_MAIN_API_KEY=...      BLOFIN_ALPHA_API_KEY=...
+        BLOFIN_MAIN_SECRET_KEY=...   BLOFIN_ALPHA_SECRET_KEY=...
+        BLOFIN_MAIN_PASSPHRASE=...   BLOFIN_ALPHA_PASSPHRASE=...
+
+    `BLOFIN_<NAME>_BASE_URL` optionally overrides BLOFIN_BASE_URL per account.
+    Without BLOFIN_ACCOUNTS the single-account variables (BLOFIN_API_KEY,
+    BLOFIN_SECRET_KEY, BLOFIN_PASSPHRASE) are used as account "main".
+
+    Returns:
+        List of credential dicts (name, api_key, secret_key, passphrase, base_url)
+    """
+    default_base_url = os.getenv('BLOFIN_BASE_URL', 'https://demo-trading-openapi.blofin.com')
+    names = [n.strip() for n in os.getenv('BLOFIN_ACCOUNTS', '').split(',') if n.strip()]
+
+    if not names:
+        return [{
+            'name': DEFAULT_ACCOUNT_NAME,
+            'api_key': os.getenv('BLOFIN_API_KEY'),
+            'secret_key': os.getenv('BLOFIN_SECRET_KEY'),
+            'passphrase': os.getenv('BLOFIN_PASSPHRASE'),
+            'base_url': default_base_url
+        }]
+
+    credentials = []
+    for name in names:
+        prefix = f"BLOFIN_{name.upper()}_"
+        credentials.append({
+            'name': name,
+            'api_key': os.getenv(f"{prefix}API_KEY"),
+            'secret_key': os.getenv(f"{prefix}SECRET_KEY"),
+            'passphrase': os.getenv(f"{prefix}PASSPHRASE"),
+            'base_url': os.getenv(f"{prefix}BASE_URL", default_base_url)
+        })
+    return credentials
+
+
+def _with_account(callback: Callable[[str, Dict[str, Any]], None], name: str):
+    """Wrap an event callback so every event carries the account name."""
+    def wrapped(kind: str, data: Dict[str, Any]):
+        callback(kind, {**data, 'account': name})
+    return wrapped
+
+
+def load_accounts(max_orders_per_minute: int,
+                  webhook_url: Optional[str] = None,
+                  check_interval: int = 30,
+                  risk_limits: Optional[RiskLimits] = None,
+                  event_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None,
+                  transport_factory: Optional[Callable[[str], Any]] = None,
+                  breaker_config: Optional[BreakerConfig] = None,
+                  clock: Optional[Callable[[], float]] = None,
+                  rate_limit_store: Optional[Any] = None
+                  ) -> Dict[str, TradingAccount]:
+    """
+    Build a TradingAccount for every configured credential set.
+
+    Accounts with missing credentials are skipped with an error so one bad
+    entry doesn't take the other accounts down.
+
+    Args:
+        max_orders_per_minute: Per-account limit for trading (POST) requests
+        webhook_url: Discord webhook for order monitor notifications
+        check_interval: Order monitor check interval in seconds
+        risk_limits: Limits for each account's risk engine (defaults if None)
+        event_callback: Receives order monitor events as (kind, data); the
+            account name is added to data
+        transport_factory: Returns the HTTP transport for an account name
+            (e.g. recording or replay, see blofin_transport); None = network
+        breaker_config: Circuit breaker thresholds (None = no breakers)
+        clock: Exchange clock for request timestamps (e.g. ClockSync.now; None = local)
+        rate_limit_store: SharedStateStore holding each account's order bucket, so
+            the limit holds across worker processes (None = per process)
+
+    Returns:
+        Dict mapping account name to TradingAccount (in configured order)
+    """
+    accounts: Dict[str, TradingAccount] = {}
+
+    for creds in load_account_credentials():
+        name = creds['name']
+        if not all([creds['api_key'], creds['secret_key'], creds['passphrase']]):
+            logger.error(f"❌ [{name}] BloFin credentials not configured, skipping account")
+            continue
+
+        try:
+            client = BloFinClient(
+                api_key=creds['api_key'],
+                secret_key=creds['secret_key'],
+                passphrase=creds['passphrase'],
+                base_url=creds['base_url'],
+                rate_limiter=RateLimiter(max_orders_per_minute, period=60.0, name=name, store=rate_limit_store),
+                transport=transport_factory(name) if transport_factory else None,
+                breakers=CircuitBreakerSet(breaker_config, name=name) if breaker_config else None,
+                clock=clock
+            )
+            monitor = OrderMonitor(
+                blofin_client=client,
+                webhook_url=webhook_url,
+                check_interval=check_interval,
+                event_callback=_with_account(event_callback, name) if event_callback else None
+            )
+            risk_engine = RiskEngine(risk_limits or RiskLimits(), name=name)
+            accounts[name] = TradingAccount(name, client, monitor, risk_engine)
+            logger.info(f"✅ [{name}] BloFin client initialized ({creds['base_url']})")
+        except Exception as e:
+            logger.error(f"❌ [{name}] Failed to initialize BloFin client: {e}")
+
+    return accounts
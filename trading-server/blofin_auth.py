@@ -11,7 +11,7 @@ import time
 import json
 import base64
 import logging
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, Callable
 
 logger = logging.getLogger(__name__)
 
@@ -23,7 +23,8 @@ class BloFinAuth:
     Generates required headers for authenticated requests.
     """
     
-    def __init__(self, api_key: str, secret_key: str, passphrase: str):
+    def __init__(self, api_key: str, secret_key: str, passphrase: str,
+                 clock: Optional[Callable[[], float]] = None):
         """
         Initialize BloFin authentication.
         
@@ -31,10 +32,13 @@ class BloFinAuth:
             api_key: BloFin API key
             secret_key: BloFin secret key
             passphrase: BloFin passphrase
+            clock: Returns the exchange's current time in unix seconds, for
+                   ACCESS-TIMESTAMP (default: local clock; see clock_sync)
         """
         self.api_key = api_key
         self.secret_key = secret_key
         self.passphrase = passphrase
+        self.clock = clock or time.time
     
     def generate_signature(self, method: str, path: str, timestamp: str, nonce: str, body: str = '', query: str = '') -> str:
         """
@@ -71,7 +75,7 @@ class BloFinAuth:
         """
         import uuid
         from urllib.parse import urlencode
-        timestamp = str(int(time.time() * 1000))
+        timestamp = str(int(self.clock() * 1000))
         nonce = str(uuid.uuid4())
         if method.upper() == 'POST':
             # Sort keys to match Blofin docs order for POST
@@ -10,11 +10,31 @@ import logging
 from typing import Optional, Dict, Any, List
 from enum import Enum
 import time
+import threading
+import contextvars
+from contextlib import contextmanager
 
+import sys
+from pathlib import Path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from shared.metrics import REGISTRY
+from shared import tracing
 from blofin_auth import BloFinAuth
+from blofin_transport import RequestsTransport
+from rate_limiter import RateLimiter
+from circuit_breaker import CircuitBreakerSet
 
 logger = logging.getLogger(__name__)
 
+API_LATENCY = REGISTRY.histogram('blofin_api_request_seconds', 'BloFin API request latency',
+                                 ['method', 'endpoint'])
+API_ERRORS = REGISTRY.counter('blofin_api_errors_total', 'BloFin API errors by code (or timeout/network)',
+                              ['endpoint', 'code'])
+
+# Set by BloFinClient.protective() for calls that protect or close a position
+_protective = contextvars.ContextVar('blofin_protective', default=False)
+
 
 class OrderSide(Enum):
     """Order side mapping."""
@@ -36,7 +56,9 @@ class BloFinClient:
     """
     
     def __init__(self, api_key: str, secret_key: str, passphrase: str, 
-                 base_url: str = "https://openapi.blofin.com", timeout: int = 10):
+                 base_url: str = "https://openapi.blofin.com", timeout: int = 10,
+                 rate_limiter: Optional[RateLimiter] = None, transport=None,
+                 breakers: Optional[CircuitBreakerSet] = None, clock=None):
         """
         Initialize BloFin client.
         
@@ -46,12 +68,20 @@ class BloFinClient:
             passphrase: BloFin passphrase
             base_url: API base URL (use demo URL for testing)
             timeout: Request timeout in seconds
+            rate_limiter: Optional limiter applied to POST (trading) requests
+            transport: HTTP transport (default: RequestsTransport over self.session;
+                       see blofin_transport for recording and replay)
+            breakers: Optional circuit breakers per endpoint group (see circuit_breaker)
+            clock: Optional exchange clock for request timestamps (e.g. ClockSync.now)
         """
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
-        self.auth = BloFinAuth(api_key, secret_key, passphrase)
+        self.auth = BloFinAuth(api_key, secret_key, passphrase, clock=clock)
+        self.rate_limiter = rate_limiter
+        self.breakers = breakers
         
         self.session = requests.Session()
+        self.transport = transport or RequestsTransport(self.session)
         
         # Cache for instrument specifications
         self._instrument_cache = {}
@@ -62,8 +92,23 @@ class BloFinClient:
             'api_calls': 0,
             'api_errors': 0
         }
+        self._stats_lock = threading.Lock()  # Accounts fan out on worker threads
+    
+    def _count(self, key: str):
+        with self._stats_lock:
+            self.stats[key] += 1
     
-    def _request(self, method: str, path: str, body: Optional[Dict] = None) -> Dict[str, Any]:
+    @contextmanager
+    def protective(self):
+        """Calls made in this block (closing or protecting a position) bypass open circuit breakers."""
+        token = _protective.set(True)
+        try:
+            yield
+        finally:
+            _protective.reset(token)
+    
+    def _request(self, method: str, path: str, body: Optional[Dict] = None,
+                 protective: bool = False) -> Dict[str, Any]:
         """
         Make authenticated API request.
         
@@ -71,20 +116,38 @@ class BloFinClient:
             method: HTTP method
             path: API path
             body: Request body
+            protective: Call protects or closes a position (bypasses open breakers)
             
         Returns:
             Response data
             
         Raises:
+            CircuitOpenError: If the endpoint group's circuit breaker is open
             Exception: On API error
         """
-        self.stats['api_calls'] += 1
+        endpoint = path.split('?', 1)[0]  # Metric label without per-symbol query strings
+        
+        # Fail fast while the exchange is having an incident (before spending a rate limit slot)
+        breaker = self.breakers.for_path(endpoint) if self.breakers else None
+        protective = protective or _protective.get()
+        if breaker:
+            breaker.allow(protective)
         
+        # Trading calls count against this account's order rate limit
+        if self.rate_limiter and method.upper() == "POST":
+            waited = time.perf_counter()
+            self.rate_limiter.acquire()
+            if time.perf_counter() - waited > 0.001:
+                tracing.record('rate_limit', waited)
+        
+        self._count('api_calls')
         url = f"{self.base_url}{path}"
+        failed = True  # For the breaker: transport, 5xx or unreadable response
+        started = time.perf_counter()
         try:
             if method.upper() == "GET":
                 headers = self.auth.get_headers(method, path, None, body, debug=False)
-                response = self.session.get(url, headers=headers, params=body, timeout=self.timeout) if body else self.session.get(url, headers=headers, timeout=self.timeout)
+                response = self.transport.send("GET", url, headers, params=body or None, timeout=self.timeout)
             elif method.upper() == "POST":
                     headers = self.auth.get_headers(method, path.rstrip('/'), body=body, debug=True)
                     # Serialize body to JSON string to match signature
@@ -108,29 +171,39 @@ class BloFinClient:
                         print(f"  {k}: {v}")
                     print("==============================\n")
                     # Use data= with pre-serialized JSON to preserve key order for signature
-                    response = self.session.post(url, headers=filtered_headers, data=body_str, timeout=self.timeout)
+                    response = self.transport.send("POST", url, filtered_headers, data=body_str, timeout=self.timeout)
             else:
                 raise ValueError(f"Unsupported method: {method}")
             # Parse response
             data = response.json()
+            failed = getattr(response, 'status_code', 200) >= 500
             # Check BloFin API response code
             if data.get('code') == '0':
                 logger.debug(f"API call successful: {method} {path}")
                 return data.get('data', {})
             else:
-                self.stats['api_errors'] += 1
+                self._count('api_errors')
                 error_msg = data.get('msg', 'Unknown error')
                 error_code = data.get('code', 'UNKNOWN')
+                API_ERRORS.labels(endpoint, error_code).inc()
                 logger.error(f"BloFin API error {error_code}: {error_msg}")
                 raise Exception(f"BloFin API error {error_code}: {error_msg}")
         except requests.exceptions.Timeout:
-            self.stats['api_errors'] += 1
+            self._count('api_errors')
+            API_ERRORS.labels(endpoint, 'timeout').inc()
             logger.error(f"Request timeout: {method} {path}")
             raise Exception("Request timeout")
         except requests.exceptions.RequestException as e:
-            self.stats['api_errors'] += 1
+            self._count('api_errors')
+            API_ERRORS.labels(endpoint, 'network').inc()
             logger.error(f"Request failed: {e}")
             raise Exception(f"Request failed: {str(e)}")
+        finally:
+            elapsed = time.perf_counter() - started
+            API_LATENCY.labels(method.upper(), endpoint).observe(elapsed)
+            tracing.record('blofin', started, detail=f"{method.upper()} {endpoint}")
+            if breaker:
+                breaker.record(failed, elapsed, protective)
     
     def calculate_position_size(self, symbol: str, entry_price: float, stop_loss: float, 
                                 risk_percent: float = 1.0, leverage: int = 10) -> Dict[str, Any]:
@@ -319,7 +392,7 @@ class BloFinClient:
         
         try:
             response = self._request("POST", "/api/v1/copytrading/trade/place-order", payload)
-            self.stats['orders_placed'] += 1
+            self._count('orders_placed')
             
             # Response is a list of orders, get the first one
             if isinstance(response, list) and len(response) > 0:
@@ -327,7 +400,7 @@ class BloFinClient:
             else:
                 order_data = response
             
-            order_id = order_data.get('ordId') if isinstance(order_data, dict) else None
+            order_id = (order_data.get('orderId') or order_data.get('ordId')) if isinstance(order_data, dict) else None
             logger.info(f"✅ Order placed successfully: {order_id}")
             
             return {
@@ -340,7 +413,7 @@ class BloFinClient:
             }
         
         except Exception as e:
-            self.stats['orders_failed'] += 1
+            self._count('orders_failed')
             logger.error(f"❌ Failed to place order: {e}")
             raise
     
@@ -384,7 +457,7 @@ class BloFinClient:
         
         try:
             response = self._request("POST", "/api/v1/copytrading/trade/place-order", payload)
-            self.stats['orders_placed'] += 1
+            self._count('orders_placed')
             
             # Response is a list of orders, get the first one
             if isinstance(response, list) and len(response) > 0:
@@ -392,7 +465,7 @@ class BloFinClient:
             else:
                 order_data = response
             
-            order_id = order_data.get('ordId') if isinstance(order_data, dict) else None
+            order_id = (order_data.get('orderId') or order_data.get('ordId')) if isinstance(order_data, dict) else None
             logger.info(f"✅ Limit order placed: {order_id}")
             
             return {
@@ -406,7 +479,7 @@ class BloFinClient:
             }
         
         except Exception as e:
-            self.stats['orders_failed'] += 1
+            self._count('orders_failed')
             logger.error(f"❌ Failed to place limit order: {e}")
             raise
     
@@ -452,8 +525,8 @@ class BloFinClient:
         logger.info(f"Placing reduce-only TP: {api_side} {rounded_size} {symbol} @ {price}")
         
         try:
-            response = self._request("POST", "/api/v1/copytrading/trade/place-order", payload)
-            self.stats['orders_placed'] += 1
+            response = self._request("POST", "/api/v1/copytrading/trade/place-order", payload, protective=True)
+            self._count('orders_placed')
             
             # Response is a list of orders, get the first one
             if isinstance(response, list) and len(response) > 0:
@@ -461,7 +534,7 @@ class BloFinClient:
             else:
                 order_data = response
             
-            order_id = order_data.get('ordId') if isinstance(order_data, dict) else None
+            order_id = (order_data.get('orderId') or order_data.get('ordId')) if isinstance(order_data, dict) else None
             logger.info(f"✅ Reduce-only TP order placed: {order_id} @ ${price}")
             
             return {
@@ -475,7 +548,7 @@ class BloFinClient:
             }
         
         except Exception as e:
-            self.stats['orders_failed'] += 1
+            self._count('orders_failed')
             logger.error(f"❌ Failed to place reduce-only order: {e}")
             raise
     
@@ -500,7 +573,8 @@ class BloFinClient:
         logger.info(f"Canceling TP/SL orders: {symbol}")
         
         try:
-            response = self._request("POST", "/api/v1/copytrading/trade/cancel-tpsl-by-contract", payload)
+            response = self._request("POST", "/api/v1/copytrading/trade/cancel-tpsl-by-contract", payload,
+                                     protective=True)
             logger.info(f"✅ TP/SL orders canceled")
             return response
         except Exception as e:
@@ -538,7 +612,8 @@ class BloFinClient:
         logger.info(f"Setting TP/SL pair: {symbol} TP@{tp_price} SL@{sl_price} (size: {rounded_size})")
         
         try:
-            response = self._request("POST", "/api/v1/copytrading/trade/place-tpsl-by-contract", payload)
+            response = self._request("POST", "/api/v1/copytrading/trade/place-tpsl-by-contract", payload,
+                                     protective=True)
             algo_id = response.get('algoId')
             
             # Validate that we got a valid order ID
@@ -630,14 +705,26 @@ class BloFinClient:
             Ticker data with current price
         """
         try:
-            response = self._request("GET", f"/api/v1/market/ticker?instId={symbol}")
-            if response and 'data' in response and len(response['data']) > 0:
-                return response['data'][0]
+            # _request returns the "data" list: [{instId, last, askPrice, bidPrice, ..., ts}]
+            tickers = self._request("GET", f"/api/v1/market/tickers?instId={symbol}")
+            if isinstance(tickers, list) and tickers:
+                return tickers[0]
             return {}
         except Exception as e:
             logger.error(f"Failed to get ticker for {symbol}: {e}")
             raise
     
+    def get_mark_prices(self) -> Dict[str, float]:
+        """
+        Get mark prices for every instrument in one call.
+        
+        Returns:
+            Dict of symbol -> mark price
+        """
+        # _request returns the "data" list: [{instId, indexPrice, markPrice, ts}]
+        rows = self._request("GET", "/api/v1/market/mark-price")
+        return {row['instId']: float(row['markPrice']) for row in rows or [] if row.get('markPrice')}
+    
     def get_account_balance(self) -> Dict[str, Any]:
         """
         Get account balance.
@@ -677,7 +764,8 @@ class BloFinClient:
             List of pending TP/SL orders
         """
         try:
-            response = self._request("GET", f"/api/v1/copytrading/trade/pending-tpsl-by-contract?instId={symbol}")
+            response = self._request("GET", f"/api/v1/copytrading/trade/pending-tpsl-by-contract?instId={symbol}",
+                                     protective=True)
             return response if isinstance(response, list) else []
         except Exception as e:
             logger.error(f"Failed to get pending TP/SL for {symbol}: {e}")
@@ -752,7 +840,11 @@ class BloFinClient:
     
     def get_stats(self) -> Dict[str, Any]:
         """Get client statistics."""
-        return self.stats.copy()
+        with self._stats_lock:
+            stats = self.stats.copy()
+        if hasattr(self.transport, 'stats'):
+            stats['transport'] = self.transport.stats.copy()
+        return stats
 
 
 if __name__ == "__main__":
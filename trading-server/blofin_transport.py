@@ -0,0 +1,264 @@
+"""
+BloFin Transport Module
+
+Pluggable HTTP layer for BloFinClient:
+
+- RequestsTransport: the real network (requests.Session)
+- RecordingTransport: wraps another transport and appends every request
+  and response to a cassette file, with credentials redacted
+- ReplayTransport: answers from a cassette instead of the network,
+  instantly or with the recorded latency (optionally compressed)
+
+A cassette captured in production (e.g. a 200108 duplicate-TP/SL storm)
+can be replayed offline against new server code, and the full pipeline
+can be benchmarked without network variance.
+
+Cassettes are JSON Lines: a header line, then one interaction per line,
+written as they happen so a crash keeps everything recorded so far.
+"""
+import copy
+import json
+import threading
+import time
+import logging
+from collections import defaultdict, deque
+from datetime import datetime
+from typing import Optional, Dict, Any, List, Tuple
+from urllib.parse import urlsplit
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+CASSETTE_VERSION = 1
+REDACTED = "REDACTED"
+SECRET_HEADERS = frozenset({'ACCESS-KEY', 'ACCESS-SIGN', 'ACCESS-PASSPHRASE'})
+
+
+class ReplayError(Exception):
+    """The cassette has no recorded response for a request."""
+
+
+class RequestsTransport:
+    """Sends requests over the network."""
+
+    def __init__(self, session: Optional[requests.Session] = None):
+        self.session = session or requests.Session()
+
+    def send(self, method: str, url: str, headers: Dict[str, str], params: Optional[Dict] = None,
+             data: Optional[str] = None, timeout: float = 10):
+        """
+        Send one request.
+
+        Returns:
+            requests.Response
+
+        Raises:
+            requests.exceptions.RequestException: On network errors and timeouts
+        """
+        if method == "GET":
+            return self.session.get(url, headers=headers, params=params, timeout=timeout)
+        return self.session.post(url, headers=headers, data=data, timeout=timeout)
+
+
+class ReplayResponse:
+    """Recorded response, with the part of requests.Response the client uses."""
+
+    def __init__(self, status_code: int, payload: Any):
+        self.status_code = status_code
+        self._payload = payload
+
+    @property
+    def text(self) -> str:
+        return self._payload if isinstance(self._payload, str) else json.dumps(self._payload)
+
+    def json(self) -> Any:
+        if isinstance(self._payload, str):
+            return json.loads(self._payload)
+        return copy.deepcopy(self._payload)
+
+
+def _request_key(method: str, url: str, params: Optional[Dict]) -> Tuple[str, str]:
+    """(method, path?query) without scheme and host, params merged into the query."""
+    parts = urlsplit(url)
+    path = parts.path
+    query = [parts.query] if parts.query else []
+    if params:
+        query += [f"{k}={v}" for k, v in sorted(params.items())]
+    return method, f"{path}?{'&'.join(query)}" if query else path
+
+
+class Cassette:
+    """Append-only cassette file, shared by the recording transports of every account."""
+
+    def __init__(self, path: str):
+        """
+        Open a cassette for recording (an existing file is replaced).
+
+        Args:
+            path: File to write
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+        self._seq = 0
+        self._file = open(path, 'w', encoding='utf-8')
+        self._write({'cassette': CASSETTE_VERSION, 'recorded_at': datetime.utcnow().isoformat()})
+
+    def _write(self, entry: Dict[str, Any]):
+        self._file.write(json.dumps(entry, separators=(',', ':')) + "\n")
+        self._file.flush()
+
+    def append(self, interaction: Dict[str, Any]):
+        with self._lock:
+            self._seq += 1
+            self._write({'seq': self._seq, 't': round(time.monotonic() - self._started, 4), **interaction})
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def load_cassette(path: str) -> List[Dict[str, Any]]:
+    """
+    Read a cassette's interactions.
+
+    Raises:
+        ValueError: If the file isn't a cassette of a supported version
+    """
+    with open(path, encoding='utf-8') as f:
+        lines = [json.loads(line) for line in f if line.strip()]
+    if not lines or lines[0].get('cassette') != CASSETTE_VERSION:
+        raise ValueError(f"{path} is not a version {CASSETTE_VERSION} cassette")
+    return lines[1:]
+
+
+class RecordingTransport:
+    """Passes requests through to another transport and records them."""
+
+    def __init__(self, inner, cassette: Cassette, label: str = "main"):
+        """
+        Initialize recorder.
+
+        Args:
+            inner: Transport that actually sends (usually RequestsTransport)
+            cassette: Cassette to append to
+            label: Account name stored with each interaction
+        """
+        self.inner = inner
+        self.cassette = cassette
+        self.label = label
+
+        self.stats = {
+            'recorded': 0
+        }
+
+    def send(self, method: str, url: str, headers: Dict[str, str], params: Optional[Dict] = None,
+             data: Optional[str] = None, timeout: float = 10):
+        method, path = _request_key(method, url, params)
+        interaction = {
+            'label': self.label,
+            'method': method,
+            'path': path,
+            'body': data,
+            'headers': {k: REDACTED if k in SECRET_HEADERS else v for k, v in headers.items()}
+        }
+
+        start = time.perf_counter()
+        try:
+            response = self.inner.send(method, url, headers, params=params, data=data, timeout=timeout)
+        except requests.exceptions.Timeout:
+            self._record(interaction, start, error='timeout')
+            raise
+        except requests.exceptions.RequestException as e:
+            self._record(interaction, start, error=f"connection: {e}")
+            raise
+
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = response.text
+        self._record(interaction, start, status=response.status_code, response=payload)
+        return response
+
+    def _record(self, interaction: Dict[str, Any], start: float, **result):
+        interaction['elapsed'] = round(time.perf_counter() - start, 4)
+        interaction.update(result)
+        self.cassette.append(interaction)
+        self.stats['recorded'] += 1
+
+
+class ReplayTransport:
+    """
+    Answers requests from a cassette.
+
+    Requests are matched on method, path and query (and the body with
+    match_body) to the recorded interactions of this transport's label,
+    first recorded first served. A GET whose recordings are used up gets the
+    last one again (new code may poll more often); a POST never repeats.
+    """
+
+    def __init__(self, interactions: List[Dict[str, Any]], label: str = "main",
+                 speed: float = 0, match_body: bool = False):
+        """
+        Initialize replay.
+
+        Args:
+            interactions: From load_cassette()
+            label: Only replay interactions recorded for this account
+            speed: 0 = answer instantly, 1 = recorded latency, N = latency / N
+            match_body: Also require the POST body to match
+        """
+        self.speed = speed
+        self.match_body = match_body
+        self._queues: Dict[Tuple, deque] = defaultdict(deque)
+        self._last: Dict[Tuple, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        for interaction in interactions:
+            if interaction.get('label', 'main') == label:
+                self._queues[self._key(interaction['method'], interaction['path'], interaction.get('body'))].append(
+                    interaction)
+
+        self.stats = {
+            'replayed': 0,
+            'repeated': 0,
+            'misses': 0
+        }
+
+    def _key(self, method: str, path: str, body: Optional[str]) -> Tuple:
+        return (method, path, body) if self.match_body and method == "POST" else (method, path)
+
+    def remaining(self) -> int:
+        """Recorded interactions not replayed yet."""
+        with self._lock:
+            return sum(len(q) for q in self._queues.values())
+
+    def send(self, method: str, url: str, headers: Dict[str, str], params: Optional[Dict] = None,
+             data: Optional[str] = None, timeout: float = 10):
+        method, path = _request_key(method, url, params)
+        key = self._key(method, path, data)
+        with self._lock:
+            if self._queues[key]:
+                interaction = self._queues[key].popleft()
+                self._last[key] = interaction
+                self.stats['replayed'] += 1
+            elif method == "GET" and key in self._last:
+                interaction = self._last[key]
+                self.stats['repeated'] += 1
+            else:
+                self.stats['misses'] += 1
+                raise ReplayError(f"No recorded response for {method} {path}")
+
+        if self.speed:
+            time.sleep(interaction.get('elapsed', 0) / self.speed)
+
+        error = interaction.get('error')
+        if error == 'timeout':
+            raise requests.exceptions.Timeout(f"Replayed timeout: {method} {path}")
+        if error:
+            raise requests.exceptions.ConnectionError(f"Replayed {error}")
+        return ReplayResponse(interaction.get('status', 200), interaction.get('response'))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get replay statistics."""
+        return {**self.stats, 'remaining': self.remaining()}
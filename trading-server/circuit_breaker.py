@@ -0,0 +1,260 @@
+"""
+Circuit Breaker Module
+
+Per-account circuit breakers around BloFin API calls, one per endpoint
+group (market data, account, trading), so an incident on one part of the
+API doesn't block the others.
+
+Each breaker tracks a rolling window of call outcomes. A call fails if it
+times out, can't connect, gets an HTTP 5xx or unreadable response, or takes
+longer than `slow_call_seconds`. BloFin business errors (insufficient
+balance, TP/SL already set, ...) mean the exchange is up and count as
+successes. Once the window holds `min_calls` calls and the failed share
+reaches `failure_rate`, the breaker opens:
+
+- open: calls are rejected immediately with CircuitOpenError (error code
+  CIRCUIT_OPEN) instead of waiting on timeouts and retries. Protective
+  calls (TP/SL placement, closes) still go through.
+- half-open: after `open_seconds` one probe call at a time is let through;
+  `probe_successes` successes in a row close the breaker, a failure opens
+  it again.
+"""
+import threading
+import time
+import logging
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+from shared.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CLOSED = "closed"
+HALF_OPEN = "half_open"
+OPEN = "open"
+
+CIRCUIT_STATE = REGISTRY.gauge('blofin_circuit_state', 'Circuit breaker state (0 closed, 1 half-open, 2 open)',
+                               ['account', 'group'])
+CIRCUIT_REJECTIONS = REGISTRY.counter('blofin_circuit_rejections_total', 'Calls rejected by an open circuit breaker',
+                                      ['account', 'group'])
+_STATE_VALUES = {CLOSED: 0, HALF_OPEN: 1, OPEN: 2}
+
+# Path prefix -> endpoint group (first match wins)
+ENDPOINT_GROUPS = (
+    ("/api/v1/market/", "market"),
+    ("/api/v1/copytrading/account/", "account"),
+    ("/api/v1/copytrading/trade/", "trade"),
+)
+DEFAULT_GROUP = "other"
+
+
+def endpoint_group(path: str) -> str:
+    """Endpoint group for an API path."""
+    for prefix, group in ENDPOINT_GROUPS:
+        if path.startswith(prefix):
+            return group
+    return DEFAULT_GROUP
+
+
+@dataclass
+class BreakerConfig:
+    """Circuit breaker thresholds (shared by every group)."""
+    window_seconds: float = 60.0  # Rolling window of call outcomes
+    min_calls: int = 10  # Calls in the window before the breaker can open
+    failure_rate: float = 0.5  # Share of failed (or slow) calls that opens the breaker
+    slow_call_seconds: float = 5.0  # A call slower than this counts as failed
+    open_seconds: float = 30.0  # Time open before probing
+    probe_successes: int = 2  # Successful probes in a row that close the breaker
+
+
+class CircuitOpenError(Exception):
+    """A call was rejected because its endpoint group's breaker is open."""
+
+    error_code = "CIRCUIT_OPEN"
+
+    def __init__(self, group: str, retry_in: float):
+        self.group = group
+        self.retry_in = retry_in
+        super().__init__(f"BloFin {group} endpoints degraded - circuit open, retry in {retry_in:.0f}s")
+
+
+class CircuitBreaker:
+    """Breaker for one endpoint group of one account."""
+
+    def __init__(self, group: str, config: BreakerConfig, name: str = "default"):
+        """
+        Initialize breaker.
+
+        Args:
+            group: Endpoint group (market, account, trade, other)
+            config: Thresholds
+            name: Account name (log messages and metric labels)
+        """
+        self.group = group
+        self.config = config
+        self.name = name
+        self._lock = threading.Lock()
+        self._outcomes: deque = deque()  # (monotonic time, failed)
+        self._failures = 0
+        self._state = CLOSED
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self._probe_streak = 0
+        self._gauge = CIRCUIT_STATE.labels(name, group)
+        self._rejections = CIRCUIT_REJECTIONS.labels(name, group)
+
+        self.stats = {
+            'opened': 0,
+            'rejected': 0,
+            'protective_bypassed': 0
+        }
+
+    def _set_state(self, state: str, now: float):
+        if state == self._state:
+            return
+        logger.warning(f"{'🔴' if state == OPEN else '🟡' if state == HALF_OPEN else '🟢'} "
+                       f"[{self.name}] BloFin {self.group} circuit {self._state} -> {state}")
+        self._state = state
+        self._gauge.set(_STATE_VALUES[state])
+        if state == OPEN:
+            self._opened_at = now
+            self.stats['opened'] += 1
+        if state != HALF_OPEN:
+            self._probe_in_flight = False
+            self._probe_streak = 0
+        if state == CLOSED:
+            self._outcomes.clear()
+            self._failures = 0
+
+    def _refresh(self, now: float):
+        """Move an open breaker to half-open once open_seconds have passed."""
+        if self._state == OPEN and now - self._opened_at >= self.config.open_seconds:
+            self._set_state(HALF_OPEN, now)
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            self._refresh(time.monotonic())
+            return self._state
+
+    def allow(self, protective: bool = False):
+        """
+        Check a call may go ahead. Every allowed call must be followed by record().
+
+        Args:
+            protective: Call protects or closes a position - never rejected
+
+        Raises:
+            CircuitOpenError: If the breaker is open (or half-open with a probe in flight)
+        """
+        with self._lock:
+            now = time.monotonic()
+            self._refresh(now)
+            if self._state == CLOSED:
+                return
+            if protective:
+                self.stats['protective_bypassed'] += 1
+                return
+            if self._state == HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return
+            self.stats['rejected'] += 1
+            retry_in = max(self._opened_at + self.config.open_seconds - now, 0.0)
+        self._rejections.inc()
+        raise CircuitOpenError(self.group, retry_in)
+
+    def record(self, failed: bool, duration: float, protective: bool = False):
+        """
+        Record the outcome of an allowed call.
+
+        Args:
+            failed: Transport/server failure (business errors are not failures)
+            duration: Call duration in seconds (slow calls count as failed)
+            protective: Call was allowed as protective (pass the same value as to allow())
+        """
+        failed = failed or duration > self.config.slow_call_seconds
+        with self._lock:
+            now = time.monotonic()
+            self._refresh(now)
+
+            if protective and self._state != CLOSED:
+                return  # Bypassed the breaker - not a probe, the probe decides when to close
+            if self._state == HALF_OPEN:
+                self._probe_in_flight = False
+                if failed:
+                    self._set_state(OPEN, now)
+                else:
+                    self._probe_streak += 1
+                    if self._probe_streak >= self.config.probe_successes:
+                        self._set_state(CLOSED, now)
+                return
+            if self._state == OPEN:
+                return  # Call started before the breaker opened
+
+            self._outcomes.append((now, failed))
+            self._failures += failed
+            cutoff = now - self.config.window_seconds
+            while self._outcomes and self._outcomes[0][0] < cutoff:
+                self._failures -= self._outcomes.popleft()[1]
+            calls = len(self._outcomes)
+            if failed and calls >= self.config.min_calls and self._failures / calls >= self.config.failure_rate:
+                self._set_state(OPEN, now)
+
+    def get_stats(self) -> dict:
+        """Get breaker state and statistics."""
+        with self._lock:
+            now = time.monotonic()
+            self._refresh(now)
+            stats = self.stats.copy()
+            stats['state'] = self._state
+            stats['window_calls'] = len(self._outcomes)
+            stats['window_failures'] = self._failures
+            if self._state == OPEN:
+                stats['retry_in'] = round(max(self._opened_at + self.config.open_seconds - now, 0.0), 1)
+        return stats
+
+
+class CircuitBreakerSet:
+    """One breaker per endpoint group for an account, created on first use."""
+
+    def __init__(self, config: BreakerConfig, name: str = "default"):
+        """
+        Initialize breaker set.
+
+        Args:
+            config: Thresholds for every group
+            name: Account name (log messages and metric labels)
+        """
+        self.config = config
+        self.name = name
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+
+    def for_group(self, group: str) -> CircuitBreaker:
+        breaker = self._breakers.get(group)
+        if breaker is None:
+            with self._lock:
+                breaker = self._breakers.setdefault(group, CircuitBreaker(group, self.config, self.name))
+        return breaker
+
+    def for_path(self, path: str) -> CircuitBreaker:
+        """Breaker for an API path (query string ignored)."""
+        return self.for_group(endpoint_group(path))
+
+    def first_open(self, groups: Iterable[str]) -> Optional[CircuitBreaker]:
+        """First of `groups` whose breaker is open (half-open lets probes through)."""
+        for group in groups:
+            breaker = self._breakers.get(group)
+            if breaker and breaker.state == OPEN:
+                return breaker
+        return None
+
+    def degraded(self) -> Dict[str, str]:
+        """Groups that aren't closed, with their state."""
+        states = {group: breaker.state for group, breaker in list(self._breakers.items())}
+        return {group: state for group, state in states.items() if state != CLOSED}
+
+    def get_stats(self) -> Dict[str, dict]:
+        """Stats per endpoint group."""
+        return {group: breaker.get_stats() for group, breaker in list(self._breakers.items())}
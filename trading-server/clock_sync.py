@@ -0,0 +1,202 @@
+"""
+Clock Sync Module
+
+Keeps an estimate of the offset between the local clock and BloFin's
+server clock so ACCESS-TIMESTAMP is stamped in exchange time. A drifting
+droplet clock otherwise shows up as timestamp-expired rejections that look
+like random API errors.
+
+BloFin has no public server-time endpoint, so the clock is read from the
+HTTP `Date` header of a cheap public call. For one sample:
+
+    offset = (Date + 0.5s) - (sent + received) / 2
+
+`Date` has one-second resolution, so a single sample is only good to about
+±0.5s plus half the round trip. Samples are taken at jittered intervals
+(so the sub-second phase varies and the truncation averages out), samples
+with a long round trip are discarded, and the rest are smoothed with an
+EWMA that starts as a running mean. A jump larger than `step_seconds`
+(the local clock was stepped, e.g. by NTP) restarts the average instead of
+being smoothed in.
+"""
+import logging
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Optional
+
+import requests
+
+from shared.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+CLOCK_OFFSET = REGISTRY.gauge('blofin_clock_offset_seconds', 'Smoothed BloFin server time minus local time')
+CLOCK_SAMPLES = REGISTRY.counter('blofin_clock_samples_total', 'Clock sync samples by result (ok, slow, error)',
+                                 ['result'])
+
+DEFAULT_PATH = "/api/v1/market/tickers?instId=BTC-USDT"
+WARMUP_SAMPLES = 5  # Taken about a second apart at startup and after a step
+
+
+class ClockSync:
+    """
+    Smoothed offset between BloFin's clock and the local clock, sampled in the background.
+    """
+
+    def __init__(self, base_url: str, path: str = DEFAULT_PATH, interval: float = 60.0,
+                 alpha: float = 0.2, max_rtt: float = 1.0, step_seconds: float = 2.0,
+                 alert_threshold: float = 1.0,
+                 on_alert: Optional[Callable[[float, bool], None]] = None,
+                 session: Optional[requests.Session] = None, timeout: float = 5.0):
+        """
+        Initialize clock sync.
+
+        Args:
+            base_url: BloFin API base URL
+            path: Public endpoint whose Date header is read
+            interval: Seconds between samples (jittered ±20%)
+            alpha: EWMA weight of a new sample
+            max_rtt: Samples with a longer round trip are discarded
+            step_seconds: A sample this far from the estimate restarts the average
+            alert_threshold: |offset| in seconds that raises the drift alert (0 = off)
+            on_alert: Called with (offset, drifting) when the offset crosses the threshold
+                and when it comes back
+            session: HTTP session (default: a new requests.Session)
+            timeout: Request timeout in seconds
+        """
+        self.url = f"{base_url.rstrip('/')}{path}"
+        self.interval = interval
+        self.alpha = alpha
+        self.max_rtt = max_rtt
+        self.step_seconds = step_seconds
+        self.alert_threshold = alert_threshold
+        self.on_alert = on_alert
+        self.session = session or requests.Session()
+        self.timeout = timeout
+
+        self._offset = 0.0
+        self._samples = 0  # Samples in the current average
+        self._synced_at = 0.0  # time.monotonic() of the last accepted sample
+        self.drifting = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            'samples': 0,
+            'slow_samples': 0,
+            'errors': 0,
+            'steps': 0,
+            'last_sample': None,
+            'last_rtt_ms': None
+        }
+
+    @property
+    def offset(self) -> float:
+        """Server time minus local time, in seconds (0 until the first sample)."""
+        return self._offset
+
+    def now(self) -> float:
+        """Current time on BloFin's clock (unix seconds) - pass to BloFinAuth as its clock."""
+        return time.time() + self._offset
+
+    def add_sample(self, sample: float):
+        """Fold one measured offset into the estimate."""
+        with self._lock:
+            if self._samples and abs(sample - self._offset) > self.step_seconds:
+                logger.warning(f"⏱️ Clock offset jumped {self._offset:+.3f}s -> {sample:+.3f}s, resyncing")
+                self.stats['steps'] += 1
+                self._samples = 0
+            self._samples += 1
+            weight = max(self.alpha, 1.0 / self._samples)  # Running mean until it settles into the EWMA
+            self._offset += weight * (sample - self._offset)
+            self._synced_at = time.monotonic()
+            self.stats['samples'] += 1
+            self.stats['last_sample'] = round(sample, 3)
+            offset = self._offset
+        CLOCK_OFFSET.set(offset)
+        self._check_drift(offset)
+
+    def _check_drift(self, offset: float):
+        if not self.alert_threshold:
+            return
+        drifting = abs(offset) > self.alert_threshold
+        if drifting == self.drifting or self.stats['samples'] < WARMUP_SAMPLES:
+            return
+        self.drifting = drifting
+        if drifting:
+            logger.error(f"🚨 Local clock is {abs(offset):.3f}s {'ahead of' if offset < 0 else 'behind'} "
+                         f"BloFin server time (threshold {self.alert_threshold:.1f}s) - check NTP on this host")
+        else:
+            logger.info(f"✅ Clock drift back within {self.alert_threshold:.1f}s ({offset:+.3f}s)")
+        if self.on_alert:
+            try:
+                self.on_alert(offset, drifting)
+            except Exception as e:
+                logger.error(f"Error sending clock drift alert: {e}")
+
+    def sample(self) -> Optional[float]:
+        """
+        Measure the offset once and fold it in.
+
+        Returns:
+            The measured offset, or None if the sample failed or was discarded
+        """
+        try:
+            sent = time.time()
+            response = self.session.get(self.url, timeout=self.timeout)
+            received = time.time()
+            server_time = parsedate_to_datetime(response.headers['Date']).timestamp()
+        except Exception as e:
+            self.stats['errors'] += 1
+            CLOCK_SAMPLES.labels('error').inc()
+            logger.warning(f"⚠️ Clock sync sample failed: {e}")
+            return None
+
+        rtt = received - sent
+        self.stats['last_rtt_ms'] = round(rtt * 1000, 1)
+        if rtt > self.max_rtt:
+            self.stats['slow_samples'] += 1
+            CLOCK_SAMPLES.labels('slow').inc()
+            return None
+
+        CLOCK_SAMPLES.labels('ok').inc()
+        sample = server_time + 0.5 - (sent + received) / 2
+        self.add_sample(sample)
+        return sample
+
+    def _run(self):
+        while not self._stop.is_set():
+            settling = self._samples < WARMUP_SAMPLES
+            self.sample()
+            if settling and self._samples == WARMUP_SAMPLES:
+                logger.info(f"⏱️ BloFin clock offset {self._offset:+.3f}s")
+            # Quick samples until the average settles (at startup and after a step)
+            if self._samples < WARMUP_SAMPLES:
+                self._stop.wait(random.uniform(0.5, 1.5))
+            else:
+                self._stop.wait(self.interval * random.uniform(0.8, 1.2))
+
+    def start(self):
+        """Start sampling in a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="clock-sync")
+        self._thread.start()
+        logger.info(f"⏱️ Clock sync started (every {self.interval:.0f}s)")
+
+    def stop(self):
+        """Stop the sampling thread."""
+        self._stop.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get offset and sampling statistics."""
+        return {
+            **self.stats,
+            'offset_ms': round(self._offset * 1000, 1),
+            'drifting': self.drifting,
+            'age_seconds': round(time.monotonic() - self._synced_at, 1) if self._synced_at else None
+        }
@@ -6,7 +6,7 @@ Runs every 30 seconds to check order status.
 """
 import logging
 import time
-from typing import Dict, Set, Optional
+from typing import Dict, Set, Optional, Callable, Any
 from datetime import datetime
 import requests
 
@@ -16,7 +16,8 @@ logger = logging.getLogger(__name__)
 class OrderMonitor:
     """Monitors TP/SL orders and sends Discord notifications when filled."""
     
-    def __init__(self, blofin_client, webhook_url: Optional[str] = None, check_interval: int = 30):
+    def __init__(self, blofin_client, webhook_url: Optional[str] = None, check_interval: int = 30,
+                 event_callback: Optional[Callable[[str, Dict[str, Any]], None]] = None):
         """
         Initialize order monitor.
         
@@ -24,10 +25,12 @@ class OrderMonitor:
             blofin_client: BloFinClient instance
             webhook_url: Discord webhook URL
             check_interval: Check interval in seconds (default 30)
+            event_callback: Called as event_callback(kind, data) when an order fills
         """
         self.client = blofin_client
         self.webhook_url = webhook_url
         self.check_interval = check_interval
+        self.event_callback = event_callback
         
         # Track orders we're monitoring
         # Key: orderId, Value: order details
@@ -162,6 +165,20 @@ class OrderMonitor:
             is_tp=is_tp
         )
         
+        # Push to signal channel clients
+        if self.event_callback:
+            try:
+                self.event_callback('order_filled', {
+                    'order_id': order_id,
+                    'symbol': symbol,
+                    'order_type': order_type,
+                    'trigger_price': trigger_price,
+                    'size': size,
+                    'pnl': pnl
+                })
+            except Exception as e:
+                logger.error(f"Error publishing order event: {e}")
+        
         # If this was a TP and we have cascading TPs configured, create next level
         if is_tp and symbol in self.cascading_tps:
             self._create_next_tp_level(symbol)
@@ -0,0 +1,257 @@
+"""
+Price Guard Module
+
+Pre-execution check of a signal against the live market.
+
+Entries are market orders, so a signal posted minutes ago (or one the
+price has already run away from) would otherwise be filled at whatever
+the market is now - possibly past TP1 or through the stop. The guard
+compares the signal's entry, stop loss and targets with a cached mark
+price and rejects signals that are stale, already invalidated, or whose
+remaining reward:risk is too low. Signals that are still worth taking
+but whose stop is now further away are resized so the dollar risk stays
+what the signal planned.
+
+Mark prices for every instrument are refreshed by a background thread
+(one public REST call per interval), so a check is a dict lookup and a
+few comparisons - no API call on the execution path.
+"""
+import threading
+import time
+import logging
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any, Callable
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GuardLimits:
+    """
+    Configurable guard thresholds. A threshold of 0 disables that check.
+    """
+    max_signal_age: float = 300.0  # Seconds since the signal was posted
+    max_price_age: float = 10.0  # Seconds before a cached mark price is too old to use
+    min_reward_risk: float = 1.0  # Remaining reward:risk at the mark price (to the TP placed)
+    resize: bool = True  # Shrink size when the stop is now further away than planned
+    require_price: bool = False  # Reject (instead of allow) when no fresh mark price is cached
+
+
+@dataclass
+class GuardDecision:
+    """Result of a pre-execution price check."""
+    allowed: bool
+    error_code: Optional[str] = None
+    message: str = ""
+    mark_price: Optional[float] = None
+    reward_risk: Optional[float] = None
+    size_factor: float = 1.0  # Multiply position size by this (<= 1)
+
+
+class MarkPriceCache:
+    """
+    Mark prices for every instrument, refreshed in the background.
+    """
+
+    def __init__(self, fetch: Callable[[], Dict[str, float]], interval: float = 2.0):
+        """
+        Initialize cache.
+
+        Args:
+            fetch: Returns {symbol: mark_price} for all instruments
+            interval: Seconds between refreshes
+        """
+        self.fetch = fetch
+        self.interval = interval
+        self._prices: Dict[str, float] = {}
+        self._updated_at = 0.0  # time.monotonic() of the last refresh
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+        self.stats = {
+            'refreshes': 0,
+            'refresh_errors': 0
+        }
+
+    def update(self, prices: Dict[str, float]):
+        """Replace the cached prices (the dict is swapped, readers never see a partial update)."""
+        self._prices = prices
+        self._updated_at = time.monotonic()
+
+    def get(self, symbol: str, max_age: float = 0) -> Optional[float]:
+        """
+        Cached mark price for a symbol.
+
+        Args:
+            symbol: Trading pair (e.g., BTC-USDT)
+            max_age: Return None if the cache is older than this (0 = any age)
+
+        Returns:
+            Mark price, or None if unknown or stale
+        """
+        if max_age and time.monotonic() - self._updated_at > max_age:
+            return None
+        return self._prices.get(symbol)
+
+    def age(self) -> Optional[float]:
+        """Seconds since the last refresh, or None if never refreshed."""
+        return time.monotonic() - self._updated_at if self._updated_at else None
+
+    def refresh(self):
+        """Fetch and store prices once."""
+        try:
+            self.update(self.fetch())
+            self.stats['refreshes'] += 1
+        except Exception as e:
+            self.stats['refresh_errors'] += 1
+            logger.warning(f"⚠️ Mark price refresh failed: {e}")
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.refresh()
+            self._stop.wait(self.interval)
+
+    def start(self):
+        """Start refreshing in a daemon thread."""
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True, name="mark-price-cache")
+        self._thread.start()
+        logger.info(f"📈 Mark price cache started (every {self.interval}s)")
+
+    def stop(self):
+        """Stop the refresh thread."""
+        self._stop.set()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get cache statistics."""
+        age = self.age()
+        return {
+            **self.stats,
+            'symbols': len(self._prices),
+            'age_seconds': round(age, 2) if age is not None else None
+        }
+
+
+def signal_age(timestamp: Optional[str]) -> Optional[float]:
+    """
+    Seconds since an ISO timestamp (naive timestamps are UTC).
+
+    Returns:
+        Age in seconds, or None if the timestamp is missing or invalid
+    """
+    if not timestamp:
+        return None
+    try:
+        posted = datetime.fromisoformat(timestamp)
+    except ValueError:
+        return None
+    if posted.tzinfo is None:
+        posted = posted.replace(tzinfo=timezone.utc)
+    return (datetime.now(timezone.utc) - posted).total_seconds()
+
+
+class PriceGuard:
+    """
+    Checks signals against cached mark prices before execution.
+    """
+
+    def __init__(self, cache: MarkPriceCache, limits: GuardLimits):
+        """
+        Initialize price guard.
+
+        Args:
+            cache: Mark price cache to read from
+            limits: Guard thresholds
+        """
+        self.cache = cache
+        self.limits = limits
+
+        self.stats = {
+            'checked': 0,
+            'rejected': 0,
+            'resized': 0,
+            'no_price': 0
+        }
+
+    def check(self, symbol: str, side: str, entry_price: Optional[float], stop_loss: Optional[float],
+              targets: list, tp_price: Optional[float], timestamp: Optional[str] = None) -> GuardDecision:
+        """
+        Check a signal against the current mark price.
+
+        Args:
+            symbol: Trading pair
+            side: long/buy or short/sell
+            entry_price: Signal entry (None = market)
+            stop_loss: Signal stop loss
+            targets: All signal take-profit levels (None entries ignored)
+            tp_price: Take profit that will actually be placed (for reward:risk)
+            timestamp: When the signal was posted (ISO format)
+
+        Returns:
+            GuardDecision - size_factor < 1 means the position should be shrunk
+        """
+        self.stats['checked'] += 1
+        limits = self.limits
+
+        if limits.max_signal_age:
+            age = signal_age(timestamp)
+            if age is not None and age > limits.max_signal_age:
+                return self._reject("STALE_SIGNAL", f"Signal is {age:.0f}s old (limit {limits.max_signal_age:.0f}s)")
+
+        price = self.cache.get(symbol, limits.max_price_age)
+        if price is None:
+            self.stats['no_price'] += 1
+            if limits.require_price:
+                return self._reject("NO_MARK_PRICE", f"No fresh mark price for {symbol}")
+            return GuardDecision(allowed=True, message=f"No fresh mark price for {symbol}, not checked")
+
+        direction = 1 if side in ("long", "buy") else -1
+
+        if stop_loss and direction * (price - stop_loss) <= 0:
+            return self._reject("SL_BREACHED", f"Mark price {price} is already through the stop loss {stop_loss}",
+                                price)
+
+        targets = [tp for tp in targets if tp]
+        if targets:
+            first_target = min(targets) if direction == 1 else max(targets)
+            if direction * (first_target - price) <= 0:
+                return self._reject("TP_REACHED", f"Mark price {price} has already reached TP {first_target}",
+                                    price)
+
+        reward_risk = None
+        if tp_price and stop_loss:
+            reward_risk = (direction * (tp_price - price)) / (direction * (price - stop_loss))
+            if limits.min_reward_risk and reward_risk < limits.min_reward_risk:
+                return self._reject("LOW_REWARD_RISK",
+                                    f"Reward:risk at mark price {price} is {reward_risk:.2f} "
+                                    f"(minimum {limits.min_reward_risk})", price, reward_risk)
+
+        size_factor = 1.0
+        if limits.resize and stop_loss and entry_price:
+            planned_risk = abs(entry_price - stop_loss)
+            actual_risk = abs(price - stop_loss)
+            if actual_risk > planned_risk:
+                size_factor = planned_risk / actual_risk
+                self.stats['resized'] += 1
+
+        return GuardDecision(
+            allowed=True,
+            message=f"Mark price {price} ok",
+            mark_price=price,
+            reward_risk=reward_risk,
+            size_factor=size_factor
+        )
+
+    def _reject(self, error_code: str, message: str, price: Optional[float] = None,
+                reward_risk: Optional[float] = None) -> GuardDecision:
+        self.stats['rejected'] += 1
+        logger.warning(f"🛑 Price guard: {message}")
+        return GuardDecision(allowed=False, error_code=error_code, message=message,
+                             mark_price=price, reward_risk=reward_risk)
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get guard and cache statistics."""
+        return {**self.stats, 'cache': self.cache.get_stats()}
@@ -0,0 +1,109 @@
+"""
+Rate Limiter Module
+
+Thread-safe token bucket used to keep each BloFin account under its
+order rate limit. One instance per account - accounts never share a bucket.
+
+With several worker processes each builds its own RateLimiter, so the
+bucket itself is kept in the shared state store (SharedStateStore.take_token)
+and the account's limit holds across all of them.
+"""
+import threading
+import time
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """
+    Token bucket rate limiter.
+
+    Allows short bursts up to `max_calls` and refills at
+    `max_calls / period` tokens per second. `acquire()` blocks the calling
+    thread until a token is available.
+    """
+
+    def __init__(self, max_calls: int, period: float = 60.0, name: str = "default", store=None):
+        """
+        Initialize rate limiter.
+
+        Args:
+            max_calls: Maximum calls allowed per period (also the burst size)
+            period: Period length in seconds
+            name: Name used in log messages (usually the account name)
+            store: Optional SharedStateStore holding the bucket for every
+                worker process (None = this process only)
+        """
+        if max_calls <= 0:
+            raise ValueError("max_calls must be positive")
+
+        self.max_calls = max_calls
+        self.period = period
+        self.name = name
+        self.store = store
+        self._rate = max_calls / period
+        self._tokens = float(max_calls)
+        self._last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'acquired': 0,
+            'throttled': 0
+        }
+
+    def _refill(self, now: float):
+        """Add tokens for the time elapsed since the last refill."""
+        elapsed = now - self._last_refill
+        if elapsed > 0:
+            self._tokens = min(self.max_calls, self._tokens + elapsed * self._rate)
+            self._last_refill = now
+
+    def _take_shared(self) -> float:
+        """Take a token from the shared bucket; seconds to wait if there was none."""
+        try:
+            wait_time = self.store.take_token(f"orders:{self.name}", self.max_calls, self._rate)
+        except Exception as e:
+            logger.warning(f"⚠️ [{self.name}] Shared rate limit unavailable, using this worker's bucket: {e}")
+            return -1.0
+        with self._lock:
+            if wait_time:
+                self.stats['throttled'] += 1
+            else:
+                self.stats['acquired'] += 1
+        return wait_time
+
+    def acquire(self):
+        """Take one token, sleeping until one is available."""
+        while True:
+            if self.store:
+                wait_time = self._take_shared()
+                if wait_time == 0:
+                    return
+                if wait_time > 0:
+                    logger.warning(f"⏳ [{self.name}] Rate limit reached, waiting {wait_time:.2f}s")
+                    time.sleep(wait_time)
+                    continue
+
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    self.stats['acquired'] += 1
+                    return
+                wait_time = (1 - self._tokens) / self._rate
+                self.stats['throttled'] += 1
+
+            logger.warning(f"⏳ [{self.name}] Rate limit reached, waiting {wait_time:.2f}s")
+            time.sleep(wait_time)
+
+    def get_stats(self) -> dict:
+        """Get limiter statistics."""
+        with self._lock:
+            stats = self.stats.copy()
+            if self.store:
+                stats['shared'] = True  # Tokens are in the state store
+            else:
+                stats['available_tokens'] = round(self._tokens, 2)
+        return stats
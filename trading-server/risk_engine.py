@@ -0,0 +1,298 @@
+"""
+Risk Engine Module
+
+Portfolio-level pre-trade risk checks for a single BloFin account.
+
+Exposure is kept as running totals (gross/net notional, margin in use,
+per-side and per-symbol exposure, open position count) that are updated
+incrementally from fills, so checking a signal never needs an API call.
+The totals are re-seeded from the shared position book whenever another
+worker (or a reconciliation) changes it.
+
+A passing check reserves the trade's exposure under the same lock, so
+concurrent signals on one account are checked against each other and
+can't all pass against the same totals. The caller commits the
+reservation once the fill is recorded, or releases it if the order
+isn't placed.
+"""
+import threading
+import logging
+from dataclasses import dataclass
+from typing import Optional, Dict, List, Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RiskLimits:
+    """
+    Configurable risk limits. A limit of 0 disables that check.
+
+    All notional values are in USD.
+    """
+    max_position_size_usd: float = 1000.0  # Notional of a single trade
+    max_leverage: int = 20  # Signal leverage is clamped to this
+    max_gross_notional_usd: float = 0.0  # Sum of |exposure| across symbols
+    max_net_notional_usd: float = 0.0  # |long exposure - short exposure|
+    max_side_notional_usd: float = 0.0  # Total long or total short exposure (correlated risk)
+    max_symbol_notional_usd: float = 0.0  # Exposure in any one symbol
+    max_margin_usd: float = 0.0  # Margin in use
+    max_open_positions: int = 0  # Concurrent open positions
+
+
+@dataclass(eq=False)
+class Reservation:
+    """Exposure held for a checked trade until it fills (commit) or is abandoned (release)."""
+    symbol: str
+    signed: float  # Signed notional (long positive)
+    margin: float  # Margin added by the trade
+
+
+@dataclass
+class RiskDecision:
+    """Result of a pre-trade risk check."""
+    allowed: bool
+    error_code: Optional[str] = None
+    message: str = ""
+    reservation: Optional[Reservation] = None  # Set when allowed
+
+
+class RiskEngine:
+    """
+    Incremental exposure tracker and pre-trade checker for one account.
+
+    Exposure per symbol is stored as signed notional (long positive, short
+    negative) so every check and update is O(1) regardless of how many
+    positions are open.
+    """
+
+    def __init__(self, limits: RiskLimits, name: str = "default"):
+        """
+        Initialize risk engine.
+
+        Args:
+            limits: Risk limits to enforce
+            name: Name used in log messages (usually the account name)
+        """
+        self.limits = limits
+        self.name = name
+        self._lock = threading.Lock()
+
+        self._exposure: Dict[str, float] = {}  # symbol -> signed notional
+        self._margin: Dict[str, float] = {}  # symbol -> margin in use
+        self._long_notional = 0.0
+        self._short_notional = 0.0
+        self._margin_total = 0.0
+        self._reserved: List[Reservation] = []  # Checked trades not yet filled
+        self.book_version: Optional[int] = None
+
+        self.stats = {
+            'checked': 0,
+            'rejected': 0,
+            'released': 0,
+            'leverage_clamped': 0
+        }
+
+    # ----------------------------------------------------------------- limits
+
+    def clamp_leverage(self, leverage: int) -> int:
+        """Clamp leverage to the configured maximum."""
+        if self.limits.max_leverage and leverage > self.limits.max_leverage:
+            logger.warning(f"⚠️ [{self.name}] Leverage {leverage}x exceeds max {self.limits.max_leverage}x, clamping")
+            with self._lock:
+                self.stats['leverage_clamped'] += 1
+            return self.limits.max_leverage
+        return leverage
+
+    def check(self, symbol: str, side: str, notional: float, leverage: int) -> RiskDecision:
+        """
+        Check whether a new fill would keep the account within limits and
+        reserve its exposure if so.
+
+        A limit only rejects trades that push a total above it *and* make
+        it larger, so trades that reduce exposure are always allowed.
+        Totals include the exposure reserved by earlier checks that haven't
+        filled yet. An allowed decision carries a reservation that must be
+        passed to commit() after the fill or release() if the trade is
+        abandoned.
+
+        Args:
+            symbol: Trading pair
+            side: long/short (buy/sell accepted)
+            notional: Notional value of the trade in USD
+            leverage: Leverage for the trade
+
+        Returns:
+            RiskDecision (error_code is set when rejected, reservation when allowed)
+        """
+        limits = self.limits
+        signed = notional if side.lower() in ["long", "buy"] else -notional
+
+        with self._lock:
+            self.stats['checked'] += 1
+
+            current = self._exposure.get(symbol, 0.0)
+            after = current + signed
+
+            long_after = self._long_notional - max(current, 0.0) + max(after, 0.0)
+            short_after = self._short_notional - max(-current, 0.0) + max(-after, 0.0)
+            gross_before = self._long_notional + self._short_notional
+            net_before = abs(self._long_notional - self._short_notional)
+            positions_before = len(self._exposure)
+            positions_after = positions_before - (1 if current else 0) + (1 if after else 0)
+            margin_delta = self._margin_delta(symbol, current, after, leverage)
+            margin_after = self._margin_total + margin_delta
+
+            checks = [
+                ("RISK_MAX_POSITION_SIZE", "Position size", notional, 0.0,
+                 limits.max_position_size_usd),
+                ("RISK_MAX_LEVERAGE", "Leverage", leverage, 0,
+                 limits.max_leverage),
+                ("RISK_MAX_SYMBOL_EXPOSURE", f"{symbol} exposure", abs(after), abs(current),
+                 limits.max_symbol_notional_usd),
+                ("RISK_MAX_SIDE_EXPOSURE", "Long exposure", long_after, self._long_notional,
+                 limits.max_side_notional_usd),
+                ("RISK_MAX_SIDE_EXPOSURE", "Short exposure", short_after, self._short_notional,
+                 limits.max_side_notional_usd),
+                ("RISK_MAX_GROSS_NOTIONAL", "Gross notional", long_after + short_after, gross_before,
+                 limits.max_gross_notional_usd),
+                ("RISK_MAX_NET_NOTIONAL", "Net notional", abs(long_after - short_after), net_before,
+                 limits.max_net_notional_usd),
+                ("RISK_MAX_MARGIN", "Margin in use", margin_after, self._margin_total,
+                 limits.max_margin_usd),
+                ("RISK_MAX_OPEN_POSITIONS", "Open positions", positions_after, positions_before,
+                 limits.max_open_positions),
+            ]
+
+            for error_code, label, value, before, limit in checks:
+                if limit and value > limit and value > before:
+                    self.stats['rejected'] += 1
+                    fmt = ",.0f" if isinstance(limit, int) else ",.2f"
+                    message = f"{label} {value:{fmt}} would exceed limit {limit:{fmt}}"
+                    logger.warning(f"🛑 [{self.name}] Risk check failed for {symbol} {side}: {message}")
+                    return RiskDecision(allowed=False, error_code=error_code, message=message)
+
+            reservation = Reservation(symbol, signed, margin_delta)
+            self._apply(symbol, signed, margin_delta)
+            self._reserved.append(reservation)
+
+        return RiskDecision(allowed=True, reservation=reservation)
+
+    def commit(self, reservation: Reservation):
+        """The reserved trade filled and is in the position book - keep its exposure."""
+        with self._lock:
+            if reservation in self._reserved:
+                self._reserved.remove(reservation)
+
+    def release(self, reservation: Reservation):
+        """The reserved trade won't be placed - give its exposure back."""
+        with self._lock:
+            if reservation not in self._reserved:
+                return
+            self._reserved.remove(reservation)
+            self._apply(reservation.symbol, -reservation.signed, -reservation.margin)
+            self.stats['released'] += 1
+
+    # ---------------------------------------------------------------- updates
+
+    def _margin_delta(self, symbol: str, current: float, after: float, leverage: Optional[int]) -> float:
+        """Change in margin when a symbol's exposure moves from current to after."""
+        current_margin = self._margin.get(symbol, 0.0)
+        if after == 0:
+            return -current_margin
+        if current and (current > 0) == (after > 0):
+            if abs(after) <= abs(current):
+                # Reduced: release margin proportionally
+                return current_margin * abs(after) / abs(current) - current_margin
+            return (abs(after) - abs(current)) / max(leverage or 1, 1)
+        # Opened or flipped
+        return abs(after) / max(leverage or 1, 1) - current_margin
+
+    def apply_fill(self, symbol: str, side: str, notional: float, leverage: Optional[int] = None):
+        """
+        Update running totals with a fill.
+
+        Args:
+            symbol: Trading pair
+            side: long/short (buy/sell accepted)
+            notional: Fill notional value in USD
+            leverage: Leverage used
+        """
+        signed = notional if side.lower() in ["long", "buy"] else -notional
+        with self._lock:
+            current = self._exposure.get(symbol, 0.0)
+            self._apply(symbol, signed, self._margin_delta(symbol, current, current + signed, leverage))
+
+    def _apply(self, symbol: str, signed: float, margin_delta: float):
+        """Move a symbol's exposure by `signed` and its margin by `margin_delta` (lock held)."""
+        current = self._exposure.get(symbol, 0.0)
+        after = current + signed
+        if abs(after) < 1e-9:
+            after = 0.0
+
+        self._long_notional += max(after, 0.0) - max(current, 0.0)
+        self._short_notional += max(-after, 0.0) - max(-current, 0.0)
+
+        if after:
+            self._margin_total += margin_delta
+            self._margin[symbol] = self._margin.get(symbol, 0.0) + margin_delta
+            self._exposure[symbol] = after
+        else:
+            self._margin_total -= self._margin.pop(symbol, 0.0)  # Closed: all of its margin is freed
+            self._exposure.pop(symbol, None)
+
+    def load_positions(self, positions: List[Dict[str, Any]], book_version: Optional[int] = None):
+        """
+        Re-seed running totals from the position book.
+
+        Args:
+            positions: Rows from SharedStateStore.get_positions() for this account
+            book_version: Book version the rows were read at
+        """
+        with self._lock:
+            self._exposure.clear()
+            self._margin.clear()
+            self._long_notional = 0.0
+            self._short_notional = 0.0
+            self._margin_total = 0.0
+
+            for pos in positions:
+                notional = abs(pos['notional'])
+                if not notional:
+                    continue
+                signed = notional if pos['side'] in ["long", "buy"] else -notional
+                margin = notional / max(pos.get('leverage') or 1, 1)
+                self._exposure[pos['symbol']] = signed
+                self._margin[pos['symbol']] = margin
+                self._margin_total += margin
+                if signed > 0:
+                    self._long_notional += notional
+                else:
+                    self._short_notional += notional
+
+            # The book doesn't have trades that are still being placed
+            for reservation in self._reserved:
+                self._apply(reservation.symbol, reservation.signed, reservation.margin)
+
+            self.book_version = book_version
+
+    def get_exposure(self) -> Dict[str, Any]:
+        """Get current exposure totals."""
+        with self._lock:
+            return {
+                'gross_notional': round(self._long_notional + self._short_notional, 2),
+                'net_notional': round(self._long_notional - self._short_notional, 2),
+                'long_notional': round(self._long_notional, 2),
+                'short_notional': round(self._short_notional, 2),
+                'margin_in_use': round(self._margin_total, 2),
+                'open_positions': len(self._exposure),
+                'reserved': len(self._reserved),
+                'symbols': {symbol: round(value, 2) for symbol, value in self._exposure.items()}
+            }
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Get check statistics and current exposure."""
+        with self._lock:
+            stats = self.stats.copy()
+        stats['exposure'] = self.get_exposure()
+        return stats
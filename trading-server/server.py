@@ -4,9 +4,9 @@ Trading Server - Main Application
 FastAPI server that receives trade signals and executes on BloFin.
 Self-contained service with REST API.
 """
-from fastapi import FastAPI, HTTPException, Security, Depends
+from fastapi import FastAPI, HTTPException, Security, Depends, WebSocket, WebSocketDisconnect, Request
 from fastapi.security import APIKeyHeader
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, Response, PlainTextResponse
 import requests
 import logging
 import os
@@ -14,8 +14,10 @@ from dotenv import load_dotenv
 import sys
 from pathlib import Path
 from datetime import datetime
-from typing import Optional
+from typing import Optional, Dict, List
+import asyncio
 import json
+import re
 import threading
 import time
 
@@ -25,8 +27,18 @@ sys.path.append(str(Path(__file__).parent))
 
 from blofin_client import BloFinClient
 from shared.models import TradeSignal, TradeResponse, HealthCheck
+from shared.codec import CodecError
+from shared.metrics import REGISTRY, CONTENT_TYPE
+from shared import tracing, profiler
 import trading_utils
 from order_monitor import OrderMonitor
+from account_manager import TradingAccount, load_accounts
+from blofin_transport import Cassette, RecordingTransport, ReplayTransport, RequestsTransport, load_cassette
+from risk_engine import RiskLimits, Reservation
+from circuit_breaker import BreakerConfig, CircuitOpenError
+from clock_sync import ClockSync
+from price_guard import PriceGuard, GuardLimits, MarkPriceCache
+from shared_state import SharedStateStore, LeaderLock
 
 # Load environment variables
 load_dotenv()
@@ -42,12 +54,52 @@ BLOFIN_SECRET_KEY = os.getenv('BLOFIN_SECRET_KEY')
 BLOFIN_PASSPHRASE = os.getenv('BLOFIN_PASSPHRASE')
 BLOFIN_BASE_URL = os.getenv('BLOFIN_BASE_URL', 'https://demo-trading-openapi.blofin.com')
 
+# Record/replay of BloFin traffic (see blofin_transport.py)
+BLOFIN_RECORD_CASSETTE = os.getenv('BLOFIN_RECORD_CASSETTE')  # Record every BloFin call to this file
+BLOFIN_REPLAY_CASSETTE = os.getenv('BLOFIN_REPLAY_CASSETTE')  # Answer BloFin calls from this file (no network)
+BLOFIN_REPLAY_SPEED = float(os.getenv('BLOFIN_REPLAY_SPEED', 0))  # 0 = instant, 1 = recorded latency, N = N x faster
+
 # Trading Configuration
 DEFAULT_TRADE_MODE = os.getenv('DEFAULT_TRADE_MODE', 'cross')
 DEFAULT_LEVERAGE = int(os.getenv('DEFAULT_LEVERAGE', 10))
 MAX_LEVERAGE = int(os.getenv('MAX_LEVERAGE', 20))
 MAX_POSITION_SIZE_USD = float(os.getenv('MAX_POSITION_SIZE_USD', 1000))
 RISK_PER_TRADE_PERCENT = float(os.getenv('RISK_PER_TRADE_PERCENT', 1))
+POSITION_SETTLE_DELAY = float(os.getenv('POSITION_SETTLE_DELAY', 1.5))  # Seconds between market order and TP/SL
+
+# Portfolio Risk Limits (per account, USD notional; 0 disables a limit)
+MAX_GROSS_NOTIONAL_USD = float(os.getenv('MAX_GROSS_NOTIONAL_USD', 0))
+MAX_NET_NOTIONAL_USD = float(os.getenv('MAX_NET_NOTIONAL_USD', 0))
+MAX_SIDE_NOTIONAL_USD = float(os.getenv('MAX_SIDE_NOTIONAL_USD', 0))
+MAX_SYMBOL_NOTIONAL_USD = float(os.getenv('MAX_SYMBOL_NOTIONAL_USD', 0))
+MAX_MARGIN_USD = float(os.getenv('MAX_MARGIN_USD', 0))
+MAX_OPEN_POSITIONS = int(os.getenv('MAX_OPEN_POSITIONS', 0))
+
+# Price Guard (pre-execution check against cached mark prices; 0 disables a check)
+PRICE_GUARD_ENABLED = os.getenv('PRICE_GUARD_ENABLED', 'true').lower() == 'true'
+PRICE_GUARD_MAX_SIGNAL_AGE = float(os.getenv('PRICE_GUARD_MAX_SIGNAL_AGE', 300))  # seconds
+PRICE_GUARD_MIN_RR = float(os.getenv('PRICE_GUARD_MIN_RR', 1.0))  # remaining reward:risk
+PRICE_GUARD_RESIZE = os.getenv('PRICE_GUARD_RESIZE', 'true').lower() == 'true'
+PRICE_GUARD_REQUIRE_PRICE = os.getenv('PRICE_GUARD_REQUIRE_PRICE', 'false').lower() == 'true'
+MARK_PRICE_INTERVAL = float(os.getenv('MARK_PRICE_INTERVAL', 2))  # seconds between refreshes
+MARK_PRICE_MAX_AGE = float(os.getenv('MARK_PRICE_MAX_AGE', 10))  # seconds
+
+# Rate Limiting (applied per account)
+MAX_ORDERS_PER_MINUTE = int(os.getenv('MAX_ORDERS_PER_MINUTE', 50))
+
+# Circuit Breakers (per account and BloFin endpoint group; see circuit_breaker.py)
+CIRCUIT_BREAKER_ENABLED = os.getenv('CIRCUIT_BREAKER_ENABLED', 'true').lower() == 'true'
+CIRCUIT_WINDOW_SECONDS = float(os.getenv('CIRCUIT_WINDOW_SECONDS', 60))  # Rolling window of call outcomes
+CIRCUIT_MIN_CALLS = int(os.getenv('CIRCUIT_MIN_CALLS', 10))  # Calls in the window before it can open
+CIRCUIT_FAILURE_RATE = float(os.getenv('CIRCUIT_FAILURE_RATE', 0.5))  # Failed/slow share that opens it
+CIRCUIT_SLOW_CALL_SECONDS = float(os.getenv('CIRCUIT_SLOW_CALL_SECONDS', 5))  # Slower calls count as failed
+CIRCUIT_OPEN_SECONDS = float(os.getenv('CIRCUIT_OPEN_SECONDS', 30))  # Open time before probing recovery
+ENTRY_GROUPS = ('account', 'market', 'trade')  # Endpoint groups a new entry needs
+
+# Clock Sync (request timestamps in BloFin server time; see clock_sync.py)
+CLOCK_SYNC_ENABLED = os.getenv('CLOCK_SYNC_ENABLED', 'true').lower() == 'true'
+CLOCK_SYNC_INTERVAL = float(os.getenv('CLOCK_SYNC_INTERVAL', 60))  # Seconds between samples
+CLOCK_DRIFT_ALERT_MS = float(os.getenv('CLOCK_DRIFT_ALERT_MS', 1000))  # Alert past this offset (0 = off)
 
 # Discord Notifications
 DISCORD_NOTIFICATION_WEBHOOK = os.getenv('DISCORD_NOTIFICATION_WEBHOOK')
@@ -62,6 +114,23 @@ CLEANUP_INTERVAL = 300  # Clean up orphaned orders every 5 minutes (additional s
 # Order Monitoring
 ORDER_MONITOR_INTERVAL = 30  # Check TP/SL orders every 30 seconds
 
+# Multi-worker deployment
+# With WORKERS > 1, uvicorn runs several request-handling processes. One of them
+# (the leader, elected by file lock) owns the background workers; shared state
+# lives in the SQLite store so every worker sees the same dedupe/position book/jobs.
+WORKERS = int(os.getenv('WORKERS', 1))
+STATE_DB_PATH = os.getenv('STATE_DB_PATH', os.path.join(os.path.dirname(__file__), 'trading_state.db'))
+LEADER_LOCK_FILE = os.getenv('LEADER_LOCK_FILE', STATE_DB_PATH + '.leader')
+SIGNAL_RETENTION_HOURS = float(os.getenv('SIGNAL_RETENTION_HOURS', 168))  # Signal records and trade timelines
+CANCEL_WAIT_TIMEOUT = 30  # A cancel that loses the race with an entry waits this long for its result
+LEADER_RETRY_INTERVAL = 5  # Standby workers retry leadership every 5 seconds
+JOB_POLL_INTERVAL = 1  # Leader drains the job queue every second
+
+# Signal Channel (persistent WebSocket for the Discord bot)
+EVENT_POLL_INTERVAL = 0.5  # Each worker pushes new events to its channel clients every 0.5s
+EVENT_RETENTION = 3600  # Keep published events for 1 hour
+FRAME_ID_PATTERN = re.compile(r'"id"\s*:\s*"?([^",}\s]+)')  # Correlation id of a frame that isn't valid JSON
+
 # Logging
 LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
 LOG_FILE = os.getenv('LOG_FILE', 'trading_server.log')
@@ -76,6 +145,29 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Metrics (exported at /metrics; BloFin API latency is recorded in blofin_client)
+HTTP_LATENCY = REGISTRY.histogram('http_request_seconds', 'Trading server request latency',
+                                  ['method', 'route', 'status'])
+TRADE_STAGE_SECONDS = REGISTRY.histogram('trade_stage_seconds', 'Duration of each trade pipeline stage',
+                                         ['stage'])
+TRADE_SIGNALS = REGISTRY.counter('trade_signals_total', 'Signals processed, by result',
+                                 ['status', 'error_code'])
+SIGNALS_IN_FLIGHT = REGISTRY.gauge('trade_signals_in_flight', 'Signals being processed by this worker')
+NOTIFICATION_SECONDS = REGISTRY.histogram('discord_notification_seconds', 'Discord webhook notification latency',
+                                          ['result'])
+MONITOR_POLL_SECONDS = REGISTRY.histogram('order_monitor_poll_seconds', 'Cost of one order monitor check',
+                                          ['account'])
+JOB_QUEUE_DEPTH = REGISTRY.gauge('job_queue_depth', 'Jobs waiting in the shared job queue')
+SIGNAL_CHANNEL_CLIENTS = REGISTRY.gauge('signal_channel_clients', 'Signal channel clients connected to this worker')
+TRACKED_ORDERS = REGISTRY.gauge('order_monitor_tracked_orders', 'TP/SL orders tracked by the order monitor',
+                                ['account'])
+
+
+def record_stage(stage: str, started: float, **attrs):
+    """Observe a pipeline stage (started = perf_counter) in the metrics and on the trade's trace."""
+    TRADE_STAGE_SECONDS.labels(stage).observe(time.perf_counter() - started)
+    tracing.record(stage, started, **attrs)
+
 # Initialize FastAPI app
 app = FastAPI(
     title="Trading Server",
@@ -83,6 +175,20 @@ app = FastAPI(
     version="1.0.0"
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    """Time every HTTP request, labelled by route template (not the raw path)."""
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get('route')
+        HTTP_LATENCY.labels(request.method, route.path if route else 'unmatched', status).observe(
+            time.perf_counter() - started)
+
 # API Key authentication
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
@@ -98,23 +204,40 @@ def verify_api_key(api_key: str = Security(api_key_header)):
     return True
 
 
-# Initialize BloFin client
+# Trading accounts (signals are fanned out to every account)
+accounts: Dict[str, TradingAccount] = {}
+
+# Primary account's client and monitor (used by single-account endpoints)
 blofin_client: Optional[BloFinClient] = None
 
 # Initialize Order Monitor
 order_monitor: Optional[OrderMonitor] = None
 
+# Shared state (dedupe, position book, job queue) and leader election
+state_store: Optional[SharedStateStore] = None
+price_guard: Optional[PriceGuard] = None
+clock_sync: Optional[ClockSync] = None
+leader_lock = LeaderLock(LEADER_LOCK_FILE)
+
+# Connected signal channel clients (this worker only) and their send locks
+signal_channels: Dict[WebSocket, asyncio.Lock] = {}
+
+# Follow-up work started from a request (e.g. queued signal edits), kept referenced until done
+background_tasks: set = set()
+
 # Supported pairs cache
 supported_pairs = set()
+supported_pairs_mtime = 0.0
 
 def load_supported_pairs():
     """Load supported pairs from cache file"""
-    global supported_pairs
+    global supported_pairs, supported_pairs_mtime
     try:
         if os.path.exists(PAIRS_FILE):
             with open(PAIRS_FILE, 'r') as f:
                 data = json.load(f)
                 supported_pairs = set(data.get('pairs', []))
+                supported_pairs_mtime = os.path.getmtime(PAIRS_FILE)
                 logger.info(f"📋 Loaded {len(supported_pairs)} supported trading pairs")
                 return True
         else:
@@ -144,6 +267,14 @@ def update_supported_pairs():
     except Exception as e:
         logger.error(f"Error updating pairs: {e}")
 
+def refresh_supported_pairs():
+    """Reload the pairs file if the leader has rewritten it"""
+    try:
+        if os.path.getmtime(PAIRS_FILE) != supported_pairs_mtime:
+            load_supported_pairs()
+    except OSError:
+        pass
+
 def pairs_update_worker():
     """Background worker to update pairs daily"""
     while True:
@@ -154,62 +285,122 @@ def orphaned_orders_cleanup_worker():
     """Background worker to clean up orphaned TP orders every 5 minutes"""
     while True:
         time.sleep(CLEANUP_INTERVAL)
-        if blofin_client:
+        for account in list(accounts.values()):
+            degraded = account.client.breakers.degraded() if account.client.breakers else None
+            if degraded:
+                logger.warning(f"⏭️ [{account.name}] Skipping cleanup, BloFin degraded: {degraded}")
+                continue
             try:
-                logger.info("🧹 Running periodic cleanup of orphaned orders...")
-                results = trading_utils.cleanup_all_orphaned_orders(blofin_client)
+                logger.info(f"🧹 [{account.name}] Running periodic cleanup of orphaned orders...")
+                results = trading_utils.cleanup_all_orphaned_orders(account.client)
                 if results:
-                    logger.info(f"✅ Cleaned {sum(results.values())} orders from {len(results)} symbols")
+                    logger.info(f"✅ [{account.name}] Cleaned {sum(results.values())} orders from {len(results)} symbols")
+                # Reconcile the shared position book with the exchange
+                sync_position_book(account)
             except Exception as e:
-                logger.error(f"Error in cleanup worker: {e}")
+                logger.error(f"Error in cleanup worker ({account.name}): {e}")
+        try:
+            state_store.prune_events(EVENT_RETENTION)
+            state_store.prune_signals(SIGNAL_RETENTION_HOURS * 3600)
+            state_store.prune_traces(SIGNAL_RETENTION_HOURS * 3600)
+        except Exception as e:
+            logger.error(f"Error pruning shared state: {e}")
 
 def order_monitor_worker():
     """Background worker to check TP/SL orders every 30 seconds"""
     while True:
         time.sleep(ORDER_MONITOR_INTERVAL)
-        if order_monitor:
+        for account in list(accounts.values()):
+            if not account.order_monitor:
+                continue
             try:
-                order_monitor.check_orders()
+                # Re-places protection after fills, so it keeps running while a circuit is open
+                with MONITOR_POLL_SECONDS.labels(account.name).time(), account.client.protective():
+                    account.order_monitor.check_orders()
             except Exception as e:
-                logger.error(f"Error in order monitor worker: {e}")
+                logger.error(f"Error in order monitor worker ({account.name}): {e}")
 
-@app.on_event("startup")
-async def startup_event():
-    """Initialize services on startup."""
-    global blofin_client, order_monitor
-    
-    logger.info("🚀 Starting Trading Server...")
-    logger.info(f"📡 BloFin API: {BLOFIN_BASE_URL}")
-    
-    # Validate BloFin credentials
-    if not all([BLOFIN_API_KEY, BLOFIN_SECRET_KEY, BLOFIN_PASSPHRASE]):
-        logger.error("❌ BloFin credentials not configured!")
-        logger.warning("⚠️ Server will start but trading will fail")
-    else:
+def sync_position_book(account: TradingAccount):
+    """Replace an account's rows in the shared position book with exchange positions"""
+    if not state_store:
+        return
+    rows = []
+    for pos in account.client.get_positions():
+        size = float(pos.get('positions', 0))
+        if size == 0:
+            continue
+        symbol = pos['instId']
+        contract_value = account.client.get_instrument_info(symbol).get('contractValue', 1.0)
+        mark_price = float(pos.get('markPrice') or pos.get('averagePrice') or 0)
+        rows.append({
+            'symbol': symbol,
+            'side': "long" if size > 0 else "short",
+            'size': abs(size),
+            'entry_price': float(pos.get('averagePrice') or 0) or None,
+            'notional': abs(size) * contract_value * mark_price,
+            'leverage': int(float(pos.get('leverage') or 0)) or None
+        })
+    state_store.replace_positions(account.name, rows)
+    logger.debug(f"[{account.name}] Position book synced: {len(rows)} positions")
+
+def job_queue_worker():
+    """Leader-only worker that runs jobs queued by request workers"""
+    while True:
+        time.sleep(JOB_POLL_INTERVAL)
         try:
-            blofin_client = BloFinClient(
-                api_key=BLOFIN_API_KEY,
-                secret_key=BLOFIN_SECRET_KEY,
-                passphrase=BLOFIN_PASSPHRASE,
-                base_url=BLOFIN_BASE_URL
-            )
-            logger.info("✅ BloFin client initialized")
-            
-            # Initialize Order Monitor
-            order_monitor = OrderMonitor(
-                blofin_client=blofin_client,
-                webhook_url=DISCORD_NOTIFICATION_WEBHOOK,
-                check_interval=ORDER_MONITOR_INTERVAL
-            )
-            logger.info("✅ Order Monitor initialized")
-            
+            jobs = state_store.claim_jobs()
         except Exception as e:
-            logger.error(f"❌ Failed to initialize BloFin client: {e}")
-            blofin_client = None
-    
-    # Load supported trading pairs
-    load_supported_pairs()
-    
+            logger.error(f"Error claiming jobs: {e}")
+            continue
+        for job in jobs:
+            try:
+                if job['kind'] == 'sync_positions':
+                    account = accounts.get(job['payload'].get('account'))
+                    if account:
+                        sync_position_book(account)
+                else:
+                    logger.warning(f"Unknown job type: {job['kind']}")
+            except Exception as e:
+                logger.error(f"Error running job {job['id']} ({job['kind']}): {e}")
+
+def publish_event(kind: str, data: dict):
+    """Publish an event to signal channel clients on every worker (thread-safe)"""
+    if not state_store:
+        return
+    try:
+        state_store.publish_event(kind, data)
+    except Exception as e:
+        logger.error(f"Error publishing {kind} event: {e}")
+
+async def send_frame(websocket: WebSocket, frame: dict):
+    """Send a compact JSON frame to one channel client"""
+    lock = signal_channels.get(websocket)
+    if lock is None:
+        return
+    async with lock:
+        await websocket.send_text(json.dumps(frame, separators=(',', ':')))
+
+async def signal_event_pump():
+    """Push events published by any worker to this worker's channel clients"""
+    last_id = await asyncio.to_thread(state_store.latest_event_id)
+    while True:
+        await asyncio.sleep(EVENT_POLL_INTERVAL)
+        try:
+            events = await asyncio.to_thread(state_store.get_events_after, last_id)
+        except Exception as e:
+            logger.error(f"Error reading events: {e}")
+            continue
+        for event in events:
+            last_id = event['id']
+            frame = {'t': 'evt', 'id': event['id'], 'k': event['kind'], 'd': event['payload']}
+            for websocket in list(signal_channels):
+                try:
+                    await send_frame(websocket, frame)
+                except Exception as e:
+                    logger.debug(f"Dropping event for closed channel: {e}")
+
+def start_background_workers():
+    """Start the workers owned by the leader process"""
     # Start background worker for daily pairs update
     update_thread = threading.Thread(target=pairs_update_worker, daemon=True)
     update_thread.start()
@@ -221,10 +412,132 @@ async def startup_event():
     logger.info("🧹 Started orphaned order cleanup worker (every 30 min)")
     
     # Start background worker for order monitoring
-    if order_monitor:
+    if any(account.order_monitor for account in accounts.values()):
         monitor_thread = threading.Thread(target=order_monitor_worker, daemon=True)
         monitor_thread.start()
         logger.info(f"📡 Started order monitor worker (every {ORDER_MONITOR_INTERVAL}s)")
+    
+    # Start background worker for the shared job queue
+    job_thread = threading.Thread(target=job_queue_worker, daemon=True)
+    job_thread.start()
+    logger.info("📥 Started job queue worker")
+
+def leader_election_worker():
+    """Standby worker: take over background jobs if the leader process exits"""
+    while not leader_lock.try_acquire():
+        time.sleep(LEADER_RETRY_INTERVAL)
+    logger.info(f"👑 Worker {os.getpid()} is now the leader")
+    start_background_workers()
+
+def make_transport_factory():
+    """Per-account BloFin transport factory for record/replay, or None for the network."""
+    if BLOFIN_REPLAY_CASSETTE:
+        interactions = load_cassette(BLOFIN_REPLAY_CASSETTE)
+        logger.warning(f"📼 Replaying BloFin traffic from {BLOFIN_REPLAY_CASSETTE} "
+                       f"({len(interactions)} interactions, speed {BLOFIN_REPLAY_SPEED or 'instant'}) - no network")
+        return lambda name: ReplayTransport(interactions, label=name, speed=BLOFIN_REPLAY_SPEED)
+    
+    if BLOFIN_RECORD_CASSETTE:
+        # Each worker process records to its own file
+        path = BLOFIN_RECORD_CASSETTE if WORKERS == 1 else f"{BLOFIN_RECORD_CASSETTE}.{os.getpid()}"
+        cassette = Cassette(path)
+        logger.warning(f"📼 Recording BloFin traffic to {path}")
+        return lambda name: RecordingTransport(RequestsTransport(), cassette, label=name)
+    
+    return None
+
+@app.on_event("startup")
+async def startup_event():
+    """Initialize services on startup."""
+    global accounts, blofin_client, order_monitor, state_store, price_guard, clock_sync
+    
+    logger.info("🚀 Starting Trading Server...")
+    logger.info(f"📡 BloFin API: {BLOFIN_BASE_URL}")
+    
+    # Open shared state (same database for every worker process)
+    state_store = SharedStateStore(STATE_DB_PATH)
+    
+    # Every worker keeps its own estimate of BloFin's clock for signing (not needed when replaying)
+    if CLOCK_SYNC_ENABLED and not BLOFIN_REPLAY_CASSETTE:
+        clock_sync = ClockSync(
+            BLOFIN_BASE_URL,
+            interval=CLOCK_SYNC_INTERVAL,
+            alert_threshold=CLOCK_DRIFT_ALERT_MS / 1000,
+            on_alert=send_clock_drift_alert
+        )
+        clock_sync.start()
+    
+    # Load every configured BloFin account (each with its own rate limiter)
+    accounts = load_accounts(
+        max_orders_per_minute=MAX_ORDERS_PER_MINUTE,
+        webhook_url=DISCORD_NOTIFICATION_WEBHOOK,
+        check_interval=ORDER_MONITOR_INTERVAL,
+        event_callback=publish_event,
+        transport_factory=make_transport_factory(),
+        clock=clock_sync.now if clock_sync else None,
+        rate_limit_store=state_store if WORKERS > 1 else None,  # One order bucket per account across workers
+        breaker_config=BreakerConfig(
+            window_seconds=CIRCUIT_WINDOW_SECONDS,
+            min_calls=CIRCUIT_MIN_CALLS,
+            failure_rate=CIRCUIT_FAILURE_RATE,
+            slow_call_seconds=CIRCUIT_SLOW_CALL_SECONDS,
+            open_seconds=CIRCUIT_OPEN_SECONDS
+        ) if CIRCUIT_BREAKER_ENABLED else None,
+        risk_limits=RiskLimits(
+            max_position_size_usd=MAX_POSITION_SIZE_USD,
+            max_leverage=MAX_LEVERAGE,
+            max_gross_notional_usd=MAX_GROSS_NOTIONAL_USD,
+            max_net_notional_usd=MAX_NET_NOTIONAL_USD,
+            max_side_notional_usd=MAX_SIDE_NOTIONAL_USD,
+            max_symbol_notional_usd=MAX_SYMBOL_NOTIONAL_USD,
+            max_margin_usd=MAX_MARGIN_USD,
+            max_open_positions=MAX_OPEN_POSITIONS
+        )
+    )
+    
+    if not accounts:
+        logger.error("❌ BloFin credentials not configured!")
+        logger.warning("⚠️ Server will start but trading will fail")
+    else:
+        primary = next(iter(accounts.values()))
+        blofin_client = primary.client
+        order_monitor = primary.order_monitor
+        logger.info(f"✅ {len(accounts)} account(s) ready: {', '.join(accounts.keys())}")
+    
+    # Queue depths for /metrics are read when scraped
+    JOB_QUEUE_DEPTH.set_function(state_store.queue_depth)
+    SIGNAL_CHANNEL_CLIENTS.set_function(lambda: len(signal_channels))
+    for account in accounts.values():
+        if account.order_monitor:
+            TRACKED_ORDERS.labels(account.name).set_function(
+                lambda monitor=account.order_monitor: len(monitor.tracked_orders))
+    
+    # Load supported trading pairs
+    load_supported_pairs()
+    
+    # Every worker keeps its own mark price cache for the price guard
+    if PRICE_GUARD_ENABLED and blofin_client:
+        cache = MarkPriceCache(blofin_client.get_mark_prices, interval=MARK_PRICE_INTERVAL)
+        price_guard = PriceGuard(cache, GuardLimits(
+            max_signal_age=PRICE_GUARD_MAX_SIGNAL_AGE,
+            max_price_age=MARK_PRICE_MAX_AGE,
+            min_reward_risk=PRICE_GUARD_MIN_RR,
+            resize=PRICE_GUARD_RESIZE,
+            require_price=PRICE_GUARD_REQUIRE_PRICE
+        ))
+        cache.start()
+    
+    # Every worker pushes events to the channel clients connected to it
+    asyncio.create_task(signal_event_pump())
+    
+    # Only the leader runs background workers; other workers just serve requests
+    if leader_lock.try_acquire():
+        logger.info(f"👑 Worker {os.getpid()} is the leader")
+        start_background_workers()
+    else:
+        logger.info(f"🧑‍💼 Worker {os.getpid()} is a request worker (leader owns background jobs)")
+        standby_thread = threading.Thread(target=leader_election_worker, daemon=True)
+        standby_thread.start()
 
 
 def calculate_position_size_and_leverage(
@@ -292,6 +605,43 @@ def calculate_position_size_and_leverage(
     return position_size, leverage
 
 
+def send_clock_drift_alert(offset: float, drifting: bool):
+    """
+    Tell Discord the local clock has drifted from BloFin's (or is back in sync).
+    
+    Args:
+        offset: BloFin server time minus local time, in seconds
+        drifting: True when crossing the threshold, False when back within it
+    """
+    # Every worker measures the same clock; only the leader posts
+    if not DISCORD_NOTIFICATION_WEBHOOK or not leader_lock.is_held:
+        return
+    
+    if drifting:
+        direction = "ahead of" if offset < 0 else "behind"
+        embed = {
+            "title": "⏱️ Clock Drift: Trading Server",
+            "description": f"Local clock is {abs(offset):.2f}s {direction} BloFin server time. Requests are "
+                           f"signed with the measured offset, but check NTP on the host.",
+            "color": 16753920,  # Orange
+            "timestamp": datetime.utcnow().isoformat(),
+            "footer": {"text": f"Alert threshold: {CLOCK_DRIFT_ALERT_MS:.0f}ms"}
+        }
+    else:
+        embed = {
+            "title": "✅ Clock Back in Sync: Trading Server",
+            "description": f"Offset to BloFin server time is {offset * 1000:+.0f}ms.",
+            "color": 3066993,  # Green
+            "timestamp": datetime.utcnow().isoformat()
+        }
+    
+    try:
+        response = requests.post(DISCORD_NOTIFICATION_WEBHOOK, json={"embeds": [embed]}, timeout=10)
+        response.raise_for_status()
+    except Exception as e:
+        logger.error(f"Failed to send clock drift alert: {e}")
+
+
 def send_discord_notification(
     symbol: str,
     side: str,
@@ -306,7 +656,8 @@ def send_discord_notification(
     take_profit_2: Optional[float] = None,
     take_profit_3: Optional[float] = None,
     risk_percent: Optional[float] = None,
-    risk_amount: Optional[float] = None
+    risk_amount: Optional[float] = None,
+    account: Optional[str] = None
 ):
     """
     Send trade notification to Discord via webhook.
@@ -326,10 +677,13 @@ def send_discord_notification(
         take_profit_3: Third take profit level (TP3)
         risk_percent: Risk percentage used
         risk_amount: Dollar amount at risk
+        account: Account name (shown when multiple accounts are configured)
     """
     if not DISCORD_NOTIFICATION_WEBHOOK:
         return  # No webhook configured, skip
     
+    started = time.perf_counter()
+    result = "error"
     try:
         # If error message, send error notification
         if error_message:
@@ -347,6 +701,8 @@ def send_discord_notification(
                 "timestamp": datetime.utcnow().isoformat(),
                 "footer": {"text": "⚠️ URGENT: Manual intervention required!"}
             }
+            if account and len(accounts) > 1:
+                embed["fields"].append({"name": "Account", "value": account, "inline": True})
             
             # Send the error notification and return
             payload = {"embeds": [embed]}
@@ -393,6 +749,9 @@ def send_discord_notification(
             "timestamp": datetime.utcnow().isoformat()
         }
         
+        if account and len(accounts) > 1:
+            embed["footer"]["text"] += f" | Account: {account}"
+        
         # Add price fields if available
         if entry_price:
             embed["fields"].insert(1, {"name": "Entry Price", "value": f"${entry_price:.4f}", "inline": True})
@@ -435,12 +794,17 @@ def send_discord_notification(
         )
         
         if response.status_code == 204:
+            result = "sent"
             logger.info("✅ Discord notification sent")
         else:
+            result = "failed"
             logger.warning(f"⚠️ Discord notification failed: {response.status_code}")
             
     except Exception as e:
         logger.warning(f"⚠️ Failed to send Discord notification: {e}")
+    finally:
+        NOTIFICATION_SECONDS.labels(result).observe(time.perf_counter() - started)
+        tracing.record('notify', started, detail=result)
 
 
 @app.get("/")
@@ -466,6 +830,31 @@ async def health_check():
     else:
         details['blofin'] = "connected"
         details['stats'] = blofin_client.get_stats()
+        if len(accounts) > 1:
+            details['accounts'] = {name: account.get_stats() for name, account in accounts.items()}
+        
+        # An open or probing circuit means new entries are being rejected
+        circuits = {name: account.client.breakers.degraded()
+                    for name, account in accounts.items() if account.client.breakers}
+        circuits = {name: groups for name, groups in circuits.items() if groups}
+        if circuits:
+            health_status = "degraded"
+            details['circuits'] = circuits
+    
+    # Requests signed far off server time get rejected as expired
+    if clock_sync:
+        details['clock'] = clock_sync.get_stats()
+        if clock_sync.drifting:
+            health_status = "degraded"
+    
+    details['signal_channels'] = len(signal_channels)
+    if price_guard:
+        details['price_guard'] = price_guard.get_stats()
+    details['worker'] = {
+        'pid': os.getpid(),
+        'leader': leader_lock.is_held,
+        'job_queue_depth': state_store.queue_depth() if state_store else None
+    }
     
     health = HealthCheck(
         service="trading-server",
@@ -477,24 +866,968 @@ async def health_check():
     return health.to_dict()
 
 
+def execute_on_account(account: TradingAccount, trade_signal: TradeSignal) -> TradeResponse:
+    """
+    Size and execute a validated signal on a single account.
+    
+    Runs in a worker thread so several accounts can execute concurrently.
+    Position size is calculated from this account's own equity.
+    
+    Args:
+        account: Account to trade on
+        trade_signal: Validated trade signal
+        
+    Returns:
+        TradeResponse for this account
+    """
+    client = account.client
+    calc_result = None
+    reservation = None  # Exposure held by the risk check until the fill is recorded
+    started = time.perf_counter()
+    
+    # Exchange incident: reject the entry now instead of waiting on timeouts and retries
+    open_breaker = client.breakers.first_open(ENTRY_GROUPS) if client.breakers else None
+    if open_breaker:
+        logger.warning(f"⛔ [{account.name}] Entry rejected, BloFin {open_breaker.group} circuit is open")
+        return TradeResponse(
+            success=False,
+            signal_id=trade_signal.signal_id,
+            message=f"Exchange degraded: BloFin {open_breaker.group} endpoints failing, entry not placed",
+            status="rejected",
+            error_code=CircuitOpenError.error_code,
+            account=account.name
+        )
+    
+    # Calculate position size based on account equity
+    try:
+        risk_multiplier = trade_signal.risk_multiplier or 1.0
+        position_size = trade_signal.size * risk_multiplier if trade_signal.size else None
+        # Use leverage from signal if provided, otherwise use DEFAULT_LEVERAGE
+        leverage = trade_signal.leverage if trade_signal.leverage else DEFAULT_LEVERAGE
+        if account.risk_engine:
+            leverage = account.risk_engine.clamp_leverage(leverage)
+        logger.info(f"📊 [{account.name}] Using leverage: {leverage}x {'(from signal)' if trade_signal.leverage else '(default)'}")
+        
+        if not position_size:
+            # Use blofin_client's equity-based position sizing with specified leverage
+            calc_result = client.calculate_position_size(
+                symbol=trade_signal.symbol,
+                entry_price=trade_signal.entry_price or 0,
+                stop_loss=trade_signal.stop_loss,
+                risk_percent=RISK_PER_TRADE_PERCENT * risk_multiplier,
+                leverage=leverage
+            )
+            position_size = calc_result['size']
+                
+            logger.info(f"💰 [{account.name}] Position: {position_size:.4f} contracts, Leverage: {leverage}x, Risk: ${calc_result['risk_amount']:.2f}")
+    
+    except Exception as e:
+        error_msg = f"CRITICAL: Position sizing failed: {e}"
+        logger.error(f"❌ [{account.name}] {error_msg}")
+        return TradeResponse(
+            success=False,
+            signal_id=trade_signal.signal_id,
+            message=error_msg,
+            status="failed",
+            error_code=CircuitOpenError.error_code if isinstance(e, CircuitOpenError) else "POSITION_SIZING_ERROR",
+            account=account.name
+        )
+    record_stage('sizing', started)
+    
+    # Pre-trade risk check against running exposure totals (no API calls);
+    # a pass reserves the exposure so concurrent signals see this one
+    notional = None
+    if account.risk_engine:
+        refresh_risk_engine(account)
+        try:
+            notional = fill_notional(account, trade_signal, position_size, calc_result)
+        except ValueError as e:
+            logger.warning(f"🛑 [{account.name}] Risk check impossible: {e}")
+            return TradeResponse(
+                success=False,
+                signal_id=trade_signal.signal_id,
+                message=f"Risk limit: {e}",
+                status="rejected",
+                error_code="RISK_NO_PRICE",
+                account=account.name
+            )
+        decision = account.risk_engine.check(trade_signal.symbol, trade_signal.side, notional, leverage)
+        if not decision.allowed:
+            return TradeResponse(
+                success=False,
+                signal_id=trade_signal.signal_id,
+                message=f"Risk limit: {decision.message}",
+                status="rejected",
+                error_code=decision.error_code,
+                account=account.name
+            )
+        reservation = decision.reservation
+    
+    # Set leverage for this symbol
+    leverage_started = time.perf_counter()
+    try:
+        client.set_leverage(
+            symbol=trade_signal.symbol,
+            leverage=leverage,
+            margin_mode=DEFAULT_TRADE_MODE
+        )
+    except Exception as e:
+        logger.warning(f"⚠️ [{account.name}] Could not set leverage, continuing with default: {e}")
+    record_stage('set_leverage', leverage_started)
+    
+    # A delete that arrived while this signal was being sized cancels the entry;
+    # past this point a delete is reported as filled instead (see cancel_trade)
+    if trade_signal.signal_id and state_store and not state_store.start_entry(trade_signal.signal_id):
+        logger.info(f"🚫 [{account.name}] Signal {trade_signal.signal_id} cancelled before entry")
+        if reservation:
+            account.risk_engine.release(reservation)
+        return TradeResponse(
+            success=False,
+            signal_id=trade_signal.signal_id,
+            message="Signal cancelled before entry",
+            status="rejected",
+            error_code="SIGNAL_CANCELLED",
+            account=account.name
+        )
+    
+    # Execute order - always use market orders for automated signals
+    try:
+        # Use market order for immediate execution
+        order_started = time.perf_counter()
+        order_result = client.place_market_order(
+            symbol=trade_signal.symbol,
+            side=trade_signal.side,
+            size=position_size,
+            trade_mode=DEFAULT_TRADE_MODE
+        )
+        record_stage('market_order', order_started)
+        
+        order_id = order_result.get('order_id')
+        record_fill(account, trade_signal, position_size, leverage, calc_result, reservation, notional)
+        reservation = None
+        
+        # Wait for position to be created
+        settle_started = time.perf_counter()
+        time.sleep(POSITION_SETTLE_DELAY)
+        record_stage('settle', settle_started)
+        
+        tp_price, _ = protection_levels(trade_signal)
+        
+        logger.info(f"📊 [{account.name}] Setting up single TP @ ${tp_price}")
+        
+        # Set TP/SL using the dedicated endpoint with retry logic
+        tpsl_started = time.perf_counter()
+        tpsl_set_successfully = False
+        if tp_price and trade_signal.stop_loss:
+            max_retries = 3
+            for attempt in range(max_retries):
+                try:
+                    if attempt > 0:
+                        logger.info(f"🔄 [{account.name}] Retry attempt {attempt + 1}/{max_retries} for TP/SL placement...")
+                        time.sleep(2 * attempt)  # Exponential backoff: 2s, 4s
+                    
+                    attempt_started = time.perf_counter()
+                    try:
+                        sl_result = client.set_tpsl_pair(
+                            symbol=trade_signal.symbol,
+                            tp_price=tp_price,
+                            sl_price=trade_signal.stop_loss,
+                            size="-1",  # Full position
+                            trade_mode=DEFAULT_TRADE_MODE
+                        )
+                    finally:
+                        tracing.record('tpsl_attempt', attempt_started, detail=f"attempt {attempt + 1}")
+                    
+                    # If we got here, it succeeded
+                    algo_id = sl_result.get('order_id')
+                    logger.info(f"✅ [{account.name}] TP/SL set successfully: TP @ ${tp_price}, SL @ ${trade_signal.stop_loss} (algoId: {algo_id})")
+                    tpsl_set_successfully = True
+                    publish_event('tpsl_set', {
+                        'account': account.name,
+                        'signal_id': trade_signal.signal_id,
+                        'symbol': trade_signal.symbol,
+                        'tp_price': tp_price,
+                        'sl_price': trade_signal.stop_loss,
+                        'algo_id': algo_id
+                    })
+                    break  # Success, exit retry loop
+                    
+                except Exception as e:
+                    error_str = str(e)
+                    logger.error(f"❌ [{account.name}] Attempt {attempt + 1}/{max_retries} failed to set TP/SL: {e}")
+                    
+                    # If we got error 200108 (already exists), the TP/SL was actually placed!
+                    # This happens when first attempt gets invalid response but order was created
+                    if "200108" in error_str or "already a take-profit/stop-loss" in error_str:
+                        logger.warning(f"⚠️ [{account.name}] Error 200108 detected - verifying if TP/SL exists...")
+                        time.sleep(1)  # Give API time to settle
+                        
+                        try:
+                            # Check if TP/SL actually exists
+                            pending_tpsl = client.get_pending_tpsl(trade_signal.symbol)
+                            if pending_tpsl and len(pending_tpsl) > 0:
+                                for order in pending_tpsl:
+                                    tp_trigger = order.get('tpTriggerPrice')
+                                    sl_trigger = order.get('slTriggerPrice')
+                                    if tp_trigger and sl_trigger:
+                                        logger.info(f"✅ [{account.name}] Verified TP/SL exists: TP=${tp_trigger}, SL=${sl_trigger}")
+                                        tpsl_set_successfully = True
+                                        break  # TP/SL confirmed, exit retry loop
+                        except Exception as verify_error:
+                            logger.error(f"[{account.name}] Failed to verify TP/SL: {verify_error}")
+                        
+                        if tpsl_set_successfully:
+                            break  # Exit retry loop, TP/SL confirmed
+                    
+                    if attempt == max_retries - 1:  # Last attempt failed
+                        # Only send alert if we couldn't verify TP/SL exists
+                        if not tpsl_set_successfully:
+                            logger.critical(f"🚨 [{account.name}] CRITICAL: Failed to set TP/SL after {max_retries} attempts!")
+                            logger.critical(f"🚨 [{account.name}] Position {trade_signal.symbol} is UNPROTECTED!")
+                            publish_event('tpsl_failed', {
+                                'account': account.name,
+                                'signal_id': trade_signal.signal_id,
+                                'symbol': trade_signal.symbol,
+                                'tp_price': tp_price,
+                                'sl_price': trade_signal.stop_loss,
+                                'error': str(e)
+                            })
+                        # Send urgent Discord alert
+                        send_discord_notification(
+                            symbol=trade_signal.symbol,
+                            side=trade_signal.side,
+                            entry_price=trade_signal.entry_price,
+                            stop_loss=trade_signal.stop_loss,
+                            take_profit=tp_price,
+                            position_size=position_size,
+                            leverage=leverage,
+                            order_id=order_id,
+                            position_value=position_size * (trade_signal.entry_price or 0),
+                            error_message=f"⚠️ POSITION OPENED BUT TP/SL FAILED TO SET!\n\nPosition is UNPROTECTED - manual intervention required!\n\nError: {str(e)}\n\nPlease set TP/SL manually ASAP:",
+                            take_profit_2=trade_signal.take_profit_2,
+                            take_profit_3=trade_signal.take_profit_3,
+                            account=account.name
+                        )
+        elif tp_price:
+            logger.warning(f"⚠️ [{account.name}] No stop-loss provided, only TP will be set")
+            max_retries = 3
+            for attempt in range(max_retries):
+                try:
+                    if attempt > 0:
+                        logger.info(f"🔄 [{account.name}] Retry attempt {attempt + 1}/{max_retries} for TP placement...")
+                        time.sleep(2 * attempt)
+                    
+                    # Set TP with a very low SL as placeholder
+                    placeholder_sl = tp_price * 0.5 if trade_signal.side in ["long", "buy"] else tp_price * 1.5
+                    attempt_started = time.perf_counter()
+                    try:
+                        sl_result = client.set_tpsl_pair(
+                            symbol=trade_signal.symbol,
+                            tp_price=tp_price,
+                            sl_price=placeholder_sl,
+                            size="-1",
+                            trade_mode=DEFAULT_TRADE_MODE
+                        )
+                    finally:
+                        tracing.record('tpsl_attempt', attempt_started, detail=f"attempt {attempt + 1}")
+                    algo_id = sl_result.get('order_id')
+                    logger.info(f"✅ [{account.name}] TP set @ ${tp_price} (no SL, algoId: {algo_id})")
+                    tpsl_set_successfully = True
+                    break
+                    
+                except Exception as e:
+                    logger.error(f"❌ [{account.name}] Attempt {attempt + 1}/{max_retries} failed to set TP: {e}")
+                    if attempt == max_retries - 1:
+                        logger.critical(f"🚨 [{account.name}] CRITICAL: Failed to set TP after {max_retries} attempts!")
+                        send_discord_notification(
+                            symbol=trade_signal.symbol,
+                            side=trade_signal.side,
+                            entry_price=trade_signal.entry_price,
+                            stop_loss=None,
+                            take_profit=tp_price,
+                            position_size=position_size,
+                            leverage=leverage,
+                            order_id=order_id,
+                            position_value=position_size * (trade_signal.entry_price or 0),
+                            error_message=f"⚠️ POSITION OPENED BUT TP FAILED TO SET!\n\nError: {str(e)}\n\nManual intervention required!",
+                            account=account.name
+                        )
+        
+        record_stage('tpsl', tpsl_started)
+        
+        # Send Discord notification immediately with all trade details
+        position_value = position_size * (trade_signal.entry_price or 0)
+        
+        # Get risk info if available from calc_result
+        risk_pct = calc_result.get('risk_percent', RISK_PER_TRADE_PERCENT) if calc_result else RISK_PER_TRADE_PERCENT
+        risk_amt = calc_result.get('risk_amount', 0) if calc_result else 0
+        
+        send_discord_notification(
+            symbol=trade_signal.symbol,
+            side=trade_signal.side,
+            entry_price=trade_signal.entry_price,
+            stop_loss=trade_signal.stop_loss,
+            take_profit=trade_signal.take_profit,
+            position_size=position_size,
+            leverage=leverage,
+            order_id=order_id,
+            position_value=position_value,
+            take_profit_2=trade_signal.take_profit_2,
+            take_profit_3=trade_signal.take_profit_3,
+            risk_percent=risk_pct,
+            risk_amount=risk_amt,
+            account=account.name
+        )
+        
+        # Let the leader reconcile the book with the actual fill
+        if state_store:
+            state_store.enqueue_job('sync_positions', {'account': account.name})
+        
+        # Success response
+        TRADE_STAGE_SECONDS.labels('account').observe(time.perf_counter() - started)  # Traced in run_on_account
+        logger.info(f"✅ [{account.name}] Trade executed: {order_id}")
+        return TradeResponse(
+            success=True,
+            signal_id=trade_signal.signal_id,
+            order_id=order_id,
+            message="Trade executed successfully",
+            status="executed",
+            executed_size=position_size,
+            executed_at=datetime.utcnow().isoformat(),
+            account=account.name
+        )
+    
+    except Exception as e:
+        logger.error(f"❌ [{account.name}] Order execution failed: {e}")
+        if reservation:
+            account.risk_engine.release(reservation)
+        return TradeResponse(
+            success=False,
+            signal_id=trade_signal.signal_id,
+            message=f"Order execution failed: {str(e)}",
+            status="failed",
+            error_code=CircuitOpenError.error_code if isinstance(e, CircuitOpenError) else "EXECUTION_ERROR",
+            error_details=str(e),
+            account=account.name
+        )
+
+
+def run_on_account(account: TradingAccount, trade_signal: TradeSignal) -> TradeResponse:
+    """execute_on_account with the account's spans tagged and timed on the trade's trace."""
+    with tracing.scope(account=account.name), tracing.stage('account'):
+        return execute_on_account(account, trade_signal)
+
+
+def protection_levels(trade_signal: TradeSignal) -> tuple:
+    """
+    TP and SL trigger prices placed for a signal.
+    
+    TP2 is the primary TP level (TP1 only if there is no TP2, TP3 is
+    ignored), defaulting to +10% from entry.
+    
+    Returns:
+        (tp_price, sl_price) - either may be None
+    """
+    tp_price = trade_signal.take_profit_2 or trade_signal.take_profit
+    if not tp_price and trade_signal.entry_price:
+        tp_price = trade_signal.entry_price * 1.10
+    return tp_price, trade_signal.stop_loss
+
+
+def current_price(account: TradingAccount, symbol: str) -> Optional[float]:
+    """Cached mark price for a symbol, or the last ticker price if the cache has none."""
+    if price_guard:
+        price = price_guard.cache.get(symbol, max_age=MARK_PRICE_MAX_AGE)
+        if price:
+            return price
+    try:
+        return float(account.client.get_ticker(symbol).get('last') or 0) or None
+    except Exception as e:
+        logger.warning(f"⚠️ [{account.name}] Could not get a price for {symbol}: {e}")
+        return None
+
+
+def fill_notional(account: TradingAccount, trade_signal: TradeSignal, size: float,
+                  calc_result: Optional[dict]) -> float:
+    """
+    Notional value (USD) of a fill of `size` contracts.
+    
+    Priced at the signal entry price; market signals without one are priced
+    at the current mark price.
+    
+    Raises:
+        ValueError: If there is no entry price and no current price
+    """
+    if calc_result and trade_signal.entry_price:
+        return calc_result['notional_value']
+    price = trade_signal.entry_price or current_price(account, trade_signal.symbol)
+    if not price:
+        raise ValueError(f"no price for {trade_signal.symbol} to value the position")
+    if calc_result:
+        contract_value = calc_result['contract_value']
+    else:
+        contract_value = account.client.get_instrument_info(trade_signal.symbol).get('contractValue', 1.0)
+    return size * contract_value * price
+
+
+def refresh_risk_engine(account: TradingAccount):
+    """Re-seed an account's risk engine if the shared position book changed."""
+    if not state_store or not account.risk_engine:
+        return
+    try:
+        version = state_store.get_book_version()
+        if version != account.risk_engine.book_version:
+            account.risk_engine.load_positions(state_store.get_positions(account.name), version)
+    except Exception as e:
+        logger.warning(f"⚠️ [{account.name}] Could not refresh risk engine from position book: {e}")
+
+
+def record_fill(account: TradingAccount, trade_signal: TradeSignal, size: float,
+                leverage: int, calc_result: Optional[dict], reservation: Optional[Reservation] = None,
+                notional: Optional[float] = None):
+    """
+    Add an opening fill to the risk engine and the shared position book.
+    
+    A fill reserved by the risk check is already in the engine's totals; the
+    reservation is committed once the book has the fill (a reload in between
+    counts it twice rather than not at all).
+    """
+    try:
+        if notional is None:
+            notional = fill_notional(account, trade_signal, size, calc_result)
+        if account.risk_engine and not reservation:
+            account.risk_engine.apply_fill(trade_signal.symbol, trade_signal.side, notional, leverage)
+        if not state_store:
+            return
+        version = state_store.apply_fill(
+            account=account.name,
+            symbol=trade_signal.symbol,
+            side=trade_signal.side,
+            size=size,
+            price=trade_signal.entry_price,
+            notional=notional,
+            leverage=leverage
+        )
+        # The engine already includes this fill - skip the reload unless another worker wrote too
+        if account.risk_engine and account.risk_engine.book_version == version - 1:
+            account.risk_engine.book_version = version
+    except Exception as e:
+        logger.warning(f"⚠️ [{account.name}] Could not update position book: {e}")
+    finally:
+        if reservation:
+            account.risk_engine.commit(reservation)
+
+
+def consolidate_responses(trade_signal: TradeSignal, responses: List[TradeResponse]) -> TradeResponse:
+    """
+    Merge per-account responses into a single TradeResponse.
+    
+    With one account the response is returned unchanged. With several, the
+    trade counts as successful if any account executed, and a partial
+    execution is flagged with error_code PARTIAL_EXECUTION.
+    
+    Args:
+        trade_signal: Signal that was executed
+        responses: One response per account
+        
+    Returns:
+        Consolidated TradeResponse with per-account details in account_results
+    """
+    if len(responses) == 1:
+        return responses[0]
+    
+    succeeded = [r for r in responses if r.success]
+    failed = [r for r in responses if not r.success]
+    
+    if succeeded and not failed:
+        message = f"Trade executed on all {len(responses)} accounts"
+        error_code = None
+    elif succeeded:
+        message = (f"Trade executed on {len(succeeded)}/{len(responses)} accounts "
+                   f"(failed: {', '.join(r.account for r in failed)})")
+        error_code = "PARTIAL_EXECUTION"
+    else:
+        message = f"Trade failed on all {len(responses)} accounts: {failed[0].message}"
+        error_code = failed[0].error_code
+    
+    return TradeResponse(
+        success=bool(succeeded),
+        signal_id=trade_signal.signal_id,
+        order_id=succeeded[0].order_id if succeeded else None,
+        message=message,
+        status="executed" if succeeded else "failed",
+        executed_at=datetime.utcnow().isoformat() if succeeded else None,
+        error_code=error_code,
+        error_details="; ".join(f"{r.account}: {r.message}" for r in failed) or None,
+        account_results=[r.to_dict() for r in responses]
+    )
+
+
 @app.post("/api/v1/trade")
 async def execute_trade(
     signal: dict,
     authenticated: bool = Depends(verify_api_key)
 ) -> dict:
     """
-    Execute trade signal.
+    Execute trade signal on every configured account.
     
     Args:
         signal: TradeSignal data
         authenticated: Authentication status
         
     Returns:
-        TradeResponse
+        TradeResponse (consolidated across accounts)
+    """
+    return await process_trade_signal(signal)
+
+
+def executed_accounts(result: dict) -> List[TradingAccount]:
+    """Accounts on which a stored signal result opened a position."""
+    if result.get('account_results'):
+        names = {r.get('account') for r in result['account_results'] if r.get('success')}
+    elif result.get('success'):
+        names = {result.get('account')} if result.get('account') else set(accounts)
+    else:
+        names = set()
+    return [account for name, account in accounts.items() if name in names]
+
+
+def amend_on_account(account: TradingAccount, trade_signal: TradeSignal,
+                     tp_price: float, sl_price: float) -> TradeResponse:
+    """
+    Replace the TP/SL pair protecting a signal's position on one account.
+    
+    BloFin has no amend for position TP/SL, so the pair is cancelled and
+    placed again. If the cancel fails the amend stops there (the old pair
+    is still live, a second full-position pair would be refused). If
+    placing fails after a successful cancel the position is unprotected
+    and an alert is sent.
+    """
+    client = account.client
+    try:
+        client.cancel_tpsl(trade_signal.symbol)
+    except Exception as e:
+        # The cancel may still have gone through with its response lost - check before reporting
+        if client.get_pending_tpsl(trade_signal.symbol):
+            logger.warning(f"⚠️ [{account.name}] Could not cancel old TP/SL for {trade_signal.symbol}, "
+                           f"amend skipped: {e}")
+            message = f"TP/SL amend failed, existing TP/SL left in place: {e}"
+        else:
+            logger.critical(f"🚨 [{account.name}] TP/SL cancel for {trade_signal.symbol} failed and no pending "
+                            f"TP/SL was found - protection state unknown: {e}")
+            publish_event('tpsl_failed', {
+                'account': account.name,
+                'signal_id': trade_signal.signal_id,
+                'symbol': trade_signal.symbol,
+                'tp_price': tp_price,
+                'sl_price': sl_price,
+                'error': f"TP/SL cancel failed, protection state unknown: {e}"
+            })
+            send_discord_notification(
+                symbol=trade_signal.symbol,
+                side=trade_signal.side,
+                entry_price=trade_signal.entry_price,
+                stop_loss=sl_price,
+                take_profit=tp_price,
+                position_size=0,
+                leverage=0,
+                order_id="N/A",
+                position_value=0,
+                error_message=f"⚠️ TP/SL AMEND FAILED - cancelling the old TP/SL failed and no pending TP/SL "
+                              f"could be found.\n\nCheck the position's TP/SL manually.\n\nError: {str(e)}",
+                account=account.name
+            )
+            message = f"TP/SL amend failed, protection state unknown - check the position: {e}"
+        return TradeResponse(
+            success=False,
+            signal_id=trade_signal.signal_id,
+            message=message,
+            status="failed",
+            error_code="AMEND_FAILED",
+            account=account.name
+        )
+    
+    try:
+        result = client.set_tpsl_pair(
+            symbol=trade_signal.symbol,
+            tp_price=tp_price,
+            sl_price=sl_price,
+            size="-1",  # Full position
+            trade_mode=DEFAULT_TRADE_MODE
+        )
+    except Exception as e:
+        logger.critical(f"🚨 [{account.name}] TP/SL amend failed, {trade_signal.symbol} may be UNPROTECTED: {e}")
+        publish_event('tpsl_failed', {
+            'account': account.name,
+            'signal_id': trade_signal.signal_id,
+            'symbol': trade_signal.symbol,
+            'tp_price': tp_price,
+            'sl_price': sl_price,
+            'error': str(e)
+        })
+        send_discord_notification(
+            symbol=trade_signal.symbol,
+            side=trade_signal.side,
+            entry_price=trade_signal.entry_price,
+            stop_loss=sl_price,
+            take_profit=tp_price,
+            position_size=0,
+            leverage=0,
+            order_id="N/A",
+            position_value=0,
+            error_message=f"⚠️ TP/SL AMEND FAILED - old TP/SL was cancelled!\n\nPosition may be UNPROTECTED - set TP/SL manually ASAP.\n\nError: {str(e)}",
+            account=account.name
+        )
+        return TradeResponse(
+            success=False,
+            signal_id=trade_signal.signal_id,
+            message=f"TP/SL amend failed: {e}",
+            status="failed",
+            error_code="AMEND_FAILED",
+            account=account.name
+        )
+    
+    algo_id = result.get('order_id')
+    logger.info(f"✏️ [{account.name}] TP/SL amended: {trade_signal.symbol} TP @ ${tp_price}, SL @ ${sl_price} (algoId: {algo_id})")
+    publish_event('tpsl_set', {
+        'account': account.name,
+        'signal_id': trade_signal.signal_id,
+        'symbol': trade_signal.symbol,
+        'tp_price': tp_price,
+        'sl_price': sl_price,
+        'algo_id': algo_id,
+        'amended': True
+    })
+    return TradeResponse(
+        success=True,
+        signal_id=trade_signal.signal_id,
+        order_id=algo_id,
+        message="TP/SL amended",
+        status="executed",
+        account=account.name
+    )
+
+
+@app.post("/api/v1/trade/{signal_id}/amend")
+async def amend_trade(
+    signal_id: str,
+    signal: dict,
+    authenticated: bool = Depends(verify_api_key)
+) -> dict:
+    """
+    Apply an edited signal to an executed trade.
+    
+    The edited signal is compared with the stored one. Only the protection
+    actually placed (see protection_levels) is updated, and only if it
+    changed. Symbol and side can't be amended. An edit to a signal that is
+    still executing is queued and applied when the execution finishes
+    (status "executing"); a later edit replaces a queued one.
+    
+    Args:
+        signal_id: ID of the executed signal
+        signal: Edited TradeSignal data
+        authenticated: Authentication status
+        
+    Returns:
+        TradeResponse (consolidated across accounts)
+    """
+    if not state_store:
+        return amend_rejection(signal_id, "Signal store unavailable", "SERVICE_UNAVAILABLE")
+    
+    signal['signal_id'] = signal_id
+    record = await asyncio.to_thread(state_store.get_signal, signal_id)
+    rejection = check_amend(signal_id, signal, record)
+    if rejection:
+        return rejection
+    
+    if record['result'] is None:
+        # Still executing - the worker running it applies the edit when it finishes
+        if await asyncio.to_thread(state_store.queue_amend, signal_id, signal):
+            logger.info(f"✏️ Signal {signal_id} is executing, edit queued")
+            return TradeResponse(success=True, signal_id=signal_id, status="executing",
+                                 message="Signal is executing - edit will be applied when the entry finishes").to_dict()
+        record = await asyncio.to_thread(state_store.get_signal, signal_id)  # Finished (or cancelled) meanwhile
+        rejection = check_amend(signal_id, signal, record)
+        if rejection:
+            return rejection
+    
+    return await apply_amend(signal_id, signal, record)
+
+
+def amend_rejection(signal_id: str, message: str, error_code: str) -> dict:
+    return TradeResponse(success=False, signal_id=signal_id, message=message,
+                         status="rejected", error_code=error_code).to_dict()
+
+
+def check_amend(signal_id: str, signal: dict, record: Optional[dict]) -> Optional[dict]:
+    """
+    Validate an edit against the stored signal.
+    
+    Returns:
+        Rejection TradeResponse dict, or None if the edit can be applied
+    """
+    if record and record['cancelled_at']:
+        return amend_rejection(signal_id, f"Signal {signal_id} was cancelled", "SIGNAL_CANCELLED")
+    if not record or not record['payload']:
+        return amend_rejection(signal_id, f"Signal {signal_id} not found", "SIGNAL_NOT_FOUND")
+    
+    try:
+        new_signal = TradeSignal.from_dict(signal)
+        old_signal = TradeSignal.from_dict(record['payload'])
+    except Exception as e:
+        return amend_rejection(signal_id, f"Invalid signal: {e}", "VALIDATION_ERROR")
+    
+    if (new_signal.symbol, new_signal.side) != (old_signal.symbol, old_signal.side):
+        return amend_rejection(signal_id, "Symbol and side can't be amended", "AMEND_MISMATCH")
+    is_valid, error = new_signal.validate()
+    if not is_valid:
+        return amend_rejection(signal_id, f"Invalid signal: {error}", "VALIDATION_ERROR")
+    return None
+
+
+async def apply_amend(signal_id: str, signal: dict, record: dict) -> dict:
+    """
+    Apply a checked edit (see check_amend) to a signal whose result is recorded.
+    
+    Returns:
+        TradeResponse dict (consolidated across accounts)
+    """
+    new_signal = TradeSignal.from_dict(signal)
+    old_tp, old_sl = protection_levels(TradeSignal.from_dict(record['payload']))
+    new_tp, new_sl = protection_levels(new_signal)
+    targets = executed_accounts(record['result'])
+    await asyncio.to_thread(state_store.update_signal_payload, signal_id, new_signal.to_dict())
+    
+    if (old_tp, old_sl) == (new_tp, new_sl) or not targets:
+        reason = "protection unchanged" if targets else "no open position for this signal"
+        logger.info(f"✏️ Signal {signal_id} amended, {reason}")
+        return TradeResponse(success=True, signal_id=signal_id, status="executed",
+                             message=f"Signal updated, {reason}").to_dict()
+    
+    if not new_tp or not new_sl:
+        return amend_rejection(signal_id, "Amended signal needs both TP and SL to replace the TP/SL pair",
+                               "VALIDATION_ERROR")
+    
+    logger.info(f"✏️ Amending {signal_id} {new_signal.symbol}: TP {old_tp} -> {new_tp}, SL {old_sl} -> {new_sl}")
+    responses = await asyncio.gather(*(
+        asyncio.to_thread(amend_on_account, account, new_signal, new_tp, new_sl)
+        for account in targets
+    ))
+    return consolidate_responses(new_signal, list(responses)).to_dict()
+
+
+async def apply_queued_amend(signal_id: str, signal: dict):
+    """Apply an edit that arrived while the signal was executing."""
+    try:
+        record = await asyncio.to_thread(state_store.get_signal, signal_id)
+        result = check_amend(signal_id, signal, record) or await apply_amend(signal_id, signal, record)
+        logger.info(f"✏️ Queued edit for {signal_id}: {result['message']}")
+    except Exception as e:
+        logger.error(f"❌ Could not apply queued edit for {signal_id}: {e}", exc_info=True)
+
+
+async def finish_signal(signal_id: str, result: dict):
+    """Store a signal's result, then apply any edit queued while it executed."""
+    queued = await asyncio.to_thread(state_store.record_signal_result, signal_id, result)
+    if queued:
+        task = asyncio.create_task(apply_queued_amend(signal_id, queued))
+        background_tasks.add(task)
+        task.add_done_callback(background_tasks.discard)
+
+
+async def wait_for_result(signal_id: str, timeout: float) -> Optional[dict]:
+    """Poll the store until a signal's result is recorded (by any worker); None on timeout."""
+    give_up_at = time.monotonic() + timeout
+    while True:
+        record = await asyncio.to_thread(state_store.get_signal, signal_id)
+        if record and record['result'] is not None:
+            return record['result']
+        if time.monotonic() >= give_up_at:
+            return None
+        await asyncio.sleep(0.25)
+
+
+@app.post("/api/v1/trade/{signal_id}/cancel")
+async def cancel_trade(signal_id: str, authenticated: bool = Depends(verify_api_key)) -> dict:
+    """
+    Cancel a signal whose source message was deleted.
+    
+    Before the entry is placed the signal is cancelled (including signals
+    that haven't arrived yet). Once the entry has been sent the cancel
+    waits for it and reports a fill - the position is left open, deleting
+    a post doesn't close a trade.
+    
+    Args:
+        signal_id: Signal ID
+        authenticated: Authentication status
+        
+    Returns:
+        TradeResponse - status "cancelled", or error_code ALREADY_FILLED
+        (SIGNAL_EXECUTING if the entry is still being placed after CANCEL_WAIT_TIMEOUT)
+    """
+    if not state_store:
+        return TradeResponse(success=False, signal_id=signal_id, message="Signal store unavailable",
+                             status="failed", error_code="SERVICE_UNAVAILABLE").to_dict()
+    
+    # Atomic with the executor's start_entry() - the cancel applies only if no entry was sent
+    record = await asyncio.to_thread(state_store.cancel_signal, signal_id)
+    result = record.get('result')
+    if record.get('entry_at') and result is None:
+        result = await wait_for_result(signal_id, CANCEL_WAIT_TIMEOUT)
+        if result is None:
+            logger.info(f"🚫 Cancel for {signal_id} not applied - entry already being placed")
+            return TradeResponse(
+                success=False,
+                signal_id=signal_id,
+                message="Entry already being placed - the position is left open if it fills",
+                status="executing",
+                error_code="SIGNAL_EXECUTING"
+            ).to_dict()
+    
+    if result and executed_accounts(result):
+        logger.info(f"🚫 Cancel for {signal_id} ignored - entry already filled")
+        return TradeResponse(
+            success=False,
+            signal_id=signal_id,
+            message="Entry already filled - position left open",
+            status="executed",
+            error_code="ALREADY_FILLED"
+        ).to_dict()
+    
+    if not record:
+        message = "Signal cancelled before it arrived"
+    elif record.get('entry_at'):
+        message = "Entry did not open a position - nothing to cancel"
+    elif result is None:
+        message = "Signal cancelled before entry"
+    else:
+        message = "Signal cancelled (it had not opened a position)"
+    logger.info(f"🚫 Signal {signal_id} cancelled: {message}")
+    return TradeResponse(success=True, signal_id=signal_id, message=message, status="cancelled").to_dict()
+
+
+@app.websocket("/ws/v1/signals")
+async def signal_channel(websocket: WebSocket):
+    """
+    Persistent signal channel for the Discord bot.
+    
+    Frames are compact JSON objects:
+    - client -> server: {"t": "sig", "id": <correlation id>, "d": <TradeSignal dict>}
+    - server -> client: {"t": "res", "id": <correlation id>, "d": <TradeResponse dict>}
+    - server -> client: {"t": "evt", "id": <event id>, "k": <kind>, "d": <data>}
+    
+    Authenticated with the same X-API-Key header as the REST API. Signals
+    on one connection execute concurrently; results carry the correlation id.
+    A malformed frame is answered with a VALIDATION_ERROR result (for its
+    correlation id when one can be read) and the channel stays open.
+    """
+    if API_KEY and websocket.headers.get('x-api-key') != API_KEY:
+        await websocket.close(code=1008)
+        return
+    
+    await websocket.accept()
+    signal_channels[websocket] = asyncio.Lock()
+    logger.info(f"🔌 Signal channel connected ({len(signal_channels)} open)")
+    
+    async def handle_signal(correlation_id, data):
+        result = await process_trade_signal(data)
+        try:
+            await send_frame(websocket, {'t': 'res', 'id': correlation_id, 'd': result})
+        except Exception as e:
+            logger.warning(f"⚠️ Could not deliver result for {correlation_id}: {e}")
+    
+    async def reject_frame(raw: str, error: str):
+        logger.warning(f"⚠️ Malformed signal channel frame ({error}): {raw[:100]}")
+        match = FRAME_ID_PATTERN.search(raw)
+        result = TradeResponse(success=False, message=f"Malformed frame: {error}", status="rejected",
+                               error_code="VALIDATION_ERROR").to_dict()
+        await send_frame(websocket, {'t': 'res', 'id': match.group(1) if match else None, 'd': result})
+    
+    tasks = set()
+    try:
+        while True:
+            raw = await websocket.receive_text()
+            try:
+                frame = json.loads(raw)
+            except ValueError as e:
+                await reject_frame(raw, f"invalid JSON: {e}")
+                continue
+            if not isinstance(frame, dict):
+                await reject_frame(raw, "frame must be an object")
+                continue
+            if frame.get('t') == 'sig':
+                task = asyncio.create_task(handle_signal(frame.get('id'), frame.get('d') or {}))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            elif frame.get('t') == 'ping':
+                await send_frame(websocket, {'t': 'pong', 'id': frame.get('id')})
+    except WebSocketDisconnect:
+        pass
+    except Exception as e:
+        logger.warning(f"⚠️ Signal channel error: {e}")
+    finally:
+        signal_channels.pop(websocket, None)
+        logger.info(f"🔌 Signal channel disconnected ({len(signal_channels)} open)")
+
+
+async def process_trade_signal(signal: dict) -> dict:
+    """
+    Validate, dedupe and execute a signal on every account.
+    
+    Shared by the REST endpoint and the signal channel.
+    
+    Args:
+        signal: TradeSignal data
+        
+    Returns:
+        TradeResponse dict (consolidated across accounts)
     """
+    received = time.perf_counter()
+    trace = start_trace(signal)
+    SIGNALS_IN_FLIGHT.inc()
     try:
-        # Parse signal
-        trade_signal = TradeSignal.from_dict(signal)
+        with tracing.activate(trace):
+            result = await handle_trade_signal(signal, received)
+            record_stage('signal', received)
+    finally:
+        SIGNALS_IN_FLIGHT.dec()
+    TRADE_SIGNALS.labels(result.get('status'), result.get('error_code') or '').inc()
+    
+    result['trace_id'] = trace.trace_id
+    result['timeline'] = trace.timeline()
+    if state_store:
+        try:
+            await asyncio.to_thread(state_store.record_trace, trace.trace_id, result.get('signal_id'),
+                                    result['timeline'])
+        except Exception as e:
+            logger.warning(f"⚠️ Could not journal trace {trace.trace_id}: {e}")
+    return result
+
+
+def start_trace(signal: dict) -> tracing.Trace:
+    """Continue the bot's trace for a signal (or start one for a client that doesn't trace)."""
+    upstream = signal if isinstance(signal, dict) else {}
+    trace_id = upstream.get('trace_id')
+    trace = tracing.Trace(trace_id if isinstance(trace_id, str) and trace_id else tracing.new_trace_id(), 'server')
+    trace.adopt(upstream.get('trace'))
+    return trace
+
+
+async def handle_trade_signal(signal: dict, received: float) -> dict:
+    """Body of process_trade_signal; `received` is when the signal arrived (perf_counter)."""
+    try:
+        # Parse signal (types are checked while decoding)
+        try:
+            trade_signal = TradeSignal.from_dict(signal)
+        except CodecError as e:
+            logger.warning(f"❌ Malformed signal: {e}")
+            return TradeResponse(
+                success=False,
+                signal_id=signal.get('signal_id') if isinstance(signal, dict) else None,
+                message=f"Invalid signal: {e}",
+                status="rejected",
+                error_code="VALIDATION_ERROR"
+            ).to_dict()
         logger.info(f"📊 Received signal: {trade_signal.symbol} {trade_signal.side}")
         
         # Validate signal
@@ -510,6 +1843,7 @@ async def execute_trade(
             ).to_dict()
         
         # Check if trading pair is supported
+        refresh_supported_pairs()
         if supported_pairs and trade_signal.symbol not in supported_pairs:
             error_msg = f"Exchange does not support {trade_signal.symbol}. Available pairs: {len(supported_pairs)}"
             logger.warning(f"⚠️ {error_msg}")
@@ -536,8 +1870,8 @@ async def execute_trade(
                 error_code="UNSUPPORTED_PAIR"
             ).to_dict()
         
-        # Check if BloFin client is available
-        if not blofin_client:
+        # Check if any BloFin account is available
+        if not accounts:
             logger.error("❌ BloFin client not initialized")
             return TradeResponse(
                 success=False,
@@ -547,226 +1881,84 @@ async def execute_trade(
                 error_code="SERVICE_UNAVAILABLE"
             ).to_dict()
         
-        # Calculate position size based on account equity
-        try:
-            position_size = trade_signal.size
-            # Use leverage from signal if provided, otherwise use DEFAULT_LEVERAGE
-            leverage = trade_signal.leverage if trade_signal.leverage else DEFAULT_LEVERAGE
-            logger.info(f"📊 Using leverage: {leverage}x {'(from signal)' if trade_signal.leverage else '(default)'}")
-            
-            if not position_size:
-                # Use blofin_client's equity-based position sizing with specified leverage
-                calc_result = blofin_client.calculate_position_size(
-                    symbol=trade_signal.symbol,
-                    entry_price=trade_signal.entry_price or 0,
-                    stop_loss=trade_signal.stop_loss,
-                    leverage=leverage
-                )
-                position_size = calc_result['size']
-                    
-                logger.info(f"💰 Position: {position_size:.4f} contracts, Leverage: {leverage}x, Risk: ${calc_result['risk_amount']:.2f}")
-        
-        except Exception as e:
-            error_msg = f"CRITICAL: Position sizing failed: {e}"
-            logger.error(f"❌ {error_msg}")
+        if trade_signal.account and trade_signal.account not in accounts:
+            logger.warning(f"❌ Signal routed to unknown account: {trade_signal.account}")
             return TradeResponse(
                 success=False,
                 signal_id=trade_signal.signal_id,
-                message=error_msg,
-                status="failed",
-                error_code="POSITION_SIZING_ERROR"
+                message=f"Unknown account '{trade_signal.account}' (configured: {', '.join(accounts)})",
+                status="rejected",
+                error_code="UNKNOWN_ACCOUNT"
             ).to_dict()
         
-        # Set leverage for this symbol
-        try:
-            blofin_client.set_leverage(
-                symbol=trade_signal.symbol,
-                leverage=leverage,
-                margin_mode=DEFAULT_TRADE_MODE
-            )
-        except Exception as e:
-            logger.warning(f"⚠️ Could not set leverage, continuing with default: {e}")
+        # Dedupe across all workers - a signal_id is executed only once
+        if trade_signal.signal_id and state_store:
+            if not await asyncio.to_thread(state_store.claim_signal, trade_signal.signal_id, signal):
+                if await asyncio.to_thread(state_store.is_signal_cancelled, trade_signal.signal_id):
+                    logger.info(f"🚫 Cancelled signal ignored: {trade_signal.signal_id}")
+                    return TradeResponse(
+                        success=False,
+                        signal_id=trade_signal.signal_id,
+                        message=f"Signal {trade_signal.signal_id} was cancelled",
+                        status="rejected",
+                        error_code="SIGNAL_CANCELLED"
+                    ).to_dict()
+                logger.warning(f"⚠️ Duplicate signal ignored: {trade_signal.signal_id}")
+                return TradeResponse(
+                    success=False,
+                    signal_id=trade_signal.signal_id,
+                    message=f"Signal {trade_signal.signal_id} was already received",
+                    status="rejected",
+                    error_code="DUPLICATE_SIGNAL"
+                ).to_dict()
         
-        # Execute order - always use market orders for automated signals
-        try:
-            # Use market order for immediate execution
-            order_result = blofin_client.place_market_order(
-                symbol=trade_signal.symbol,
-                side=trade_signal.side,
-                size=position_size,
-                trade_mode=DEFAULT_TRADE_MODE
-            )
-            
-            order_id = order_result.get('order_id')
-            
-            # Wait for position to be created
-            import time
-            time.sleep(1.5)
-            
-            # Use TP2 as primary TP level (ignore TP1 and TP3)
-            tp_price = trade_signal.take_profit_2 or trade_signal.take_profit
-            
-            # Default to +10% if no TP provided
-            if not tp_price and trade_signal.entry_price:
-                tp_price = trade_signal.entry_price * 1.10
-            
-            logger.info(f"📊 Setting up single TP @ ${tp_price}")
-            
-            # Set TP/SL using the dedicated endpoint with retry logic
-            tpsl_set_successfully = False
-            if tp_price and trade_signal.stop_loss:
-                max_retries = 3
-                for attempt in range(max_retries):
-                    try:
-                        if attempt > 0:
-                            logger.info(f"🔄 Retry attempt {attempt + 1}/{max_retries} for TP/SL placement...")
-                            time.sleep(2 * attempt)  # Exponential backoff: 2s, 4s
-                        
-                        sl_result = blofin_client.set_tpsl_pair(
-                            symbol=trade_signal.symbol,
-                            tp_price=tp_price,
-                            sl_price=trade_signal.stop_loss,
-                            size="-1",  # Full position
-                            trade_mode=DEFAULT_TRADE_MODE
-                        )
-                        
-                        # If we got here, it succeeded
-                        algo_id = sl_result.get('order_id')
-                        logger.info(f"✅ TP/SL set successfully: TP @ ${tp_price}, SL @ ${trade_signal.stop_loss} (algoId: {algo_id})")
-                        tpsl_set_successfully = True
-                        break  # Success, exit retry loop
-                        
-                    except Exception as e:
-                        error_str = str(e)
-                        logger.error(f"❌ Attempt {attempt + 1}/{max_retries} failed to set TP/SL: {e}")
-                        
-                        # If we got error 200108 (already exists), the TP/SL was actually placed!
-                        # This happens when first attempt gets invalid response but order was created
-                        if "200108" in error_str or "already a take-profit/stop-loss" in error_str:
-                            logger.warning("⚠️ Error 200108 detected - verifying if TP/SL exists...")
-                            time.sleep(1)  # Give API time to settle
-                            
-                            try:
-                                # Check if TP/SL actually exists
-                                pending_tpsl = blofin_client.get_pending_tpsl(trade_signal.symbol)
-                                if pending_tpsl and len(pending_tpsl) > 0:
-                                    for order in pending_tpsl:
-                                        tp_trigger = order.get('tpTriggerPrice')
-                                        sl_trigger = order.get('slTriggerPrice')
-                                        if tp_trigger and sl_trigger:
-                                            logger.info(f"✅ Verified TP/SL exists: TP=${tp_trigger}, SL=${sl_trigger}")
-                                            tpsl_set_successfully = True
-                                            break  # TP/SL confirmed, exit retry loop
-                            except Exception as verify_error:
-                                logger.error(f"Failed to verify TP/SL: {verify_error}")
-                            
-                            if tpsl_set_successfully:
-                                break  # Exit retry loop, TP/SL confirmed
-                        
-                        if attempt == max_retries - 1:  # Last attempt failed
-                            # Only send alert if we couldn't verify TP/SL exists
-                            if not tpsl_set_successfully:
-                                logger.critical(f"🚨 CRITICAL: Failed to set TP/SL after {max_retries} attempts!")
-                                logger.critical(f"🚨 Position {trade_signal.symbol} is UNPROTECTED!")
-                            # Send urgent Discord alert
-                            send_discord_notification(
-                                symbol=trade_signal.symbol,
-                                side=trade_signal.side,
-                                entry_price=trade_signal.entry_price,
-                                stop_loss=trade_signal.stop_loss,
-                                take_profit=tp_price,
-                                position_size=position_size,
-                                leverage=leverage,
-                                order_id=order_id,
-                                position_value=position_size * (trade_signal.entry_price or 0),
-                                error_message=f"⚠️ POSITION OPENED BUT TP/SL FAILED TO SET!\n\nPosition is UNPROTECTED - manual intervention required!\n\nError: {str(e)}\n\nPlease set TP/SL manually ASAP:",
-                                take_profit_2=trade_signal.take_profit_2,
-                                take_profit_3=trade_signal.take_profit_3
-                            )
-            elif tp_price:
-                logger.warning("⚠️ No stop-loss provided, only TP will be set")
-                max_retries = 3
-                for attempt in range(max_retries):
-                    try:
-                        if attempt > 0:
-                            logger.info(f"🔄 Retry attempt {attempt + 1}/{max_retries} for TP placement...")
-                            time.sleep(2 * attempt)
-                        
-                        # Set TP with a very low SL as placeholder
-                        placeholder_sl = tp_price * 0.5 if trade_signal.side in ["long", "buy"] else tp_price * 1.5
-                        sl_result = blofin_client.set_tpsl_pair(
-                            symbol=trade_signal.symbol,
-                            tp_price=tp_price,
-                            sl_price=placeholder_sl,
-                            size="-1",
-                            trade_mode=DEFAULT_TRADE_MODE
-                        )
-                        algo_id = sl_result.get('order_id')
-                        logger.info(f"✅ TP set @ ${tp_price} (no SL, algoId: {algo_id})")
-                        tpsl_set_successfully = True
-                        break
-                        
-                    except Exception as e:
-                        logger.error(f"❌ Attempt {attempt + 1}/{max_retries} failed to set TP: {e}")
-                        if attempt == max_retries - 1:
-                            logger.critical(f"🚨 CRITICAL: Failed to set TP after {max_retries} attempts!")
-                            send_discord_notification(
-                                symbol=trade_signal.symbol,
-                                side=trade_signal.side,
-                                entry_price=trade_signal.entry_price,
-                                stop_loss=None,
-                                take_profit=tp_price,
-                                position_size=position_size,
-                                leverage=leverage,
-                                order_id=order_id,
-                                position_value=position_size * (trade_signal.entry_price or 0),
-                                error_message=f"⚠️ POSITION OPENED BUT TP FAILED TO SET!\n\nError: {str(e)}\n\nManual intervention required!"
-                            )
-            
-            # Send Discord notification immediately with all trade details
-            position_value = position_size * (trade_signal.entry_price or 0)
-            
-            # Get risk info if available from calc_result
-            risk_pct = calc_result.get('risk_percent', RISK_PER_TRADE_PERCENT) if 'calc_result' in locals() else RISK_PER_TRADE_PERCENT
-            risk_amt = calc_result.get('risk_amount', 0) if 'calc_result' in locals() else 0
-            
-            send_discord_notification(
+        # Compare with the live market before anything is sent to the exchange
+        if price_guard:
+            guard_started = time.perf_counter()
+            tp_price, sl_price = protection_levels(trade_signal)
+            decision = price_guard.check(
                 symbol=trade_signal.symbol,
                 side=trade_signal.side,
                 entry_price=trade_signal.entry_price,
-                stop_loss=trade_signal.stop_loss,
-                take_profit=trade_signal.take_profit,
-                position_size=position_size,
-                leverage=leverage,
-                order_id=order_id,
-                position_value=position_value,
-                take_profit_2=trade_signal.take_profit_2,
-                take_profit_3=trade_signal.take_profit_3,
-                risk_percent=risk_pct,
-                risk_amount=risk_amt
+                stop_loss=sl_price,
+                targets=[trade_signal.take_profit, trade_signal.take_profit_2, trade_signal.take_profit_3],
+                tp_price=tp_price,
+                timestamp=trade_signal.timestamp
             )
-            
-            # Success response
-            logger.info(f"✅ Trade executed: {order_id}")
-            return TradeResponse(
-                success=True,
-                signal_id=trade_signal.signal_id,
-                order_id=order_id,
-                message="Trade executed successfully",
-                status="executed",
-                executed_at=datetime.utcnow().isoformat()
-            ).to_dict()
+            tracing.record('price_guard', guard_started)
+            if not decision.allowed:
+                result = TradeResponse(
+                    success=False,
+                    signal_id=trade_signal.signal_id,
+                    message=decision.message,
+                    status="rejected",
+                    error_code=decision.error_code
+                ).to_dict()
+                if trade_signal.signal_id and state_store:
+                    await finish_signal(trade_signal.signal_id, result)
+                return result
+            if decision.size_factor < 1:
+                # Stop is further away at the mark price - keep the planned dollar risk
+                logger.info(f"📉 Resizing {trade_signal.symbol} x{decision.size_factor:.2f}: "
+                            f"mark {decision.mark_price} vs entry {trade_signal.entry_price}")
+                trade_signal.risk_multiplier = (trade_signal.risk_multiplier or 1.0) * decision.size_factor
         
-        except Exception as e:
-            logger.error(f"❌ Order execution failed: {e}")
-            return TradeResponse(
-                success=False,
-                signal_id=trade_signal.signal_id,
-                message=f"Order execution failed: {str(e)}",
-                status="failed",
-                error_code="EXECUTION_ERROR",
-                error_details=str(e)
-            ).to_dict()
+        # Fan out to all accounts concurrently - each account sizes from its own equity
+        # and waits on its own rate limiter, so total latency stays close to one account.
+        # A signal routed to one account (per-channel config in the bot) only runs there.
+        targets = [accounts[trade_signal.account]] if trade_signal.account else list(accounts.values())
+        record_stage('admission', received)
+        if len(targets) > 1:
+            logger.info(f"📤 Fanning out {trade_signal.symbol} to {len(targets)} accounts")
+        responses = await asyncio.gather(*(
+            asyncio.to_thread(run_on_account, account, trade_signal)
+            for account in targets
+        ))
+        
+        result = consolidate_responses(trade_signal, list(responses)).to_dict()
+        if trade_signal.signal_id and state_store:
+            await finish_signal(trade_signal.signal_id, result)
+        return result
     
     except Exception as e:
         logger.error(f"❌ Unexpected error: {e}", exc_info=True)
@@ -778,13 +1970,97 @@ async def execute_trade(
         ).to_dict()
 
 
+@app.get("/metrics")
+def metrics():
+    """Metrics in the Prometheus text format (this worker's process only)."""
+    return Response(content=REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+@app.get("/api/v1/trades/{trade_id}/timeline")
+async def get_trade_timeline(trade_id: str, format: str = "json",
+                             authenticated: bool = Depends(verify_api_key)):
+    """
+    Latency breakdown of a journaled trade.
+    
+    Args:
+        trade_id: Trace ID or signal ID
+        format: 'json' (spans) or 'text' (waterfall)
+    """
+    if not state_store:
+        raise HTTPException(status_code=503, detail="Trade journal not available")
+    trace = await asyncio.to_thread(state_store.get_trace, trade_id)
+    if not trace:
+        raise HTTPException(status_code=404, detail=f"No timeline for {trade_id}")
+    if format == "text":
+        return PlainTextResponse(f"trace {trace['trace_id']} (signal {trace['signal_id']})\n"
+                                 + tracing.render_waterfall(trace['timeline']))
+    timeline = trace['timeline']
+    trace['total_ms'] = round(max((s['offset_ms'] + s['duration_ms'] for s in timeline), default=0.0), 3)
+    return trace
+
+
+@app.get("/debug/profile")
+async def debug_profile(seconds: float = 10, idle: bool = True,
+                        authenticated: bool = Depends(verify_api_key)):
+    """
+    Sample every thread of this worker for `seconds` and return collapsed stacks.
+    
+    Covers request handling, the event loop and the background workers
+    (on the leader). Feed the file to flamegraph.pl or speedscope.
+    
+    Args:
+        seconds: How long to sample (up to profiler.MAX_SECONDS)
+        idle: False drops samples of threads parked in an idle wait (closer to CPU time)
+    """
+    if not 0 < seconds <= profiler.MAX_SECONDS:
+        raise HTTPException(status_code=400, detail=f"seconds must be between 0 and {profiler.MAX_SECONDS}")
+    try:
+        profile = await asyncio.to_thread(profiler.sample, seconds, idle=idle)
+    except profiler.ProfilerBusy as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    
+    summary = profile.summary()
+    logger.info(f"🔬 Profile taken: {summary}")
+    filename = f"trading-server-{os.getpid()}-{datetime.utcnow():%Y%m%d-%H%M%S}.collapsed"
+    headers = {'Content-Disposition': f'attachment; filename="{filename}"'}
+    headers.update({f"X-Profile-{key.replace('_', '-').title()}": str(value) for key, value in summary.items()})
+    return PlainTextResponse(profile.collapsed(), headers=headers)
+
+
 @app.get("/api/v1/stats")
 async def get_stats(authenticated: bool = Depends(verify_api_key)):
     """Get trading statistics."""
     if not blofin_client:
         return {"error": "BloFin client not initialized"}
     
-    return blofin_client.get_stats()
+    if len(accounts) > 1:
+        return {name: account.get_stats() for name, account in accounts.items()}
+    
+    return next(iter(accounts.values())).get_stats()
+
+
+@app.get("/api/v1/ticker/{symbol}")
+async def get_ticker(symbol: str, authenticated: bool = Depends(verify_api_key)):
+    """Get the latest price for a symbol (e.g., BTC-USDT)."""
+    if not blofin_client:
+        raise HTTPException(status_code=503, detail="BloFin client not initialized")
+    
+    try:
+        ticker = await asyncio.to_thread(blofin_client.get_ticker, symbol.upper())
+    except Exception as e:
+        logger.error(f"Failed to get ticker for {symbol}: {e}")
+        raise HTTPException(status_code=502, detail=str(e))
+    
+    if not ticker or not ticker.get('last'):
+        raise HTTPException(status_code=404, detail=f"No ticker for {symbol}")
+    
+    return {
+        "symbol": ticker.get('instId', symbol.upper()),
+        "last": float(ticker['last']),
+        "bid": float(ticker.get('bidPrice') or 0) or None,
+        "ask": float(ticker.get('askPrice') or 0) or None,
+        "ts": int(ticker.get('ts') or 0)
+    }
 
 
 @app.get("/api/v1/balance")
@@ -907,6 +2183,19 @@ def main():
     
     logger.info(f"🚀 Starting server on {HOST}:{PORT}")
     
+    if WORKERS > 1:
+        # Multiple workers need an import string so each process loads its own app
+        logger.info(f"👥 Running {WORKERS} worker processes (leader owns background jobs)")
+        uvicorn.run(
+            "server:app",
+            app_dir=os.path.dirname(os.path.abspath(__file__)),
+            host=HOST,
+            port=PORT,
+            workers=WORKERS,
+            log_level=LOG_LEVEL.lower()
+        )
+        return
+    
     uvicorn.run(
         app,
         host=HOST,
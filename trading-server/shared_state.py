@@ -0,0 +1,610 @@
+"""
+Shared State Module
+
+SQLite-backed state shared by every Trading Server worker process:
+- Signal dedupe (a signal_id is executed by exactly one worker), amendments
+  and cancellations
+- Position book (per account/symbol exposure, updated from fills)
+- Job queue (work handed from request workers to the leader process)
+- Event log (execution/TP/SL events pushed to signal channel clients)
+- Trade journal of per-signal timelines (stage latency breakdown)
+- Token buckets, so an account's order rate limit holds across workers
+
+Also provides the leader lock that decides which process owns the
+background workers when running `uvicorn --workers N`.
+"""
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from typing import Optional, Dict, Any, List
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+    _HAS_FCNTL = True
+except ImportError:  # Windows
+    import msvcrt
+    _HAS_FCNTL = False
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS signals (
+    signal_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    result TEXT,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    cancelled_at REAL,
+    entry_at REAL,
+    pending_amend TEXT
+);
+CREATE TABLE IF NOT EXISTS positions (
+    account TEXT NOT NULL,
+    symbol TEXT NOT NULL,
+    side TEXT NOT NULL,
+    size REAL NOT NULL,
+    entry_price REAL,
+    notional REAL NOT NULL,
+    leverage INTEGER,
+    updated_at REAL NOT NULL,
+    PRIMARY KEY (account, symbol)
+);
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS traces (
+    trace_id TEXT PRIMARY KEY,
+    signal_id TEXT,
+    timeline TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS traces_signal_id ON traces (signal_id);
+CREATE TABLE IF NOT EXISTS rate_limits (
+    name TEXT PRIMARY KEY,
+    tokens REAL NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('book_version', 0);
+"""
+
+
+class SharedStateStore:
+    """
+    Process-safe state store backed by a local SQLite database (WAL mode).
+
+    Each thread gets its own connection, so the store can be used from
+    request handlers and background workers at the same time.
+    """
+
+    def __init__(self, db_path: str):
+        """
+        Initialize the store and create tables if needed.
+
+        Args:
+            db_path: Path to the SQLite database file
+        """
+        self.db_path = db_path
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.executescript(SCHEMA)
+        self._migrate(conn)
+        logger.info(f"🗄️ Shared state store ready: {db_path}")
+
+    def _migrate(self, conn: sqlite3.Connection):
+        """Add columns introduced after a database was created."""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(signals)")}
+        for column, kind in (('cancelled_at', 'REAL'), ('entry_at', 'REAL'), ('pending_amend', 'TEXT')):
+            if column in columns:
+                continue
+            try:
+                conn.execute(f"ALTER TABLE signals ADD COLUMN {column} {kind}")
+            except sqlite3.OperationalError:
+                pass  # Another worker added it first
+
+    def _conn(self) -> sqlite3.Connection:
+        """Get this thread's connection, opening it on first use."""
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=5.0, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.row_factory = sqlite3.Row
+            self._local.conn = conn
+        return conn
+
+    # ---------------------------------------------------------------- signals
+
+    def claim_signal(self, signal_id: str, payload: Dict[str, Any]) -> bool:
+        """
+        Atomically record a signal as being executed.
+
+        Args:
+            signal_id: Unique signal ID
+            payload: Signal data to store
+
+        Returns:
+            True if this call claimed the signal, False if it was seen before
+        """
+        now = time.time()
+        cursor = self._conn().execute(
+            "INSERT OR IGNORE INTO signals (signal_id, payload, created_at, updated_at) VALUES (?, ?, ?, ?)",
+            (signal_id, json.dumps(payload), now, now)
+        )
+        return cursor.rowcount == 1
+
+    def record_signal_result(self, signal_id: str, result: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        Store the execution result for a claimed signal.
+
+        Returns:
+            The edit queued while the signal was executing (see queue_amend),
+            which the caller now applies, or None
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT pending_amend FROM signals WHERE signal_id = ?", (signal_id,)).fetchone()
+            conn.execute(
+                "UPDATE signals SET result = ?, pending_amend = NULL, updated_at = ? WHERE signal_id = ?",
+                (json.dumps(result), time.time(), signal_id)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return json.loads(row['pending_amend']) if row and row['pending_amend'] else None
+
+    def queue_amend(self, signal_id: str, payload: Dict[str, Any]) -> bool:
+        """
+        Hold an edit for a signal that is still executing.
+
+        A later edit replaces an earlier one. The edit is handed back by
+        record_signal_result when execution finishes.
+
+        Returns:
+            True if queued, False if the result was recorded (or the signal
+            cancelled) first - amend it directly instead
+        """
+        cursor = self._conn().execute(
+            "UPDATE signals SET pending_amend = ?, updated_at = ? "
+            "WHERE signal_id = ? AND result IS NULL AND cancelled_at IS NULL",
+            (json.dumps(payload), time.time(), signal_id)
+        )
+        return cursor.rowcount == 1
+
+    def get_signal(self, signal_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a stored signal and its result.
+
+        Returns:
+            Dict with 'payload', 'result' (None until recorded), 'created_at',
+            'cancelled_at' (None unless cancelled) and 'entry_at' (None until
+            an entry order is about to be sent), or None
+        """
+        row = self._conn().execute(
+            "SELECT payload, result, created_at, cancelled_at, entry_at FROM signals WHERE signal_id = ?",
+            (signal_id,)
+        ).fetchone()
+        if not row:
+            return None
+        return {
+            'payload': json.loads(row['payload']),
+            'result': json.loads(row['result']) if row['result'] else None,
+            'created_at': row['created_at'],
+            'cancelled_at': row['cancelled_at'],
+            'entry_at': row['entry_at']
+        }
+
+    def update_signal_payload(self, signal_id: str, payload: Dict[str, Any]):
+        """Replace a signal's stored payload after it was amended."""
+        self._conn().execute(
+            "UPDATE signals SET payload = ?, updated_at = ? WHERE signal_id = ?",
+            (json.dumps(payload), time.time(), signal_id)
+        )
+
+    def cancel_signal(self, signal_id: str) -> Dict[str, Any]:
+        """
+        Mark a signal as cancelled, unless its entry has started.
+
+        A signal that hasn't arrived yet gets a placeholder row, so it is
+        rejected as a duplicate if it turns up later. This and start_entry()
+        are serialized, so exactly one of a cancel and an entry wins.
+
+        Returns:
+            The signal record as it was before this call ({} if it didn't
+            exist). The cancel took effect unless it has 'entry_at' set.
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            previous = self.get_signal(signal_id) or {}
+            conn.execute(
+                "INSERT OR IGNORE INTO signals (signal_id, payload, created_at, updated_at) VALUES (?, '{}', ?, ?)",
+                (signal_id, now, now)
+            )
+            conn.execute(
+                "UPDATE signals SET cancelled_at = ?, pending_amend = NULL, updated_at = ? "
+                "WHERE signal_id = ? AND cancelled_at IS NULL AND entry_at IS NULL",
+                (now, now, signal_id)
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return previous
+
+    def start_entry(self, signal_id: str) -> bool:
+        """
+        Record that an entry order is about to be sent for a signal.
+
+        Returns:
+            False if the signal was cancelled first (don't place the entry)
+        """
+        now = time.time()
+        cursor = self._conn().execute(
+            "UPDATE signals SET entry_at = COALESCE(entry_at, ?), updated_at = ? "
+            "WHERE signal_id = ? AND cancelled_at IS NULL",
+            (now, now, signal_id)
+        )
+        return cursor.rowcount == 1
+
+    def is_signal_cancelled(self, signal_id: str) -> bool:
+        """True if the signal has been cancelled."""
+        row = self._conn().execute(
+            "SELECT cancelled_at FROM signals WHERE signal_id = ?",
+            (signal_id,)
+        ).fetchone()
+        return bool(row and row['cancelled_at'])
+
+    def prune_signals(self, max_age: float):
+        """
+        Delete signals not touched for max_age seconds.
+
+        A pruned signal ID is no longer deduped, so max_age should stay well
+        beyond how late a resent signal can turn up.
+        """
+        self._conn().execute("DELETE FROM signals WHERE updated_at < ?", (time.time() - max_age,))
+
+    # ---------------------------------------------------------- position book
+
+    def _bump_book_version(self, conn: sqlite3.Connection):
+        conn.execute("UPDATE meta SET value = value + 1 WHERE key = 'book_version'")
+
+    def apply_fill(self, account: str, symbol: str, side: str, size: float,
+                   price: Optional[float], notional: float, leverage: Optional[int] = None) -> int:
+        """
+        Apply an opening fill to the position book.
+
+        Fills on the same side add to the position; fills on the opposite
+        side reduce it (removing the row when flat).
+
+        Args:
+            account: Account name
+            symbol: Trading pair
+            side: long/short (buy/sell accepted)
+            size: Filled size in contracts
+            price: Fill price (None if unknown)
+            notional: Fill notional value in USD
+            leverage: Leverage used
+
+        Returns:
+            Book version after this fill
+        """
+        side = "long" if side.lower() in ["long", "buy"] else "short"
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute(
+                "SELECT side, size, entry_price, notional FROM positions WHERE account = ? AND symbol = ?",
+                (account, symbol)
+            ).fetchone()
+
+            if row is None or row['size'] <= 0:
+                new_side, new_size, new_entry, new_notional = side, size, price, notional
+            elif row['side'] == side:
+                new_side = side
+                new_size = row['size'] + size
+                new_notional = row['notional'] + notional
+                if row['entry_price'] and price:
+                    new_entry = (row['entry_price'] * row['size'] + price * size) / new_size
+                else:
+                    new_entry = row['entry_price'] or price
+            else:
+                # Opposite side reduces (or flips) the position
+                remaining = row['size'] - size
+                if remaining > 0:
+                    new_side, new_size, new_entry = row['side'], remaining, row['entry_price']
+                    new_notional = row['notional'] * remaining / row['size']
+                else:
+                    new_side, new_size, new_entry = side, -remaining, price
+                    new_notional = notional * (-remaining) / size if size else 0.0
+
+            if new_size <= 0:
+                conn.execute("DELETE FROM positions WHERE account = ? AND symbol = ?", (account, symbol))
+            else:
+                conn.execute(
+                    "INSERT OR REPLACE INTO positions "
+                    "(account, symbol, side, size, entry_price, notional, leverage, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                    (account, symbol, new_side, new_size, new_entry, new_notional, leverage, time.time())
+                )
+            self._bump_book_version(conn)
+            version = conn.execute("SELECT value FROM meta WHERE key = 'book_version'").fetchone()['value']
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return version
+
+    def replace_positions(self, account: str, positions: List[Dict[str, Any]]):
+        """
+        Replace an account's positions with exchange truth (reconciliation).
+
+        Args:
+            account: Account name
+            positions: List of dicts with symbol, side, size, entry_price, notional, leverage
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("DELETE FROM positions WHERE account = ?", (account,))
+            conn.executemany(
+                "INSERT INTO positions "
+                "(account, symbol, side, size, entry_price, notional, leverage, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(account, p['symbol'], p['side'], p['size'], p.get('entry_price'),
+                  p['notional'], p.get('leverage'), now) for p in positions]
+            )
+            self._bump_book_version(conn)
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def get_positions(self, account: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get positions from the book, optionally for one account."""
+        if account:
+            rows = self._conn().execute("SELECT * FROM positions WHERE account = ?", (account,)).fetchall()
+        else:
+            rows = self._conn().execute("SELECT * FROM positions").fetchall()
+        return [dict(row) for row in rows]
+
+    def get_book_version(self) -> int:
+        """Get the position book version (incremented on every change)."""
+        row = self._conn().execute("SELECT value FROM meta WHERE key = 'book_version'").fetchone()
+        return row['value'] if row else 0
+
+    # -------------------------------------------------------------- job queue
+
+    def enqueue_job(self, kind: str, payload: Dict[str, Any]) -> int:
+        """
+        Queue a job for the leader process.
+
+        Args:
+            kind: Job type (e.g., 'sync_positions')
+            payload: Job arguments
+
+        Returns:
+            Job ID
+        """
+        cursor = self._conn().execute(
+            "INSERT INTO jobs (kind, payload, created_at) VALUES (?, ?, ?)",
+            (kind, json.dumps(payload), time.time())
+        )
+        return cursor.lastrowid
+
+    def claim_jobs(self, limit: int = 50) -> List[Dict[str, Any]]:
+        """
+        Remove and return the oldest queued jobs.
+
+        Only the leader calls this, but the read and delete still run in one
+        transaction so a job is never handed out twice.
+
+        Returns:
+            List of dicts with id, kind, payload, created_at
+        """
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            rows = conn.execute(
+                "SELECT id, kind, payload, created_at FROM jobs ORDER BY id LIMIT ?", (limit,)
+            ).fetchall()
+            if rows:
+                conn.execute("DELETE FROM jobs WHERE id <= ?", (rows[-1]['id'],))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return [{
+            'id': row['id'],
+            'kind': row['kind'],
+            'payload': json.loads(row['payload']),
+            'created_at': row['created_at']
+        } for row in rows]
+
+    def queue_depth(self) -> int:
+        """Get the number of queued jobs."""
+        return self._conn().execute("SELECT COUNT(*) FROM jobs").fetchone()[0]
+
+    # ------------------------------------------------------------------ events
+
+    def publish_event(self, kind: str, payload: Dict[str, Any]) -> int:
+        """
+        Append an event for every worker to push to its channel clients.
+
+        Args:
+            kind: Event type (e.g., 'tpsl_set', 'order_filled')
+            payload: Event data
+
+        Returns:
+            Event ID
+        """
+        cursor = self._conn().execute(
+            "INSERT INTO events (kind, payload, created_at) VALUES (?, ?, ?)",
+            (kind, json.dumps(payload), time.time())
+        )
+        return cursor.lastrowid
+
+    def get_events_after(self, last_id: int, limit: int = 100) -> List[Dict[str, Any]]:
+        """Get events with an ID greater than last_id, oldest first."""
+        rows = self._conn().execute(
+            "SELECT id, kind, payload, created_at FROM events WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, limit)
+        ).fetchall()
+        return [{
+            'id': row['id'],
+            'kind': row['kind'],
+            'payload': json.loads(row['payload']),
+            'created_at': row['created_at']
+        } for row in rows]
+
+    def latest_event_id(self) -> int:
+        """Get the ID of the newest event (0 if none)."""
+        return self._conn().execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+    def prune_events(self, max_age: float):
+        """Delete events older than max_age seconds."""
+        self._conn().execute("DELETE FROM events WHERE created_at < ?", (time.time() - max_age,))
+
+    # ----------------------------------------------------------------- traces
+
+    def record_trace(self, trace_id: str, signal_id: Optional[str], timeline: List[Dict[str, Any]]):
+        """
+        Journal a signal's timeline.
+
+        The first timeline for a trace ID is kept, so a resent (duplicate)
+        signal doesn't replace the trace of the execution.
+        """
+        self._conn().execute(
+            "INSERT OR IGNORE INTO traces (trace_id, signal_id, timeline, created_at) VALUES (?, ?, ?, ?)",
+            (trace_id, signal_id, json.dumps(timeline), time.time())
+        )
+
+    def get_trace(self, trade_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a journaled timeline by trace ID or signal ID.
+
+        Returns:
+            Dict with 'trace_id', 'signal_id', 'timeline' and 'created_at'
+            (the first trace recorded for a signal ID), or None
+        """
+        row = self._conn().execute(
+            "SELECT trace_id, signal_id, timeline, created_at FROM traces "
+            "WHERE trace_id = ? OR signal_id = ? ORDER BY trace_id != ?, created_at LIMIT 1",
+            (trade_id, trade_id, trade_id)
+        ).fetchone()
+        if not row:
+            return None
+        return {
+            'trace_id': row['trace_id'],
+            'signal_id': row['signal_id'],
+            'timeline': json.loads(row['timeline']),
+            'created_at': row['created_at']
+        }
+
+    def prune_traces(self, max_age: float):
+        """Delete timelines older than max_age seconds."""
+        self._conn().execute("DELETE FROM traces WHERE created_at < ?", (time.time() - max_age,))
+
+    # ------------------------------------------------------------ rate limits
+
+    def take_token(self, name: str, capacity: float, rate: float) -> float:
+        """
+        Take one token from a shared token bucket.
+
+        The bucket is refilled for the time since its last use and updated in
+        one transaction, so every worker draws from the same tokens.
+
+        Args:
+            name: Bucket name (e.g. 'orders:main')
+            capacity: Bucket size (burst)
+            rate: Tokens added per second
+
+        Returns:
+            0.0 if a token was taken, otherwise seconds until one is available
+        """
+        now = time.time()
+        conn = self._conn()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            row = conn.execute("SELECT tokens, updated_at FROM rate_limits WHERE name = ?", (name,)).fetchone()
+            tokens = capacity if row is None else min(capacity, row['tokens'] + max(now - row['updated_at'], 0) * rate)
+            wait = 0.0 if tokens >= 1 else (1 - tokens) / rate
+            if not wait:
+                tokens -= 1
+            conn.execute("INSERT OR REPLACE INTO rate_limits (name, tokens, updated_at) VALUES (?, ?, ?)",
+                         (name, tokens, now))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+        return wait
+
+
+class LeaderLock:
+    """
+    Non-blocking exclusive file lock used for leader election.
+
+    The OS releases the lock when the holding process exits, so a standby
+    worker can take over if the leader dies.
+    """
+
+    def __init__(self, lock_path: str):
+        """
+        Initialize leader lock.
+
+        Args:
+            lock_path: Path to the lock file
+        """
+        self.lock_path = lock_path
+        self._fd = None
+
+    @property
+    def is_held(self) -> bool:
+        """True if this process holds the lock."""
+        return self._fd is not None
+
+    def try_acquire(self) -> bool:
+        """
+        Try to become leader without blocking.
+
+        Returns:
+            True if this process holds the lock
+        """
+        if self._fd is not None:
+            return True
+
+        fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if _HAS_FCNTL:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            else:
+                msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+        except OSError:
+            os.close(fd)
+            return False
+
+        os.ftruncate(fd, 0)
+        os.write(fd, str(os.getpid()).encode())
+        self._fd = fd
+        return True
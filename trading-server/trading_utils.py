@@ -374,8 +374,9 @@ def close_position(client: BloFinClient, symbol: str) -> Dict[str, Any]:
     # Determine close side (opposite of position)
     close_side = "sell" if pos_size > 0 else "buy"
     
-    # Place market order to close
-    result = client.place_market_order(symbol, close_side, abs_size)
+    # Place market order to close (goes through even if the trade circuit is open)
+    with client.protective():
+        result = client.place_market_order(symbol, close_side, abs_size)
     logger.info(f"Closed {symbol} position: {abs_size} @ {close_side}")
     
     return result